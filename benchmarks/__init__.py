@@ -0,0 +1,5 @@
+"""Load and latency benchmarks for the Lotkeeper API.
+
+The benchmarks run the real application with uvicorn against the local TimescaleDB and Valkey
+of the development profile (``docker compose -f docker/dev.yml up -d postgres valkey``).
+"""
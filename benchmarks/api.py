@@ -0,0 +1,289 @@
+"""End-to-end load and latency benchmark of the API hot paths.
+
+Usage:
+    uv run python -m benchmarks.api --auctions 20000 --iterations 200 --concurrency 8
+    uv run python -m benchmarks.api --base-url http://localhost:8007 --baseline benchmarks/results/before.json
+    uv run python -m benchmarks.api --snapshots-dir data/snapshots  # replay files written by `lotkeeper seed`
+"""
+
+import asyncio
+import os
+import platform
+import random
+import subprocess
+import time
+from dataclasses import asdict
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import httpx
+import orjson
+import typer
+from loguru import logger
+
+from benchmarks.harness import ScenarioResult, run_scenario
+from benchmarks.server import run_server
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SERVER = "Benchmark"
+AGENT_TOKEN_HEADER = "X-Agent-Access-Token"
+
+cli = typer.Typer(help="Lotkeeper API benchmarks")
+
+
+def build_snapshot(realm: str, auctions: int, items: int, seed: int) -> dict[str, Any]:
+    """Build a synthetic agent snapshot with log-normal prices around a per-item base price
+
+    Args:
+        realm: The realm of the snapshot
+        auctions: The number of auction listings
+        items: The number of distinct items
+        seed: The random seed, the same seed produces the same snapshot
+
+    Returns:
+        The snapshot as the JSON body of the agent endpoint
+    """
+    rnd = random.Random(seed)
+    listings = []
+    for _ in range(auctions):
+        item_id = rnd.randint(1, items)
+        base_price = 100 + (item_id * 7919) % 250_000
+        price = int(base_price * rnd.lognormvariate(0, 0.25))
+        listings.append(
+            {
+                "item": {
+                    "id": item_id,
+                    "name": f"Benchmark Item {item_id}",
+                    "link": f"item:{item_id}",
+                    "icon": "inv_misc_questionmark",
+                    "level": item_id % 80,
+                    "quality": item_id % 5,
+                    "max_stack_size": 20,
+                    "vendor_price": base_price // 4,
+                    "class_index": item_id % 16,
+                    "class_name": f"Class {item_id % 16}",
+                },
+                "unit_buyout_price": price,
+                "unit_starting_bid_price": price // 2,
+                "quantity": rnd.randint(1, 20),
+            }
+        )
+    return {"server": SERVER, "realm": realm, "auctions": listings}
+
+
+def load_snapshots(snapshots_dir: Path) -> list[dict[str, Any]]:
+    """Load replayable snapshot files (e.g. written by `lotkeeper seed`) of the first realm in the directory
+
+    Args:
+        snapshots_dir: The directory with the snapshot files, files are replayed in name order
+
+    Returns:
+        The snapshots as JSON bodies of the agent endpoint
+    """
+    snapshots = [orjson.loads(path.read_bytes()) for path in sorted(snapshots_dir.glob("*.json"))]
+    if not snapshots:
+        raise typer.BadParameter(f"No snapshot files found in {snapshots_dir}")
+
+    first = snapshots[0]
+    return [s for s in snapshots if (s["server"], s["realm"]) == (first["server"], first["realm"])]
+
+
+async def run_benchmarks(
+    base_url: str, snapshots: list[dict[str, Any]], iterations: int, concurrency: int
+) -> list[ScenarioResult]:
+    """Ingest snapshots for the benchmark realm, then measure the read hot paths"""
+
+    realm_path = f"{snapshots[0]['server']}/{snapshots[0]['realm']}".replace(" ", "-")
+    now = datetime.now(UTC)
+    item_ids = sorted({auction["item"]["id"] for auction in snapshots[-1]["auctions"]})
+    auctions = len(snapshots[-1]["auctions"])
+    items = len(item_ids)
+    agent_headers = {AGENT_TOKEN_HEADER: os.environ.get("LOT_AGENT_TOKEN", "1234567890")}
+    bulk_iterations = max(5, iterations // 10)
+    results: list[ScenarioResult] = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0) as client:
+        snapshot_bodies = [orjson.dumps(snapshot) for snapshot in snapshots]
+
+        async def ingest(i: int) -> httpx.Response:
+            headers = agent_headers | {"Content-Type": "application/json"}
+            return await client.post("/api/v1/agent/auctions", content=snapshot_bodies[i], headers=headers)
+
+        results.append(await run_scenario(f"ingest_{auctions}_auctions", ingest, len(snapshots)))
+
+        def get(path: str, params: Any = None) -> Any:
+            async def send(i: int) -> httpx.Response:
+                resolved = params(i) if callable(params) else params
+                return await client.get(path, params=resolved)
+
+            return send
+
+        scenarios: list[tuple[str, Any, int]] = [
+            (
+                "auctions_page",
+                get(f"/api/v1/auctions/{realm_path}", lambda i: {"limit": 50, "offset": i * 50 % auctions}),
+                iterations,
+            ),
+            ("auctions_page_1000", get(f"/api/v1/auctions/{realm_path}", {"limit": 1000}), iterations),
+            (
+                "auctions_filter_name",
+                get(f"/api/v1/auctions/{realm_path}", lambda i: {"item_name": f"{item_ids[i % items]}"}),
+                iterations,
+            ),
+            (
+                "auctions_filter_quality",
+                get(f"/api/v1/auctions/{realm_path}", lambda i: {"item_quality": i % 5}),
+                iterations,
+            ),
+            ("auctions_count", get(f"/api/v1/auctions/{realm_path}/count"), iterations),
+            ("auctions_value", get(f"/api/v1/auctions/{realm_path}/value"), iterations),
+            ("auctions_below_vendor", get(f"/api/v1/auctions/{realm_path}/below-vendor-price"), iterations),
+            ("market_deals_20pct", get(f"/api/v1/market/{realm_path}/deals", {"min_discount_pct": 20}), iterations),
+            ("auctions_bulk", get(f"/api/v1/auctions/{realm_path}/bulk"), bulk_iterations),
+            (
+                "items_page",
+                get(f"/api/v1/items/{realm_path}", lambda i: {"limit": 50, "offset": i * 50 % items}),
+                iterations,
+            ),
+            ("items_bulk", get(f"/api/v1/items/{realm_path}/bulk"), bulk_iterations),
+            (
+                "item_price_daily_series_50",
+                get(
+                    f"/api/v1/auctions/datapoints/{realm_path}/price-daily-series",
+                    lambda i: {"item_ids": [item_ids[(i * 50 + j) % items] for j in range(50)]},
+                ),
+                iterations,
+            ),
+        ]
+
+        for days in (7, 31, 90):
+            window = {
+                "from_timestamp": int((now - timedelta(days=days)).timestamp()),
+                "to_timestamp": int(now.timestamp()),
+            }
+
+            def item_path(kind: str, window: dict[str, int] = window) -> Any:
+                async def send(i: int) -> httpx.Response:
+                    item_id = item_ids[i % len(item_ids)]
+                    return await client.get(f"/api/v1/auctions/datapoints/{realm_path}/{item_id}/{kind}", params=window)
+
+                return send
+
+            scenarios += [
+                (f"item_price_summary_{days}d", item_path("price-hourly-summary"), iterations),
+                (f"item_activity_summary_{days}d", item_path("activity-hourly-summary"), iterations),
+                (
+                    f"realm_activity_summary_{days}d",
+                    get(f"/api/v1/auctions/datapoints/{realm_path}/activity-hourly-summary", window),
+                    iterations,
+                ),
+            ]
+
+        for name, send, count in scenarios:
+            result = await run_scenario(name, send, count, concurrency=concurrency, warmup=min(5, count))
+            logger.info(
+                f"{name}: {result.throughput_rps} req/s - p50 {result.latency_ms['p50']}ms - "
+                f"p95 {result.latency_ms['p95']}ms - p99 {result.latency_ms['p99']}ms - errors {result.errors}"
+            )
+            results.append(result)
+
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_comparison(results: list[ScenarioResult], baseline_path: Path) -> None:
+    baseline = {result["name"]: result for result in orjson.loads(baseline_path.read_bytes())["results"]}
+
+    typer.echo(f"\n{'scenario':<32}{'req/s':>18}{'p50 ms':>22}{'p95 ms':>22}{'p99 ms':>22}")
+
+    def delta(current: float, before: float) -> str:
+        change = ((current - before) / before * 100) if before else 0.0
+        return f"{current:.1f} ({change:+.0f}%)"
+
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+
+        typer.echo(
+            f"{result.name:<32}{delta(result.throughput_rps, previous['throughput_rps']):>18}"
+            + "".join(f"{delta(result.latency_ms[q], previous['latency_ms'][q]):>22}" for q in ("p50", "p95", "p99"))
+        )
+
+
+@cli.command()
+def main(
+    *,
+    base_url: str | None = typer.Option(None, help="Benchmark a running server instead of starting one"),
+    port: int = typer.Option(8017, help="Port of the benchmark server started by this command"),
+    workers: int = typer.Option(1, help="Number of workers of the benchmark server started by this command"),
+    realm: str = typer.Option("Bench Realm", help="Realm the snapshots are ingested into"),
+    auctions: int = typer.Option(20_000, help="Auction listings per ingested snapshot"),
+    items: int = typer.Option(2_000, help="Distinct items per snapshot"),
+    ingest_snapshots: int = typer.Option(3, help="Number of snapshots to ingest (measured)"),
+    snapshots_dir: Path | None = typer.Option(None, help="Replay snapshot files instead of generating snapshots"),
+    iterations: int = typer.Option(200, help="Measured requests per read scenario"),
+    concurrency: int = typer.Option(8, help="Requests in flight per read scenario"),
+    output: Path | None = typer.Option(None, help="Result file, defaults to benchmarks/results/<timestamp>.json"),
+    baseline: Path | None = typer.Option(None, help="Previous result file to compare against"),
+) -> None:
+    """Run the API benchmarks and store the results as JSON"""
+
+    started_at = datetime.now(UTC)
+    if snapshots_dir:
+        snapshots = load_snapshots(snapshots_dir)
+    else:
+        snapshots = [build_snapshot(realm, auctions, items, seed) for seed in range(ingest_snapshots)]
+
+    def run(url: str) -> list[ScenarioResult]:
+        return asyncio.run(run_benchmarks(url, snapshots, iterations, concurrency))
+
+    start = time.perf_counter()
+    if base_url:
+        results = run(base_url)
+    else:
+        with run_server(port, workers) as url:
+            results = run(url)
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "duration_seconds": round(time.perf_counter() - start, 2),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "base_url": base_url,
+            "workers": None if base_url else workers,
+            "snapshots_dir": str(snapshots_dir) if snapshots_dir else None,
+            "auctions": len(snapshots[-1]["auctions"]),
+            "items": len({auction["item"]["id"] for auction in snapshots[-1]["auctions"]}),
+            "ingest_snapshots": len(snapshots),
+            "iterations": iterations,
+            "concurrency": concurrency,
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+    output = output or RESULTS_DIR / f"{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    logger.info(f"Benchmark results written to {output}")
+
+    if baseline:
+        _print_comparison(results, baseline)
+
+
+if __name__ == "__main__":
+    cli()
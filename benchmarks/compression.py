@@ -0,0 +1,217 @@
+"""Compression ratio and query latency report of the Timescale hypertables.
+
+Measures the size of every hypertable before and after compression and the latency of the long-range analytics
+queries on compressed chunks. With --apply the compression layout of the models (segmentby, orderby) is applied
+first, which decompresses and recompresses existing chunks, and the report compares the state before and after.
+
+Usage:
+    uv run python -m benchmarks.compression --server Synthetic --realm "Realm 1"
+    uv run python -m benchmarks.compression --server Synthetic --realm "Realm 1" --apply
+"""
+
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import orjson
+import typer
+from loguru import logger
+from sqlalchemy import text
+
+from lotkeeper.dependencies import get_datapoint_service, get_db, get_market_service, get_server_realm_service
+from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
+from lotkeeper.models.item_popularity import ItemPopularityMetric
+from lotkeeper.models.types import PaginationFilter
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+cli = typer.Typer(help="Lotkeeper compression report")
+
+
+async def measure_sizes() -> dict[str, dict[str, Any]]:
+    """Get the chunk counts and sizes of every hypertable
+
+    Returns:
+        The sizes per table, uncompressed and compressed bytes only cover compressed chunks
+    """
+    sizes = {}
+    async with get_db().engine.connect() as conn:
+        for model in TimescaleDbModel.__subclasses__():
+            table_name = model.__tablename__
+            total_bytes = (
+                await conn.execute(text("SELECT hypertable_size(CAST(:t AS regclass))"), {"t": table_name})
+            ).scalar_one()
+            stats = (
+                await conn.execute(
+                    text("""
+                    SELECT total_chunks, number_compressed_chunks,
+                           before_compression_total_bytes, after_compression_total_bytes
+                    FROM hypertable_compression_stats(CAST(:t AS regclass))
+                """),
+                    {"t": table_name},
+                )
+            ).first()
+            before = stats.before_compression_total_bytes if stats else None
+            after = stats.after_compression_total_bytes if stats else None
+            sizes[table_name] = {
+                "total_bytes": total_bytes,
+                "total_chunks": stats.total_chunks if stats else None,
+                "compressed_chunks": stats.number_compressed_chunks if stats else 0,
+                "uncompressed_bytes_of_compressed_chunks": before,
+                "compressed_bytes": after,
+                "compression_ratio": round(before / after, 2) if before and after else None,
+                "options": model.compression_options(),
+            }
+    return sizes
+
+
+async def measure_queries(server: str, realm: str, iterations: int) -> dict[str, dict[str, float]]:
+    """Measure the latency of the analytics queries over windows that reach into compressed chunks
+
+    Args:
+        server: The server of the measured realm
+        realm: The measured realm
+        iterations: The number of measured runs per query
+
+    Returns:
+        The latency in milliseconds (p50, min, max) per query
+    """
+    server_realm_id = await get_server_realm_service().get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise typer.BadParameter(f"The server realm {server}/{realm} does not exist")
+
+    popular = await get_market_service().get_popular_items(
+        server_realm_id, ItemPopularityMetric.LISTINGS, PaginationFilter(limit=1, offset=0)
+    )
+    if not popular.data:
+        raise typer.BadParameter(f"The server realm {server}/{realm} has no listed items")
+    item_id = popular.data[0].item.id
+
+    datapoint_service = get_datapoint_service()
+    now = datetime.now(UTC)
+    queries: dict[str, Callable[[], Awaitable[Any]]] = {}
+    for days in (30, 90):
+        start = now - timedelta(days=days)
+        queries |= {
+            f"item_price_hourly_summary_{days}d": partial(
+                datapoint_service.get_auction_item_price_hourly_summary, item_id, server_realm_id, start, now
+            ),
+            f"item_activity_hourly_summary_{days}d": partial(
+                datapoint_service.get_auction_item_activity_hourly_summary, item_id, server_realm_id, start, now
+            ),
+            f"realm_activity_{days}d": partial(
+                datapoint_service.get_auction_realm_activity_datapoints, server_realm_id, start, now
+            ),
+        }
+
+    latencies = {}
+    for name, query in queries.items():
+        await query()  # warm up the cache, the report compares layouts and not cold reads
+        timings = []
+        for _ in range(iterations):
+            start_time = time.perf_counter()
+            await query()
+            timings.append((time.perf_counter() - start_time) * 1000)
+        latencies[name] = {
+            "p50": round(statistics.median(timings), 2),
+            "min": round(min(timings), 2),
+            "max": round(max(timings), 2),
+        }
+        logger.info(f"{name}: p50 {latencies[name]['p50']}ms")
+    return latencies
+
+
+async def apply_layouts() -> None:
+    """Apply the compression layout of every model and compress the chunks that are due"""
+    for model in TimescaleDbModel.__subclasses__():
+        if not model.__enable_compression__:
+            continue
+
+        async with get_db().engine.begin() as conn:
+            await model.apply_compression_settings(conn, recompress=True)
+
+        async with get_db().engine.begin() as conn:
+            logger.info(f"Compressing chunks of {model.__tablename__} older than {model.__compression_after__}")
+            await conn.execute(
+                text(f"""
+                SELECT compress_chunk(chunk, if_not_compressed => TRUE)
+                FROM show_chunks(CAST(:t AS regclass), older_than => INTERVAL '{model.__compression_after__}') chunk
+            """),
+                {"t": model.__tablename__},
+            )
+
+
+async def run_report(server: str, realm: str, iterations: int, apply: bool) -> dict[str, Any]:
+    """Measure the hypertables, optionally apply the compression layouts and measure again
+
+    Args:
+        server: The server of the measured realm
+        realm: The measured realm
+        iterations: The number of measured runs per query
+        apply: Apply the compression layouts of the models between the measurements
+
+    Returns:
+        The report with a before and (with apply) an after measurement
+    """
+    await get_db().connect()
+    try:
+        report = {
+            "before": {"sizes": await measure_sizes(), "queries": await measure_queries(server, realm, iterations)}
+        }
+        if apply:
+            await apply_layouts()
+            report["after"] = {
+                "sizes": await measure_sizes(),
+                "queries": await measure_queries(server, realm, iterations),
+            }
+        return report
+    finally:
+        await get_db().disconnect()
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    after = report.get("after", report["before"])
+
+    typer.echo(f"\n{'table':<36}{'chunks':>10}{'compressed':>12}{'ratio before':>14}{'ratio after':>14}")
+    for table_name, sizes in after["sizes"].items():
+        before = report["before"]["sizes"][table_name]
+        typer.echo(
+            f"{table_name:<36}{sizes['total_chunks']!s:>10}{sizes['compressed_chunks']!s:>12}"
+            f"{before['compression_ratio'] or '-'!s:>14}{sizes['compression_ratio'] or '-'!s:>14}"
+        )
+
+    typer.echo(f"\n{'query':<40}{'p50 ms before':>16}{'p50 ms after':>16}")
+    for name, latency in after["queries"].items():
+        typer.echo(f"{name:<40}{report['before']['queries'][name]['p50']:>16}{latency['p50']:>16}")
+
+
+@cli.command()
+def main(
+    *,
+    server: str = typer.Option(..., help="Server of the realm the queries are measured on"),
+    realm: str = typer.Option(..., help="Realm the queries are measured on"),
+    iterations: int = typer.Option(10, help="Measured runs per query"),
+    apply: bool = typer.Option(False, help="Apply the compression layouts of the models and recompress chunks"),
+    output: Path | None = typer.Option(None, help="Result file, defaults to benchmarks/results/compression-<ts>.json"),
+) -> None:
+    """Report the compression ratio and query latency of the hypertables"""
+
+    started_at = datetime.now(UTC)
+    report = asyncio.run(run_report(server, realm, iterations, apply))
+    report = {"started_at": started_at.isoformat(), "server": server, "realm": realm, **report}
+
+    output = output or RESULTS_DIR / f"compression-{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    logger.info(f"Compression report written to {output}")
+
+    _print_report(report)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class ScenarioResult:
+    """Throughput and latency of a single benchmark scenario."""
+
+    name: str
+    requests: int
+    errors: int
+    concurrency: int
+    duration_seconds: float
+    throughput_rps: float
+    latency_ms: dict[str, float] = field(default_factory=dict)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Get a percentile of sorted values using linear interpolation (same as postgres percentile_cont)
+
+    Args:
+        sorted_values: The values sorted ascending
+        q: The percentile as a fraction between 0 and 1
+
+    Returns:
+        The interpolated percentile, 0 if there are no values
+    """
+    if not sorted_values:
+        return 0.0
+
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+async def run_scenario(
+    name: str,
+    send: Callable[[int], Awaitable[httpx.Response]],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 0,
+) -> ScenarioResult:
+    """Run a scenario and measure the latency of every request
+
+    Args:
+        name: The name of the scenario
+        send: Sends the request for the given iteration and returns the response
+        iterations: The number of measured requests
+        concurrency: The number of requests in flight at the same time
+        warmup: The number of unmeasured requests sent before measuring
+
+    Returns:
+        The scenario result
+    """
+    for i in range(warmup):
+        await send(i)
+
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await send(i)
+                if response.is_error:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(iterations)))
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return ScenarioResult(
+        name=name,
+        requests=iterations,
+        errors=errors,
+        concurrency=concurrency,
+        duration_seconds=round(duration, 4),
+        throughput_rps=round(iterations / duration, 2) if duration else 0.0,
+        latency_ms={
+            "min": round(latencies[0], 3),
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3),
+            "mean": round(sum(latencies) / len(latencies), 3),
+        },
+    )
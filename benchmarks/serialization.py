@@ -0,0 +1,237 @@
+"""Per-row CPU cost and throughput of the auction and item listings, pydantic models against Postgres-side JSON.
+
+Runs the read paths of the listings in process on an existing realm and measures the CPU time of this process, the
+work of a worker. Three paths per listing:
+
+- models: the service call returning the API models, what in-process callers pay (e.g. get_auctions)
+- models_response: the models validated and serialized like FastAPI does for a response model
+- postgres_json: what the endpoints run, the rows are rendered to JSON by Postgres and only joined into the body
+
+Both responses must produce the same JSON.
+
+Usage:
+    uv run python -m benchmarks.serialization --server Synthetic --realm "Realm 1"
+    uv run python -m benchmarks.serialization --server Synthetic --realm "Realm 1" --iterations 20 --bulk-iterations 3
+"""
+
+import asyncio
+import os
+import platform
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import orjson
+import typer
+from loguru import logger
+from pydantic import TypeAdapter
+
+from lotkeeper.dependencies import get_auction_service, get_db, get_item_service, get_server_realm_service
+from lotkeeper.models.auction import Auction
+from lotkeeper.models.item import Item
+from lotkeeper.models.types import PaginatedResponse, PaginationFilter
+
+RESULTS_DIR = Path(__file__).parent / "results"
+PAGE_SIZE = 1000  # the largest page of the listing endpoints
+
+cli = typer.Typer(help="Lotkeeper response serialization benchmark")
+
+
+@dataclass(frozen=True, slots=True)
+class PathResult:
+    case: str
+    path: str
+    rows: int
+    iterations: int
+    wall_ms: float  # median per request
+    cpu_ms: float  # median per request, CPU time of this process
+    cpu_us_per_row: float
+    rows_per_second: float  # by the median wall time
+
+
+def response_path(adapter: TypeAdapter[Any], read: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[bytes]]:
+    """Read the API models and serialize them like FastAPI does for a response model
+
+    Args:
+        adapter: The adapter of the response model
+        read: The service call returning the API models
+
+    Returns:
+        The read path returning the response body
+    """
+
+    async def run() -> bytes:
+        # FastAPI validates the returned models against the response model and dumps them with pydantic-core
+        return adapter.dump_json(adapter.validate_python(await read()))
+
+    return run
+
+
+async def measure(case: str, path: str, run: Callable[[], Awaitable[Any]], rows: int, iterations: int) -> PathResult:
+    """Measure a read path
+
+    Args:
+        case: The name of the listing
+        path: The name of the read path
+        run: The read path
+        rows: The number of rows the read path reads
+        iterations: The number of measured runs
+
+    Returns:
+        The result of the read path
+    """
+    await run()  # warm up the statement caches, the comparison is about the steady state
+    wall, cpu = [], []
+    for _ in range(iterations):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        await run()
+        cpu.append((time.process_time() - cpu_start) * 1000)
+        wall.append((time.perf_counter() - wall_start) * 1000)
+
+    result = PathResult(
+        case=case,
+        path=path,
+        rows=rows,
+        iterations=iterations,
+        wall_ms=round(statistics.median(wall), 2),
+        cpu_ms=round(statistics.median(cpu), 2),
+        cpu_us_per_row=round(statistics.median(cpu) * 1000 / max(rows, 1), 2),
+        rows_per_second=round(rows / statistics.median(wall) * 1000),
+    )
+    logger.info(
+        f"{case} {path}: {result.rows} rows - {result.cpu_ms}ms CPU - {result.cpu_us_per_row}µs CPU per row - "
+        f"{result.rows_per_second} rows/s"
+    )
+    return result
+
+
+async def compare_json(response: Callable[[], Awaitable[bytes]], postgres: Callable[[], Awaitable[bytes]]) -> int:
+    """Check that both responses have the same JSON, the bulk listings are not ordered
+
+    Returns:
+        The number of rows of the response
+    """
+    expected, actual = orjson.loads(await response()), orjson.loads(await postgres())
+    if isinstance(expected, list):
+        if sorted(map(orjson.dumps, expected)) != sorted(map(orjson.dumps, actual)):
+            raise RuntimeError("The responses have different JSON")
+        return len(actual)
+    if expected != actual:
+        raise RuntimeError("The responses have different JSON")
+    return len(actual["data"])
+
+
+async def run_benchmark(server: str, realm: str, iterations: int, bulk_iterations: int) -> list[PathResult]:
+    """Measure both read paths of every listing
+
+    Args:
+        server: The server of the measured realm
+        realm: The measured realm
+        iterations: The number of measured runs per page listing
+        bulk_iterations: The number of measured runs per bulk listing
+
+    Returns:
+        The result per listing and read path
+    """
+    await get_db().connect()
+    try:
+        server_realm_id = await get_server_realm_service().get_server_realm_id(server, realm)
+        if not server_realm_id:
+            raise typer.BadParameter(f"The server realm {server}/{realm} does not exist")
+
+        auction_service, item_service = get_auction_service(), get_item_service()
+        page = PaginationFilter(limit=PAGE_SIZE, offset=0)
+        cases: dict[str, tuple[int, TypeAdapter[Any], Callable[[], Awaitable[Any]], Callable[[], Awaitable[bytes]]]] = {
+            "auctions_page": (
+                iterations,
+                TypeAdapter(PaginatedResponse[Auction]),
+                lambda: auction_service.get_auctions_paginated(server_realm_id, page),
+                lambda: auction_service.get_auctions_paginated_json(server_realm_id, page),
+            ),
+            "items_page": (
+                iterations,
+                TypeAdapter(PaginatedResponse[Item]),
+                lambda: item_service.get_items_paginated(server_realm_id, page),
+                lambda: item_service.get_items_paginated_json(server_realm_id, page),
+            ),
+            "auctions_bulk": (
+                bulk_iterations,
+                TypeAdapter(list[Auction]),
+                lambda: auction_service.get_auctions(server_realm_id),
+                lambda: auction_service.get_auctions_json(server_realm_id),
+            ),
+            "items_bulk": (
+                bulk_iterations,
+                TypeAdapter(list[Item]),
+                lambda: item_service.get_items(server_realm_id),
+                lambda: item_service.get_items_json(server_realm_id),
+            ),
+        }
+
+        results = []
+        for case, (case_iterations, adapter, models, postgres) in cases.items():
+            response = response_path(adapter, models)
+            try:
+                rows = await compare_json(response, postgres)
+            except RuntimeError as e:
+                raise RuntimeError(f"The read paths of {case} produce different JSON") from e
+            results.append(await measure(case, "models", models, rows, case_iterations))
+            results.append(await measure(case, "models_response", response, rows, case_iterations))
+            results.append(await measure(case, "postgres_json", postgres, rows, case_iterations))
+        return results
+    finally:
+        await get_db().disconnect()
+
+
+def _print_comparison(results: list[PathResult]) -> None:
+    typer.echo(f"\n{'listing':<16}{'path':<18}{'rows':>8}{'wall ms':>10}{'rows/s':>10}{'CPU ms':>10}{'CPU µs/row':>18}")
+    # The CPU per row is compared with the response of the models, what the endpoints ran before
+    baseline = {result.case: result for result in results if result.path == "models_response"}
+    for result in results:
+        change = (result.cpu_us_per_row - baseline[result.case].cpu_us_per_row) / baseline[result.case].cpu_us_per_row
+        typer.echo(
+            f"{result.case:<16}{result.path:<18}{result.rows:>8}{result.wall_ms:>10.1f}{result.rows_per_second:>10.0f}"
+            f"{result.cpu_ms:>10.1f}{f'{result.cpu_us_per_row:.2f} ({change * 100:+.0f}%)':>18}"
+        )
+
+
+@cli.command()
+def main(
+    *,
+    server: str = typer.Option(..., help="Server of the realm the listings are measured on"),
+    realm: str = typer.Option(..., help="Realm the listings are measured on"),
+    iterations: int = typer.Option(20, help="Measured runs per page listing"),
+    bulk_iterations: int = typer.Option(3, help="Measured runs per bulk listing"),
+    output: Path | None = typer.Option(
+        None, help="Result file, defaults to benchmarks/results/serialization-<ts>.json"
+    ),
+) -> None:
+    """Compare the CPU cost per row and the throughput of the pydantic and the Postgres JSON read paths"""
+
+    started_at = datetime.now(UTC)
+    results = asyncio.run(run_benchmark(server, realm, iterations, bulk_iterations))
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {"server": server, "realm": realm, "iterations": iterations, "bulk_iterations": bulk_iterations},
+        "results": [asdict(result) for result in results],
+    }
+    output = output or RESULTS_DIR / f"serialization-{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    logger.info(f"Serialization benchmark results written to {output}")
+
+    _print_comparison(results)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import httpx
+from loguru import logger
+
+
+@contextmanager
+def run_server(
+    port: int, workers: int = 1, env: dict[str, str] | None = None, options: dict[str, Any] | None = None
+) -> Iterator[str]:
+    """Run the application with uvicorn in a subprocess until the context exits
+
+    Rate limiting is disabled so the limits don't cap the measured throughput.
+
+    Args:
+        port: The port to listen on
+        workers: The number of uvicorn workers
+        env: Extra environment variables for the server, e.g. database settings
+        options: Extra uvicorn options by their keyword name, e.g. {"loop": "uvloop"}, None values are skipped
+
+    Returns:
+        The base URL of the server
+    """
+    server_env = os.environ | {"LOT_RATE_LIMIT_ENABLED": "false", "LOT_WORKERS": str(workers)} | (env or {})
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "lotkeeper.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+    for name, value in (options or {}).items():
+        if value is not None:
+            command += [f"--{name.replace('_', '-')}", str(value)]
+
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(command, env=server_env)
+    try:
+        _wait_until_healthy(base_url, process)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _wait_until_healthy(base_url: str, process: subprocess.Popen[bytes], timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Benchmark server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == httpx.codes.OK:
+                logger.info(f"Benchmark server is ready at {base_url}")
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+
+    raise TimeoutError(f"Benchmark server at {base_url} did not become healthy within {timeout}s")
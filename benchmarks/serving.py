@@ -0,0 +1,237 @@
+"""Throughput comparison of the server profiles on the hot read endpoints.
+
+Starts the server once per profile with the same workers and data and measures the read endpoints that serve most of
+the traffic at a high concurrency. The default profile is uvicorn untuned (asyncio loop, h11), the production profile
+is what `lotkeeper.main start` runs in production (uvloop, httptools, keep-alive, concurrency limit, recycling).
+
+Usage:
+    uv run python -m benchmarks.serving --workers 4 --concurrency 64
+    uv run python -m benchmarks.serving --profile production --profile default --iterations 5000
+"""
+
+import asyncio
+import os
+import platform
+import time
+from dataclasses import asdict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+import orjson
+import typer
+from loguru import logger
+
+from benchmarks.api import AGENT_TOKEN_HEADER, build_snapshot
+from benchmarks.harness import ScenarioResult, run_scenario
+from benchmarks.server import run_server
+from lotkeeper.config import AppEnvironment, Environment
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+cli = typer.Typer(help="Lotkeeper server profile benchmark")
+
+
+class KeepAliveClient:
+    """A minimal HTTP/1.1 client on a pool of keep-alive connections, like a reverse proxy in front of the server.
+
+    httpx spends more CPU per request than the server it measures, on a shared host it would cap the throughput
+    before the server does. Responses must have a Content-Length, which every JSON response of the API has.
+    """
+
+    def __init__(self, base_url: str, connections: int):
+        url = httpx.URL(base_url)
+        self.host = url.host
+        self.port = url.port or 80
+        self.connections = connections
+        self._pool: asyncio.Queue[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = asyncio.Queue()
+
+    async def __aenter__(self) -> "KeepAliveClient":
+        for _ in range(self.connections):
+            self._pool.put_nowait(await asyncio.open_connection(self.host, self.port))
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        while not self._pool.empty():
+            _reader, writer = self._pool.get_nowait()
+            writer.close()
+
+    async def get(self, path: str, params: Any = None) -> httpx.Response:
+        """Send a GET request and read the response body
+
+        Args:
+            path: The path of the request
+            params: The query parameters
+
+        Returns:
+            The response with the status code and body
+        """
+        target = f"{path}?{httpx.QueryParams(params)}" if params else path
+        reader, writer = await self._pool.get()
+        try:
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+            length = int(head.split("content-length:", 1)[1].split("\r\n", 1)[0])
+            body = await reader.readexactly(length)
+        except Exception:
+            writer.close()  # the connection is in an unknown state, replace it
+            self._pool.put_nowait(await asyncio.open_connection(self.host, self.port))
+            raise httpx.TransportError(f"GET {target} failed") from None
+        self._pool.put_nowait((reader, writer))
+        return httpx.Response(int(head[9:12]), content=body)
+
+
+def get_profiles(workers: int) -> dict[str, dict[str, Any]]:
+    """Get the uvicorn options of every profile
+
+    Args:
+        workers: The number of workers, the same for every profile
+
+    Returns:
+        The uvicorn options per profile name, without the worker count
+    """
+    production = AppEnvironment(LOT_ENVIRONMENT=Environment.PRODUCTION, LOT_WORKERS=workers).get_server_options()
+    del production["workers"]
+    return {"default": {"loop": "asyncio", "http": "h11"}, "production": production}
+
+
+async def ingest(base_url: str, snapshot: dict[str, Any]) -> None:
+    """Ingest the snapshot the reads of every profile run on
+
+    Args:
+        base_url: The base URL of the server
+        snapshot: The snapshot to ingest
+    """
+    headers = {
+        AGENT_TOKEN_HEADER: os.environ.get("LOT_AGENT_TOKEN", "1234567890"),
+        "Content-Type": "application/json",
+    }
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0) as client:
+        response = await client.post("/api/v1/agent/auctions", content=orjson.dumps(snapshot), headers=headers)
+        response.raise_for_status()
+
+
+async def run_profile(
+    base_url: str, snapshot: dict[str, Any], iterations: int, concurrency: int
+) -> list[ScenarioResult]:
+    """Measure the hot read endpoints
+
+    Args:
+        base_url: The base URL of the server
+        snapshot: The ingested snapshot, the reads run on its realm
+        iterations: The number of measured requests per endpoint
+        concurrency: The number of requests in flight
+
+    Returns:
+        The result per endpoint
+    """
+    realm_path = f"{snapshot['server']}/{snapshot['realm']}".replace(" ", "-")
+    item_ids = sorted({auction["item"]["id"] for auction in snapshot["auctions"]})
+    auctions, items = len(snapshot["auctions"]), len(item_ids)
+
+    async with KeepAliveClient(base_url, connections=concurrency) as client:
+
+        def get(path: str, params: Any = None) -> Any:
+            async def send(i: int) -> httpx.Response:
+                return await client.get(path, params(i) if callable(params) else params)
+
+            return send
+
+        scenarios = {
+            "health": get("/health"),
+            "server_realms": get("/api/v1/server-realms"),
+            "auctions_page": get(
+                f"/api/v1/auctions/{realm_path}", lambda i: {"limit": 50, "offset": i * 50 % auctions}
+            ),
+            "auctions_count": get(f"/api/v1/auctions/{realm_path}/count"),
+            "items_page": get(f"/api/v1/items/{realm_path}", lambda i: {"limit": 50, "offset": i * 50 % items}),
+            "market_deals": get(f"/api/v1/market/{realm_path}/deals"),
+            "item_price_daily_series_10": get(
+                f"/api/v1/auctions/datapoints/{realm_path}/price-daily-series",
+                lambda i: {"item_ids": [item_ids[(i * 10 + j) % items] for j in range(10)]},
+            ),
+        }
+
+        results = []
+        for name, send in scenarios.items():
+            result = await run_scenario(name, send, iterations, concurrency=concurrency, warmup=concurrency)
+            logger.info(
+                f"{name}: {result.throughput_rps} req/s - p50 {result.latency_ms['p50']}ms - "
+                f"p99 {result.latency_ms['p99']}ms - errors {result.errors}"
+            )
+            results.append(result)
+    return results
+
+
+def _print_comparison(report: dict[str, Any]) -> None:
+    profiles = list(report["profiles"])
+    baseline = {result["name"]: result for result in report["profiles"][profiles[0]]["results"]}
+
+    typer.echo(f"\n{'scenario':<30}{'profile':<14}{'req/s':>18}{'p50 ms':>12}{'p99 ms':>12}{'errors':>8}")
+    for name, before in baseline.items():
+        for profile in profiles:
+            result = next(r for r in report["profiles"][profile]["results"] if r["name"] == name)
+            change = (result["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100
+            typer.echo(
+                f"{name:<30}{profile:<14}{f'{result["throughput_rps"]:.1f} ({change:+.0f}%)':>18}"
+                f"{result['latency_ms']['p50']:>12.1f}{result['latency_ms']['p99']:>12.1f}{result['errors']:>8}"
+            )
+
+
+@cli.command()
+def main(
+    *,
+    profile: list[str] = typer.Option(["default", "production"], help="Profiles to compare, the first is the baseline"),
+    port: int = typer.Option(8018, help="Port of the benchmark server"),
+    workers: int = typer.Option(1, help="Number of workers of every profile"),
+    realm: str = typer.Option("Serving Realm", help="Realm the snapshot is ingested into"),
+    auctions: int = typer.Option(20_000, help="Auction listings of the ingested snapshot"),
+    items: int = typer.Option(2_000, help="Distinct items of the snapshot"),
+    iterations: int = typer.Option(2_000, help="Measured requests per endpoint"),
+    concurrency: int = typer.Option(64, help="Requests in flight"),
+    output: Path | None = typer.Option(None, help="Result file, defaults to benchmarks/results/serving-<ts>.json"),
+) -> None:
+    """Compare the throughput of the server profiles on the hot read endpoints"""
+
+    started_at = datetime.now(UTC)
+    profiles = get_profiles(workers)
+    if unknown := set(profile) - profiles.keys():
+        raise typer.BadParameter(f"Unknown profiles {sorted(unknown)}, available: {sorted(profiles)}")
+
+    snapshot = build_snapshot(realm, auctions, items, seed=0)
+    report: dict[str, Any] = {
+        "started_at": started_at.isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {"workers": workers, "auctions": auctions, "iterations": iterations, "concurrency": concurrency},
+        "profiles": {},
+    }
+    # A server of its own, its shutdown waits for the background work of the ingest before the first measurement
+    with run_server(port, workers) as url:
+        asyncio.run(ingest(url, snapshot))
+
+    for name in profile:
+        logger.info(f"Benchmarking the {name} profile: {profiles[name]}")
+        start = time.perf_counter()
+        with run_server(port, workers, options=profiles[name]) as url:
+            results = asyncio.run(run_profile(url, snapshot, iterations, concurrency))
+        report["profiles"][name] = {
+            "options": profiles[name],
+            "duration_seconds": round(time.perf_counter() - start, 2),
+            "results": [asdict(result) for result in results],
+        }
+
+    output = output or RESULTS_DIR / f"serving-{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    logger.info(f"Serving benchmark results written to {output}")
+
+    _print_comparison(report)
+
+
+if __name__ == "__main__":
+    cli()
@@ -4,6 +4,7 @@ import type {
     AuctionFilter,
     PaginatedResponse,
     AuctionPriceHourlySummary,
+    AuctionPriceDailySeries,
     AuctionMarketActivityHourlySummary,
     AuctionRealmActivityHourlySummary,
     ServerRealm,
@@ -203,6 +204,29 @@ export const API = {
             return response.json();
         },
 
+        async getPriceDailySeries(
+            server: string,
+            realm: string,
+            itemIds: number[],
+            days?: number
+        ): Promise<AuctionPriceDailySeries[]> {
+            const params = new URLSearchParams();
+            itemIds.forEach((itemId) => params.append('item_ids', itemId.toString()));
+            if (days !== undefined) params.append('days', days.toString());
+
+            const response = await fetch(
+                `${API_V1_URL}/auctions/datapoints/${server}/${realm}/price-daily-series?${params.toString()}`,
+                {
+                    method: 'GET',
+                    headers: buildHeaders()
+                }
+            );
+            if (!response.ok) {
+                throw new Error(`Failed to get price daily series: ${response.statusText}`);
+            }
+            return response.json();
+        },
+
         async getItemActivityHourlySummary(
             server: string,
             realm: string,
@@ -99,6 +99,13 @@ export interface AuctionPriceHourlySummary {
     datapoint_count: number;
 }
 
+export interface AuctionPriceDailySeries {
+    item_id: number;
+    timestamps: string[]; // ISO datetime strings, aligned with the price lists
+    median_buyout_prices: number[];
+    min_buyout_prices: number[];
+}
+
 export interface AuctionMarketActivityHourlySummary {
     timestamp: string; // ISO datetime string
     total_auctions: number;
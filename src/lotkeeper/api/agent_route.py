@@ -1,21 +1,33 @@
+import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Request, Response, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, Request, Response, status
+from fastapi.exceptions import RequestValidationError
 from loguru import logger
 
 from lotkeeper.api.rate_limits import AGENT_RATE_LIMIT
+from lotkeeper.common.snapshot_prep import SnapshotValidationError
 from lotkeeper.config import ENV
 from lotkeeper.dependencies import (
     get_auction_service,
     get_datapoint_service,
+    get_ingest_pool,
+    get_market_service,
     get_rate_limiter,
+    get_realm_event_broker,
     get_server_realm_service,
+    get_snapshot_deduplicator,
 )
-from lotkeeper.models.auction import AuctionData
+from lotkeeper.infra.ingest_pool import IngestPool
+from lotkeeper.infra.realm_events import RealmEventBroker
+from lotkeeper.infra.snapshot_dedup import SnapshotDeduplicator
+from lotkeeper.models.auction import AuctionData, IngestResult
 from lotkeeper.security.agent_access import verify_agent_access_token
 from lotkeeper.services.auction_service import AuctionService
 from lotkeeper.services.datapoint_service import DatapointService
+from lotkeeper.services.market_service import MarketService
 from lotkeeper.services.server_realm_service import ServerRealmService
 
 router = APIRouter(
@@ -26,6 +38,19 @@ router = APIRouter(
 )
 
 
+# --- Constants ---
+VALIDATION_WINDOW = timedelta(hours=1)  # snapshots older than this are not compared with a new one
+SNAPSHOT_DUPLICATE_HEADER = "X-Snapshot-Duplicate"
+SNAPSHOT_STALE_HEADER = "X-Snapshot-Stale"
+# The schema of the body, which is validated in the ingest pool instead of by FastAPI. The models of the listings are
+# in the components of the schema, the auction and item routes return them
+SNAPSHOT_SCHEMA = {
+    key: value
+    for key, value in AuctionData.model_json_schema(ref_template="#/components/schemas/{model}").items()
+    if key != "$defs"
+}
+
+
 @dataclass
 class AuctionDataValidationResult:
     valid: bool
@@ -41,69 +66,123 @@ class AuctionDataValidationResult:
     summary="Submit a snapshot of all auction listings for a given server and realm",
     responses={
         status.HTTP_204_NO_CONTENT: {
-            "description": "Auction data has been submitted, processed and stored by the server."
+            "description": "Auction data has been submitted, processed and stored by the server. "
+            f"A snapshot with the idempotency key or the content of one submitted within the window is acknowledged "
+            f"without being stored again, the response then has the {SNAPSHOT_DUPLICATE_HEADER} header. A snapshot older "
+            f"than the latest ingested snapshot of the realm is dropped, the response then has the "
+            f"{SNAPSHOT_STALE_HEADER} header."
+        },
+        status.HTTP_406_NOT_ACCEPTABLE: {
+            "description": "The snapshot has less than 80% of the auctions of the previous one and is not accepted"
+        },
+        HTTPStatus.UNPROCESSABLE_ENTITY: {"description": "The body is not a valid snapshot"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Another snapshot of the realm is being ingested and did not finish in time, retry later"
         },
     },
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": SNAPSHOT_SCHEMA}}}},
 )
 @get_rate_limiter().limit(AGENT_RATE_LIMIT)
 async def submit_auction_data(
     request: Request,
-    data: AuctionData,
     background_tasks: BackgroundTasks,
     auction_service: AuctionService = Depends(get_auction_service),
     server_realm_service: ServerRealmService = Depends(get_server_realm_service),
     datapoint_service: DatapointService = Depends(get_datapoint_service),
+    market_service: MarketService = Depends(get_market_service),
+    realm_events: RealmEventBroker = Depends(get_realm_event_broker),
+    snapshot_dedup: SnapshotDeduplicator = Depends(get_snapshot_deduplicator),
+    ingest_pool: IngestPool = Depends(get_ingest_pool),
+    idempotency_key: str | None = Header(
+        None, max_length=128, description="The same key for every retry of a submission, retries are not ingested"
+    ),
 ) -> Response:
-    server_realm_id = await server_realm_service.get_server_realm_id(data.server, data.realm)
-
-    # If the realm does not exist, explicitly create it
-    if not server_realm_id:
-        logger.info(
-            f"Received auction data for realm {data.server}/{data.realm} that does not exist, the realm will be created"
-        )
-        server_realm_id = (await server_realm_service.create_server_realm(data.server, data.realm)).id
-
-    # Validate that the new total of active auctions is at least 80% of the previous total
-    validation_result = await validate_auction_count(datapoint_service, server_realm_id, len(data.auctions))
-    if not validation_result.valid:
-        logger.warning(
-            f"Auction count validation failed for server realm {server_realm_id} ({data.server}/{data.realm}): "
-            f"new_count={validation_result.new_count}, "
-            f"previous_count={validation_result.previous_count}, "
-            f"threshold_80_percent={validation_result.threshold}, "
-            f"decrease_percentage={validation_result.decrease_percentage:.1f}% - "
-            f"this anomaly is not accepted"
-        )
-        return Response(status_code=status.HTTP_406_NOT_ACCEPTABLE)
-
-    # Replace auctions for the given realm
-    await auction_service.truncate_and_insert_auctions(server_realm_id, data)
+    received_at = datetime.now(UTC)
+
+    # Validate the snapshot and compute everything derived from its listings in another process
+    try:
+        snapshot = await ingest_pool.prepare(await request.body())
+    except SnapshotValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors]) from None
+
+    # Snapshots are ordered by their scan time, a scan time in the future is taken as the time of the submission
+    timestamp = min(snapshot.scanned_at, received_at) if snapshot.scanned_at else received_at
+
+    # Acknowledge a snapshot that was already submitted within the window without touching the database
+    claim = await snapshot_dedup.claim(snapshot, idempotency_key)
+    if claim is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers={SNAPSHOT_DUPLICATE_HEADER: "true"})
+
+    try:
+        server_realm_id = await server_realm_service.get_server_realm_id(snapshot.server, snapshot.realm)
+
+        # If the realm does not exist, explicitly create it
+        if not server_realm_id:
+            logger.info(
+                f"Received auction data for realm {snapshot.server}/{snapshot.realm} that does not exist, "
+                f"the realm will be created"
+            )
+            server_realm_id = (await server_realm_service.create_server_realm(snapshot.server, snapshot.realm)).id
+
+        # Validate that the new total of active auctions is at least 80% of the previous total
+        validation_result = await validate_auction_count(realm_events, server_realm_id, snapshot.auction_count)
+        if not validation_result.valid:
+            logger.warning(
+                f"Auction count validation failed for server realm {server_realm_id} ({snapshot.server}/{snapshot.realm}): "
+                f"new_count={validation_result.new_count}, "
+                f"previous_count={validation_result.previous_count}, "
+                f"threshold_80_percent={validation_result.threshold}, "
+                f"decrease_percentage={validation_result.decrease_percentage:.1f}% - "
+                f"this anomaly is not accepted"
+            )
+            await snapshot_dedup.release(claim)
+            return Response(status_code=status.HTTP_406_NOT_ACCEPTABLE)
+
+        # Replace auctions for the given realm, unless a newer snapshot of the realm was ingested meanwhile
+        started = time.perf_counter()
+        result = await auction_service.truncate_and_insert_auctions(server_realm_id, snapshot, timestamp)
+    except Exception:
+        await snapshot_dedup.release(claim)
+        raise
+
+    if result is IngestResult.STALE:
+        await snapshot_dedup.release(claim)
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers={SNAPSHOT_STALE_HEADER: "true"})
+    if result is IngestResult.BUSY:
+        await snapshot_dedup.release(claim)
+        return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "60"})
+    await snapshot_dedup.complete(claim, time.perf_counter() - started)
 
     # Add bg task for upserting realm activity datapoints
     background_tasks.add_task(
         datapoint_service.upsert_auction_realm_activity_datapoints, server_realm_id, delay_seconds=30
     )
 
+    # Add bg task for ranking the market movers from the updated hourly rollups
+    background_tasks.add_task(market_service.refresh_market_movers, server_realm_id)
+
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 async def validate_auction_count(
-    datapoint_service: DatapointService, server_realm_id: int, new_total_auctions: int
+    realm_events: RealmEventBroker, server_realm_id: int, new_total_auctions: int
 ) -> AuctionDataValidationResult:
     """
-    Validate that the new total of active auctions is at least 80% of the previous total
+    Validate that the new total of active auctions is at least 80% of the total of the last accepted snapshot
+
+    The last accepted snapshot is the state of the realm kept by the ingest (one Valkey read, or memory while Valkey
+    is unavailable), it is current even for back-to-back submissions. Snapshots older than the validation window
+    are not compared.
 
     Returns:
         dict: Contains validation result with detailed metrics
     """
 
-    # Get the last total auctions datapoint
-    last_known_total = await datapoint_service.get_auction_realm_activity_datapoints(
-        server_realm_id, datetime.now() - timedelta(hours=1), datetime.now()
-    )
+    # Get the size of the last accepted snapshot
+    last_snapshot = await realm_events.get_latest(server_realm_id)
 
-    # If no datapoint is found, then it's OK to submit
-    if not last_known_total:
+    # If no recent snapshot is known, then it's OK to submit
+    if not last_snapshot or last_snapshot.snapshot_at < datetime.now(UTC) - VALIDATION_WINDOW:
         return AuctionDataValidationResult(
             valid=True,
             new_count=new_total_auctions,
@@ -113,7 +192,7 @@ async def validate_auction_count(
             reason="No previous data available",
         )
 
-    previous_count = last_known_total[0].total_auctions
+    previous_count = last_snapshot.total_auctions
     threshold = int(previous_count * 0.8)
     is_valid = new_total_auctions >= threshold
     decrease_percentage = ((previous_count - new_total_auctions) / previous_count) * 100 if previous_count > 0 else 0
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
@@ -7,14 +7,21 @@ from lotkeeper.api.rate_limits import AUCTION_DATAPOINTS_RATE_LIMIT
 from lotkeeper.dependencies import get_datapoint_service, get_rate_limiter, get_server_realm_service
 from lotkeeper.models.auction_datapoint import (
     AuctionItemActivityHourlySummary,
+    AuctionItemPriceDailySeries,
+    AuctionItemPriceHistory,
+    AuctionItemPriceHistoryResolution,
     AuctionItemPriceHourlySummary,
 )
 from lotkeeper.models.auction_realm_activity_datapoint import (
     AuctionRealmActivityDatapoint,
 )
+from lotkeeper.models.types import ItemId
 from lotkeeper.services.datapoint_service import DatapointService
 from lotkeeper.services.server_realm_service import ServerRealmService
 
+MAX_PRICE_SERIES_ITEMS = 100
+MAX_AUTO_HOURLY_HISTORY = timedelta(days=14)  # longer ranges default to daily buckets
+
 router = APIRouter(
     prefix="/api/v1/auctions/datapoints",
     tags=["auction-datapoints"],
@@ -25,6 +32,10 @@ def _get_timestamp_31_days_ago() -> int:
     return int((datetime.now() - timedelta(days=31)).timestamp())
 
 
+def _get_timestamp_365_days_ago() -> int:
+    return int((datetime.now() - timedelta(days=365)).timestamp())
+
+
 def _get_current_timestamp() -> int:
     return int(datetime.now().timestamp())
 
@@ -63,6 +74,84 @@ async def get_auction_item_price_hourly_summary(
     return await datapoint_service.get_auction_item_price_hourly_summary(item_id, server_realm_id, from_dt, to_dt)
 
 
+@router.get(
+    "/{server}/{realm}/price-daily-series",
+    summary="Get compact daily buyout price series for multiple items, e.g. for sparklines",
+    responses={
+        HTTPStatus.OK: {"description": "Successfully retrieved the daily price series of the requested items."},
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+    },
+)
+@get_rate_limiter().limit(AUCTION_DATAPOINTS_RATE_LIMIT)
+async def get_auction_item_price_daily_series(
+    request: Request,
+    server: str,
+    realm: str,
+    item_ids: list[ItemId] = Query(
+        description=f"The IDs of the items, at most {MAX_PRICE_SERIES_ITEMS}",
+        min_length=1,
+        max_length=MAX_PRICE_SERIES_ITEMS,
+    ),
+    days: int = Query(7, description="The number of days of the series, ending today (UTC)", ge=1, le=31),
+    datapoint_service: DatapointService = Depends(get_datapoint_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> list[AuctionItemPriceDailySeries]:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    # Whole UTC days, so the first bucket is not partial
+    to_dt = datetime.now(UTC)
+    from_dt = to_dt.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+
+    return await datapoint_service.get_auction_item_price_daily_series(item_ids, server_realm_id, from_dt, to_dt)
+
+
+@router.get(
+    "/{server}/{realm}/{item_id}/price-history",
+    summary="Get the long-range price history of an item from the hourly or daily rollups",
+    responses={
+        HTTPStatus.OK: {"description": "Successfully retrieved the price history within the given time period."},
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+    },
+)
+@get_rate_limiter().limit(AUCTION_DATAPOINTS_RATE_LIMIT)
+async def get_auction_item_price_history(
+    request: Request,
+    server: str,
+    realm: str,
+    item_id: int,
+    from_timestamp: int = Query(
+        _get_timestamp_365_days_ago(), description="Start timestamp in epoch seconds, defaults to 365 days ago"
+    ),
+    to_timestamp: int = Query(
+        _get_current_timestamp(), description="End timestamp in epoch seconds, defaults to current timestamp"
+    ),
+    resolution: AuctionItemPriceHistoryResolution | None = Query(
+        None,
+        description="The size of the buckets, defaults to hourly for up to 14 days and to daily for longer periods",
+    ),
+    datapoint_service: DatapointService = Depends(get_datapoint_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> AuctionItemPriceHistory:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    from_dt = datetime.fromtimestamp(from_timestamp)
+    to_dt = datetime.fromtimestamp(to_timestamp)
+
+    # Read the cheapest tier that covers the period
+    if resolution is None:
+        resolution = (
+            AuctionItemPriceHistoryResolution.HOUR
+            if to_dt - from_dt <= MAX_AUTO_HOURLY_HISTORY
+            else AuctionItemPriceHistoryResolution.DAY
+        )
+
+    return await datapoint_service.get_auction_item_price_history(item_id, server_realm_id, from_dt, to_dt, resolution)
+
+
 @router.get(
     "/{server}/{realm}/{item_id}/activity-hourly-summary",
     summary="Get hourly buyout activity datapoints for an item within the given time period",
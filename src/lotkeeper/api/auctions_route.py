@@ -1,12 +1,26 @@
+from collections.abc import AsyncIterator
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from lotkeeper.api.rate_limits import AUCTIONS_RATE_LIMIT, AUCTIONS_STRICT_RATE_LIMIT
-from lotkeeper.dependencies import get_auction_service, get_rate_limiter, get_server_realm_service
+from lotkeeper.config import ENV
+from lotkeeper.dependencies import (
+    get_auction_service,
+    get_market_service,
+    get_rate_limiter,
+    get_realm_event_broker,
+    get_server_realm_service,
+)
+from lotkeeper.infra.realm_events import RealmEventBroker, RealmSubscription
 from lotkeeper.models.auction import Auction, AuctionFilter
-from lotkeeper.models.types import PaginatedResponse, PaginationFilter
+from lotkeeper.models.auction_deal import AuctionDeal, AuctionDealKind
+from lotkeeper.models.realm_update import RealmUpdate
+from lotkeeper.models.types import CursorPaginatedResponse, CursorPaginationFilter, PaginatedResponse, PaginationFilter
 from lotkeeper.services.auction_service import AuctionService
+from lotkeeper.services.market_service import MarketService
 from lotkeeper.services.server_realm_service import ServerRealmService
 
 router = APIRouter(
@@ -21,11 +35,13 @@ LIMIT_MIN = 1
 LIMIT_MAX = 1000
 OFFSET_DEFAULT = 0
 OFFSET_MIN = 0
+STREAM_RETRY_SECONDS = 5  # reconnect delay of the update streams, also the Retry-After of a worker at its limit
 
 
 @router.get(
     "/{server}/{realm}",
     summary="Retrieve auctions for a realm, enforces pagination and allows optional filtering",
+    response_model=PaginatedResponse[Auction],
     responses={
         HTTPStatus.OK: {
             "description": "Successfully retrieved filtered auctions. "
@@ -51,7 +67,7 @@ async def get_auctions_filtered(
     offset: int = Query(OFFSET_DEFAULT, ge=OFFSET_MIN, description="Number of items to skip"),
     auction_service: AuctionService = Depends(get_auction_service),
     server_realm_service: ServerRealmService = Depends(get_server_realm_service),
-) -> PaginatedResponse[Auction]:
+) -> Response:
     server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
     if not server_realm_id:
         raise HTTPException(status_code=404, detail="Realm not found")
@@ -66,12 +82,14 @@ async def get_auctions_filtered(
     )
 
     pagination = PaginationFilter(limit=limit, offset=offset)
-    return await auction_service.get_auctions_paginated(server_realm_id, pagination, filter)
+    content = await auction_service.get_auctions_paginated_json(server_realm_id, pagination, filter)
+    return Response(content=content, media_type="application/json")
 
 
 @router.get(
     "/{server}/{realm}/bulk",
     summary="Retrieve all auctions in bulk for a realm. (2/minute rate limit enforced)",
+    response_model=list[Auction],
     responses={
         HTTPStatus.OK: {
             "description": "Successfully retrieved auctions. "
@@ -87,13 +105,13 @@ async def get_bulk_auctions(
     realm: str,
     auction_service: AuctionService = Depends(get_auction_service),
     server_realm_service: ServerRealmService = Depends(get_server_realm_service),
-) -> list[Auction]:
+) -> Response:
     server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
     if not server_realm_id:
         raise HTTPException(status_code=404, detail="The server realm combination could not be found")
 
-    auctions = await auction_service.get_auctions(server_realm_id)
-    return auctions
+    content = await auction_service.get_auctions_json(server_realm_id)
+    return Response(content=content, media_type="application/json")
 
 
 @router.get(
@@ -148,13 +166,15 @@ async def get_auctions_value(
 
 @router.get(
     "/{server}/{realm}/below-vendor-price",
-    summary="Retrieve auctions where buyout price is below vendor price",
+    summary="Retrieve auctions where buyout price is below vendor price, enforces cursor pagination",
     responses={
         HTTPStatus.OK: {
             "description": "Successfully retrieved auctions below vendor price. "
-            "Returns auctions where the buyout price is less than the vendor price, ordered by savings amount."
+            "Returns auctions where the buyout price is less than the vendor price, ordered by savings amount. "
+            "The deals are ranked once per snapshot of the realm."
         },
         HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+        HTTPStatus.CONFLICT: {"description": "The cursor is invalid or the deals were refreshed since it was issued"},
     },
 )
 @get_rate_limiter().limit(AUCTIONS_RATE_LIMIT)
@@ -162,11 +182,109 @@ async def get_below_vendor_price(
     request: Request,
     server: str,
     realm: str,
-    auction_service: AuctionService = Depends(get_auction_service),
+    limit: int = Query(LIMIT_DEFAULT, ge=LIMIT_MIN, le=LIMIT_MAX, description="Number of items per page"),
+    cursor: str | None = Query(None, min_length=1, description="The next cursor of the previous page"),
+    market_service: MarketService = Depends(get_market_service),
     server_realm_service: ServerRealmService = Depends(get_server_realm_service),
-) -> list[Auction]:
+) -> CursorPaginatedResponse[AuctionDeal]:
     server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
     if not server_realm_id:
         raise HTTPException(status_code=404, detail="Realm not found")
 
-    return await auction_service.get_auctions_below_vendor_price(server_realm_id)
+    pagination = CursorPaginationFilter(limit=limit, cursor=cursor)
+    deals = await market_service.get_auction_deals(server_realm_id, AuctionDealKind.VENDOR, pagination)
+    if deals is None:
+        raise HTTPException(status_code=409, detail="The deals were refreshed, restart from the first page")
+    return deals
+
+
+@router.get(
+    "/{server}/{realm}/updates",
+    summary="Stream an event whenever a new snapshot of the realm was ingested (Server-Sent Events)",
+    response_class=StreamingResponse,
+    responses={
+        HTTPStatus.OK: {
+            "description": "A text/event-stream of realm-update events carrying the RealmUpdate as JSON data. "
+            "The stream starts with the latest update of the realm, unless the Last-Event-ID header already names "
+            "it. Refetch the listings of the realm when an event arrives instead of polling them.",
+            "content": {"text/event-stream": {}},
+        },
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+        HTTPStatus.SERVICE_UNAVAILABLE: {"description": "The worker holds its maximum of streams, retry later"},
+    },
+)
+@get_rate_limiter().limit(AUCTIONS_RATE_LIMIT)
+async def get_realm_updates(
+    request: Request,
+    server: str,
+    realm: str,
+    last_event_id: str | None = Header(None, description="The id of the last received event, sent on reconnects"),
+    realm_events: RealmEventBroker = Depends(get_realm_event_broker),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> StreamingResponse:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    subscription = realm_events.subscribe(server_realm_id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many open update streams, retry later",
+            headers={"Retry-After": str(STREAM_RETRY_SECONDS)},
+        )
+
+    return StreamingResponse(
+        stream_realm_updates(realm_events, subscription, last_event_id),
+        media_type="text/event-stream",
+        # Proxies must pass the events through as they are written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(subscription.close),
+    )
+
+
+async def stream_realm_updates(
+    realm_events: RealmEventBroker, subscription: RealmSubscription, last_event_id: str | None
+) -> AsyncIterator[bytes]:
+    """Write the updates of a realm as Server-Sent Events until the client disconnects or the worker stops
+
+    Args:
+        realm_events: The broker the subscription belongs to
+        subscription: The subscription of the stream, subscribed before the latest update is read so none is missed
+        last_event_id: The id of the last event the client received, the snapshot time of its update
+
+    Yields:
+        The chunks of the stream
+    """
+    try:
+        yield f"retry: {STREAM_RETRY_SECONDS * 1000}\n\n".encode()
+
+        sent = last_event_id
+        if (latest := await realm_events.get_latest(subscription.server_realm_id)) and event_id(latest) != sent:
+            yield format_event(latest)
+            sent = event_id(latest)
+
+        while True:
+            try:
+                update = await subscription.get(timeout=ENV.LOT_REALM_STREAM_HEARTBEAT)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+
+            if update is None:
+                return
+            if event_id(update) != sent:
+                yield format_event(update)
+                sent = event_id(update)
+    finally:
+        subscription.close()
+
+
+def event_id(update: RealmUpdate) -> str:
+    """Get the event id of an update, the snapshot time identifies the version of the realm data"""
+    return update.snapshot_at.isoformat()
+
+
+def format_event(update: RealmUpdate) -> bytes:
+    """Format an update as a Server-Sent Event"""
+    return f"id: {event_id(update)}\nevent: realm-update\ndata: {update.model_dump_json()}\n\n".encode()
@@ -1,7 +1,20 @@
-from fastapi import APIRouter, Request, status
+from fastapi import APIRouter, Depends, Request, status
 
 from lotkeeper.api.rate_limits import HEALTH_RATE_LIMIT
-from lotkeeper.dependencies import get_rate_limiter
+from lotkeeper.dependencies import (
+    get_db,
+    get_ingest_pool,
+    get_rate_limiter,
+    get_realm_event_broker,
+    get_snapshot_deduplicator,
+)
+from lotkeeper.infra.db import DB
+from lotkeeper.infra.db_pool import DbPoolStatus
+from lotkeeper.infra.db_replica import DbReplicaStatus
+from lotkeeper.infra.ingest_lock import IngestLockStatus
+from lotkeeper.infra.ingest_pool import IngestPool, IngestPoolStatus
+from lotkeeper.infra.realm_events import RealmEventBroker, RealmStreamStatus
+from lotkeeper.infra.snapshot_dedup import SnapshotDeduplicator, SnapshotDedupStatus
 
 router = APIRouter(
     prefix="/health",
@@ -21,3 +34,91 @@ router = APIRouter(
 @get_rate_limiter().limit(HEALTH_RATE_LIMIT)
 async def health_check(request: Request) -> dict[str, str]:
     return {"status": "ok"}
+
+
+@router.get(
+    "/db-pool",
+    summary="Get the database connection pool status of the worker handling the request",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Successfully retrieved the pool status. Returns pool usage and checkout wait metrics",
+        },
+    },
+)
+@get_rate_limiter().limit(HEALTH_RATE_LIMIT)
+async def db_pool_status(request: Request, db: DB = Depends(get_db)) -> DbPoolStatus:
+    return db.get_pool_status()
+
+
+@router.get(
+    "/db-replicas",
+    summary="Get the replication state of the read replicas seen by the worker handling the request",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Successfully retrieved the replica states. Returns the lag and routed reads per replica",
+        },
+    },
+)
+@get_rate_limiter().limit(HEALTH_RATE_LIMIT)
+async def db_replicas_status(request: Request, db: DB = Depends(get_db)) -> list[DbReplicaStatus]:
+    return db.get_replica_status()
+
+
+@router.get(
+    "/realm-streams",
+    summary="Get the realm update streams of the worker handling the request",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Successfully retrieved the stream status. Returns the open streams and delivered updates",
+        },
+    },
+)
+@get_rate_limiter().limit(HEALTH_RATE_LIMIT)
+async def realm_streams_status(
+    request: Request, realm_events: RealmEventBroker = Depends(get_realm_event_broker)
+) -> RealmStreamStatus:
+    return realm_events.get_status()
+
+
+@router.get(
+    "/snapshot-dedup",
+    summary="Get the snapshot deduplication metrics of the worker handling the request",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Successfully retrieved the deduplication metrics. Returns the skipped snapshots and work",
+        },
+    },
+)
+@get_rate_limiter().limit(HEALTH_RATE_LIMIT)
+async def snapshot_dedup_status(
+    request: Request, snapshot_dedup: SnapshotDeduplicator = Depends(get_snapshot_deduplicator)
+) -> SnapshotDedupStatus:
+    return snapshot_dedup.get_status()
+
+
+@router.get(
+    "/ingest-locks",
+    summary="Get the realm ingest lock metrics of the worker handling the request",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Successfully retrieved the lock metrics. Returns lock waits and dropped stale snapshots",
+        },
+    },
+)
+@get_rate_limiter().limit(HEALTH_RATE_LIMIT)
+async def ingest_locks_status(request: Request, db: DB = Depends(get_db)) -> IngestLockStatus:
+    return db.get_ingest_lock_status()
+
+
+@router.get(
+    "/ingest-pool",
+    summary="Get the snapshot preparation metrics of the worker handling the request",
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Successfully retrieved the preparation metrics. Returns the time spent in the pool",
+        },
+    },
+)
+@get_rate_limiter().limit(HEALTH_RATE_LIMIT)
+async def ingest_pool_status(request: Request, ingest_pool: IngestPool = Depends(get_ingest_pool)) -> IngestPoolStatus:
+    return ingest_pool.get_status()
@@ -1,12 +1,14 @@
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from lotkeeper.api.rate_limits import ITEMS_RATE_LIMIT, ITEMS_STRICT_RATE_LIMIT
-from lotkeeper.dependencies import get_item_service, get_rate_limiter, get_server_realm_service
+from lotkeeper.dependencies import get_item_service, get_market_service, get_rate_limiter, get_server_realm_service
 from lotkeeper.models.item import Item, ItemFilter
-from lotkeeper.models.types import PaginatedResponse, PaginationFilter
+from lotkeeper.models.item_market_price import ItemMarketPrice
+from lotkeeper.models.types import ItemId, PaginatedResponse, PaginationFilter
 from lotkeeper.services.item_service import ItemService
+from lotkeeper.services.market_service import MarketService
 from lotkeeper.services.server_realm_service import ServerRealmService
 
 router = APIRouter(
@@ -21,11 +23,13 @@ LIMIT_MIN = 1
 LIMIT_MAX = 1000
 OFFSET_DEFAULT = 0
 OFFSET_MIN = 0
+MARKET_PRICES_MAX_ITEMS = 1000
 
 
 @router.get(
     "/{server}/{realm}",
     summary="Retrieve items for a realm, enforces pagination and allows optional filtering",
+    response_model=PaginatedResponse[Item],
     responses={
         HTTPStatus.OK: {
             "description": "Successfully retrieved filtered items. "
@@ -49,7 +53,7 @@ async def get_items_filtered(
     offset: int = Query(OFFSET_DEFAULT, ge=OFFSET_MIN, description="Number of items to skip"),
     item_service: ItemService = Depends(get_item_service),
     server_realm_service: ServerRealmService = Depends(get_server_realm_service),
-) -> PaginatedResponse[Item]:
+) -> Response:
     server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
     if not server_realm_id:
         raise HTTPException(status_code=404, detail="Realm not found")
@@ -64,12 +68,14 @@ async def get_items_filtered(
     )
 
     pagination = PaginationFilter(limit=limit, offset=offset)
-    return await item_service.get_items_paginated(server_realm_id, pagination, filter)
+    content = await item_service.get_items_paginated_json(server_realm_id, pagination, filter)
+    return Response(content=content, media_type="application/json")
 
 
 @router.get(
     "/{server}/{realm}/bulk",
     summary="Retrieve all items in bulk for a realm. (2/minute rate limit enforced)",
+    response_model=list[Item],
     responses={
         HTTPStatus.OK: {
             "description": "Successfully retrieved items. Returns a complete list of all items for the specified realm."
@@ -84,13 +90,13 @@ async def get_bulk_items(
     realm: str,
     item_service: ItemService = Depends(get_item_service),
     server_realm_service: ServerRealmService = Depends(get_server_realm_service),
-) -> list[Item]:
+) -> Response:
     server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
     if not server_realm_id:
         raise HTTPException(status_code=404, detail="The server realm combination could not be found")
 
-    items = await item_service.get_items(server_realm_id)
-    return items
+    content = await item_service.get_items_json(server_realm_id)
+    return Response(content=content, media_type="application/json")
 
 
 @router.get(
@@ -116,3 +122,62 @@ async def get_items_count(
     if not server_realm_id:
         raise HTTPException(status_code=404, detail="The server realm combination could not be found")
     return await item_service.get_item_count(server_realm_id)
+
+
+@router.get(
+    "/{server}/{realm}/market-prices",
+    summary="Get the current market prices of multiple items",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully retrieved the current market prices. "
+            "Items that were never listed on the realm are omitted."
+        },
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+    },
+)
+@get_rate_limiter().limit(ITEMS_RATE_LIMIT)
+async def get_item_market_prices(
+    request: Request,
+    server: str,
+    realm: str,
+    item_ids: list[ItemId] = Query(
+        description=f"The IDs of the items, at most {MARKET_PRICES_MAX_ITEMS}",
+        min_length=1,
+        max_length=MARKET_PRICES_MAX_ITEMS,
+    ),
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> list[ItemMarketPrice]:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+    return await market_service.get_item_market_prices(server_realm_id, item_ids)
+
+
+@router.get(
+    "/{server}/{realm}/{item_id}/market-price",
+    summary="Get the current market price of an item",
+    responses={
+        HTTPStatus.OK: {"description": "Successfully retrieved the current market price of the item."},
+        HTTPStatus.NOT_FOUND: {
+            "description": "The server realm combination could not be found or the item was never listed on the realm"
+        },
+    },
+)
+@get_rate_limiter().limit(ITEMS_RATE_LIMIT)
+async def get_item_market_price(
+    request: Request,
+    server: str,
+    realm: str,
+    item_id: ItemId,
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> ItemMarketPrice:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    market_price = await market_service.get_item_market_price(server_realm_id, item_id)
+    if not market_price:
+        raise HTTPException(status_code=404, detail="The item was never listed on the server realm")
+    return market_price
@@ -0,0 +1,230 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from lotkeeper.api.rate_limits import MARKET_RATE_LIMIT
+from lotkeeper.common.snapshot_prep import MARKET_DEAL_MIN_DISCOUNT_PCT
+from lotkeeper.dependencies import get_market_service, get_rate_limiter, get_server_realm_service
+from lotkeeper.models.auction_deal import AuctionDeal, AuctionDealKind
+from lotkeeper.models.item_popularity import ItemPopularity, ItemPopularityMetric
+from lotkeeper.models.item_sell_through import ItemSellThrough, ItemSellThroughHour, ItemSellThroughSort
+from lotkeeper.models.market_mover import MarketMover, MarketMoverSort, MarketMoverWindow
+from lotkeeper.models.types import (
+    CursorPaginatedResponse,
+    CursorPaginationFilter,
+    ItemId,
+    PaginatedResponse,
+    PaginationFilter,
+)
+from lotkeeper.services.market_service import MarketService
+from lotkeeper.services.server_realm_service import ServerRealmService
+
+router = APIRouter(
+    prefix="/api/v1/market",
+    tags=["market"],
+)
+
+
+# --- Constants ---
+LIMIT_DEFAULT = 50
+LIMIT_MIN = 1
+LIMIT_MAX = 1000
+OFFSET_DEFAULT = 0
+OFFSET_MIN = 0
+
+
+@router.get(
+    "/{server}/{realm}/movers",
+    summary="Get the items whose price or volume went up or down the most over the last 24 hours or 7 days",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully retrieved the market movers. "
+            "The ranking is refreshed after every snapshot of the realm."
+        },
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+    },
+)
+@get_rate_limiter().limit(MARKET_RATE_LIMIT)
+async def get_market_movers(
+    request: Request,
+    server: str,
+    realm: str,
+    window: MarketMoverWindow = Query(MarketMoverWindow.DAY, description="The window the changes are measured over"),
+    sort: MarketMoverSort = Query(MarketMoverSort.PRICE, description="Rank by price change or volume change"),
+    direction: str = Query("up", pattern="^(up|down)$", description="Biggest risers (up) or biggest fallers (down)"),
+    limit: int = Query(LIMIT_DEFAULT, ge=LIMIT_MIN, le=LIMIT_MAX, description="Number of items per page"),
+    offset: int = Query(OFFSET_DEFAULT, ge=OFFSET_MIN, description="Number of items to skip"),
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> PaginatedResponse[MarketMover]:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    pagination = PaginationFilter(limit=limit, offset=offset)
+    return await market_service.get_market_movers(
+        server_realm_id, window, pagination, sort=sort, descending=direction == "up"
+    )
+
+
+@router.get(
+    "/{server}/{realm}/deals",
+    summary="Get the auctions priced at least a given percentage below the robust market median of their item",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully retrieved the deals, ordered by discount. "
+            "The deals are ranked once per snapshot of the realm."
+        },
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+        HTTPStatus.CONFLICT: {"description": "The cursor is invalid or the deals were refreshed since it was issued"},
+    },
+)
+@get_rate_limiter().limit(MARKET_RATE_LIMIT)
+async def get_market_deals(
+    request: Request,
+    server: str,
+    realm: str,
+    min_discount_pct: float = Query(
+        20.0,
+        ge=MARKET_DEAL_MIN_DISCOUNT_PCT,
+        lt=100,
+        description="The minimum discount to the robust median buyout price in percent",
+    ),
+    limit: int = Query(LIMIT_DEFAULT, ge=LIMIT_MIN, le=LIMIT_MAX, description="Number of items per page"),
+    cursor: str | None = Query(None, min_length=1, description="The next cursor of the previous page"),
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> CursorPaginatedResponse[AuctionDeal]:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    pagination = CursorPaginationFilter(limit=limit, cursor=cursor)
+    deals = await market_service.get_auction_deals(
+        server_realm_id, AuctionDealKind.MARKET, pagination, min_discount_pct=min_discount_pct
+    )
+    if deals is None:
+        raise HTTPException(status_code=409, detail="The deals were refreshed, restart from the first page")
+    return deals
+
+
+@router.get(
+    "/{server}/{realm}/popular",
+    summary="Get the most popular currently listed items by listing count, listed quantity or market value",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully retrieved the popular items. "
+            "The ranking is updated with every snapshot of the realm."
+        },
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+    },
+)
+@get_rate_limiter().limit(MARKET_RATE_LIMIT)
+async def get_popular_items(
+    request: Request,
+    server: str,
+    realm: str,
+    metric: ItemPopularityMetric = Query(ItemPopularityMetric.LISTINGS, description="The metric to rank by"),
+    limit: int = Query(LIMIT_DEFAULT, ge=LIMIT_MIN, le=LIMIT_MAX, description="Number of items per page"),
+    offset: int = Query(OFFSET_DEFAULT, ge=OFFSET_MIN, description="Number of items to skip"),
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> PaginatedResponse[ItemPopularity]:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    pagination = PaginationFilter(limit=limit, offset=offset)
+    return await market_service.get_popular_items(server_realm_id, metric, pagination)
+
+
+@router.get(
+    "/{server}/{realm}/popular/{item_id}",
+    summary="Get the popularity rank of an item by listing count, listed quantity or market value",
+    responses={
+        HTTPStatus.OK: {"description": "Successfully retrieved the popularity rank of the item."},
+        HTTPStatus.NOT_FOUND: {
+            "description": "The server realm combination could not be found or the item is not listed on the realm"
+        },
+    },
+)
+@get_rate_limiter().limit(MARKET_RATE_LIMIT)
+async def get_item_popularity(
+    request: Request,
+    server: str,
+    realm: str,
+    item_id: ItemId,
+    metric: ItemPopularityMetric = Query(ItemPopularityMetric.LISTINGS, description="The metric to rank by"),
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> ItemPopularity:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    popularity = await market_service.get_item_popularity(server_realm_id, item_id, metric)
+    if not popularity:
+        raise HTTPException(status_code=404, detail="The item is not listed on the server realm")
+    return popularity
+
+
+@router.get(
+    "/{server}/{realm}/sell-through",
+    summary="Get the items with the most listings likely sold over the last 24 hours or 7 days",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully retrieved the sell-through of the items. Listings are matched between "
+            "consecutive snapshots of the realm, a buyout listing that disappeared counts as sold if it was priced "
+            "at or below the market median or below every listing left, else as expired."
+        },
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+    },
+)
+@get_rate_limiter().limit(MARKET_RATE_LIMIT)
+async def get_sell_through(
+    request: Request,
+    server: str,
+    realm: str,
+    window: MarketMoverWindow = Query(MarketMoverWindow.DAY, description="The window the listings are counted over"),
+    sort: ItemSellThroughSort = Query(
+        ItemSellThroughSort.SOLD, description="Rank by sold listings, sold value or sell-through rate"
+    ),
+    limit: int = Query(LIMIT_DEFAULT, ge=LIMIT_MIN, le=LIMIT_MAX, description="Number of items per page"),
+    offset: int = Query(OFFSET_DEFAULT, ge=OFFSET_MIN, description="Number of items to skip"),
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> PaginatedResponse[ItemSellThrough]:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    pagination = PaginationFilter(limit=limit, offset=offset)
+    return await market_service.get_sell_through(server_realm_id, window, pagination, sort=sort)
+
+
+@router.get(
+    "/{server}/{realm}/sell-through/{item_id}",
+    summary="Get the hourly sell-through of an item over the last 24 hours or 7 days",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully retrieved the hours with listings of the item that appeared or "
+            "disappeared, oldest first."
+        },
+        HTTPStatus.NOT_FOUND: {"description": "The server realm combination could not be found"},
+    },
+)
+@get_rate_limiter().limit(MARKET_RATE_LIMIT)
+async def get_item_sell_through(
+    request: Request,
+    server: str,
+    realm: str,
+    item_id: ItemId,
+    window: MarketMoverWindow = Query(MarketMoverWindow.DAY, description="The window to get the hours of"),
+    market_service: MarketService = Depends(get_market_service),
+    server_realm_service: ServerRealmService = Depends(get_server_realm_service),
+) -> list[ItemSellThroughHour]:
+    server_realm_id = await server_realm_service.get_server_realm_id(server, realm)
+    if not server_realm_id:
+        raise HTTPException(status_code=404, detail="The server realm combination could not be found")
+
+    return await market_service.get_item_sell_through(server_realm_id, item_id, window)
@@ -4,6 +4,7 @@ AUCTIONS_STRICT_RATE_LIMIT = "2/minute"
 ITEMS_RATE_LIMIT = "120/minute"
 ITEMS_STRICT_RATE_LIMIT = "2/minute"
 AUCTION_DATAPOINTS_RATE_LIMIT = "120/minute"
+MARKET_RATE_LIMIT = "120/minute"
 WEB_RATE_LIMIT = "120/minute"
 SERVER_REALMS_RATE_LIMIT = "120/minute"
 
@@ -8,8 +8,10 @@ from fastapi.staticfiles import StaticFiles
 
 from lotkeeper.api.rate_limits import WEB_RATE_LIMIT
 from lotkeeper.config import DIRS
-from lotkeeper.dependencies import get_auction_service, get_rate_limiter, get_server_realm_service
-from lotkeeper.services.auction_service import AuctionService
+from lotkeeper.dependencies import get_market_service, get_rate_limiter, get_server_realm_service
+from lotkeeper.models.item_popularity import ItemPopularityMetric
+from lotkeeper.models.types import PaginationFilter
+from lotkeeper.services.market_service import MarketService
 from lotkeeper.services.server_realm_service import ServerRealmService
 
 router = APIRouter(prefix="", include_in_schema=False)
@@ -48,7 +50,7 @@ async def serve_index(request: Request) -> FileResponse:
 async def serve_sitemap(
     request: Request,
     server_realm_service: ServerRealmService = Depends(get_server_realm_service),
-    auction_service: AuctionService = Depends(get_auction_service),
+    market_service: MarketService = Depends(get_market_service),
 ) -> Response:
     """Generate and serve a dynamic XML sitemap with all available server realms."""
     server_realms = await server_realm_service.get_server_realms()
@@ -103,10 +105,12 @@ async def serve_sitemap(
 
             # Get top 50 popular items for this realm
             try:
-                popular_items = await auction_service.get_top_50_items_by_auction_count(server_realm_id)
+                popular_items = await market_service.get_popular_items(
+                    server_realm_id, ItemPopularityMetric.LISTINGS, PaginationFilter(limit=50, offset=0)
+                )
 
                 # Add item pages for popular items
-                for item in popular_items:
+                for item in (popularity.item for popularity in popular_items.data):
                     if item.id:
                         item_slug = (
                             item.name.replace(" ", "-")
@@ -0,0 +1,261 @@
+"""Preparation of a submitted auction snapshot for ingest, the CPU-bound part of the ingest.
+
+Runs in the ingest process pool (see lotkeeper.infra.ingest_pool) and only depends on the models and the price
+statistics. Everything computed per listing happens here: the validation of the body, the unique items, the packed
+price history, the robust price statistics, the ranked deals and the fingerprint. The listings and the price history
+of each item are handed back as arrays of machine integers, which pickle as flat buffers instead of one object per
+listing. The ranked deals stay one tuple per deal, only the listings sufficiently below the reference price are deals.
+"""
+
+import hashlib
+import time
+from array import array
+from collections import defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import orjson
+from pydantic import ValidationError
+from pydantic_core import ErrorDetails
+
+from lotkeeper.common.stats import RobustPriceStats, robust_price_stats
+from lotkeeper.models.auction import AuctionData
+from lotkeeper.models.auction_deal import AuctionDealKind
+from lotkeeper.models.item import Item
+
+# Only listings at least this far below the robust median are stored as market deals, smaller discounts are noise
+MARKET_DEAL_MIN_DISCOUNT_PCT = 10.0
+
+
+class SnapshotValidationError(Exception):
+    """The body of a submitted snapshot is not a valid AuctionData, unlike the pydantic error it can be pickled."""
+
+    def __init__(self, errors: list[ErrorDetails]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+@dataclass(frozen=True, slots=True)
+class ItemListings:
+    """The listings of one item of a snapshot."""
+
+    item_id: int
+    buyout_prices: array[int]  # ascending, bid-only listings are excluded
+    quantities: array[int]  # the quantities of the buyout listings, aligned with the prices
+    listing_count: int  # bid-only listings included
+    total_quantity: int
+    stats: RobustPriceStats  # of the buyout prices
+
+
+@dataclass(frozen=True, slots=True)
+class PreparedSnapshot:
+    """A validated snapshot with everything the ingest derives from its listings."""
+
+    server: str
+    realm: str
+    scanned_at: datetime | None
+    items: list[Item]  # the unique items
+    # The listings as columns, one entry per auction
+    item_ids: array[int]
+    unit_buyout_prices: array[int]
+    unit_starting_bid_prices: array[int]
+    quantities: array[int]
+    item_listings: list[ItemListings]
+    # (kind, rank, item_id, unit_buyout_price, unit_starting_bid_price, quantity, reference_price, unit_savings,
+    # discount_pct), the columns of the auction deals without the realm and the snapshot time
+    deals: list[tuple[Any, ...]]
+    total_value: int  # the total buyout value of the listings in copper
+    fingerprint: str
+    prepare_seconds: float
+
+    @property
+    def auction_count(self) -> int:
+        return len(self.item_ids)
+
+    def get_listing_records(self) -> Iterator[tuple[int, int, int, int]]:
+        """Get the listings as records for COPY
+
+        Returns:
+            Tuples of (item_id, unit_buyout_price, unit_starting_bid_price, quantity)
+        """
+        return zip(self.item_ids, self.unit_buyout_prices, self.unit_starting_bid_prices, self.quantities, strict=True)
+
+
+def prepare_snapshot(body: bytes) -> PreparedSnapshot:
+    """Validate the JSON body of a snapshot submission and prepare it for ingest
+
+    Args:
+        body: The request body, an AuctionData
+
+    Returns:
+        The prepared snapshot
+
+    Raises:
+        SnapshotValidationError: The body is not a valid AuctionData
+    """
+    started = time.perf_counter()
+    try:
+        data = AuctionData.model_validate_json(body)
+    except ValidationError as e:
+        raise SnapshotValidationError(e.errors(include_url=False)) from None
+
+    return _prepare(data, started)
+
+
+def prepare_auction_data(data: AuctionData) -> PreparedSnapshot:
+    """Prepare an already validated snapshot for ingest, e.g. a generated one
+
+    Args:
+        data: The snapshot
+
+    Returns:
+        The prepared snapshot
+    """
+    return _prepare(data, time.perf_counter())
+
+
+def fingerprint_snapshot(snapshot_columns: tuple[array[int], ...], items: list[Item]) -> str:
+    """Hash the content of a snapshot independently of the order of its listings
+
+    The listings are combined by the sum of their hashes instead of being sorted, sorting 100k listings costs several
+    times more. Hashes of integer tuples are not randomized per process, the fingerprint is the same on every worker
+    of a Python version.
+
+    Args:
+        snapshot_columns: The item IDs, unit buyout prices, unit starting bid prices and quantities of the listings
+        items: The unique items of the snapshot
+
+    Returns:
+        The fingerprint as a hex digest
+    """
+    listings = sum(map(hash, zip(*snapshot_columns, strict=True)))
+    # The item metadata is part of the snapshot too, the ingest records its changes
+    item_rows = sorted(
+        (
+            item.id,
+            item.name,
+            item.link,
+            item.icon,
+            item.level,
+            item.quality,
+            item.max_stack_size,
+            item.vendor_price,
+            item.class_index,
+            item.class_name,
+        )
+        for item in items
+    )
+    content = orjson.dumps([len(snapshot_columns[0]), listings % 2**64, item_rows])
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def rank_auction_deals(
+    snapshot_columns: tuple[array[int], ...], items: list[Item], stats_by_item: dict[int, RobustPriceStats]
+) -> list[tuple[Any, ...]]:
+    """Rank the vendor and market deals of a snapshot
+
+    Vendor deals are ranked by savings, market deals by discount so that every "at least X% below the median" query
+    is a prefix of the ranking.
+
+    Args:
+        snapshot_columns: The item IDs, unit buyout prices, unit starting bid prices and quantities of the listings
+        items: The unique items of the snapshot
+        stats_by_item: The robust buyout price statistics of the snapshot per item ID
+
+    Returns:
+        The deals as (kind, rank, item_id, unit_buyout_price, unit_starting_bid_price, quantity, reference_price,
+        unit_savings, discount_pct)
+    """
+    items_by_id = {item.id: item for item in items}
+
+    vendor_deals = []
+    market_deals = []
+    for listing in zip(*snapshot_columns, strict=True):
+        item_id, price = listing[0], listing[1]
+        if price <= 0:
+            continue
+
+        item = items_by_id[item_id]
+        if 0 < price < item.vendor_price:
+            vendor_deals.append((listing, item.name, item.vendor_price))
+
+        median = stats_by_item[item_id].median_price
+        if median and (median - price) * 100.0 / median >= MARKET_DEAL_MIN_DISCOUNT_PCT:
+            market_deals.append((listing, item.name, median))
+
+    vendor_deals.sort(key=lambda deal: (deal[0][1] - deal[2], deal[1]))
+    market_deals.sort(key=lambda deal: (deal[0][1] / deal[2], deal[1]))
+
+    return [
+        (
+            kind.value,
+            rank,
+            item_id,
+            price,
+            starting_bid_price,
+            quantity,
+            reference_price,
+            reference_price - price,
+            (reference_price - price) * 100.0 / reference_price,
+        )
+        for kind, deals in ((AuctionDealKind.VENDOR, vendor_deals), (AuctionDealKind.MARKET, market_deals))
+        for rank, ((item_id, price, starting_bid_price, quantity), _, reference_price) in enumerate(deals, start=1)
+    ]
+
+
+def _prepare(data: AuctionData, started: float) -> PreparedSnapshot:
+    items = list({auction.item.id: auction.item for auction in data.auctions}.values())
+    columns = (
+        array("q", [auction.item.id for auction in data.auctions]),
+        array("q", [auction.unit_buyout_price for auction in data.auctions]),
+        array("q", [auction.unit_starting_bid_price for auction in data.auctions]),
+        array("q", [auction.quantity for auction in data.auctions]),
+    )
+    item_ids, unit_buyout_prices, _, quantities = columns
+
+    # Group the listings by item, the buyout listings are the price history and the base of the market prices
+    buyout_listings: defaultdict[int, list[tuple[int, int]]] = defaultdict(list)
+    listing_counts: defaultdict[int, int] = defaultdict(int)
+    total_quantities: defaultdict[int, int] = defaultdict(int)
+    total_value = 0
+    for item_id, price, quantity in zip(item_ids, unit_buyout_prices, quantities, strict=True):
+        listing_counts[item_id] += 1
+        total_quantities[item_id] += quantity
+        if price > 0:
+            buyout_listings[item_id].append((price, quantity))
+            total_value += price * quantity
+
+    item_listings = []
+    stats_by_item = {}
+    for item_id, listing_count in listing_counts.items():
+        listings = sorted(buyout_listings.get(item_id, ()))
+        prices = array("q", [price for price, _ in listings])
+        stats = stats_by_item[item_id] = robust_price_stats(prices)
+        item_listings.append(
+            ItemListings(
+                item_id=item_id,
+                buyout_prices=prices,
+                quantities=array("q", [quantity for _, quantity in listings]),
+                listing_count=listing_count,
+                total_quantity=total_quantities[item_id],
+                stats=stats,
+            )
+        )
+
+    return PreparedSnapshot(
+        server=data.server,
+        realm=data.realm,
+        scanned_at=data.scanned_at,
+        items=items,
+        item_ids=item_ids,
+        unit_buyout_prices=unit_buyout_prices,
+        unit_starting_bid_prices=columns[2],
+        quantities=quantities,
+        item_listings=item_listings,
+        deals=rank_auction_deals(columns, items, stats_by_item),
+        total_value=total_value,
+        fingerprint=fingerprint_snapshot(columns, items),
+        prepare_seconds=time.perf_counter() - started,
+    )
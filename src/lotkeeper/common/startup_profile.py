@@ -0,0 +1,107 @@
+"""Cold start profiling of a worker.
+
+The startup phases of the lifespan are timed on every boot. The import profile runs the import of the app with
+``python -X importtime`` in a fresh interpreter, a process that already imported the app can't see its own imports.
+
+Usage:
+    uv run python -m lotkeeper.main start --profile-startup
+"""
+
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StartupProfile:
+    """The durations of the startup phases of a worker in milliseconds."""
+
+    phases: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a startup phase
+
+        Args:
+            name: The name of the phase
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (time.perf_counter() - started) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.phases.values())
+
+    def __str__(self) -> str:
+        return ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.phases.items())
+
+
+@dataclass(frozen=True, slots=True)
+class ImportTiming:
+    module: str
+    depth: int  # 0 for the profiled module, 1 for its direct imports
+    self_ms: float
+    cumulative_ms: float
+
+
+@dataclass(frozen=True, slots=True)
+class ImportProfile:
+    module: str
+    wall_ms: float  # interpreter start and import of the module
+    timings: list[ImportTiming]  # the module and everything it imported
+
+    @property
+    def import_ms(self) -> float:
+        return next((t.cumulative_ms for t in self.timings if t.module == self.module), 0.0)
+
+    def direct_imports(self) -> list[ImportTiming]:
+        """Get the direct imports of the profiled module, slowest first"""
+        return sorted((t for t in self.timings if t.depth == 1), key=lambda t: t.cumulative_ms, reverse=True)
+
+    def slowest(self, limit: int) -> list[ImportTiming]:
+        """Get the modules with the slowest own import time, without their imports"""
+        return sorted(self.timings, key=lambda t: t.self_ms, reverse=True)[:limit]
+
+
+def profile_imports(module: str = "lotkeeper.main") -> ImportProfile:
+    """Import a module in a fresh interpreter and record the import time of every module it loads
+
+    Args:
+        module: The module to import
+
+    Returns:
+        The import profile
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=os.environ,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    # Lines look like "import time:       602 |      49538 |   lotkeeper.middlewares.dynrender" in microseconds,
+    # nested imports are indented by two spaces per level
+    timings = []
+    for line in result.stderr.splitlines():
+        match line.removeprefix("import time:").split("|"):
+            case [own, cumulative, name] if own.strip().isdigit():  # skips the header line
+                depth = (len(name) - len(name.lstrip()) - 1) // 2
+                timings.append(ImportTiming(name.strip(), depth, int(own) / 1000, int(cumulative) / 1000))
+
+    # Modules are listed once their import finished, after their own imports. Keep the imports of the profiled module
+    # and drop the ones of the interpreter startup (site, .pth files) listed before it
+    end = next(i for i, t in enumerate(timings) if t.depth == 0 and t.module == module) + 1
+    start = next((i + 1 for i in range(end - 2, -1, -1) if timings[i].depth == 0), 0)
+    timings = timings[start:end]
+
+    return ImportProfile(module=module, wall_ms=wall_ms, timings=timings)
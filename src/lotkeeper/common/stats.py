@@ -0,0 +1,76 @@
+"""Robust price statistics, equivalent to the MAD/IQR outlier filtering of the SQL analytics queries.
+
+Used at ingest where the listings are already in memory, which avoids re-reading freshly inserted rows
+that the query planner has no statistics for yet.
+"""
+
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+MAD_THRESHOLD = 10  # minimum number of prices to use MAD, fewer fall back to IQR
+MAD_K = 3.0
+IQR_K = 1.5
+MAD_SCALE = 1.4826  # scales the MAD to the standard deviation of a normal distribution
+
+
+@dataclass(frozen=True, slots=True)
+class RobustPriceStats:
+    count: int
+    min_price: int | None
+    median_price: int | None  # median of the inliers
+    outlier_count: int
+
+
+def percentile_cont(sorted_values: Sequence[float], q: float) -> float:
+    """Continuous percentile with linear interpolation, like Postgres percentile_cont
+
+    Args:
+        sorted_values: The values in ascending order, must not be empty
+        q: The percentile between 0 and 1
+
+    Returns:
+        The interpolated percentile
+    """
+    position = q * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def robust_price_stats(prices: Sequence[int]) -> RobustPriceStats:
+    """Get the min and the outlier-filtered median of buyout prices
+
+    Outliers are prices more than MAD_K scaled MADs from the median. With fewer than MAD_THRESHOLD prices
+    or a MAD of 0 the IQR fences are used instead, and if the spread is 0 nothing is an outlier.
+
+    Args:
+        prices: The buyout prices, bid-only listings (price 0) must be excluded
+
+    Returns:
+        The robust price statistics
+    """
+    if not prices:
+        return RobustPriceStats(count=0, min_price=None, median_price=None, outlier_count=0)
+
+    ordered = sorted(prices)
+    median = percentile_cont(ordered, 0.5)
+    q1 = percentile_cont(ordered, 0.25)
+    q3 = percentile_cont(ordered, 0.75)
+    mad = percentile_cont(sorted(abs(price - median) for price in ordered), 0.5)
+
+    use_mad = len(ordered) >= max(3, MAD_THRESHOLD) and mad > 0
+    if use_mad:
+        low, high = median - MAD_K * MAD_SCALE * mad, median + MAD_K * MAD_SCALE * mad
+    elif q3 - q1 > 0:
+        low, high = q1 - IQR_K * (q3 - q1), q3 + IQR_K * (q3 - q1)
+    else:
+        low, high = -math.inf, math.inf
+
+    inliers = [price for price in ordered if low <= price <= high]
+    return RobustPriceStats(
+        count=len(ordered),
+        min_price=ordered[0],
+        median_price=math.floor(percentile_cont(inliers, 0.5) + 0.5) if inliers else None,  # round half up like SQL
+        outlier_count=len(ordered) - len(inliers),
+    )
@@ -0,0 +1,194 @@
+"""Deterministic synthetic auction house data for capacity testing and benchmarks.
+
+The same seed always produces the same item catalog, and the same seed, realm and timestamp always produce
+the same listings, so any hour of history can be generated independently.
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from lotkeeper.models.auction import Auction, AuctionData
+from lotkeeper.models.item import Item
+
+# (class name, class index, max stack size)
+ITEM_CLASSES: tuple[tuple[str, int, int], ...] = (
+    ("Consumable", 0, 20),
+    ("Container", 1, 1),
+    ("Weapon", 2, 1),
+    ("Gem", 3, 20),
+    ("Armor", 4, 1),
+    ("Reagent", 5, 20),
+    ("Projectile", 6, 200),
+    ("Trade Goods", 7, 20),
+    ("Recipe", 9, 1),
+    ("Miscellaneous", 15, 1),
+)
+QUALITY_WEIGHTS: tuple[int, ...] = (15, 45, 25, 10, 4, 1)  # poor, common, uncommon, rare, epic, legendary
+NAME_PREFIXES: tuple[str, ...] = ("Ancient", "Runed", "Heavy", "Light", "Savage", "Mystic", "Frozen", "Burning")
+NAME_NOUNS: tuple[str, ...] = ("Leather", "Blade", "Potion", "Cloth", "Ore", "Elixir", "Gem", "Helm", "Scroll", "Herb")
+EPOCH = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticItem:
+    id: int
+    name: str
+    level: int
+    quality: int
+    max_stack_size: int
+    vendor_price: int
+    class_index: int
+    class_name: str
+    base_price: float  # the typical unit buyout price in copper
+    volatility: float  # the spread of listing prices around the market price
+    trend: float  # the relative price change over 90 days
+    phase: float  # the offset of the weekly price cycle
+
+    def to_view(self) -> Item:
+        return Item(
+            id=self.id,
+            name=self.name,
+            link=f"|cffffffff|Hitem:{self.id}::::::::80:::::|h[{self.name}]|h|r",
+            icon="inv_misc_questionmark",
+            level=self.level,
+            quality=self.quality,
+            max_stack_size=self.max_stack_size,
+            vendor_price=self.vendor_price,
+            class_index=self.class_index,
+            class_name=self.class_name,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticListing:
+    item_id: int
+    unit_buyout_price: int
+    unit_starting_bid_price: int
+    quantity: int
+    is_outlier: bool
+
+
+class SyntheticRealmGenerator:
+    """Generates listings for a realm with log-normal prices, weekly cycles, long-term trends and outliers.
+
+    Item popularity follows a Zipf-like distribution, so a few items make up most listings like on real realms.
+    """
+
+    def __init__(self, seed: int, server: str, realm: str, item_count: int, outlier_rate: float = 0.02):
+        self.seed = seed
+        self.server = server
+        self.realm = realm
+        self.outlier_rate = outlier_rate
+        self.items = generate_item_catalog(seed, item_count)
+        self.items_by_id = {item.id: item for item in self.items}
+        self._views = {item.id: item.to_view() for item in self.items}
+        self._cum_weights = _cumulative([1 / (rank + 1) ** 0.9 for rank in range(len(self.items))])
+
+        # Realms share the catalog but have their own price level
+        self.price_factor = random.Random(f"{seed}:{realm}:factor").uniform(0.8, 1.25)
+
+    def market_price(self, item: SyntheticItem, timestamp: datetime) -> float:
+        """Get the market price of an item at a point in time (before per-listing noise)"""
+        days = (timestamp - EPOCH).total_seconds() / 86_400
+        weekly = 1 + 0.1 * math.sin(2 * math.pi * days / 7 + item.phase)
+        return item.base_price * self.price_factor * weekly * math.exp(item.trend * days / 90)
+
+    def listings(self, timestamp: datetime, count: int) -> list[SyntheticListing]:
+        """Generate the listings of a snapshot taken at the given time
+
+        Args:
+            timestamp: The time of the snapshot, the same time always produces the same listings
+            count: The number of listings
+
+        Returns:
+            The listings of the snapshot
+        """
+        rnd = random.Random(f"{self.seed}:{self.realm}:{timestamp.isoformat()}")
+        items = rnd.choices(self.items, cum_weights=self._cum_weights, k=count)
+        market_prices = {item.id: self.market_price(item, timestamp) for item in set(items)}
+
+        listings = []
+        for item in items:
+            price = market_prices[item.id] * rnd.lognormvariate(0, item.volatility)
+            is_outlier = rnd.random() < self.outlier_rate
+            if is_outlier:
+                price *= rnd.uniform(8, 60) if rnd.random() < 0.7 else rnd.uniform(0.02, 0.2)  # noqa: PLR2004
+
+            buyout = max(1, int(price))
+            if rnd.random() < 0.03:  # noqa: PLR2004 - bid-only listings
+                buyout = 0
+
+            quantity = 1 if item.max_stack_size == 1 else rnd.choice((1, 1, 5, 10, item.max_stack_size))
+            starting_bid = max(1, int((buyout or price) * rnd.uniform(0.5, 0.95)))
+            listings.append(SyntheticListing(item.id, buyout, starting_bid, quantity, is_outlier))
+
+        return listings
+
+    def snapshot(self, listings: list[SyntheticListing]) -> AuctionData:
+        """Turn generated listings into a full agent snapshot
+
+        Args:
+            listings: The listings of the snapshot
+
+        Returns:
+            The snapshot as submitted by agents
+        """
+        auctions = [
+            Auction.model_construct(
+                item=self._views[listing.item_id],
+                unit_buyout_price=listing.unit_buyout_price,
+                unit_starting_bid_price=listing.unit_starting_bid_price,
+                quantity=listing.quantity,
+            )
+            for listing in listings
+        ]
+        return AuctionData.model_construct(server=self.server, realm=self.realm, auctions=auctions)
+
+
+def generate_item_catalog(seed: int, count: int) -> list[SyntheticItem]:
+    """Generate a deterministic item catalog ordered by popularity (most popular first)
+
+    Args:
+        seed: The random seed
+        count: The number of items
+
+    Returns:
+        The item catalog
+    """
+    rnd = random.Random(f"{seed}:catalog")
+    item_ids = rnd.sample(range(1_000, 60_000), count)
+
+    items = []
+    for item_id in item_ids:
+        class_name, class_index, max_stack_size = rnd.choice(ITEM_CLASSES)
+        quality = rnd.choices(range(len(QUALITY_WEIGHTS)), weights=QUALITY_WEIGHTS)[0]
+        base_price = rnd.lognormvariate(math.log(200 * 4**quality), 1.2)
+        items.append(
+            SyntheticItem(
+                id=item_id,
+                name=f"{rnd.choice(NAME_PREFIXES)} {rnd.choice(NAME_NOUNS)} {item_id}",
+                level=rnd.randint(1, 80),
+                quality=quality,
+                max_stack_size=max_stack_size,
+                vendor_price=int(base_price * rnd.uniform(0.05, 0.6)),
+                class_index=class_index,
+                class_name=class_name,
+                base_price=base_price,
+                volatility=rnd.uniform(0.05, 0.35),
+                trend=rnd.uniform(-0.3, 0.3),
+                phase=rnd.uniform(0, 2 * math.pi),
+            )
+        )
+
+    return items
+
+
+def _cumulative(weights: list[float]) -> list[float]:
+    total = 0.0
+    cumulative = []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
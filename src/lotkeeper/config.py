@@ -1,6 +1,8 @@
+import os
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
+from typing import Any, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -30,6 +32,17 @@ class AppEnvironment(BaseSettings):
     # --- Environment ---
     LOT_ENVIRONMENT: Environment = Environment.DEVELOPMENT
 
+    # --- Server ---
+    LOT_WORKERS: int | None = None  # defaults to the cpu count in production and 1 in development
+    LOT_SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] | None = None  # defaults to uvloop in production
+    LOT_SERVER_HTTP: Literal["auto", "h11", "httptools"] | None = None  # defaults to httptools in production
+    LOT_SERVER_BACKLOG: int = 2048  # pending connections queued per listening socket, capped by net.core.somaxconn
+    LOT_SERVER_LIMIT_CONCURRENCY: int | None = None  # connections per worker before answering 503, 512 in production
+    LOT_SERVER_KEEP_ALIVE: int | None = None  # idle seconds before closing a connection, 130 in production and 5 else
+    LOT_SERVER_MAX_REQUESTS: int | None = None  # requests before a worker is replaced, 50000 in production
+    LOT_SERVER_MAX_REQUESTS_JITTER: int | None = None  # random extra requests per worker, defaults to half the max
+    LOT_SERVER_GRACEFUL_SHUTDOWN: int = 30  # seconds a stopping worker waits for its in-flight requests
+
     # --- CORS ---
     LOT_ALLOWED_ORIGINS: list[str] = ["*"]
 
@@ -40,10 +53,49 @@ class AppEnvironment(BaseSettings):
     LOT_POSTGRES_PASSWORD: str = "postgres"
     LOT_POSTGRES_DB: str = "lotkeeper"
 
+    # --- Database pool ---
+    LOT_POSTGRES_MAX_CONNECTIONS: int = 100  # must match max_connections of the postgres server (or pgbouncer)
+    LOT_DB_RESERVED_CONNECTIONS: int = 10  # kept free for migrations, maintenance and psql sessions
+    LOT_DB_POOL_SIZE: int | None = None  # defaults to a share of the connection budget per worker
+    LOT_DB_MAX_OVERFLOW: int | None = None  # defaults to the remainder of the connection budget per worker
+    LOT_DB_POOL_TIMEOUT: float = 10.0
+    LOT_DB_POOL_PRE_PING: bool = True
+    LOT_DB_POOL_RECYCLE: int = 1800
+    LOT_DB_POOL_SLOW_WAIT: float = 0.1  # pool checkouts waiting longer than this (seconds) are logged
+    LOT_DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements cached per connection
+    LOT_DB_PGBOUNCER: bool = False  # pgbouncer in transaction pooling mode, disables prepared statement caching
+    LOT_DB_MIGRATION_LOCK_TIMEOUT: float = 300.0  # seconds a worker waits for another worker's migration
+
+    # --- Database read replicas ---
+    LOT_POSTGRES_REPLICA_HOSTS: list[str] = []  # host or host:port, same user, password and database as the primary
+    LOT_DB_REPLICA_MAX_LAG: float = 5.0  # seconds, replicas lagging more are skipped until they catch up
+    LOT_DB_REPLICA_CHECK_INTERVAL: float = 1.0  # seconds between replication lag checks
+
     # --- Redis ---
     LOT_VALKEY_HOST: str = "localhost"
     LOT_VALKEY_PORT: int = 6379
 
+    # --- Rate limiting ---
+    LOT_RATE_LIMIT_ENABLED: bool = True
+    LOT_RATE_LIMIT_SYNC_INTERVAL: float = 1.0  # seconds between synchronizations of the local counters with valkey
+    LOT_RATE_LIMIT_MAX_DRIFT: int = 10  # unsynchronized hits per limit and worker before synchronizing early
+
+    # --- Realm update streams ---
+    LOT_REALM_STREAM_MAX_CONNECTIONS: int = 256  # open streams per worker, they count against the concurrency limit
+    LOT_REALM_STREAM_HEARTBEAT: float = 15.0  # seconds between keep-alive comments of an idle stream
+
+    # --- Ingest ---
+    LOT_INGEST_LOCK_TIMEOUT: float = 120.0  # seconds an ingest waits for another ingest of its realm before failing
+    LOT_INGEST_LOCK_SLOW_WAIT: float = 1.0  # ingests waiting longer than this (seconds) for their realm are logged
+    LOT_INGEST_PROCESSES: int = 1  # processes per worker validating and preparing snapshots, 0 uses the event loop
+
+    # --- Snapshot deduplication ---
+    LOT_SNAPSHOT_DEDUP_WINDOW: int = 3600  # seconds a submitted snapshot is remembered, resubmissions are skipped
+
+    # --- Retention ---
+    LOT_RETENTION_ENABLED: bool = True  # downsample and purge the price history tiers in the background
+    LOT_RETENTION_INTERVAL: int = 3600  # seconds between retention runs
+
     # --- Debug ---
     LOT_DB_ECHO: bool = False
 
@@ -57,11 +109,76 @@ class AppEnvironment(BaseSettings):
 
         return self.LOT_ENVIRONMENT == Environment.PRODUCTION
 
+    def get_worker_count(self) -> int:
+        """Get the number of server worker processes"""
+
+        if self.LOT_WORKERS:
+            return self.LOT_WORKERS
+
+        return (os.cpu_count() or 1) if self.is_prod() else 1
+
+    def get_server_options(self) -> dict[str, Any]:
+        """Get the uvicorn options of the server, tuned for throughput in production
+
+        Caddy keeps idle upstream connections open for 2 minutes, the keep-alive of production outlasts it so
+        Caddy never reuses a connection the worker is closing. A recycled worker stops accepting and finishes its
+        in-flight requests before the supervisor starts its replacement, the wide jitter keeps the workers from
+        being recycled at the same time.
+        """
+
+        prod = self.is_prod()
+        max_requests = self.LOT_SERVER_MAX_REQUESTS or (50_000 if prod else None)
+        jitter = self.LOT_SERVER_MAX_REQUESTS_JITTER
+        return {
+            "workers": self.get_worker_count(),
+            "loop": self.LOT_SERVER_LOOP or ("uvloop" if prod else "auto"),
+            "http": self.LOT_SERVER_HTTP or ("httptools" if prod else "auto"),
+            "backlog": self.LOT_SERVER_BACKLOG,
+            "limit_concurrency": self.LOT_SERVER_LIMIT_CONCURRENCY or (512 if prod else None),
+            "timeout_keep_alive": self.LOT_SERVER_KEEP_ALIVE or (130 if prod else 5),
+            "limit_max_requests": max_requests,
+            "limit_max_requests_jitter": jitter if jitter is not None else (max_requests or 0) // 2,
+            "timeout_graceful_shutdown": self.LOT_SERVER_GRACEFUL_SHUTDOWN,
+        }
+
+    def get_db_connection_budget(self) -> int:
+        """Get the number of database connections a single worker may hold (pool size plus overflow)"""
+
+        available = self.LOT_POSTGRES_MAX_CONNECTIONS - self.LOT_DB_RESERVED_CONNECTIONS
+        return max(2, available // self.get_worker_count())
+
+    def get_db_pool_size(self) -> int:
+        """Get the number of persistent database connections per worker"""
+
+        if self.LOT_DB_POOL_SIZE is not None:
+            return self.LOT_DB_POOL_SIZE
+
+        return max(1, self.get_db_connection_budget() * 3 // 4)
+
+    def get_db_max_overflow(self) -> int:
+        """Get the number of temporary database connections per worker on top of the pool size"""
+
+        if self.LOT_DB_MAX_OVERFLOW is not None:
+            return self.LOT_DB_MAX_OVERFLOW
+
+        return max(0, self.get_db_connection_budget() - self.get_db_pool_size())
+
     def get_database_url(self) -> str:
         """Get the postgres database URL"""
 
         return f"postgresql+asyncpg://{self.LOT_POSTGRES_USER}:{self.LOT_POSTGRES_PASSWORD}@{self.LOT_POSTGRES_HOST}:{self.LOT_POSTGRES_PORT}/{self.LOT_POSTGRES_DB}"
 
+    def get_replica_database_urls(self) -> list[str]:
+        """Get the postgres database URLs of the read replicas"""
+
+        urls = []
+        for replica in self.LOT_POSTGRES_REPLICA_HOSTS:
+            host, _, port = replica.partition(":")
+            urls.append(
+                f"postgresql+asyncpg://{self.LOT_POSTGRES_USER}:{self.LOT_POSTGRES_PASSWORD}@{host}:{port or self.LOT_POSTGRES_PORT}/{self.LOT_POSTGRES_DB}"
+            )
+        return urls
+
     def get_database_url_sync(self) -> str:
         """Get the postgres database URL"""
 
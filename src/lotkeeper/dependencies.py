@@ -4,24 +4,43 @@ Contains global dependencies for the application, they are used for dependency i
 """
 
 from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from lotkeeper.config import ENV
+from lotkeeper.infra import rate_limit_storage  # noqa: F401 - registers the batched+redis storage scheme
 from lotkeeper.services.auction_service import AuctionService
 from lotkeeper.services.datapoint_service import DatapointService
 from lotkeeper.services.item_service import ItemService
+from lotkeeper.services.market_service import MarketService
+from lotkeeper.services.retention_service import RetentionService
 from lotkeeper.services.server_realm_service import ServerRealmService
 
 from .infra.db import DB
+from .infra.ingest_pool import IngestPool
+from .infra.realm_events import RealmEventBroker
+from .infra.snapshot_dedup import SnapshotDeduplicator
+
+if TYPE_CHECKING:
+    from lotkeeper.services.seed_service import SeedService
 
 
 # --- Dependencies ---
+@lru_cache(maxsize=1)
 def get_rate_limiter() -> Limiter:
-    """Get the rate limiter instance"""
+    """Get the rate limiter instance, shared by all routes of the worker"""
 
-    return Limiter(key_func=get_remote_address, storage_uri=f"redis://{ENV.LOT_VALKEY_HOST}:{ENV.LOT_VALKEY_PORT}")
+    return Limiter(
+        key_func=get_remote_address,
+        enabled=ENV.LOT_RATE_LIMIT_ENABLED,
+        storage_uri=f"batched+redis://{ENV.LOT_VALKEY_HOST}:{ENV.LOT_VALKEY_PORT}",
+        storage_options={
+            "sync_interval": str(ENV.LOT_RATE_LIMIT_SYNC_INTERVAL),
+            "max_drift": str(ENV.LOT_RATE_LIMIT_MAX_DRIFT),
+        },
+    )
 
 
 @lru_cache(maxsize=1)
@@ -31,6 +50,33 @@ def get_db() -> DB:
     return DB()
 
 
+@lru_cache(maxsize=1)
+def get_realm_event_broker() -> RealmEventBroker:
+    """Get the realm update broker, shared by the ingests and update streams of the worker"""
+
+    return RealmEventBroker(
+        get_db(),
+        f"redis://{ENV.LOT_VALKEY_HOST}:{ENV.LOT_VALKEY_PORT}",
+        max_connections=ENV.LOT_REALM_STREAM_MAX_CONNECTIONS,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_snapshot_deduplicator() -> SnapshotDeduplicator:
+    """Get the snapshot deduplicator, shared by the agent submissions of the worker"""
+
+    return SnapshotDeduplicator(
+        f"redis://{ENV.LOT_VALKEY_HOST}:{ENV.LOT_VALKEY_PORT}", window=ENV.LOT_SNAPSHOT_DEDUP_WINDOW
+    )
+
+
+@lru_cache(maxsize=1)
+def get_ingest_pool() -> IngestPool:
+    """Get the process pool preparing the submitted snapshots of the worker"""
+
+    return IngestPool(ENV.LOT_INGEST_PROCESSES)
+
+
 @lru_cache(maxsize=1)
 def get_datapoint_service() -> DatapointService:
     """Get the auction datapoint service instance"""
@@ -38,11 +84,27 @@ def get_datapoint_service() -> DatapointService:
     return DatapointService(get_db())
 
 
+@lru_cache(maxsize=1)
+def get_market_service() -> MarketService:
+    """Get the market service instance"""
+
+    return MarketService(get_db())
+
+
+@lru_cache(maxsize=1)
+def get_retention_service() -> RetentionService:
+    """Get the retention service instance"""
+
+    return RetentionService(get_db())
+
+
 @lru_cache(maxsize=1)
 def get_auction_service() -> AuctionService:
     """Get the auction service instance"""
 
-    return AuctionService(get_db(), get_datapoint_service())
+    return AuctionService(
+        get_db(), get_datapoint_service(), get_item_service(), get_market_service(), get_realm_event_broker()
+    )
 
 
 @lru_cache(maxsize=1)
@@ -57,3 +119,18 @@ def get_server_realm_service() -> ServerRealmService:
     """Get the server realm service instance"""
 
     return ServerRealmService(get_db())
+
+
+@lru_cache(maxsize=1)
+def get_seed_service() -> "SeedService":
+    """Get the synthetic data seed service instance, only the seed command loads it"""
+    from lotkeeper.services.seed_service import SeedService  # noqa: PLC0415
+
+    return SeedService(
+        get_db(),
+        auction_service=get_auction_service(),
+        datapoint_service=get_datapoint_service(),
+        market_service=get_market_service(),
+        retention_service=get_retention_service(),
+        server_realm_service=get_server_realm_service(),
+    )
@@ -1,98 +1,256 @@
+import ast
 import os
-import subprocess
-import sys
+import time
+from collections.abc import Iterable
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
 
 from loguru import logger
-from sqlalchemy import text
+from sqlalchemy import Connection, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker, create_async_engine
 
 from lotkeeper.common.logging import propagate_logs
 from lotkeeper.config import ENV
+from lotkeeper.infra.db_pool import DbPoolStatus, InstrumentedAsyncQueuePool
+from lotkeeper.infra.db_replica import DbReplicaStatus, Replica, ReplicaRouter
+from lotkeeper.infra.ingest_lock import LOCK_NOT_AVAILABLE, IngestLockStatus, RealmIngestLock
 from lotkeeper.models.base.db_model import DbModel
 from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
 
+MIGRATION_LOCK_ID = 12345  # advisory lock, only one worker migrates at a time
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+if TYPE_CHECKING:
+    from alembic.config import Config
+
+
+def _get_alembic_config() -> "Config":
+    # Alembic is imported on demand, the boot of a worker at head never needs it
+    from alembic.config import Config  # noqa: PLC0415
+
+    # Without an ini file, so alembic leaves the logging configuration alone
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return config
+
+
+@cache
+def _get_head_revisions() -> set[str]:
+    """Get the head revisions of the migration scripts, read once per process.
+
+    Parses the revision identifiers of the scripts instead of loading them through alembic, which would import
+    alembic and every migration module on each boot. A head is a revision no other revision builds on.
+    """
+    revisions: set[str] = set()
+    down_revisions: set[str] = set()
+    for path in (MIGRATIONS_DIR / "versions").glob("*.py"):
+        for node in ast.parse(path.read_text()).body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target, value = node.targets[0], node.value
+            elif isinstance(node, ast.AnnAssign) and node.value is not None:
+                target, value = node.target, node.value
+            else:
+                continue
+
+            if isinstance(target, ast.Name) and target.id == "revision":
+                revisions.add(ast.literal_eval(value))
+            elif isinstance(target, ast.Name) and target.id == "down_revision" and (down := ast.literal_eval(value)):
+                down_revisions.update([down] if isinstance(down, str) else down)
+    return revisions - down_revisions
+
+
+def _upgrade_to_head(sync_conn: Connection) -> None:
+    from alembic import command  # noqa: PLC0415
+
+    config = _get_alembic_config()
+    config.attributes["connection"] = sync_conn  # env.py runs the migrations on this connection
+    command.upgrade(config, "head")
+
 
 class DB:
     """Database connection and session management singleton."""
 
-    def __init__(self, database_url: str = ENV.get_database_url()):
-        self.engine = create_async_engine(database_url, echo=ENV.LOT_DB_ECHO, future=True)
+    def __init__(
+        self, database_url: str = ENV.get_database_url(), replica_urls: list[str] = ENV.get_replica_database_urls()
+    ):
+        self.engine = create_async_engine(database_url, echo=ENV.LOT_DB_ECHO, future=True, **self._get_engine_options())
         self.async_session = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.replicas = ReplicaRouter(
+            [self._create_replica(url) for url in replica_urls],
+            max_lag=ENV.LOT_DB_REPLICA_MAX_LAG,
+            check_interval=ENV.LOT_DB_REPLICA_CHECK_INTERVAL,
+        )
+        self.ingest_lock = RealmIngestLock(ENV.LOT_INGEST_LOCK_TIMEOUT, ENV.LOT_INGEST_LOCK_SLOW_WAIT)
         propagate_logs()  # Propagate stdlib logs to loguru
 
+    def _create_replica(self, url: str) -> Replica:
+        engine = create_async_engine(url, echo=ENV.LOT_DB_ECHO, future=True, **self._get_engine_options())
+        parsed = make_url(url)
+        return Replica(
+            name=f"{parsed.host}:{parsed.port}",
+            engine=engine,
+            async_session=async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+        )
+
+    @staticmethod
+    def _get_engine_options() -> dict[str, Any]:
+        """Get the connection pool and driver options, sized to the connection budget of a single worker."""
+
+        # The dialect prepares the statements through its own cache, asyncpg's cache only serves its own queries
+        connect_args: dict[str, Any] = {
+            "statement_cache_size": ENV.LOT_DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": ENV.LOT_DB_STATEMENT_CACHE_SIZE,
+        }
+
+        if ENV.LOT_DB_PGBOUNCER:
+            # Transaction pooling hands out a different server connection per transaction,
+            # so prepared statements can't be cached and need unique names
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+
+        return {
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": ENV.get_db_pool_size(),
+            "max_overflow": ENV.get_db_max_overflow(),
+            "pool_timeout": ENV.LOT_DB_POOL_TIMEOUT,
+            "pool_pre_ping": ENV.LOT_DB_POOL_PRE_PING,
+            "pool_recycle": ENV.LOT_DB_POOL_RECYCLE,
+            "connect_args": connect_args,
+        }
+
     async def connect(self) -> None:
-        """Connect to the database and initialize it."""
-        logger.info("Connecting to database...")
+        """Connect to the database and migrate it if the schema is not at head."""
+        started = time.perf_counter()
+        logger.info(
+            f"Connecting to database (pool size {ENV.get_db_pool_size()}, max overflow {ENV.get_db_max_overflow()}, "
+            f"{ENV.get_worker_count()} workers, pgbouncer {ENV.LOT_DB_PGBOUNCER})..."
+        )
+
+        # Fast path of every boot, a single query without the migration lock
+        async with self.engine.connect() as conn:
+            at_head = await self._is_at_head(conn)
+
+        if at_head:
+            logger.info("Database schema is at head, skipping migrations")
+        else:
+            try:
+                await self.migrate(force=False)
+            except Exception as e:
+                logger.error(f"Failed to run migrations: {e}")
+                if ENV.is_prod():
+                    raise
+                logger.warning("Migration failed, continuing in development mode")
+
+        if self.replicas.replicas:
+            logger.info(f"Routing reads to {len(self.replicas.replicas)} read replicas")
+            await self.replicas.start()
+
+        logger.info(f"Database is ready in {(time.perf_counter() - started) * 1000:.0f}ms")
 
-        # Try to acquire migration lock - only one worker should run migrations
-        migration_lock_acquired = await self._try_acquire_migration_lock()
+    async def migrate(self, force: bool = True, recompress: bool = False) -> None:
+        """Upgrade the schema to head and apply the hypertable settings of the models.
 
-        if migration_lock_acquired:
-            logger.info("Migration lock acquired - running migrations")
-            await self._run_migrations_sync()
+        Runs in-process while holding the migration lock, workers that wait for the lock skip the work if the
+        schema reached head in the meantime. Deploys run it with force, which always applies the hypertable settings.
+
+        Args:
+            force: Apply the hypertable settings even if the schema is already at head
+            recompress: Decompress the compressed chunks of hypertables whose compression layout changed
+        """
+        async with self.engine.connect() as conn:
+            await self._acquire_migration_lock(conn)
+            try:
+                if not force and await self._is_at_head(conn):
+                    logger.info("Database schema was migrated by another worker")
+                    return
+
+                logger.info("Running database migrations...")
+                await conn.run_sync(_upgrade_to_head)
+                await conn.commit()
 
-            # Create hypertables in the same worker that ran migrations
-            async with self.engine.begin() as conn:
                 logger.info("Creating hypertables if needed")
-                await self._create_hypertables(conn)
+                await self._create_hypertables(conn, recompress)
+                await conn.commit()
                 logger.info("Database has been set up and is ready to use")
-        else:
-            logger.warning("Migration lock not acquired - skipping migrations (another worker is handling them)")
+            finally:
+                # A failed step leaves the transaction aborted, the unlock would fail and hide its error. The lock is
+                # held by the session, a connection returned to the pool without the unlock would keep it
+                await conn.rollback()
+                await conn.execute(text(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_ID})"))
+                await conn.commit()
 
-            # Still connect but don't create hypertables
-            async with self.engine.begin() as conn:
-                logger.info("Connected, database setup handled by another worker")
+    async def disconnect(self) -> None:
+        """Close all pooled connections of this worker."""
 
-    async def _run_migrations_sync(self) -> None:
-        """Run database migrations using Alembic (sync)."""
-        try:
-            logger.info("Running database migrations...")
-
-            sync_url = ENV.get_database_url_sync()
-            current_file = Path(__file__)
-            migrations_dir = current_file.parent.parent
-
-            # Set environment variable for Alembic to use
-            env = os.environ.copy()
-            env["DB_URL"] = sync_url
-
-            result = subprocess.run(
-                [sys.executable, "-m", "alembic", "upgrade", "head"],
-                check=False,
-                cwd=migrations_dir,
-                capture_output=True,
-                text=True,
-                env=env,
-            )
-
-            if result.returncode == 0:
-                logger.info("Migrations completed successfully")
-                if result.stdout:
-                    logger.info(f"Migration output: {result.stdout}")
-            else:
-                logger.error(f"Migration failed with return code: {result.returncode}")
-                logger.error(f"Migration stdout: {result.stdout}")
-                logger.error(f"Migration stderr: {result.stderr}")
+        await self.replicas.stop()
+        await self.engine.dispose()
 
-                if ENV.is_prod():
-                    raise Exception(f"Migration failed in production: {result.stderr}")
-                else:
-                    logger.warning("Migration failed, continuing in development mode")
+    def get_pool_status(self) -> DbPoolStatus:
+        """Get the connection pool status and checkout metrics of this worker."""
 
-        except Exception as e:
-            logger.error(f"Failed to run migrations: {e}")
-            if ENV.is_prod():
-                raise e
+        pool = self.engine.pool
+        if not isinstance(pool, InstrumentedAsyncQueuePool):
+            raise TypeError(f"Pool metrics are not available for {type(pool).__name__}")
+
+        metrics = pool.metrics
+        return DbPoolStatus(
+            pid=os.getpid(),
+            pool_size=pool.size(),
+            max_overflow=ENV.get_db_max_overflow(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            checkouts=metrics.checkouts,
+            checkins=metrics.checkins,
+            connects=metrics.connects,
+            timeouts=metrics.timeouts,
+            slow_waits=metrics.slow_waits,
+            wait_seconds_avg=metrics.wait_seconds_total / metrics.checkouts if metrics.checkouts else 0.0,
+            wait_seconds_max=metrics.wait_seconds_max,
+        )
+
+    @staticmethod
+    async def _acquire_migration_lock(conn: AsyncConnection) -> None:
+        """Take the session-level migration lock, waiting at most LOT_DB_MIGRATION_LOCK_TIMEOUT
+
+        Raises:
+            TimeoutError: Another worker held the lock for longer than the timeout
+        """
+        timeout = ENV.LOT_DB_MIGRATION_LOCK_TIMEOUT
+        try:
+            # lock_timeout bounds advisory lock waits too, SET LOCAL ends with the transaction but the lock does not
+            await conn.execute(text(f"SET LOCAL lock_timeout = '{int(timeout * 1000)}ms'"))
+            await conn.execute(text(f"SELECT pg_advisory_lock({MIGRATION_LOCK_ID})"))
+        except DBAPIError as e:
+            await conn.rollback()
+            if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+                raise
+            raise TimeoutError(f"Timed out after {timeout:.0f}s waiting for the migration lock") from None
+        await conn.commit()
+
+    @staticmethod
+    async def _is_at_head(conn: AsyncConnection) -> bool:
+        current: set[str] = set()
+        if (await conn.execute(text("SELECT to_regclass('alembic_version') IS NOT NULL"))).scalar_one():
+            current = set((await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars())
+        await conn.commit()
+        return current == _get_head_revisions()
 
     async def _create_tables(self, conn: AsyncConnection) -> None:
         await conn.run_sync(DbModel.metadata.create_all)
 
-    async def _create_hypertables(self, conn: AsyncConnection) -> None:
+    async def _create_hypertables(self, conn: AsyncConnection, recompress: bool = False) -> None:
         models = TimescaleDbModel.__subclasses__()
 
         for clazz in models:
-            await clazz.create_hypertable(conn)
+            await clazz.create_hypertable(conn, recompress)
 
     async def _clean_database(self, conn: AsyncConnection) -> None:
         """
@@ -122,18 +280,82 @@ class DB:
         await conn.execute(drop_all_statement)
         logger.info("Database cleaned successfully")
 
-    async def _try_acquire_migration_lock(self) -> bool:
-        """Try to acquire a migration lock using PostgreSQL advisory lock."""
-        try:
-            async with self.engine.begin() as conn:
-                result = await conn.execute(text("SELECT pg_try_advisory_lock(12345)"))
-                lock_acquired = result.scalar()
-                return bool(lock_acquired)
-        except Exception as e:
-            logger.warning(f"Failed to acquire migration lock: {e}")
-            return False
-
     def get_session(self) -> AsyncSession:
         """Get a async database session"""
 
         return self.async_session()
+
+    def get_read_session(self, server_realm_id: int | None = None) -> AsyncSession:
+        """Get a async database session for reads, on a read replica if one is healthy and caught up
+
+        Args:
+            server_realm_id: The realm the session reads, recently ingested realms are read from the primary
+
+        Returns:
+            A session on a read replica or on the primary
+        """
+        replica = self.replicas.pick(server_realm_id)
+        return replica.async_session() if replica else self.async_session()
+
+    def get_read_connection(self, server_realm_id: int | None = None) -> AsyncConnection:
+        """Get a async database connection for reads of plain rows, on a read replica like get_read_session
+
+        Core selects on a connection skip the identity map and the ORM loading of a session, the rows are tuples
+        with the column keys as attributes.
+
+        Args:
+            server_realm_id: The realm the connection reads, recently ingested realms are read from the primary
+
+        Returns:
+            A connection on a read replica or on the primary
+        """
+        replica = self.replicas.pick(server_realm_id)
+        return (replica.engine if replica else self.engine).connect()
+
+    @staticmethod
+    async def copy_records(
+        session: AsyncSession, table_name: str, records: Iterable[tuple[Any, ...]], columns: list[str]
+    ) -> None:
+        """Bulk load rows with COPY on the connection of a session, in its transaction
+
+        Much faster than INSERT for many rows, and the rows are never ORM objects.
+
+        Args:
+            session: The session, in a transaction
+            table_name: The table to load
+            records: The rows as tuples aligned with the columns
+            columns: The columns of the records
+        """
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+            table_name, records=records, columns=columns
+        )
+
+    async def fence_realm(self, server_realm_id: int) -> str | None:
+        """Keep the reads of a realm on the primary until the replicas replayed its latest committed write
+
+        Args:
+            server_realm_id: The ID of the server realm that was written
+
+        Returns:
+            The WAL position the replicas must replay, for the other workers to fence the realm too. None without
+            read replicas
+        """
+        if not self.replicas.replicas:
+            return None
+
+        async with self.engine.connect() as conn:
+            lsn: str = (await conn.execute(text("SELECT pg_current_wal_lsn()::text"))).scalar_one()
+        self.replicas.fence(server_realm_id, lsn)
+        return lsn
+
+    def get_ingest_lock_status(self) -> IngestLockStatus:
+        """Get the realm ingest lock metrics of this worker."""
+
+        return self.ingest_lock.get_status()
+
+    def get_replica_status(self) -> list[DbReplicaStatus]:
+        """Get the replication state of the read replicas as seen by this worker."""
+
+        return self.replicas.get_status()
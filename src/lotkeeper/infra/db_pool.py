@@ -0,0 +1,97 @@
+import time
+from dataclasses import dataclass
+from typing import Any, cast
+
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from lotkeeper.config import ENV
+
+
+@dataclass
+class PoolMetrics:
+    """Counters for connection checkouts of a single pool (per worker process)."""
+
+    slow_wait_threshold: float = 0.1
+    checkouts: int = 0
+    checkins: int = 0
+    connects: int = 0
+    timeouts: int = 0
+    slow_waits: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        """Record the time spent waiting for a connection from the pool
+
+        Args:
+            seconds: The time spent waiting in seconds
+        """
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+        if seconds >= self.slow_wait_threshold:
+            self.slow_waits += 1
+            logger.warning(f"Waited {seconds:.3f}s for a database connection, the pool may be undersized")
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long checkouts wait for a free connection."""
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics(slow_wait_threshold=ENV.LOT_DB_POOL_SLOW_WAIT)
+
+        # A recreated pool inherits the listeners of the pool it replaces
+        if "_dispatch" in kwargs:
+            return
+
+        event.listen(self, "checkout", self._on_checkout)
+        event.listen(self, "checkin", self._on_checkin)
+        event.listen(self, "connect", self._on_connect)
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        pool = cast(InstrumentedAsyncQueuePool, super().recreate())
+        pool.metrics = self.metrics
+        return pool
+
+    def _on_checkout(self, *_: Any) -> None:
+        self.metrics.checkouts += 1
+
+    def _on_checkin(self, *_: Any) -> None:
+        self.metrics.checkins += 1
+
+    def _on_connect(self, *_: Any) -> None:
+        self.metrics.connects += 1
+
+
+class DbPoolStatus(BaseModel):
+    model_config = {"json_schema_extra": {"description": "Connection pool status and metrics of a server worker"}}
+
+    pid: int = Field(description="The process ID of the worker")
+    pool_size: int = Field(description="The number of persistent connections in the pool", ge=0)
+    max_overflow: int = Field(description="The number of temporary connections allowed on top of the pool size")
+    checked_out: int = Field(description="The number of connections currently in use", ge=0)
+    checked_in: int = Field(description="The number of idle connections in the pool", ge=0)
+    overflow: int = Field(description="The current overflow, negative while the pool is not yet filled")
+    checkouts: int = Field(description="The total number of connection checkouts", ge=0)
+    checkins: int = Field(description="The total number of connection checkins", ge=0)
+    connects: int = Field(description="The total number of new database connections opened", ge=0)
+    timeouts: int = Field(description="The number of checkouts that timed out waiting for a connection", ge=0)
+    slow_waits: int = Field(description="The number of checkouts that waited longer than the slow threshold", ge=0)
+    wait_seconds_avg: float = Field(description="The average time a checkout waited for a connection", ge=0)
+    wait_seconds_max: float = Field(description="The longest time a checkout waited for a connection", ge=0)
@@ -0,0 +1,190 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+REPLICA_STATE_QUERY = text("""
+SELECT
+    pg_is_in_recovery() AS in_recovery,
+    pg_last_wal_replay_lsn()::text AS replay_lsn,
+    CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag_seconds
+""")
+
+
+def parse_lsn(lsn: str) -> int:
+    """Convert a Postgres WAL position like 16/B374D848 to a comparable integer
+
+    Args:
+        lsn: The WAL position as text
+
+    Returns:
+        The WAL position as a byte offset
+    """
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+@dataclass
+class Replica:
+    """A read replica and its last observed replication state (per worker process)."""
+
+    name: str
+    engine: AsyncEngine
+    async_session: async_sessionmaker[AsyncSession]
+    healthy: bool = False
+    in_recovery: bool = False
+    replay_lsn: int | None = None  # None if the server is not a streaming replica
+    lag_seconds: float | None = None
+    checked_at: datetime | None = None
+    error: str | None = None
+    reads: int = 0
+
+
+@dataclass
+class RealmFence:
+    """The WAL position of the latest ingest of a realm, reads of the realm need a replica that replayed it."""
+
+    lsn: int
+    fenced_at: float = field(default_factory=time.monotonic)
+
+
+class DbReplicaStatus(BaseModel):
+    model_config = {"json_schema_extra": {"description": "Replication state of a read replica seen by a worker"}}
+
+    name: str = Field(description="The host and port of the replica")
+    healthy: bool = Field(description="The replica answers and its lag is within the limit, reads are routed to it")
+    in_recovery: bool = Field(description="The replica is a streaming replica, else a standalone stand-in")
+    lag_seconds: float | None = Field(description="The replay lag in seconds, 0 if all received WAL is replayed")
+    replay_lsn: str | None = Field(description="The last replayed WAL position")
+    checked_at: datetime | None = Field(description="The time of the last check (UTC)")
+    error: str | None = Field(description="The error of the last check")
+    reads: int = Field(description="The number of read sessions routed to the replica by this worker", ge=0)
+
+
+class ReplicaRouter:
+    """Routes read sessions to healthy read replicas and tracks their replication lag.
+
+    Replicas lagging more than max_lag are skipped. After the ingest of a realm its reads stay on the primary
+    until a replica has replayed the ingest, or until max_lag has passed and any healthy replica must have it.
+    """
+
+    def __init__(self, replicas: list[Replica], max_lag: float, check_interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.fences: dict[int, RealmFence] = {}
+        self._round_robin = itertools.count()
+        self._monitor: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Check the replicas once and keep tracking their lag in the background"""
+        if not self.replicas or self._monitor:
+            return
+
+        await self.check()
+        self._monitor = asyncio.create_task(self._monitor_loop())
+
+    async def stop(self) -> None:
+        """Stop tracking the lag and close the connections to the replicas"""
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
+
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def check(self) -> None:
+        """Refresh the replication state of every replica"""
+        await asyncio.gather(*(self._check_replica(replica) for replica in self.replicas))
+
+    def fence(self, server_realm_id: int, lsn: str) -> None:
+        """Keep the reads of a realm on the primary until the replicas replayed a WAL position
+
+        Args:
+            server_realm_id: The ID of the server realm that was written
+            lsn: The WAL position of the primary after the write was committed
+        """
+        self.fences[server_realm_id] = RealmFence(lsn=parse_lsn(lsn))
+
+    def pick(self, server_realm_id: int | None = None) -> Replica | None:
+        """Pick a replica for a read session
+
+        Args:
+            server_realm_id: The realm the session reads, reads of a recently ingested realm may need the primary
+
+        Returns:
+            The replica, None if the read must go to the primary
+        """
+        candidates = [replica for replica in self.replicas if replica.healthy]
+        if not candidates:
+            return None
+
+        if server_realm_id is not None and (fence := self.fences.get(server_realm_id)):
+            if time.monotonic() - fence.fenced_at > self.max_lag + self.check_interval:
+                del self.fences[server_realm_id]
+            else:
+                candidates = [r for r in candidates if r.replay_lsn is not None and r.replay_lsn >= fence.lsn]
+                if not candidates:
+                    return None
+
+        replica = candidates[next(self._round_robin) % len(candidates)]
+        replica.reads += 1
+        return replica
+
+    def get_status(self) -> list[DbReplicaStatus]:
+        """Get the replication state of every replica as seen by this worker"""
+        return [
+            DbReplicaStatus(
+                name=replica.name,
+                healthy=replica.healthy,
+                in_recovery=replica.in_recovery,
+                lag_seconds=replica.lag_seconds,
+                replay_lsn=f"{replica.replay_lsn >> 32:X}/{replica.replay_lsn & 0xFFFFFFFF:X}"
+                if replica.replay_lsn is not None
+                else None,
+                checked_at=replica.checked_at,
+                error=replica.error,
+                reads=replica.reads,
+            )
+            for replica in self.replicas
+        ]
+
+    async def _monitor_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def _check_replica(self, replica: Replica) -> None:
+        was_healthy = replica.healthy
+        try:
+            async with replica.engine.connect() as conn:
+                row = (await asyncio.wait_for(conn.execute(REPLICA_STATE_QUERY), timeout=self.max_lag)).one()
+        except Exception as e:
+            replica.healthy = False
+            replica.error = str(e) or type(e).__name__
+            replica.checked_at = datetime.now(UTC)
+            if was_healthy:
+                logger.warning(f"Read replica {replica.name} is unavailable, reading from the primary: {e}")
+            return
+
+        replica.in_recovery = row.in_recovery
+        replica.replay_lsn = parse_lsn(row.replay_lsn) if row.replay_lsn else None
+        # A standalone server (e.g. a second local Postgres standing in for a replica) has no lag
+        replica.lag_seconds = float(row.lag_seconds) if row.lag_seconds is not None else 0.0
+        replica.healthy = replica.lag_seconds <= self.max_lag
+        replica.error = None
+        replica.checked_at = datetime.now(UTC)
+
+        if was_healthy and not replica.healthy:
+            logger.warning(f"Read replica {replica.name} lags {replica.lag_seconds:.1f}s, reading from the primary")
+        elif not was_healthy and replica.healthy:
+            logger.info(f"Read replica {replica.name} is healthy (lag {replica.lag_seconds:.1f}s)")
@@ -0,0 +1,111 @@
+"""Per-realm ingest lock shared by all workers and hosts.
+
+The ingest of a realm replaces its auctions in one transaction. Two ingests of the same realm would interleave their
+deletes and inserts, so each takes a transaction-level advisory lock keyed by the realm first. Ingests of different
+realms take different keys and never wait on each other.
+"""
+
+import time
+from dataclasses import dataclass
+
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+INGEST_LOCK_ID = 12347  # advisory lock class, the second key is the server realm ID
+LOCK_NOT_AVAILABLE = "55P03"  # SQLSTATE of a lock wait that exceeded lock_timeout
+
+
+@dataclass
+class IngestLockMetrics:
+    """Counters for the ingest locks taken by a single worker."""
+
+    slow_wait_threshold: float = 1.0
+    acquired: int = 0
+    timeouts: int = 0
+    slow_waits: int = 0
+    stale: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record_wait(self, server_realm_id: int, seconds: float) -> None:
+        """Record the time spent waiting for the ingest lock of a realm
+
+        Args:
+            server_realm_id: The ID of the server realm
+            seconds: The time spent waiting in seconds
+        """
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+        if seconds >= self.slow_wait_threshold:
+            self.slow_waits += 1
+            logger.warning(f"Waited {seconds:.3f}s for the ingest lock of server realm {server_realm_id}")
+
+
+class IngestLockStatus(BaseModel):
+    model_config = {"json_schema_extra": {"description": "Realm ingest lock metrics of a server worker"}}
+
+    acquired: int = Field(description="The number of ingest locks taken", ge=0)
+    timeouts: int = Field(description="The number of ingests that gave up waiting for the lock of their realm", ge=0)
+    slow_waits: int = Field(description="The number of ingests that waited longer than the slow threshold", ge=0)
+    stale: int = Field(description="The number of snapshots dropped for being older than the ingested one", ge=0)
+    wait_seconds_avg: float = Field(description="The average time an ingest waited for the lock", ge=0)
+    wait_seconds_max: float = Field(description="The longest time an ingest waited for the lock", ge=0)
+
+
+class RealmIngestLock:
+    """Transaction-level advisory locks serializing the ingests of a realm across workers and hosts."""
+
+    def __init__(self, timeout: float, slow_wait_threshold: float):
+        self.timeout = timeout
+        self.metrics = IngestLockMetrics(slow_wait_threshold=slow_wait_threshold)
+
+    async def acquire(self, session: AsyncSession, server_realm_id: int) -> bool:
+        """Take the ingest lock of a realm until the end of the transaction of the session
+
+        Args:
+            session: The session of the ingest, in a transaction
+            server_realm_id: The ID of the server realm
+
+        Returns:
+            Whether the lock was taken, False if an ingest of the realm on another worker or host did not finish
+            within the timeout. The transaction is then aborted
+        """
+        started = time.perf_counter()
+        try:
+            # lock_timeout bounds advisory lock waits too, SET LOCAL ends with the transaction like the lock
+            await session.execute(text(f"SET LOCAL lock_timeout = '{int(self.timeout * 1000)}ms'"))
+            await session.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_id, :server_realm_id)"),
+                {"lock_id": INGEST_LOCK_ID, "server_realm_id": server_realm_id},
+            )
+            await session.execute(text("SET LOCAL lock_timeout = DEFAULT"))
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+                raise
+            self.metrics.timeouts += 1
+            logger.warning(
+                f"Timed out after {self.timeout:.0f}s waiting for the ingest lock of server realm {server_realm_id}"
+            )
+            return False
+        finally:
+            self.metrics.record_wait(server_realm_id, time.perf_counter() - started)
+
+        self.metrics.acquired += 1
+        return True
+
+    def get_status(self) -> IngestLockStatus:
+        """Get the ingest lock metrics of this worker"""
+        metrics = self.metrics
+        attempts = metrics.acquired + metrics.timeouts
+        return IngestLockStatus(
+            acquired=metrics.acquired,
+            timeouts=metrics.timeouts,
+            slow_waits=metrics.slow_waits,
+            stale=metrics.stale,
+            wait_seconds_avg=metrics.wait_seconds_total / attempts if attempts else 0.0,
+            wait_seconds_max=metrics.wait_seconds_max,
+        )
@@ -0,0 +1,111 @@
+"""Process pool preparing submitted snapshots off the event loop.
+
+Validating a snapshot of 100k listings and deriving its price history, market prices and deals takes seconds of
+pure Python. On the event loop every other request of the worker would wait for it, in the pool it runs on another
+core and snapshots of several realms are prepared at once. The body goes to the pool as bytes and the listings come
+back as integer columns (see lotkeeper.common.snapshot_prep), only the database writes stay on the loop.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from lotkeeper.common.snapshot_prep import PreparedSnapshot, SnapshotValidationError, prepare_snapshot
+
+
+class IngestPoolStatus(BaseModel):
+    model_config = {"json_schema_extra": {"description": "Snapshot preparation of the worker handling the request"}}
+
+    processes: int = Field(description="The processes preparing snapshots, 0 prepares them on the event loop", ge=0)
+    running: int = Field(description="The snapshots being prepared or waiting for a process", ge=0)
+    prepared: int = Field(description="The snapshots prepared for ingest", ge=0)
+    invalid: int = Field(description="The snapshots rejected by the validation", ge=0)
+    failed: int = Field(description="The preparations lost to a crashed process, the pool was replaced", ge=0)
+    prepare_seconds_avg: float = Field(description="The average time a process spent preparing a snapshot", ge=0)
+    overhead_seconds_avg: float = Field(
+        description="The average time a snapshot spent waiting for a process and being transferred", ge=0
+    )
+
+
+class IngestPool:
+    """Prepares snapshots in a pool of processes started on the first submission.
+
+    The processes are spawned, a fork of a worker would copy its event loop, threads and connections. A crashed
+    process breaks the whole pool, the preparations in flight fail and the next submission starts a new pool.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor: ProcessPoolExecutor | None = None
+        self._running = 0
+        self._prepared = 0
+        self._invalid = 0
+        self._failed = 0
+        self._prepare_seconds = 0.0
+        self._overhead_seconds = 0.0
+
+    async def prepare(self, body: bytes) -> PreparedSnapshot:
+        """Validate and prepare a submitted snapshot
+
+        Args:
+            body: The JSON body of the submission
+
+        Returns:
+            The prepared snapshot
+
+        Raises:
+            SnapshotValidationError: The body is not a valid snapshot
+        """
+        started = time.perf_counter()
+        executor = self._get_executor() if self.processes else None
+        self._running += 1
+        try:
+            if executor is None:
+                snapshot = prepare_snapshot(body)
+            else:
+                snapshot = await asyncio.get_running_loop().run_in_executor(executor, prepare_snapshot, body)
+        except SnapshotValidationError:
+            self._invalid += 1
+            raise
+        except BrokenProcessPool:
+            self._failed += 1
+            if executor is self._executor:  # the first failure of a broken pool replaces it
+                logger.warning("A snapshot preparation process crashed, starting a new pool")
+                self.close()
+            raise
+        finally:
+            self._running -= 1
+
+        self._prepared += 1
+        self._prepare_seconds += snapshot.prepare_seconds
+        self._overhead_seconds += max(time.perf_counter() - started - snapshot.prepare_seconds, 0.0)
+        return snapshot
+
+    def get_status(self) -> IngestPoolStatus:
+        """Get the snapshot preparation metrics of this worker"""
+        prepared = self._prepared
+        return IngestPoolStatus(
+            processes=self.processes,
+            running=self._running,
+            prepared=prepared,
+            invalid=self._invalid,
+            failed=self._failed,
+            prepare_seconds_avg=round(self._prepare_seconds / prepared, 3) if prepared else 0.0,
+            overhead_seconds_avg=round(self._overhead_seconds / prepared, 3) if prepared else 0.0,
+        )
+
+    def close(self) -> None:
+        """Stop the processes, preparations in flight are cancelled"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
@@ -0,0 +1,186 @@
+"""Rate limit storage with in-process counters and batched Valkey synchronization.
+
+Registers the ``batched+redis://`` storage scheme with the ``limits`` library so it can be used as the
+``storage_uri`` of a slowapi ``Limiter``.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import redis
+from limits.storage import Storage
+from loguru import logger
+
+# Increment a counter and start its expiry on the first hit of the window, like the fixed window storages of limits
+INCR_SCRIPT = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+if redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return count
+"""
+
+
+@dataclass(slots=True)
+class _Window:
+    """Local state of a single rate limit window."""
+
+    expires_at: float
+    expiry: int
+    synced: int = 0  # the global count (all workers) as of the last synchronization
+    pending: int = 0  # local hits that have not been pushed to valkey yet
+
+
+class BatchedValkeyStorage(Storage):
+    """Fixed window rate limit storage that counts hits in process and synchronizes with Valkey in batches.
+
+    Hits are counted in memory so checking a limit costs a dictionary lookup instead of a network round trip.
+    A background thread pushes the pending hits of all keys to Valkey every ``sync_interval`` seconds and pulls
+    back the global counts of all workers. A key is synchronized early once it has ``max_drift`` pending hits,
+    which bounds how far a worker can run ahead of the global count. If Valkey is slow or unavailable the pending
+    hits are kept and limits are still enforced locally until the next successful synchronization.
+    """
+
+    STORAGE_SCHEME = ["batched+redis"]  # noqa: RUF012
+
+    def __init__(
+        self,
+        uri: str,
+        wrap_exceptions: bool = False,
+        sync_interval: float = 1.0,
+        max_drift: int = 10,
+        socket_timeout: float = 0.5,
+        **options: Any,
+    ) -> None:
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.sync_interval = float(sync_interval)
+        self.max_drift = int(max_drift)
+
+        self._client = redis.Redis.from_url(
+            uri.removeprefix("batched+"),
+            socket_timeout=float(socket_timeout),
+            socket_connect_timeout=float(socket_timeout),
+        )
+        self._incr_script = self._client.register_script(INCR_SCRIPT)
+
+        self._windows: dict[str, _Window] = {}
+        self._lock = threading.Lock()
+        self._sync_requested = threading.Event()
+        self._sync_thread: threading.Thread | None = None
+        self._sync_pid: int | None = None
+        self._sync_failing = False
+
+    @property
+    def base_exceptions(self) -> type[Exception] | tuple[type[Exception], ...]:
+        return redis.RedisError
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.expires_at <= now:
+                window = self._windows[key] = _Window(expires_at=now + expiry, expiry=expiry)
+
+            window.pending += amount
+            count = window.synced + window.pending
+
+            if window.pending >= self.max_drift:
+                self._sync_requested.set()
+
+        self._ensure_sync_thread()
+        return count
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.expires_at <= time.time():
+                return 0
+            return window.synced + window.pending
+
+    def get_expiry(self, key: str) -> float:
+        with self._lock:
+            window = self._windows.get(key)
+            return window.expires_at if window else time.time()
+
+    def check(self) -> bool:
+        try:
+            return bool(self._client.ping())
+        except redis.RedisError:
+            return False
+
+    def reset(self) -> int | None:
+        with self._lock:
+            count = len(self._windows)
+            self._windows.clear()
+
+        keys = list(self._client.scan_iter("LIMITER*"))
+        if keys:
+            self._client.delete(*keys)
+        return count
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+        self._client.delete(key)
+
+    def sync(self) -> None:
+        """Push the pending hits of all active windows to Valkey and pull back the global counts."""
+
+        now = time.time()
+        with self._lock:
+            for key in [key for key, window in self._windows.items() if window.expires_at <= now]:
+                del self._windows[key]
+
+            batch = [(key, window, window.pending) for key, window in self._windows.items()]
+
+        if not batch:
+            return
+
+        pipeline = self._client.pipeline(transaction=False)
+        for key, window, pending in batch:
+            if pending:
+                self._incr_script(keys=[key], args=[pending, window.expiry], client=pipeline)
+            else:
+                pipeline.get(key)
+        results = pipeline.execute()
+
+        with self._lock:
+            for (key, window, pushed), remote_count in zip(batch, results, strict=True):
+                # The window may have expired and been replaced while synchronizing
+                if self._windows.get(key) is not window:
+                    continue
+                window.pending -= pushed
+                window.synced = int(remote_count or 0)
+
+    def _ensure_sync_thread(self) -> None:
+        """Start the synchronization thread once per process (workers are separate processes)."""
+
+        pid = os.getpid()
+        if self._sync_pid == pid:
+            return
+
+        with self._lock:
+            if self._sync_pid == pid:
+                return
+            self._sync_pid = pid
+            self._sync_thread = threading.Thread(target=self._run_sync, name="rate-limit-sync", daemon=True)
+            self._sync_thread.start()
+
+    def _run_sync(self) -> None:
+        while True:
+            self._sync_requested.wait(self.sync_interval)
+            self._sync_requested.clear()
+
+            try:
+                self.sync()
+                if self._sync_failing:
+                    logger.info("Rate limit synchronization with valkey recovered")
+                    self._sync_failing = False
+            except Exception as e:
+                if not self._sync_failing:
+                    logger.warning(f"Rate limit synchronization with valkey failed, limiting locally: {e}")
+                    self._sync_failing = True
@@ -0,0 +1,279 @@
+"""Realm update events fanned out to the update streams of every worker through Valkey pub/sub.
+
+The worker that ingests a snapshot publishes a small update of the realm. Every worker with open streams listens on
+one pattern subscription and hands the update to the streams of its realm. The latest update of a realm is also kept
+in Valkey and in memory, it is the state of the realm: a new stream starts with it so the client can tell whether its
+data is current, and the ingest validates the size of a new snapshot against it.
+"""
+
+import asyncio
+from collections import defaultdict
+
+import orjson
+import redis.asyncio as redis
+from loguru import logger
+from pydantic import BaseModel, Field, ValidationError
+
+from lotkeeper.infra.db import DB
+from lotkeeper.models.realm_update import RealmUpdate
+
+CHANNEL_PREFIX = "lotkeeper:realm-updates:"
+LATEST_KEY_PREFIX = "lotkeeper:realm-state:"
+LATEST_TTL = 7 * 24 * 3600  # seconds, realms without a snapshot for a week start their streams without an update
+RECONNECT_DELAY = 1.0  # seconds, doubled up to MAX_RECONNECT_DELAY while Valkey is unavailable
+MAX_RECONNECT_DELAY = 30.0
+
+# Keep and publish an update unless a newer snapshot of the realm was published already, ingests of a realm commit
+# in the order of their snapshots but may publish out of order
+PUBLISH_SCRIPT = """
+local latest = tonumber(redis.call('HGET', KEYS[1], 'version'))
+if latest and latest > tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'version', ARGV[1], 'update', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('PUBLISH', ARGV[4], ARGV[5])
+return 1
+"""
+
+
+class RealmStreamStatus(BaseModel):
+    model_config = {"json_schema_extra": {"description": "Realm update streams of the worker handling the request"}}
+
+    connections: int = Field(description="The open update streams of the worker", ge=0)
+    max_connections: int = Field(description="The open update streams before new streams are refused", ge=0)
+    listening: bool = Field(description="The worker is subscribed to the updates published in Valkey")
+    published: int = Field(description="The updates published by the ingests of this worker", ge=0)
+    delivered: int = Field(description="The updates handed to the streams of this worker", ge=0)
+    replaced: int = Field(description="The updates replaced by a newer one before a slow stream sent them", ge=0)
+
+
+class RealmSubscription:
+    """The updates of a realm for one stream, only the latest update is kept until the stream sends it."""
+
+    def __init__(self, broker: "RealmEventBroker", server_realm_id: int):
+        self.server_realm_id = server_realm_id
+        self._broker = broker
+        self._queue: asyncio.Queue[RealmUpdate | None] = asyncio.Queue(maxsize=1)
+        self._closed = False
+
+    def put(self, update: RealmUpdate | None) -> bool:
+        """Hand an update to the stream, None ends the stream
+
+        Returns:
+            Whether a pending update was replaced
+        """
+        replaced = self._queue.full()
+        if replaced:
+            self._queue.get_nowait()
+        self._queue.put_nowait(update)
+        return replaced
+
+    async def get(self, timeout: float) -> RealmUpdate | None:
+        """Wait for the next update
+
+        Args:
+            timeout: The seconds to wait before giving up
+
+        Returns:
+            The update, None if the stream must end
+
+        Raises:
+            TimeoutError: No update arrived in time
+        """
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+    def close(self) -> None:
+        """Release the connection slot of the stream, closing twice is a no-op"""
+        if not self._closed:
+            self._closed = True
+            self._broker.unsubscribe(self)
+
+
+class RealmEventBroker:
+    """Publishes realm updates and fans them out to the update streams of this worker.
+
+    The subscription to Valkey starts with the first stream of the worker, or at startup with read replicas. Other
+    workers without streams only publish.
+    A worker holds at most max_connections streams. A stream only keeps the latest update, a slow client skips to it
+    instead of buffering every update. While Valkey is unavailable the streams stay open and the worker resubscribes
+    with a backoff, the streams then get the latest update of their realm in case one was missed.
+
+    The published message carries the WAL position of the ingest, every worker keeps the reads of the realm on the
+    primary until its read replicas replayed it, so a client refetching on an update never reads the old snapshot.
+    """
+
+    def __init__(self, db: DB, url: str, max_connections: int, socket_timeout: float = 2.0):
+        self.db = db
+        self.max_connections = max_connections
+        # An idle subscription is checked with a ping, a dead connection is noticed without a publish on it
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout, health_check_interval=30
+        )
+        self._publish_script = self._client.register_script(PUBLISH_SCRIPT)
+        self._subscriptions: dict[int, set[RealmSubscription]] = defaultdict(set)
+        self._latest: dict[int, RealmUpdate] = {}  # the latest update of every realm seen by this worker
+        self._listener: asyncio.Task[None] | None = None
+        self._listening = False
+        self._published = 0
+        self._delivered = 0
+        self._replaced = 0
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    async def publish(self, update: RealmUpdate, lsn: str | None = None) -> None:
+        """Publish the update of an ingested realm to the streams of every worker and keep it as the realm state
+
+        An update older than the realm state in Valkey is dropped, a late publish never replaces a newer state.
+        Failures are only logged, the update is still kept in the memory of this worker.
+
+        Args:
+            update: The update of the realm
+            lsn: The WAL position of the primary after the ingest, None without read replicas
+        """
+        self._remember(update)
+        payload = update.model_dump_json()
+        message = orjson.dumps({"update": orjson.Fragment(payload), "lsn": lsn})
+        version = int(update.snapshot_at.timestamp() * 1_000_000)  # exact as a Lua number
+        try:
+            published = await self._publish_script(
+                keys=[f"{LATEST_KEY_PREFIX}{update.server_realm_id}"],
+                args=[version, payload, LATEST_TTL, f"{CHANNEL_PREFIX}{update.server_realm_id}", message],
+            )
+            self._published += int(published)
+        except redis.RedisError as e:
+            logger.warning(f"Publishing the update of server realm {update.server_realm_id} failed: {e}")
+
+    async def get_latest(self, server_realm_id: int) -> RealmUpdate | None:
+        """Get the latest published update of a realm, one Valkey read
+
+        The update kept in memory is used while Valkey is unavailable, or if it is newer than the one in Valkey
+        (e.g. Valkey restarted without its data).
+
+        Args:
+            server_realm_id: The ID of the server realm
+
+        Returns:
+            The update, None if the realm had no snapshot recently
+        """
+        try:
+            payload = await self._client.hget(f"{LATEST_KEY_PREFIX}{server_realm_id}", "update")
+        except redis.RedisError as e:
+            logger.warning(f"Reading the latest update of server realm {server_realm_id} failed: {e}")
+            return self._latest.get(server_realm_id)
+
+        if payload:
+            self._remember(RealmUpdate.model_validate_json(payload))
+        return self._latest.get(server_realm_id)
+
+    def start(self) -> None:
+        """Subscribe to the updates published in Valkey, a no-op if this worker is subscribed already
+
+        Called by the first stream of the worker. Workers with read replicas subscribe at startup, they fence the
+        realms ingested by other workers even without streams.
+        """
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    def subscribe(self, server_realm_id: int) -> RealmSubscription | None:
+        """Subscribe a stream to the updates of a realm
+
+        Args:
+            server_realm_id: The ID of the server realm
+
+        Returns:
+            The subscription, None if the worker already holds max_connections streams
+        """
+        if self.connections >= self.max_connections:
+            return None
+
+        self.start()
+        subscription = RealmSubscription(self, server_realm_id)
+        self._subscriptions[server_realm_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: RealmSubscription) -> None:
+        """Remove the subscription of a closed stream"""
+        subscriptions = self._subscriptions.get(subscription.server_realm_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.server_realm_id]
+
+    def end_streams(self) -> None:
+        """End the streams of this worker, the clients reconnect to another worker"""
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.put(None)
+
+    async def close(self) -> None:
+        """End the streams of this worker and stop listening"""
+        self.end_streams()
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+
+        await self._client.aclose()
+
+    def get_status(self) -> RealmStreamStatus:
+        """Get the update streams of this worker"""
+        return RealmStreamStatus(
+            connections=self.connections,
+            max_connections=self.max_connections,
+            listening=self._listening,
+            published=self._published,
+            delivered=self._delivered,
+            replaced=self._replaced,
+        )
+
+    def _remember(self, update: RealmUpdate) -> None:
+        latest = self._latest.get(update.server_realm_id)
+        if latest is None or update.snapshot_at >= latest.snapshot_at:
+            self._latest[update.server_realm_id] = update
+
+    def _deliver(self, update: RealmUpdate) -> None:
+        for subscription in self._subscriptions.get(update.server_realm_id, ()):
+            self._replaced += subscription.put(update)
+            self._delivered += 1
+
+    async def _redeliver_latest(self) -> None:
+        for server_realm_id in list(self._subscriptions):
+            if update := await self.get_latest(server_realm_id):
+                self._deliver(update)
+
+    async def _listen(self) -> None:
+        delay = RECONNECT_DELAY
+        missed = False
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    if missed:
+                        await self._redeliver_latest()
+                    if not self._listening:
+                        logger.info("Listening for realm updates")
+                    self._listening, missed, delay = True, False, RECONNECT_DELAY
+
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is None or message["type"] != "pmessage":
+                            continue
+
+                        try:
+                            event = orjson.loads(message["data"])
+                            update = RealmUpdate.model_validate(event["update"])
+                        except (orjson.JSONDecodeError, ValidationError, KeyError, TypeError) as e:
+                            logger.warning(f"Skipped a malformed realm update on {message['channel']!r}: {e}")
+                            continue
+                        if event.get("lsn"):
+                            self.db.replicas.fence(update.server_realm_id, event["lsn"])
+                        self._remember(update)
+                        self._deliver(update)
+            except redis.RedisError as e:
+                if self._listening:
+                    logger.warning(f"Listening for realm updates failed, retrying in {delay:.0f}s: {e}")
+                self._listening, missed = False, True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
@@ -0,0 +1,171 @@
+"""Deduplication of resubmitted auction snapshots by content fingerprint and idempotency key.
+
+Agents resubmit the same scan on retries, and several agents may cover one realm. A snapshot whose fingerprint or
+idempotency key was seen within the window is acknowledged without touching the database. The fingerprint does not
+depend on the order of the listings, two scans of an unchanged auction house are the same snapshot. It is computed
+with the preparation of the snapshot (see lotkeeper.common.snapshot_prep.fingerprint_snapshot).
+"""
+
+from dataclasses import dataclass
+
+import redis.asyncio as redis
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from lotkeeper.common.snapshot_prep import PreparedSnapshot
+
+KEY_PREFIX = "lotkeeper:snapshot:"
+IDEMPOTENCY_KEY_PREFIX = "lotkeeper:snapshot-key:"
+CLAIM_TTL = 300  # seconds a snapshot being ingested is claimed, a crashed ingest does not block it for the window
+
+
+def get_realm_key(server: str, realm: str) -> str:
+    """Get the realm part of the keys, the same for every spelling of the realm the realm lookup accepts"""
+    return f"{server.replace('-', ' ').lower()}:{realm.replace('-', ' ').lower()}"
+
+
+@dataclass
+class SnapshotClaim:
+    """A snapshot claimed for ingestion, no other submission of the same content is ingested while it is held."""
+
+    fingerprint: str
+    fingerprint_key: str
+    idempotency_key: str | None
+    auctions: int
+    held: bool  # False if Valkey was unavailable, the snapshot is ingested without deduplication
+
+
+class SnapshotDedupStatus(BaseModel):
+    model_config = {"json_schema_extra": {"description": "Snapshot deduplication of the worker handling the request"}}
+
+    window_seconds: int = Field(description="The seconds a snapshot is remembered after its ingestion", ge=0)
+    received: int = Field(description="The snapshots submitted to this worker", ge=0)
+    ingested: int = Field(description="The snapshots ingested by this worker", ge=0)
+    duplicates_by_key: int = Field(description="The snapshots skipped for an already seen idempotency key", ge=0)
+    duplicates_by_content: int = Field(description="The snapshots skipped for an already seen fingerprint", ge=0)
+    skipped_auctions: int = Field(description="The auction listings of the skipped snapshots", ge=0)
+    skipped_ingest_seconds: float = Field(
+        description="The estimated ingest time of the skipped snapshots, by the ingest time per listing", ge=0
+    )
+    unavailable: int = Field(description="The snapshots ingested without deduplication, Valkey was unavailable", ge=0)
+
+
+class SnapshotDeduplicator:
+    """Claims submitted snapshots in Valkey, a snapshot already claimed within the window is a duplicate.
+
+    A snapshot is claimed for CLAIM_TTL seconds while it is ingested and remembered for the window once ingested. A
+    snapshot that is rejected or fails to ingest is released, its resubmission is ingested. If Valkey is unavailable
+    every snapshot is ingested, deduplication never loses a snapshot.
+    """
+
+    def __init__(self, url: str, window: int, socket_timeout: float = 2.0):
+        self.window = window
+        self._client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self._received = 0
+        self._ingested = 0
+        self._ingested_auctions = 0
+        self._ingest_seconds = 0.0
+        self._duplicates_by_key = 0
+        self._duplicates_by_content = 0
+        self._skipped_auctions = 0
+        self._unavailable = 0
+
+    async def claim(self, snapshot: PreparedSnapshot, idempotency_key: str | None = None) -> SnapshotClaim | None:
+        """Claim a snapshot for ingestion
+
+        Args:
+            snapshot: The submitted snapshot, prepared
+            idempotency_key: The idempotency key of the submission, a retry sends the same key
+
+        Returns:
+            The claim, None if the snapshot is a duplicate and must not be ingested
+        """
+        self._received += 1
+        realm_key = get_realm_key(snapshot.server, snapshot.realm)
+        key = f"{IDEMPOTENCY_KEY_PREFIX}{realm_key}:{idempotency_key}" if idempotency_key else None
+        fingerprint_key = f"{KEY_PREFIX}{realm_key}:{snapshot.fingerprint}"
+
+        try:
+            if key and await self._client.exists(key):
+                self._duplicates_by_key += 1
+                self._skip(snapshot)
+                return None
+
+            if not await self._client.set(fingerprint_key, "claimed", nx=True, ex=CLAIM_TTL):
+                self._duplicates_by_content += 1
+                self._skip(snapshot)
+                return None
+        except redis.RedisError as e:
+            logger.warning(f"Snapshot deduplication is unavailable, ingesting {snapshot.server}/{snapshot.realm}: {e}")
+            self._unavailable += 1
+            return SnapshotClaim(
+                fingerprint="", fingerprint_key="", idempotency_key=key, auctions=snapshot.auction_count, held=False
+            )
+
+        return SnapshotClaim(
+            fingerprint=snapshot.fingerprint,
+            fingerprint_key=fingerprint_key,
+            idempotency_key=key,
+            auctions=snapshot.auction_count,
+            held=True,
+        )
+
+    async def complete(self, claim: SnapshotClaim, ingest_seconds: float) -> None:
+        """Remember an ingested snapshot for the window
+
+        Args:
+            claim: The claim of the snapshot
+            ingest_seconds: The time the ingest took, the estimate of the time skipped duplicates save
+        """
+        self._ingested += 1
+        self._ingested_auctions += claim.auctions
+        self._ingest_seconds += ingest_seconds
+        if not claim.held:
+            return
+
+        try:
+            async with self._client.pipeline(transaction=False) as pipeline:
+                pipeline.set(claim.fingerprint_key, "ingested", ex=self.window)
+                if claim.idempotency_key:
+                    pipeline.set(claim.idempotency_key, claim.fingerprint, ex=self.window)
+                await pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Remembering the ingested snapshot {claim.fingerprint} failed: {e}")
+
+    async def release(self, claim: SnapshotClaim) -> None:
+        """Release a snapshot that was not ingested, its resubmission is ingested
+
+        Args:
+            claim: The claim of the snapshot
+        """
+        if not claim.held:
+            return
+
+        try:
+            await self._client.delete(claim.fingerprint_key)
+        except redis.RedisError as e:
+            logger.warning(f"Releasing the snapshot {claim.fingerprint} failed, it expires in {CLAIM_TTL}s: {e}")
+
+    def get_status(self) -> SnapshotDedupStatus:
+        """Get the deduplication metrics of this worker"""
+        seconds_per_auction = self._ingest_seconds / self._ingested_auctions if self._ingested_auctions else 0.0
+        return SnapshotDedupStatus(
+            window_seconds=self.window,
+            received=self._received,
+            ingested=self._ingested,
+            duplicates_by_key=self._duplicates_by_key,
+            duplicates_by_content=self._duplicates_by_content,
+            skipped_auctions=self._skipped_auctions,
+            skipped_ingest_seconds=round(self._skipped_auctions * seconds_per_auction, 3),
+            unavailable=self._unavailable,
+        )
+
+    async def close(self) -> None:
+        """Close the connections to Valkey"""
+        await self._client.aclose()
+
+    def _skip(self, snapshot: PreparedSnapshot) -> None:
+        self._skipped_auctions += snapshot.auction_count
+        logger.info(
+            f"Skipped a duplicate snapshot of {snapshot.server}/{snapshot.realm} ({snapshot.auction_count} auctions)"
+        )
@@ -1,11 +1,18 @@
 import asyncio
 import os
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+import signal
+import threading
+import time
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from types import FrameType
+from typing import Any
 
 import typer
-import uvicorn
 from aiocache import caches
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse
@@ -19,12 +26,22 @@ from lotkeeper.api import (
     auctions_route,
     health_route,
     items_route,
+    market_route,
     server_realms_route,
     web_route,
 )
 from lotkeeper.common.logging import propagate_logs, setup_loguru
+from lotkeeper.common.startup_profile import StartupProfile, profile_imports
 from lotkeeper.config import DIRS, ENV
-from lotkeeper.dependencies import get_db, get_rate_limiter
+from lotkeeper.dependencies import (
+    get_db,
+    get_ingest_pool,
+    get_rate_limiter,
+    get_realm_event_broker,
+    get_retention_service,
+    get_seed_service,
+    get_snapshot_deduplicator,
+)
 from lotkeeper.infra.db import DB
 from lotkeeper.middlewares.dynrender import dynrender_lifespan, dynrender_middleware
 from lotkeeper.middlewares.perf import add_performance_middleware
@@ -57,6 +74,30 @@ PORT = 8007
 
 
 # --- Lifespan ---
+def end_realm_streams_on_exit() -> None:
+    """End the realm update streams as soon as the worker is told to stop
+
+    Uvicorn waits for the open connections before the shutdown of the lifespan, without ending the streams on the
+    exit signal a stopping or recycled worker would wait out its whole graceful shutdown. The signal handlers of
+    uvicorn are chained, they still stop the server.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return  # signals can only be handled in the main thread, e.g. not in a server run by a test thread
+
+    loop = asyncio.get_running_loop()
+    broker = get_realm_event_broker()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handle_exit(signum: int, frame: FrameType | None, previous: Callable[..., Any] = previous) -> None:
+            loop.call_soon_threadsafe(broker.end_streams)
+            previous(signum, frame)
+
+        signal.signal(sig, handle_exit)
+
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
     pid = os.getpid()
@@ -67,15 +108,48 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
             f"Note: Web UI Bundle is missing at {DIRS.LOT_WEB_BUNDLE_DIR}, meaning the web UI is not available"
         )
 
+    profile = StartupProfile()
+
     # Connect DB
     db = get_db()
-    await db.connect()
+    with profile.phase("db"):
+        await db.connect()
+
+    # With read replicas every worker fences the realms ingested by the others, streams or not
+    if db.replicas.replicas:
+        get_realm_event_broker().start()
 
-    if ENV.is_prod():  # add dynrender for production only
-        async with dynrender_lifespan(_app):
+    # Background jobs, every worker schedules them and the jobs make sure only one worker runs them at a time
+    with profile.phase("scheduler"):
+        scheduler = AsyncIOScheduler(timezone=UTC)
+        if ENV.LOT_RETENTION_ENABLED:
+            scheduler.add_job(
+                get_retention_service().run,
+                "interval",
+                seconds=ENV.LOT_RETENTION_INTERVAL,
+                next_run_time=datetime.now(UTC) + timedelta(minutes=5),
+                jitter=60,
+                coalesce=True,
+                max_instances=1,
+            )
+        scheduler.start()
+
+    try:
+        async with AsyncExitStack() as stack:
+            if ENV.is_prod():  # add dynrender for production only
+                with profile.phase("dynrender"):
+                    await stack.enter_async_context(dynrender_lifespan(_app))
+
+            end_realm_streams_on_exit()
+            _app.state.startup_profile = profile
+            logger.info(f"Worker is ready in {profile.total_ms:.0f}ms ({profile})")
             yield
-    else:
-        yield
+    finally:
+        scheduler.shutdown(wait=False)
+        await get_realm_event_broker().close()
+        await get_snapshot_deduplicator().close()
+        get_ingest_pool().close()
+        await db.disconnect()
 
 
 # --- FastAPI app ---
@@ -123,6 +197,7 @@ app.include_router(server_realms_route.router)
 app.include_router(auctions_route.router)
 app.include_router(items_route.router)
 app.include_router(auction_datapoints_route.router)
+app.include_router(market_route.router)
 app.include_router(agent_route.router)
 app.include_router(web_route.router)
 
@@ -132,6 +207,7 @@ app.openapi_tags = [
     {"name": "auctions", "description": "Raw auction listings and details"},
     {"name": "items", "description": "Item metadata"},
     {"name": "auction-datapoints", "description": "Buyout auction analytics and trends"},
+    {"name": "market", "description": "Market movers and trends"},
     {"name": "health", "description": "Health check and other status related endpoints"},
 ]
 
@@ -143,12 +219,18 @@ if ENV.is_prod() and ENV.LOT_ALLOWED_ORIGINS == ["*"]:
 
 # --- Commands ---
 @cli.command()
-def start() -> None:
+def start(
+    *,
+    profile_startup: bool = typer.Option(
+        False, help="Profile the imports and the startup phases of a worker instead of serving"
+    ),
+) -> None:
     """Start the FastAPI application"""
-    if ENV.is_prod():
-        worker_count = os.cpu_count() or 1
-    else:
-        worker_count = 1
+    if profile_startup:
+        _profile_startup()
+        return
+
+    import uvicorn  # noqa: PLC0415 - only the server needs it, the other commands skip the import
 
     uvicorn.run(
         "lotkeeper.main:app",
@@ -157,10 +239,57 @@ def start() -> None:
         reload=ENV.is_dev(),
         log_config=None,
         log_level=None,
-        workers=worker_count,
+        **ENV.get_server_options(),
     )
 
 
+def _profile_startup() -> None:
+    """Print the cold start of a worker: the imports in a fresh interpreter, then the startup phases of the app"""
+
+    imports = profile_imports("lotkeeper.main")
+
+    async def run() -> StartupProfile:
+        async with lifespan(app):
+            profile: StartupProfile = app.state.startup_profile
+        return profile
+
+    profile = asyncio.run(run())
+
+    typer.echo(f"\nImport of lotkeeper.main: {imports.import_ms:.0f}ms ({imports.wall_ms:.0f}ms with the interpreter)")
+    typer.echo(f"\n{'direct import':<48}{'cumulative ms':>16}")
+    for timing in imports.direct_imports()[:15]:
+        typer.echo(f"{timing.module:<48}{timing.cumulative_ms:>16.1f}")
+    typer.echo(f"\n{'slowest module':<48}{'self ms':>16}")
+    for timing in imports.slowest(15):
+        typer.echo(f"{timing.module:<48}{timing.self_ms:>16.1f}")
+    typer.echo(f"\n{'startup phase':<48}{'ms':>16}")
+    for name, ms in profile.phases.items():
+        typer.echo(f"{name:<48}{ms:>16.1f}")
+    typer.echo(f"{'total':<48}{profile.total_ms:>16.1f}")
+    typer.echo(f"\nCold start: {imports.wall_ms + profile.total_ms:.0f}ms")
+
+
+@cli.command()
+def migrate(
+    *,
+    recompress: bool = typer.Option(
+        False,
+        help="Apply changed compression layouts to compressed chunks too, they are decompressed and compressed "
+        "again by the compression policy",
+    ),
+) -> None:
+    """Upgrade the database schema to head and apply the hypertable settings, run once per deploy"""
+
+    async def run() -> None:
+        db = get_db()
+        try:
+            await db.migrate(recompress=recompress)
+        finally:
+            await db.disconnect()
+
+    asyncio.run(run())
+
+
 @cli.command()
 def clean_db() -> None:
     """Clean the database for a fresh install"""
@@ -174,11 +303,74 @@ def clean_db() -> None:
     asyncio.run(clean())
 
 
+@cli.command()
+def retention() -> None:
+    """Downsample the price history tiers and drop the chunks past their retention once"""
+
+    async def run() -> None:
+        db = get_db()
+        await db.connect()
+        try:
+            await get_retention_service().run()
+        finally:
+            await db.disconnect()
+
+    asyncio.run(run())
+
+
+@cli.command()
+def seed(
+    *,
+    realms: int = typer.Option(3, help="Number of realms to generate"),
+    server: str = typer.Option("Synthetic", help="Server of the generated realms"),
+    listings: int = typer.Option(100_000, help="Listings of the current snapshot of each realm"),
+    items: int = typer.Option(5_000, help="Distinct items in the catalog shared by all realms"),
+    history_days: int = typer.Option(90, help="Days of hourly auction datapoint history per realm"),
+    history_listings: int = typer.Option(5_000, help="Listings per hourly history snapshot"),
+    outlier_rate: float = typer.Option(0.02, help="Fraction of listings with outlier prices"),
+    random_seed: int = typer.Option(42, "--seed", help="Random seed, the same seed produces the same data"),
+    snapshots_dir: Path | None = typer.Option(None, help="Also write replayable snapshot files to this directory"),
+    snapshot_count: int = typer.Option(3, help="Consecutive hourly snapshot files to write per realm"),
+    load: bool = typer.Option(True, help="Load the data into the database, disable to only write snapshot files"),
+) -> None:
+    """Seed the database with deterministic synthetic realm data for capacity testing"""
+    # Only this command needs the generator, the workers skip the import
+    from lotkeeper.common.synthetic import SyntheticRealmGenerator  # noqa: PLC0415
+    from lotkeeper.services.seed_service import SeedService  # noqa: PLC0415
+
+    now = datetime.now(UTC).replace(second=0, microsecond=0)
+    generators = [
+        SyntheticRealmGenerator(random_seed, server, f"Realm {i + 1}", items, outlier_rate) for i in range(realms)
+    ]
+
+    if snapshots_dir:
+        for generator in generators:
+            paths = SeedService.write_snapshots(generator, now, listings, snapshot_count, snapshots_dir)
+            logger.info(f"Wrote {len(paths)} snapshot files for {generator.server}/{generator.realm}")
+
+    if not load:
+        return
+
+    async def run() -> None:
+        db = get_db()
+        await db.connect()
+        try:
+            seed_service = get_seed_service()
+            for generator in generators:
+                started = time.perf_counter()
+                await seed_service.seed_realm(generator, now, listings, history_days, history_listings)
+                logger.info(f"Seeded {generator.server}/{generator.realm} in {time.perf_counter() - started:.1f}s")
+        finally:
+            await db.disconnect()
+
+    asyncio.run(run())
+
+
 # --- Default callback when no command is given ---
 @cli.callback(invoke_without_command=True)
 def _default(ctx: typer.Context) -> None:
     if ctx.invoked_subcommand is None:
-        start()
+        start(profile_startup=False)
 
 
 # --- Main ---
@@ -1,4 +1,6 @@
 # app/middleware_dynrender.py
+from __future__ import annotations
+
 import asyncio
 import hashlib
 import os
@@ -6,19 +8,16 @@ import re
 import time
 from collections.abc import AsyncGenerator, Awaitable, Callable
 from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
 
 from aiocache import Cache, caches
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, Response
 from loguru import logger
-from playwright.async_api import (
-    Browser,
-    BrowserContext,
-    Page,
-    Playwright,
-    Route,
-    async_playwright,
-)
+
+if TYPE_CHECKING:
+    # Playwright is imported when the browser starts, workers without dynrender never load it
+    from playwright.async_api import Browser, BrowserContext, Page, Playwright, Route
 
 ALLOWED_HOSTS: set[str] = {"lotkeeper.net", "www.lotkeeper.net"}
 
@@ -70,6 +69,7 @@ _context: BrowserContext | None = None
 _pw: Playwright | None = None
 
 _render_sem = asyncio.Semaphore(CONCURRENCY)
+_context_lock = asyncio.Lock()  # the warm-up and the first bot request must not start two browsers
 
 
 # Helpers
@@ -128,6 +128,8 @@ async def _ensure_browser() -> Browser:
     worker_pid = os.getpid()
     logger.info(f"Dynrender: starting browser (pid {worker_pid})")
 
+    from playwright.async_api import async_playwright  # noqa: PLC0415
+
     _pw = await async_playwright().start()
 
     _browser = await _pw.chromium.launch(
@@ -157,6 +159,14 @@ async def _ensure_browser() -> Browser:
 
 
 async def _ensure_context() -> BrowserContext:
+    if _context:
+        return _context
+
+    async with _context_lock:
+        return await _create_context()
+
+
+async def _create_context() -> BrowserContext:
     global _context  # noqa: PLW0603
     if _context:
         return _context
@@ -190,8 +200,8 @@ async def _ensure_context() -> BrowserContext:
 
 async def _warm_assets_once() -> None:
     """Navigate once to seed the HTTP cache in the context, then close the temp page."""
-    context = await _ensure_context()
     try:
+        context = await _ensure_context()
         p = await context.new_page()
         await p.goto("https://lotkeeper.net/", wait_until="domcontentloaded", timeout=5_000)
         await p.wait_for_timeout(200)
@@ -300,10 +310,10 @@ async def dynrender_middleware(request: Request, call_next: Callable[[Request],
 
 @asynccontextmanager
 async def dynrender_lifespan(app: FastAPI) -> AsyncGenerator[None]:
-    # Start browser/context and seed cache once
-    await _ensure_context()
-    await _warm_assets_once()
+    # Start browser/context and seed cache once in the background, the worker serves while Chromium starts
+    warmup = asyncio.create_task(_warm_assets_once())
     try:
         yield
     finally:
+        warmup.cancel()
         await _close_browser()
@@ -1,4 +1,5 @@
 from logging.config import fileConfig
+from typing import Any
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
@@ -21,6 +22,11 @@ from lotkeeper.models import __all__ as models
 target_metadata = DbModel.metadata
 
 
+def include_object(object: Any, name: str | None, type_: str, reflected: bool, compare_to: Any) -> bool:
+    """Exclude tables that are mapped onto views (info is_view), their migrations are written by hand."""
+    return not (type_ == "table" and object.info.get("is_view"))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     from lotkeeper.config import ENV
@@ -31,6 +37,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -43,6 +50,15 @@ def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
     from lotkeeper.config import ENV
 
+    # In-process upgrades at startup (DB.migrate) pass their connection
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     # Convert async URL to sync URL
     url = ENV.get_database_url_sync()
 
@@ -56,7 +72,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
         with context.begin_transaction():
             context.run_migrations()
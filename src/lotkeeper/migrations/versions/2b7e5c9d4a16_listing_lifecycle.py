@@ -0,0 +1,50 @@
+"""listing lifecycle
+
+Tracks the first snapshot of every listing and the hourly sell-through of the items. The ingest matches the
+listings of a new snapshot with the previous one, listings that disappeared are counted as sold or expired.
+
+Revision ID: 2b7e5c9d4a16
+Revises: 9d3f6a1b8c57
+Create Date: 2026-10-19 01:12:48.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7e5c9d4a16'
+down_revision: Union[str, Sequence[str], None] = '9d3f6a1b8c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('auctions', sa.Column('first_seen_at', sa.TIMESTAMP(timezone=True), nullable=True))
+
+    op.create_table('auction_item_sell_through_hourly',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('new_listings', sa.Integer(), nullable=False),
+    sa.Column('sold', sa.Integer(), nullable=False),
+    sa.Column('sold_quantity', sa.BigInteger(), nullable=False),
+    sa.Column('sold_value', sa.BigInteger(), nullable=False),
+    sa.Column('expired', sa.Integer(), nullable=False),
+    sa.Column('expired_quantity', sa.BigInteger(), nullable=False),
+    sa.Column('timed_sales', sa.Integer(), nullable=False),
+    sa.Column('time_to_sell_seconds', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'item_id', 'bucket')
+    )
+    op.create_index('idx_aisth_realm_bucket', 'auction_item_sell_through_hourly', ['server_realm_id', sa.text('bucket DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_aisth_realm_bucket', table_name='auction_item_sell_through_hourly')
+    op.drop_table('auction_item_sell_through_hourly')
+    op.drop_column('auctions', 'first_seen_at')
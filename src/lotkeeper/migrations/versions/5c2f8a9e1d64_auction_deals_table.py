@@ -0,0 +1,42 @@
+"""auction deals table
+
+Revision ID: 5c2f8a9e1d64
+Revises: b3d9e41c7a20
+Create Date: 2026-10-18 23:04:52.640311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f8a9e1d64'
+down_revision: Union[str, Sequence[str], None] = 'b3d9e41c7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('auction_deals',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=8), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('unit_buyout_price', sa.Integer(), nullable=False),
+    sa.Column('unit_starting_bid_price', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('reference_price', sa.Integer(), nullable=False),
+    sa.Column('unit_savings', sa.Integer(), nullable=False),
+    sa.Column('discount_pct', sa.Float(), nullable=False),
+    sa.Column('snapshot_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'kind', 'rank')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('auction_deals')
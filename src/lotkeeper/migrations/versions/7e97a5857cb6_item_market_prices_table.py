@@ -0,0 +1,40 @@
+"""item market prices table
+
+Revision ID: 7e97a5857cb6
+Revises: 25ac22ab8165
+Create Date: 2026-10-18 22:20:11.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e97a5857cb6'
+down_revision: Union[str, Sequence[str], None] = '25ac22ab8165'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('item_market_prices',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('min_buyout_price', sa.Integer(), nullable=True),
+    sa.Column('median_buyout_price', sa.Integer(), nullable=True),
+    sa.Column('total_quantity', sa.BigInteger(), nullable=False),
+    sa.Column('listing_count', sa.Integer(), nullable=False),
+    sa.Column('outlier_count', sa.Integer(), nullable=False),
+    sa.Column('last_seen_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'item_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('item_market_prices')
@@ -0,0 +1,31 @@
+"""realm snapshot ordering
+
+Adds the time of the latest ingested snapshot of a realm. The ingest of a realm runs under a per-realm lock and
+drops snapshots older than it, a delayed submission never replaces a newer snapshot.
+
+Revision ID: 9d3f6a1b8c57
+Revises: f4a91d3c6b27
+Create Date: 2026-10-19 00:31:12.406218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3f6a1b8c57'
+down_revision: Union[str, Sequence[str], None] = 'f4a91d3c6b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('server_realms', sa.Column('last_snapshot_at', sa.TIMESTAMP(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('server_realms', 'last_snapshot_at')
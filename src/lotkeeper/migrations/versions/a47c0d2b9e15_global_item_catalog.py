@@ -0,0 +1,118 @@
+"""global item catalog
+
+Replaces the per-realm items table with a shared item catalog and the items of each realm, which only hold
+metadata where the realm differs from the catalog. The items view merges both for reads.
+
+Revision ID: a47c0d2b9e15
+Revises: e81a4c6f0b93
+Create Date: 2026-10-19 00:12:38.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a47c0d2b9e15'
+down_revision: Union[str, Sequence[str], None] = 'e81a4c6f0b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+METADATA_COLUMNS = ('name', 'link', 'icon', 'level', 'quality', 'max_stack_size', 'vendor_price', 'class_index', 'class_name')
+
+# Must match ItemCatalogFactory.get_content_hash
+CONTENT_HASH_SQL = (
+    "('x' || left(md5(concat_ws(E'\\x1f', name, link, icon, level, quality, max_stack_size, vendor_price, "
+    "class_index, class_name)), 16))::bit(64)::bigint"
+)
+
+ITEMS_VIEW_SQL = f"""
+CREATE VIEW items AS
+SELECT
+    ri.item_id AS id,
+    ri.server_realm_id,
+    {', '.join(f'COALESCE(ri.{column}, c.{column}) AS {column}' for column in METADATA_COLUMNS)}
+FROM realm_items ri
+JOIN item_catalog c ON c.id = ri.item_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('item_catalog',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.BigInteger(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('link', sa.String(), nullable=False),
+    sa.Column('icon', sa.String(), nullable=False),
+    sa.Column('level', sa.Integer(), nullable=False),
+    sa.Column('quality', sa.Integer(), nullable=False),
+    sa.Column('max_stack_size', sa.Integer(), nullable=False),
+    sa.Column('vendor_price', sa.Integer(), nullable=False),
+    sa.Column('class_index', sa.Integer(), nullable=False),
+    sa.Column('class_name', sa.String(), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_item_catalog_quality'), 'item_catalog', ['quality'], unique=False)
+
+    op.create_table('realm_items',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.BigInteger(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('link', sa.String(), nullable=True),
+    sa.Column('icon', sa.String(), nullable=True),
+    sa.Column('level', sa.Integer(), nullable=True),
+    sa.Column('quality', sa.Integer(), nullable=True),
+    sa.Column('max_stack_size', sa.Integer(), nullable=True),
+    sa.Column('vendor_price', sa.Integer(), nullable=True),
+    sa.Column('class_index', sa.Integer(), nullable=True),
+    sa.Column('class_name', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['item_id'], ['item_catalog.id'], ),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'item_id')
+    )
+
+    # The lowest realm ID that lists an item defines its catalog entry
+    columns = ', '.join(METADATA_COLUMNS)
+    op.execute(f"""
+        INSERT INTO item_catalog (id, content_hash, {columns}, updated_at)
+        SELECT DISTINCT ON (id) id, {CONTENT_HASH_SQL}, {columns}, now()
+        FROM items
+        ORDER BY id, server_realm_id
+    """)
+    op.execute(f"""
+        INSERT INTO realm_items (server_realm_id, item_id, content_hash, {columns})
+        SELECT i.server_realm_id, i.id, i.content_hash,
+            {', '.join(f'CASE WHEN i.content_hash = c.content_hash THEN NULL ELSE i.{column} END' for column in METADATA_COLUMNS)}
+        FROM (SELECT items.*, {CONTENT_HASH_SQL} AS content_hash FROM items) i
+        JOIN item_catalog c ON c.id = i.id
+    """)
+
+    op.drop_constraint('auctions_item_id_server_realm_id_fkey', 'auctions', type_='foreignkey')
+    op.drop_table('items')
+    op.execute(ITEMS_VIEW_SQL)
+    op.create_foreign_key('auctions_item_id_server_realm_id_fkey', 'auctions', 'realm_items', ['item_id', 'server_realm_id'], ['item_id', 'server_realm_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('auctions_item_id_server_realm_id_fkey', 'auctions', type_='foreignkey')
+    op.execute("ALTER VIEW items RENAME TO items_view")
+    op.execute("CREATE TABLE items AS SELECT * FROM items_view")
+    op.execute("DROP VIEW items_view")
+    for column in ('id', 'server_realm_id', *METADATA_COLUMNS):
+        op.alter_column('items', column, nullable=False)
+    op.create_primary_key('items_pkey', 'items', ['id', 'server_realm_id'])
+    op.create_foreign_key('items_server_realm_id_fkey', 'items', 'server_realms', ['server_realm_id'], ['id'])
+    op.create_index(op.f('ix_items_id'), 'items', ['id'], unique=False)
+    op.create_index(op.f('ix_items_quality'), 'items', ['quality'], unique=False)
+    op.create_index('ix_items_server_realm', 'items', ['server_realm_id'], unique=False)
+    op.create_index(op.f('ix_items_server_realm_id'), 'items', ['server_realm_id'], unique=False)
+    op.create_foreign_key('auctions_item_id_server_realm_id_fkey', 'auctions', 'items', ['item_id', 'server_realm_id'], ['id', 'server_realm_id'])
+    op.drop_table('realm_items')
+    op.drop_index(op.f('ix_item_catalog_quality'), table_name='item_catalog')
+    op.drop_table('item_catalog')
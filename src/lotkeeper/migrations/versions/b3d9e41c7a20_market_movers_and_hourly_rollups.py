@@ -0,0 +1,61 @@
+"""market movers and hourly rollups
+
+Revision ID: b3d9e41c7a20
+Revises: 7e97a5857cb6
+Create Date: 2026-10-18 22:31:42.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9e41c7a20'
+down_revision: Union[str, Sequence[str], None] = '7e97a5857cb6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('auction_item_hourly_rollups',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('min_buyout_price', sa.Integer(), nullable=True),
+    sa.Column('median_buyout_price', sa.Integer(), nullable=True),
+    sa.Column('total_quantity', sa.BigInteger(), nullable=False),
+    sa.Column('listing_count', sa.Integer(), nullable=False),
+    sa.Column('outlier_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'item_id', 'bucket')
+    )
+    op.create_index('idx_aihr_realm_bucket', 'auction_item_hourly_rollups', ['server_realm_id', sa.text('bucket DESC')], unique=False)
+
+    op.create_table('market_movers',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('window', sa.String(length=8), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('current_median_buyout_price', sa.Integer(), nullable=False),
+    sa.Column('previous_median_buyout_price', sa.Integer(), nullable=False),
+    sa.Column('price_change_pct', sa.Float(), nullable=False),
+    sa.Column('current_quantity', sa.BigInteger(), nullable=False),
+    sa.Column('previous_quantity', sa.BigInteger(), nullable=False),
+    sa.Column('volume_change_pct', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'window', 'item_id')
+    )
+    op.create_index('idx_mm_realm_window_price', 'market_movers', ['server_realm_id', 'window', 'price_change_pct'], unique=False)
+    op.create_index('idx_mm_realm_window_volume', 'market_movers', ['server_realm_id', 'window', 'volume_change_pct'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_mm_realm_window_volume', table_name='market_movers')
+    op.drop_index('idx_mm_realm_window_price', table_name='market_movers')
+    op.drop_table('market_movers')
+    op.drop_index('idx_aihr_realm_bucket', table_name='auction_item_hourly_rollups')
+    op.drop_table('auction_item_hourly_rollups')
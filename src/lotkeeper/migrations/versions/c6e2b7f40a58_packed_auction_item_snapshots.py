@@ -0,0 +1,94 @@
+"""packed auction item snapshots
+
+Replaces the per-listing auction_datapoints table with one row per realm, item and snapshot holding the
+sorted buyout prices and the aligned quantities as arrays. Bid-only listings, starting bids and counts were
+never read and are dropped.
+
+Revision ID: c6e2b7f40a58
+Revises: a47c0d2b9e15
+Create Date: 2026-10-19 09:41:17.224310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e2b7f40a58'
+down_revision: Union[str, Sequence[str], None] = 'a47c0d2b9e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The hypertable must be created while the table is empty, the backfill then lands in chunks
+CREATE_HYPERTABLE_SQL = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+        PERFORM create_hypertable(
+            '{table}', 'timestamp', if_not_exists => TRUE, chunk_time_interval => INTERVAL '{interval}'
+        );
+    END IF;
+END
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('auction_item_snapshots',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('buyout_prices', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('quantities', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'item_id', 'timestamp')
+    )
+    op.execute(CREATE_HYPERTABLE_SQL.format(table='auction_item_snapshots', interval='7 days'))
+
+    op.execute("""
+        INSERT INTO auction_item_snapshots (server_realm_id, item_id, timestamp, buyout_prices, quantities)
+        SELECT
+            server_realm_id,
+            item_id,
+            timestamp,
+            array_agg(buyout_price ORDER BY buyout_price, quantity),
+            array_agg(quantity ORDER BY buyout_price, quantity)
+        FROM auction_datapoints
+        WHERE buyout_price > 0
+        GROUP BY server_realm_id, item_id, timestamp
+    """)
+
+    op.drop_table('auction_datapoints')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('auction_datapoints',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('timestamp', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('buyout_price', sa.Integer(), nullable=False),
+    sa.Column('starting_bid_price', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('id', 'timestamp')
+    )
+    op.create_index('idx_a_item_server_realm_ts', 'auction_datapoints', ['item_id', 'server_realm_id', sa.literal_column('timestamp DESC')], unique=False)
+    op.create_index('idx_adp_realm_time_cover_price', 'auction_datapoints', ['server_realm_id', 'timestamp'], unique=False, postgresql_include=('buyout_price', 'quantity'), postgresql_where=sa.text('buyout_price > 0'))
+    op.execute(CREATE_HYPERTABLE_SQL.format(table='auction_datapoints', interval='1 day'))
+
+    # Starting bids are not known anymore, the buyout price is the closest value
+    op.execute("""
+        INSERT INTO auction_datapoints (timestamp, server_realm_id, item_id, buyout_price, starting_bid_price, count, quantity)
+        SELECT s.timestamp, s.server_realm_id, s.item_id, p.buyout_price, p.buyout_price, 1, p.quantity
+        FROM auction_item_snapshots s
+        CROSS JOIN LATERAL unnest(s.buyout_prices, s.quantities) AS p(buyout_price, quantity)
+    """)
+
+    op.drop_table('auction_item_snapshots')
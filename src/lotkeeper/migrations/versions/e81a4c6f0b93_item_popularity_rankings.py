@@ -0,0 +1,39 @@
+"""item popularity rankings
+
+Revision ID: e81a4c6f0b93
+Revises: 5c2f8a9e1d64
+Create Date: 2026-10-18 23:41:07.312945
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81a4c6f0b93'
+down_revision: Union[str, Sequence[str], None] = '5c2f8a9e1d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('item_market_prices', sa.Column('market_value', sa.BigInteger(), nullable=False, server_default='0'))
+    op.execute(
+        "UPDATE item_market_prices SET market_value = total_quantity * COALESCE(median_buyout_price, 0) "
+        "WHERE listing_count > 0"
+    )
+    op.alter_column('item_market_prices', 'market_value', server_default=None)
+    op.create_index('idx_imp_realm_listing_count', 'item_market_prices', ['server_realm_id', 'listing_count', 'item_id'], unique=False)
+    op.create_index('idx_imp_realm_total_quantity', 'item_market_prices', ['server_realm_id', 'total_quantity', 'item_id'], unique=False)
+    op.create_index('idx_imp_realm_market_value', 'item_market_prices', ['server_realm_id', 'market_value', 'item_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_imp_realm_market_value', table_name='item_market_prices')
+    op.drop_index('idx_imp_realm_total_quantity', table_name='item_market_prices')
+    op.drop_index('idx_imp_realm_listing_count', table_name='item_market_prices')
+    op.drop_column('item_market_prices', 'market_value')
@@ -0,0 +1,49 @@
+"""tiered price history retention
+
+Adds the daily item rollups, which are downsampled from the hourly rollups and kept forever. The retention of
+the raw snapshots and the hourly rollups moves from Timescale policies to the retention job, which only drops
+chunks after they were downsampled.
+
+Revision ID: f4a91d3c6b27
+Revises: c6e2b7f40a58
+Create Date: 2026-10-19 14:02:51.730118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a91d3c6b27'
+down_revision: Union[str, Sequence[str], None] = 'c6e2b7f40a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('auction_item_daily_rollups',
+    sa.Column('server_realm_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('min_buyout_price', sa.Integer(), nullable=True),
+    sa.Column('median_buyout_price', sa.Integer(), nullable=True),
+    sa.Column('total_quantity', sa.BigInteger(), nullable=False),
+    sa.Column('listing_count', sa.Integer(), nullable=False),
+    sa.Column('outlier_count', sa.Integer(), nullable=False),
+    sa.Column('hour_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['server_realm_id'], ['server_realms.id'], ),
+    sa.PrimaryKeyConstraint('server_realm_id', 'item_id', 'bucket')
+    )
+    op.create_index('idx_aidr_realm_bucket', 'auction_item_daily_rollups', ['server_realm_id', sa.literal_column('bucket DESC')], unique=False)
+
+    # The retention policies of the raw and hourly tiers are removed at startup (create_hypertable), the daily
+    # rollups of the existing history are written by the first retention run
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_aidr_realm_bucket', table_name='auction_item_daily_rollups')
+    op.drop_table('auction_item_daily_rollups')
@@ -1,15 +1,27 @@
 # Import all SQLAlchemy models so Alembic can detect them
 from lotkeeper.models.auction import AuctionModel
-from lotkeeper.models.auction_datapoint import AuctionDatapointModel
+from lotkeeper.models.auction_deal import AuctionDealModel
+from lotkeeper.models.auction_item_daily_rollup import AuctionItemDailyRollupModel
+from lotkeeper.models.auction_item_hourly_rollup import AuctionItemHourlyRollupModel
+from lotkeeper.models.auction_item_snapshot import AuctionItemSnapshotModel
 from lotkeeper.models.auction_realm_activity_datapoint import AuctionRealmActivityDatapointModel
 from lotkeeper.models.item import ItemModel
+from lotkeeper.models.item_market_price import ItemMarketPriceModel
+from lotkeeper.models.item_sell_through import ItemSellThroughHourlyModel
+from lotkeeper.models.market_mover import MarketMoverModel
 from lotkeeper.models.server_realm import ServerRealmModel
 
 # This ensures all models are registered with the metadata
 __all__ = [
-    "AuctionDatapointModel",
+    "AuctionDealModel",
+    "AuctionItemDailyRollupModel",
+    "AuctionItemHourlyRollupModel",
+    "AuctionItemSnapshotModel",
     "AuctionModel",
     "AuctionRealmActivityDatapointModel",
+    "ItemMarketPriceModel",
     "ItemModel",
+    "ItemSellThroughHourlyModel",
+    "MarketMoverModel",
     "ServerRealmModel",
 ]
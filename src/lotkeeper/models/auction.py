@@ -1,11 +1,17 @@
 from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
+from typing import Any
 
-from pydantic import BaseModel, Field
-from sqlalchemy import ForeignKeyConstraint, Index
+from pydantic import AwareDatetime, BaseModel, Field
+from sqlalchemy import TIMESTAMP, ForeignKeyConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.selectable import ScalarSelect
 
 from lotkeeper.models.base.db_model import DbModel
-from lotkeeper.models.item import Item
+from lotkeeper.models.base.json_row import json_row
+from lotkeeper.models.item import Item, ItemFactory
+from lotkeeper.models.types import AnyRow
 
 
 class AuctionModel(DbModel):
@@ -13,7 +19,7 @@ class AuctionModel(DbModel):
     __table_args__ = (
         Index("ix_auctions_item_server_realm", "item_id", "server_realm_id"),
         ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
-        ForeignKeyConstraint(["item_id", "server_realm_id"], ["items.id", "items.server_realm_id"]),
+        ForeignKeyConstraint(["item_id", "server_realm_id"], ["realm_items.item_id", "realm_items.server_realm_id"]),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
@@ -23,6 +29,9 @@ class AuctionModel(DbModel):
     auction_unit_buyout_price: Mapped[int] = mapped_column(index=True)
     auction_unit_starting_bid_price: Mapped[int] = mapped_column(index=True)
     auction_quantity: Mapped[int]
+    # The time of the first snapshot with the listing, carried over while the following snapshots still have it.
+    # None for listings ingested before the listing lifecycle was tracked
+    first_seen_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
 
 
 class Auction(BaseModel):
@@ -41,6 +50,17 @@ class AuctionData(BaseModel):
     server: str = Field(description="The server of the realm", min_length=3)
     realm: str = Field(description="The realm of the auctions", min_length=3)
     auctions: list[Auction] = Field(description="The auctions to insert")
+    scanned_at: AwareDatetime | None = Field(
+        default=None,
+        description="The time the auction house was scanned (UTC), defaults to the time of the submission. "
+        "A snapshot older than the latest ingested snapshot of the realm is dropped",
+    )
+
+
+class IngestResult(StrEnum):
+    APPLIED = "applied"
+    STALE = "stale"  # a newer snapshot of the realm was already ingested
+    BUSY = "busy"  # another ingest of the realm did not finish in time
 
 
 @dataclass
@@ -54,12 +74,19 @@ class AuctionFilter:
 
 
 class AuctionFactory:
+    # The columns of the API model without the item, read as plain rows by Core selects (see DB.get_read_connection)
+    COLUMNS = (
+        AuctionModel.auction_unit_buyout_price,
+        AuctionModel.auction_unit_starting_bid_price,
+        AuctionModel.auction_quantity,
+    )
+
     @staticmethod
-    def get(model: AuctionModel, item: Item) -> Auction:
+    def get(model: AuctionModel | AnyRow, item: Item) -> Auction:
         """Get the API model from a database model
 
         Args:
-            model: The database model to convert to a API model
+            model: The database model to convert to a API model, or a row with its COLUMNS
             item: The item for this auction
 
         Returns:
@@ -72,6 +99,20 @@ class AuctionFactory:
             quantity=model.auction_quantity,
         )
 
+    @staticmethod
+    def get_json_row() -> ScalarSelect[Any]:
+        """Get the API model of the auction and item row of the enclosing query as a row rendered to JSON by Postgres
+
+        Returns:
+            The row with the fields of the API model
+        """
+        return json_row(
+            ItemFactory.get_json_row().label("item"),
+            AuctionModel.auction_unit_buyout_price.label("unit_buyout_price"),
+            AuctionModel.auction_unit_starting_bid_price.label("unit_starting_bid_price"),
+            AuctionModel.auction_quantity.label("quantity"),
+        )
+
     @staticmethod
     def get_db_model(view: Auction, server_realm_id: int) -> AuctionModel:
         """Get a database model from a API model
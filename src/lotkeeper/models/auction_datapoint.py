@@ -1,49 +1,7 @@
 from datetime import datetime
+from enum import StrEnum
 
 from pydantic import BaseModel, Field
-from sqlalchemy import TIMESTAMP, ForeignKeyConstraint, Index
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.sql import text as sa_text
-
-from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
-
-
-class AuctionDatapointModel(TimescaleDbModel):
-    __tablename__ = "auction_datapoints"
-    __table_args__ = (
-        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
-        # Composite index item market activity
-        Index(
-            "idx_a_item_server_realm_ts",
-            "item_id",
-            "server_realm_id",
-            sa_text("timestamp DESC"),
-        ),
-        # Composite index realm market activity
-        Index(
-            "idx_adp_realm_time_cover_price",
-            "server_realm_id",
-            "timestamp",
-            postgresql_include=("buyout_price", "quantity"),
-            postgresql_where=sa_text("buyout_price > 0"),
-        ),
-    )
-
-    # Timescale hypertable config
-    __time_column_name__ = "timestamp"
-    __chunk_time_interval__ = "1 day"
-    __compression_after__ = "14 days"
-
-    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
-    timestamp: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True, nullable=False)
-
-    server_realm_id: Mapped[int] = mapped_column()
-    item_id: Mapped[int] = mapped_column()
-
-    buyout_price: Mapped[int] = mapped_column()
-    starting_bid_price: Mapped[int] = mapped_column()  # stored but not used
-    count: Mapped[int] = mapped_column()
-    quantity: Mapped[int] = mapped_column()
 
 
 class AuctionItemPriceHourlySummary(BaseModel):
@@ -80,6 +38,49 @@ class AuctionItemActivityHourlySummary(BaseModel):
     outlier_count: int = Field(description="The number of datapoints that are outliers", ge=0)
 
 
+class AuctionItemPriceDailySeries(BaseModel):
+    model_config = {
+        "json_schema_extra": {
+            "description": "A compact daily buyout price series of an item, the lists are aligned by day (UTC)"
+        }
+    }
+
+    item_id: int = Field(description="The ID of the item", gt=0)
+    timestamps: list[datetime] = Field(description="The start of each day with buyout datapoints (UTC)")
+    median_buyout_prices: list[int] = Field(description="The median buyout price of each day in copper")
+    min_buyout_prices: list[int] = Field(description="The minimum buyout price of each day in copper")
+
+
+class AuctionItemPriceHistoryResolution(StrEnum):
+    HOUR = "hour"  # hourly rollups, kept for months
+    DAY = "day"  # daily rollups, kept forever
+
+
+class AuctionItemPriceHistoryPoint(BaseModel):
+    model_config = {"json_schema_extra": {"description": "The downsampled market state of an item for one bucket"}}
+
+    timestamp: datetime = Field(description="The start of the bucket (UTC)")
+    min_buyout_price: int | None = Field(description="The minimum buyout price in copper", ge=0)
+    median_buyout_price: int | None = Field(
+        description="The median buyout price in copper after outlier filtering, daily buckets use the median of "
+        "the hourly medians",
+        ge=0,
+    )
+    total_quantity: int = Field(description="The listed quantity, daily buckets use the hourly average", ge=0)
+    listing_count: int = Field(description="The number of listings, daily buckets use the hourly average", ge=0)
+    outlier_count: int = Field(description="The number of outlier listings", ge=0)
+
+
+class AuctionItemPriceHistory(BaseModel):
+    model_config = {
+        "json_schema_extra": {"description": "The long-range price history of an item from the rollup tiers"}
+    }
+
+    item_id: int = Field(description="The ID of the item", gt=0)
+    resolution: AuctionItemPriceHistoryResolution = Field(description="The size of the buckets")
+    points: list[AuctionItemPriceHistoryPoint] = Field(description="The buckets with data, oldest first")
+
+
 class AuctionDatapointFactory:
     @staticmethod
     def get_price_hourly_summary(
@@ -0,0 +1,82 @@
+from datetime import datetime
+from enum import StrEnum
+
+from pydantic import BaseModel, Field
+from sqlalchemy import TIMESTAMP, ForeignKeyConstraint, PrimaryKeyConstraint, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lotkeeper.models.base.db_model import DbModel
+from lotkeeper.models.item import Item
+from lotkeeper.models.types import AnyRow
+
+
+class AuctionDealKind(StrEnum):
+    VENDOR = "vendor"  # buyout below the vendor price of the item
+    MARKET = "market"  # buyout below the robust median buyout price of the item
+
+
+class AuctionDealModel(DbModel):
+    """A deal of the latest snapshot of a realm, ranked per kind at ingest."""
+
+    __tablename__ = "auction_deals"
+    __table_args__ = (
+        # Pages are read by walking the rank forward, the primary key doubles as the read index
+        PrimaryKeyConstraint("server_realm_id", "kind", "rank"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+    )
+
+    server_realm_id: Mapped[int] = mapped_column()
+    kind: Mapped[str] = mapped_column(String(8))
+    rank: Mapped[int] = mapped_column()  # 1-based, best deal first
+
+    item_id: Mapped[int] = mapped_column()
+    unit_buyout_price: Mapped[int] = mapped_column()
+    unit_starting_bid_price: Mapped[int] = mapped_column()
+    quantity: Mapped[int] = mapped_column()
+    reference_price: Mapped[int] = mapped_column()  # vendor price or robust median buyout price
+    unit_savings: Mapped[int] = mapped_column()
+    discount_pct: Mapped[float] = mapped_column()
+    snapshot_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class AuctionDeal(BaseModel):
+    model_config = {"json_schema_extra": {"description": "An auction listed below the reference price of its item"}}
+
+    item: Item = Field(description="The item being auctioned")
+    kind: AuctionDealKind = Field(description="The reference price the deal is measured against")
+    rank: int = Field(description="The rank of the deal within its kind, 1 is the best deal", ge=1)
+    unit_buyout_price: int = Field(description="The buyout price in copper", ge=0)
+    unit_starting_bid_price: int = Field(description="The starting bid price in copper", ge=0)
+    quantity: int = Field(description="The quantity being auctioned", gt=0)
+    reference_price: int = Field(
+        description="The vendor price or the robust median buyout price of the item in copper", ge=0
+    )
+    unit_savings: int = Field(description="The reference price minus the buyout price in copper", gt=0)
+    discount_pct: float = Field(description="The savings in percent of the reference price", gt=0, le=100)
+    snapshot_at: datetime = Field(description="The time of the snapshot the deal was found in (UTC)")
+
+
+class AuctionDealFactory:
+    @staticmethod
+    def get(model: AuctionDealModel | AnyRow, item: Item) -> AuctionDeal:
+        """Get the API model from a database model
+
+        Args:
+            model: The database model to convert to a API model, or a row with its columns
+            item: The item of the deal
+
+        Returns:
+            The API model
+        """
+        return AuctionDeal(
+            item=item,
+            kind=AuctionDealKind(model.kind),
+            rank=model.rank,
+            unit_buyout_price=model.unit_buyout_price,
+            unit_starting_bid_price=model.unit_starting_bid_price,
+            quantity=model.quantity,
+            reference_price=model.reference_price,
+            unit_savings=model.unit_savings,
+            discount_pct=model.discount_pct,
+            snapshot_at=model.snapshot_at,
+        )
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKeyConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import text as sa_text
+
+from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
+
+
+class AuctionItemDailyRollupModel(TimescaleDbModel):
+    """Daily market state per item, downsampled from the hourly rollups of completed UTC days and kept forever."""
+
+    __tablename__ = "auction_item_daily_rollups"
+    __table_args__ = (
+        PrimaryKeyConstraint("server_realm_id", "item_id", "bucket"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+        # The latest rolled up day of a realm, where the next downsampling run continues
+        Index("idx_aidr_realm_bucket", "server_realm_id", sa_text("bucket DESC")),
+    )
+
+    # Timescale hypertable config
+    __time_column_name__ = "bucket"
+    __chunk_time_interval__ = "90 days"
+    __compression_after__ = "180 days"
+    __compress_segmentby__ = ("server_realm_id", "item_id")
+    __compress_orderby__ = ("bucket DESC",)
+    __reorder_index__ = "auction_item_daily_rollups_pkey"
+    __enable_retention__ = False
+
+    server_realm_id: Mapped[int] = mapped_column()
+    item_id: Mapped[int] = mapped_column()
+    bucket: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+    min_buyout_price: Mapped[int | None] = mapped_column(nullable=True)
+    median_buyout_price: Mapped[int | None] = mapped_column(nullable=True)  # median of the hourly medians
+    total_quantity: Mapped[int] = mapped_column(BigInteger)  # average listed quantity per hour
+    listing_count: Mapped[int] = mapped_column()  # average listings per hour
+    outlier_count: Mapped[int] = mapped_column()  # sum of the hourly outliers
+    hour_count: Mapped[int] = mapped_column()  # hours with a rollup, up to 24
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKeyConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import text as sa_text
+
+from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
+
+
+class AuctionItemHourlyRollupModel(TimescaleDbModel):
+    """Hourly market state per item, the latest snapshot within the hour wins."""
+
+    __tablename__ = "auction_item_hourly_rollups"
+    __table_args__ = (
+        PrimaryKeyConstraint("server_realm_id", "item_id", "bucket"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+        Index("idx_aihr_realm_bucket", "server_realm_id", sa_text("bucket DESC")),
+    )
+
+    # Timescale hypertable config
+    __time_column_name__ = "bucket"
+    __chunk_time_interval__ = "7 days"
+    __compression_after__ = "14 days"
+    __compress_segmentby__ = ("server_realm_id", "item_id")
+    __compress_orderby__ = ("bucket DESC",)
+    __reorder_index__ = "auction_item_hourly_rollups_pkey"
+    __retention_after__ = "6 months"
+    __retention_downsampled__ = True
+
+    server_realm_id: Mapped[int] = mapped_column()
+    item_id: Mapped[int] = mapped_column()
+    bucket: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+    min_buyout_price: Mapped[int | None] = mapped_column(nullable=True)
+    median_buyout_price: Mapped[int | None] = mapped_column(nullable=True)  # after MAD/IQR outlier filtering
+    total_quantity: Mapped[int] = mapped_column(BigInteger)
+    listing_count: Mapped[int] = mapped_column()
+    outlier_count: Mapped[int] = mapped_column()
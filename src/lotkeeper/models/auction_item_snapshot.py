@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, ForeignKeyConstraint, Integer, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
+
+
+class AuctionItemSnapshotModel(TimescaleDbModel):
+    """The buyout listings of an item in one snapshot of a realm, packed into arrays.
+
+    One row per realm, item and snapshot instead of one row per listing. Prices are sorted ascending and the
+    quantities are aligned with them, bid-only listings are not stored.
+    """
+
+    __tablename__ = "auction_item_snapshots"
+    __table_args__ = (
+        # Also the index of the item analytics queries (realm, item, time range)
+        PrimaryKeyConstraint("server_realm_id", "item_id", "timestamp"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+    )
+
+    # Timescale hypertable config
+    __time_column_name__ = "timestamp"
+    __chunk_time_interval__ = "7 days"
+    __compression_after__ = "14 days"
+    __compress_segmentby__ = ("server_realm_id", "item_id")
+    __compress_orderby__ = ("timestamp DESC",)
+    __reorder_index__ = "auction_item_snapshots_pkey"
+    # The hourly price and activity summaries are computed from the raw listings (percentiles, market value), the
+    # rollups can't serve them. Their ranges go back 90 days
+    __retention_after__ = "90 days"
+    __retention_downsampled__ = True
+
+    server_realm_id: Mapped[int] = mapped_column()
+    item_id: Mapped[int] = mapped_column()
+    timestamp: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+    buyout_prices: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
+    quantities: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
@@ -18,6 +18,9 @@ class AuctionRealmActivityDatapointModel(TimescaleDbModel):
     __time_column_name__ = "ts"
     __chunk_time_interval__ = "1 day"
     __compression_after__ = "14 days"
+    __compress_segmentby__ = ("server_realm_id",)
+    __compress_orderby__ = ("ts DESC",)
+    __reorder_index__ = "idx_r_realm_ts"
 
     server_realm_id: Mapped[int] = mapped_column(primary_key=True, nullable=False)
     ts: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True, nullable=False)
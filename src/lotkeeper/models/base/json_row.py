@@ -0,0 +1,65 @@
+"""Postgres-side JSON rendering of API models.
+
+Read paths of trusted rows can skip the ORM objects and pydantic models: Postgres renders every row as the JSON of
+its API model and the rows are joined into the response body. The keys of an object are the labels of its columns in
+order, the same bytes as the pydantic model serialized with orjson.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import Text, cast, func, select
+from sqlalchemy.sql.elements import ColumnElement, Label
+from sqlalchemy.sql.selectable import ScalarSelect
+
+from lotkeeper.models.types import PaginationInfo
+
+
+def json_row(*columns: Label[Any]) -> ScalarSelect[Any]:
+    """Build a row of labelled columns of the enclosing query, a JSON object once rendered
+
+    Args:
+        columns: The columns labelled with the keys of the object, a row can be nested as the column of another row
+
+    Returns:
+        The row as a scalar subquery correlated to the enclosing query
+    """
+    row = select(*columns).correlate_except(None).subquery("row")
+    return select(row.table_valued()).scalar_subquery()
+
+
+def json_text(row: ScalarSelect[Any]) -> ColumnElement[str]:
+    """Render a row as JSON text in Postgres
+
+    Args:
+        row: The row built by json_row
+
+    Returns:
+        The JSON of the row as text, returned by asyncpg without decoding
+    """
+    return cast(func.row_to_json(row), Text)
+
+
+def json_array(rows: Sequence[str]) -> bytes:
+    """Join rows rendered by json_text into a JSON array
+
+    Args:
+        rows: The JSON of every row
+
+    Returns:
+        The JSON array as the response body
+    """
+    return f"[{','.join(rows)}]".encode()
+
+
+def json_paginated(rows: Sequence[str], pagination: PaginationInfo) -> bytes:
+    """Join rows rendered by json_text into the JSON of a PaginatedResponse
+
+    Args:
+        rows: The JSON of every row of the page
+        pagination: The pagination of the page
+
+    Returns:
+        The paginated response as the response body
+    """
+    return f'{{"data":[{",".join(rows)}],"pagination":{pagination.model_dump_json()}}}'.encode()
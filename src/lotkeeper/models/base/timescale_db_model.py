@@ -1,3 +1,4 @@
+from loguru import logger
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncConnection
 
@@ -17,15 +18,27 @@ class TimescaleDbModel(DbModel):
     __compression_after__: str = "14 days"
     __enable_compression__: bool = True
 
+    # Compression layout: rows are grouped into compressed batches per segmentby value and sorted by orderby
+    # within a batch. Queries filtering on the segmentby columns only decompress the matching batches.
+    __compress_segmentby__: tuple[str, ...] = ()
+    __compress_orderby__: tuple[str, ...] = ()  # e.g. ("timestamp DESC",)
+
+    # Reorder policy: rewrites uncompressed chunks in the order of this index once they stop receiving writes
+    __reorder_index__: str | None = None
+
     # Retention policy (auto purge) — enabled by default
     __enable_retention__: bool = True
     __retention_after__: str = "3 months"
+    # Retention is enforced by the RetentionService instead of a Timescale policy, which only drops chunks after
+    # their data was downsampled into the next tier
+    __retention_downsampled__: bool = False
 
     @classmethod
-    async def create_hypertable(cls, conn: AsyncConnection) -> None:
+    async def create_hypertable(cls, conn: AsyncConnection, recompress: bool = False) -> None:
         """
         Ensure hypertable exists and (optionally) set compression + retention policies.
-        Idempotent: safe to call multiple times.
+        Idempotent: safe to call multiple times. With recompress a changed compression layout is applied to
+        compressed chunks too (see apply_compression_settings).
         """
         table_name = cls.__tablename__
         column_name = cls.__time_column_name__
@@ -44,28 +57,37 @@ class TimescaleDbModel(DbModel):
 
         # 2) Enable + policy: compression (optional)
         if cls.__enable_compression__:
-            # Enable compression on the table (no-op if already set)
+            # Enable compression on the table with the configured layout (no-op if already set)
+            await cls.apply_compression_settings(conn, recompress=recompress)
+
+            # Add compression policy (idempotent)
             await conn.execute(
                 text(f"""
-                ALTER TABLE {table_name} SET (
-                    timescaledb.compress = true
+                SELECT add_compression_policy(
+                    '{table_name}',
+                    if_not_exists => TRUE,
+                    compress_after => INTERVAL '{cls.__compression_after__}'
                 );
             """)
             )
 
-            # Add compression policy (idempotent)
+        # 3) Reorder policy (optional)
+        if cls.__reorder_index__:
             await conn.execute(
                 text(f"""
-                SELECT add_compression_policy(
+                SELECT add_reorder_policy(
                     '{table_name}',
-                    if_not_exists => TRUE,
-                    compress_after => INTERVAL '{cls.__compression_after__}'
+                    '{cls.__reorder_index__}',
+                    if_not_exists => TRUE
                 );
             """)
             )
 
-        # 3) Retention policy (auto-purge old chunks) — optional
-        if cls.__enable_retention__:
+        # 4) Retention policy (auto-purge old chunks) — optional
+        if cls.__enable_retention__ and cls.__retention_downsampled__:
+            # A policy could drop chunks before they are downsampled
+            await conn.execute(text(f"SELECT remove_retention_policy('{table_name}', if_exists => TRUE);"))
+        elif cls.__enable_retention__:
             await conn.execute(
                 text(f"""
                 SELECT add_retention_policy(
@@ -76,6 +98,86 @@ class TimescaleDbModel(DbModel):
             """)
             )
 
+    @classmethod
+    def compression_options(cls) -> dict[str, str]:
+        """Get the compression storage parameters of the table from the model config
+
+        Returns:
+            The timescaledb storage parameters by name
+        """
+        options = {"timescaledb.compress": "true"}
+        if cls.__compress_segmentby__:
+            options["timescaledb.compress_segmentby"] = ", ".join(cls.__compress_segmentby__)
+        if cls.__compress_orderby__:
+            options["timescaledb.compress_orderby"] = ", ".join(cls.__compress_orderby__)
+        return options
+
+    @classmethod
+    async def apply_compression_settings(cls, conn: AsyncConnection, recompress: bool = False) -> bool:
+        """Enable compression with the configured segmentby and orderby if the table doesn't use them yet.
+
+        The layout can't be changed while chunks are compressed. Without recompress a warning is logged and the
+        existing layout is kept, with recompress the compressed chunks are decompressed first and compressed
+        again by the compression policy.
+
+        Args:
+            conn: The connection to use
+            recompress: Decompress compressed chunks to apply a changed layout
+
+        Returns:
+            True if the settings were changed
+        """
+        table_name = cls.__tablename__
+
+        def normalize(columns: str | None) -> str:
+            return (columns or "").replace('"', "").replace(" ", "").lower()
+
+        current = (
+            await conn.execute(
+                text("""
+                SELECT segmentby, orderby
+                FROM timescaledb_information.hypertable_compression_settings
+                WHERE hypertable = CAST(:table_name AS regclass)
+            """),
+                {"table_name": table_name},
+            )
+        ).first()
+        desired = (", ".join(cls.__compress_segmentby__), ", ".join(cls.__compress_orderby__))
+        if current is not None and (normalize(current[0]), normalize(current[1])) == tuple(map(normalize, desired)):
+            return False
+
+        compressed_chunks = (
+            await conn.execute(
+                text("""
+                SELECT count(*)
+                FROM timescaledb_information.chunks
+                WHERE hypertable_name = :table_name AND is_compressed
+            """),
+                {"table_name": table_name},
+            )
+        ).scalar_one()
+
+        if compressed_chunks:
+            if not recompress:
+                logger.warning(
+                    f"Compression layout of {table_name} differs from the model but {compressed_chunks} chunks are "
+                    "compressed, keeping the existing layout (run migrate --recompress to apply it)"
+                )
+                return False
+
+            logger.info(f"Decompressing {compressed_chunks} chunks of {table_name} to change the compression layout")
+            await conn.execute(
+                text(
+                    "SELECT decompress_chunk(chunk, if_compressed => TRUE) FROM show_chunks(CAST(:table_name AS regclass)) chunk"
+                ),
+                {"table_name": table_name},
+            )
+
+        options = ", ".join(f"{name} = '{value}'" for name, value in cls.compression_options().items())
+        await conn.execute(text(f"ALTER TABLE {table_name} SET ({options});"))
+        logger.info(f"Applied compression layout to {table_name}: {options}")
+        return True
+
     @classmethod
     async def drop_hypertable(cls, conn: AsyncConnection) -> None:
         """Drop the hypertable (table + chunks)."""
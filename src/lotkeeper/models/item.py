@@ -1,27 +1,35 @@
 from dataclasses import dataclass
+from typing import Any
 
 from pydantic import BaseModel, Field
-from sqlalchemy import ForeignKeyConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.selectable import ScalarSelect
 
 from lotkeeper.models.base.db_model import DbModel
+from lotkeeper.models.base.json_row import json_row
+from lotkeeper.models.types import AnyRow
 
 
 class ItemModel(DbModel):
+    """Read-only view of the item metadata per realm, the catalog entry merged with the realm's overrides.
+
+    Items are written through ItemCatalogModel and RealmItemModel.
+    """
+
     __tablename__ = "items"
     __table_args__ = (
         PrimaryKeyConstraint("id", "server_realm_id"),
-        Index("ix_items_server_realm", "server_realm_id"),
-        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+        {"info": {"is_view": True}},
     )
 
-    id: Mapped[int] = mapped_column(index=True)  # The item ID
-    server_realm_id: Mapped[int] = mapped_column(index=True)  # For which server-realm this item is available
+    id: Mapped[int] = mapped_column()  # The item ID
+    server_realm_id: Mapped[int] = mapped_column()  # For which server-realm this item is available
     name: Mapped[str]
     link: Mapped[str]
     icon: Mapped[str]
     level: Mapped[int]
-    quality: Mapped[int] = mapped_column(index=True)
+    quality: Mapped[int]
     max_stack_size: Mapped[int]
     vendor_price: Mapped[int]
     class_index: Mapped[int]
@@ -54,12 +62,26 @@ class ItemFilter:
 
 
 class ItemFactory:
+    # The columns of the API model, read as plain rows by Core selects (see DB.get_read_connection)
+    COLUMNS = (
+        ItemModel.id,
+        ItemModel.name,
+        ItemModel.link,
+        ItemModel.icon,
+        ItemModel.level,
+        ItemModel.quality,
+        ItemModel.max_stack_size,
+        ItemModel.vendor_price,
+        ItemModel.class_index,
+        ItemModel.class_name,
+    )
+
     @staticmethod
-    def get(model: ItemModel) -> Item:
+    def get(model: ItemModel | AnyRow) -> Item:
         """Get the API model from a database model
 
         Args:
-            model: The database model to convert to a API model
+            model: The database model to convert to a API model, or a row with its COLUMNS
 
         Returns:
             The API model
@@ -78,26 +100,26 @@ class ItemFactory:
         )
 
     @staticmethod
-    def get_db_model(view: Item, server_realm_id: int) -> ItemModel:
-        """Get a database model from a API model
+    def get_once(model: ItemModel | AnyRow, items: dict[int, Item]) -> Item:
+        """Get the API model of an item once per result, results of listings repeat the same items on many rows
 
         Args:
-            view: The API model to convert to a database model
-            server_realm_id: The server realm ID
+            model: The database model to convert to a API model, or a row with its COLUMNS
+            items: The API models of the result converted so far, by item ID
 
         Returns:
-            The database model
+            The API model, shared by the rows of the item
         """
-        return ItemModel(
-            server_realm_id=server_realm_id,
-            id=view.id,
-            name=view.name,
-            link=view.name,
-            icon=view.icon,
-            level=view.level,
-            quality=view.quality,
-            max_stack_size=view.max_stack_size,
-            vendor_price=view.vendor_price,
-            class_index=view.class_index,
-            class_name=view.class_name,
-        )
+        item = items.get(model.id)
+        if item is None:
+            item = items[model.id] = ItemFactory.get(model)
+        return item
+
+    @staticmethod
+    def get_json_row() -> ScalarSelect[Any]:
+        """Get the API model of the item row of the enclosing query as a row rendered to JSON by Postgres
+
+        Returns:
+            The row with the fields of the API model
+        """
+        return json_row(*(column.label(column.key) for column in ItemFactory.COLUMNS))
@@ -0,0 +1,65 @@
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lotkeeper.models.base.db_model import DbModel
+from lotkeeper.models.item import Item
+
+
+class ItemCatalogModel(DbModel):
+    """Item metadata shared by all realms, the first realm that lists an item defines its catalog entry."""
+
+    __tablename__ = "item_catalog"
+
+    id: Mapped[int] = mapped_column(primary_key=True)  # The item ID
+    content_hash: Mapped[int] = mapped_column(BigInteger)
+    name: Mapped[str]
+    link: Mapped[str]
+    icon: Mapped[str]
+    level: Mapped[int]
+    quality: Mapped[int] = mapped_column(index=True)
+    max_stack_size: Mapped[int]
+    vendor_price: Mapped[int]
+    class_index: Mapped[int]
+    class_name: Mapped[str]
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class ItemCatalogFactory:
+    @staticmethod
+    def get_content_hash(view: Item) -> int:
+        """Get a hash of the metadata of an item, equal for equal metadata on any realm
+
+        Args:
+            view: The API model to hash
+
+        Returns:
+            The first 8 bytes of the MD5 of the metadata as a signed 64 bit integer, the catalog
+            migration computes the same hash in SQL
+        """
+        content = "\x1f".join(str(value) for value in ItemCatalogFactory.get_metadata(view).values())
+        return int.from_bytes(hashlib.md5(content.encode(), usedforsecurity=False).digest()[:8], signed=True)
+
+    @staticmethod
+    def get_metadata(view: Item) -> dict[str, str | int]:
+        """Get the metadata columns of an item as stored in the catalog and the realm overrides
+
+        Args:
+            view: The API model to get the metadata of
+
+        Returns:
+            The metadata column values by column name
+        """
+        return {
+            "name": view.name,
+            "link": view.name,  # the link column has always held the name
+            "icon": view.icon,
+            "level": view.level,
+            "quality": view.quality,
+            "max_stack_size": view.max_stack_size,
+            "vendor_price": view.vendor_price,
+            "class_index": view.class_index,
+            "class_name": view.class_name,
+        }
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKeyConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lotkeeper.models.base.db_model import DbModel
+from lotkeeper.models.types import AnyRow
+
+
+class ItemMarketPriceModel(DbModel):
+    __tablename__ = "item_market_prices"
+    __table_args__ = (
+        PrimaryKeyConstraint("server_realm_id", "item_id"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+        # Popularity rankings, scanned backward for the top items
+        Index("idx_imp_realm_listing_count", "server_realm_id", "listing_count", "item_id"),
+        Index("idx_imp_realm_total_quantity", "server_realm_id", "total_quantity", "item_id"),
+        Index("idx_imp_realm_market_value", "server_realm_id", "market_value", "item_id"),
+    )
+
+    server_realm_id: Mapped[int] = mapped_column()
+    item_id: Mapped[int] = mapped_column()
+
+    # Prices are kept from the last snapshot that had buyout listings of the item
+    min_buyout_price: Mapped[int | None] = mapped_column(nullable=True)
+    median_buyout_price: Mapped[int | None] = mapped_column(nullable=True)  # after MAD/IQR outlier filtering
+    total_quantity: Mapped[int] = mapped_column(BigInteger)
+    listing_count: Mapped[int] = mapped_column()
+    outlier_count: Mapped[int] = mapped_column()
+    market_value: Mapped[int] = mapped_column(BigInteger)  # total quantity times median buyout price
+    last_seen_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class ItemMarketPrice(BaseModel):
+    model_config = {
+        "json_schema_extra": {"description": "The current market price of an item, updated with every snapshot"}
+    }
+
+    item_id: int = Field(description="The ID of the item", gt=0)
+    min_buyout_price: int | None = Field(description="The lowest buyout price in copper", ge=0)
+    median_buyout_price: int | None = Field(
+        description="The median buyout price in copper, excluding outliers (MAD, fallback IQR)", ge=0
+    )
+    total_quantity: int = Field(description="The total quantity currently listed", ge=0)
+    listing_count: int = Field(description="The number of listings in the latest snapshot, 0 if not listed", ge=0)
+    outlier_count: int = Field(description="The number of buyout listings excluded as outliers", ge=0)
+    market_value: int = Field(
+        description="The listed quantity valued at the median buyout price in copper, 0 if not listed", ge=0
+    )
+    last_seen_at: datetime = Field(description="The time of the latest snapshot that listed the item (UTC)")
+    updated_at: datetime = Field(description="The time of the latest snapshot of the realm (UTC)")
+
+
+class ItemMarketPriceFactory:
+    @staticmethod
+    def get(model: ItemMarketPriceModel | AnyRow) -> ItemMarketPrice:
+        """Get the API model from a database model
+
+        Args:
+            model: The database model to convert to a API model, or a row with its columns
+
+        Returns:
+            The API model
+        """
+        return ItemMarketPrice(
+            item_id=model.item_id,
+            min_buyout_price=model.min_buyout_price,
+            median_buyout_price=model.median_buyout_price,
+            total_quantity=model.total_quantity,
+            listing_count=model.listing_count,
+            outlier_count=model.outlier_count,
+            market_value=model.market_value,
+            last_seen_at=model.last_seen_at,
+            updated_at=model.updated_at,
+        )
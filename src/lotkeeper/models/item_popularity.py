@@ -0,0 +1,50 @@
+from enum import StrEnum
+
+from pydantic import BaseModel, Field
+
+from lotkeeper.models.item import Item
+from lotkeeper.models.item_market_price import ItemMarketPriceModel
+from lotkeeper.models.types import AnyRow
+
+
+class ItemPopularityMetric(StrEnum):
+    LISTINGS = "listings"
+    QUANTITY = "quantity"
+    VALUE = "value"
+
+
+class ItemPopularity(BaseModel):
+    model_config = {"json_schema_extra": {"description": "The popularity rank of a currently listed item"}}
+
+    item: Item = Field(description="The item")
+    metric: ItemPopularityMetric = Field(description="The metric the item is ranked by")
+    rank: int = Field(description="The rank of the item on the realm, 1 is the most popular", ge=1)
+    listing_count: int = Field(description="The number of listings in the latest snapshot", ge=0)
+    total_quantity: int = Field(description="The total quantity currently listed", ge=0)
+    market_value: int = Field(description="The listed quantity valued at the median buyout price in copper", ge=0)
+
+
+class ItemPopularityFactory:
+    @staticmethod
+    def get(
+        model: ItemMarketPriceModel | AnyRow, item: Item, metric: ItemPopularityMetric, rank: int
+    ) -> ItemPopularity:
+        """Get the API model from a market price database model
+
+        Args:
+            model: The market price database model of the item, or a row with its columns
+            item: The item
+            metric: The metric the item is ranked by
+            rank: The rank of the item
+
+        Returns:
+            The API model
+        """
+        return ItemPopularity(
+            item=item,
+            metric=metric,
+            rank=rank,
+            listing_count=model.listing_count,
+            total_quantity=model.total_quantity,
+            market_value=model.market_value,
+        )
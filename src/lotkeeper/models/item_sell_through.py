@@ -0,0 +1,141 @@
+from datetime import datetime
+from enum import StrEnum
+
+from pydantic import BaseModel, Field
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKeyConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import text as sa_text
+
+from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
+from lotkeeper.models.item import Item
+from lotkeeper.models.market_mover import MarketMoverWindow
+from lotkeeper.models.types import AnyRow
+
+
+class ItemSellThroughHourlyModel(TimescaleDbModel):
+    """The buyout listings of an item that appeared and disappeared within an hour, summed over its snapshots.
+
+    A listing disappears when the next snapshot of the realm no longer has it. It was likely sold if it was priced at
+    or below the market median of its item, or below every buyout listing of the item that is left. Otherwise it
+    likely expired or was cancelled.
+    """
+
+    __tablename__ = "auction_item_sell_through_hourly"
+    __table_args__ = (
+        PrimaryKeyConstraint("server_realm_id", "item_id", "bucket"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+        Index("idx_aisth_realm_bucket", "server_realm_id", sa_text("bucket DESC")),
+    )
+
+    # Timescale hypertable config
+    __time_column_name__ = "bucket"
+    __chunk_time_interval__ = "7 days"
+    __compression_after__ = "14 days"
+    __compress_segmentby__ = ("server_realm_id", "item_id")
+    __compress_orderby__ = ("bucket DESC",)
+    __reorder_index__ = "auction_item_sell_through_hourly_pkey"
+    __retention_after__ = "6 months"
+
+    server_realm_id: Mapped[int] = mapped_column()
+    item_id: Mapped[int] = mapped_column()
+    bucket: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+    new_listings: Mapped[int] = mapped_column()
+    sold: Mapped[int] = mapped_column()
+    sold_quantity: Mapped[int] = mapped_column(BigInteger)
+    sold_value: Mapped[int] = mapped_column(BigInteger)  # buyout price times quantity in copper
+    expired: Mapped[int] = mapped_column()
+    expired_quantity: Mapped[int] = mapped_column(BigInteger)
+    timed_sales: Mapped[int] = mapped_column()  # sold listings whose first snapshot is known
+    time_to_sell_seconds: Mapped[int] = mapped_column(BigInteger)  # summed over the timed sales
+
+
+class ItemSellThroughSort(StrEnum):
+    SOLD = "sold"
+    VALUE = "value"
+    RATE = "rate"
+
+
+class ItemSellThroughHour(BaseModel):
+    model_config = {"json_schema_extra": {"description": "The listings of an item that sold or expired in an hour"}}
+
+    bucket: datetime = Field(description="The start of the hour (UTC)")
+    new_listings: int = Field(description="The buyout listings that appeared", ge=0)
+    sold: int = Field(description="The buyout listings that disappeared and were likely sold", ge=0)
+    sold_quantity: int = Field(description="The quantity of the sold listings", ge=0)
+    sold_value: int = Field(description="The buyout value of the sold listings in copper", ge=0)
+    expired: int = Field(description="The buyout listings that disappeared and likely expired or were cancelled", ge=0)
+    sell_through_rate: float | None = Field(
+        description="The share of the disappeared listings that were sold, None if none disappeared", ge=0, le=1
+    )
+    avg_time_to_sell_seconds: float | None = Field(
+        description="The average time from the first snapshot of a sold listing to the snapshot without it, "
+        "None without timed sales",
+        ge=0,
+    )
+
+
+class ItemSellThrough(BaseModel):
+    model_config = {"json_schema_extra": {"description": "The sell-through of an item over a window"}}
+
+    item: Item = Field(description="The item")
+    window: MarketMoverWindow = Field(description="The window the listings are counted over")
+    new_listings: int = Field(description="The buyout listings that appeared", ge=0)
+    sold: int = Field(description="The buyout listings that disappeared and were likely sold", ge=0)
+    sold_quantity: int = Field(description="The quantity of the sold listings", ge=0)
+    sold_value: int = Field(description="The buyout value of the sold listings in copper", ge=0)
+    expired: int = Field(description="The buyout listings that disappeared and likely expired or were cancelled", ge=0)
+    sell_through_rate: float = Field(description="The share of the disappeared listings that were sold", ge=0, le=1)
+    avg_time_to_sell_seconds: float | None = Field(
+        description="The average time from the first snapshot of a sold listing to the snapshot without it, "
+        "None without timed sales",
+        ge=0,
+    )
+
+
+class ItemSellThroughFactory:
+    @staticmethod
+    def get_hour(model: ItemSellThroughHourlyModel | AnyRow) -> ItemSellThroughHour:
+        """Get the API model of an hour from a database model
+
+        Args:
+            model: The database model to convert to a API model, or a row with its columns
+
+        Returns:
+            The API model
+        """
+        disappeared = model.sold + model.expired
+        return ItemSellThroughHour(
+            bucket=model.bucket,
+            new_listings=model.new_listings,
+            sold=model.sold,
+            sold_quantity=model.sold_quantity,
+            sold_value=model.sold_value,
+            expired=model.expired,
+            sell_through_rate=model.sold / disappeared if disappeared else None,
+            avg_time_to_sell_seconds=model.time_to_sell_seconds / model.timed_sales if model.timed_sales else None,
+        )
+
+    @staticmethod
+    def get(row: AnyRow, item: Item, window: MarketMoverWindow) -> ItemSellThrough:
+        """Get the API model from a row with the columns of the hourly model summed over a window
+
+        Args:
+            row: The row, an item with at least one disappeared listing
+            item: The item
+            window: The window of the sums
+
+        Returns:
+            The API model
+        """
+        return ItemSellThrough(
+            item=item,
+            window=window,
+            new_listings=row.new_listings,
+            sold=row.sold,
+            sold_quantity=row.sold_quantity,
+            sold_value=row.sold_value,
+            expired=row.expired,
+            sell_through_rate=row.sold / (row.sold + row.expired),
+            avg_time_to_sell_seconds=row.time_to_sell_seconds / row.timed_sales if row.timed_sales else None,
+        )
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from enum import StrEnum
+
+from pydantic import BaseModel, Field
+from sqlalchemy import TIMESTAMP, BigInteger, ForeignKeyConstraint, Index, PrimaryKeyConstraint, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lotkeeper.models.base.db_model import DbModel
+from lotkeeper.models.item import Item
+from lotkeeper.models.types import AnyRow
+
+
+class MarketMoverWindow(StrEnum):
+    DAY = "24h"
+    WEEK = "7d"
+
+    def to_timedelta(self) -> timedelta:
+        return timedelta(hours=24) if self is MarketMoverWindow.DAY else timedelta(days=7)
+
+
+class MarketMoverSort(StrEnum):
+    PRICE = "price"
+    VOLUME = "volume"
+
+
+class MarketMoverModel(DbModel):
+    __tablename__ = "market_movers"
+    __table_args__ = (
+        PrimaryKeyConstraint("server_realm_id", "window", "item_id"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+        # Ranked reads, scanned forward for risers and backward for fallers
+        Index("idx_mm_realm_window_price", "server_realm_id", "window", "price_change_pct"),
+        Index("idx_mm_realm_window_volume", "server_realm_id", "window", "volume_change_pct"),
+    )
+
+    server_realm_id: Mapped[int] = mapped_column()
+    window: Mapped[str] = mapped_column(String(8))
+    item_id: Mapped[int] = mapped_column()
+
+    current_median_buyout_price: Mapped[int] = mapped_column()
+    previous_median_buyout_price: Mapped[int] = mapped_column()
+    price_change_pct: Mapped[float] = mapped_column()
+    current_quantity: Mapped[int] = mapped_column(BigInteger)
+    previous_quantity: Mapped[int] = mapped_column(BigInteger)
+    volume_change_pct: Mapped[float] = mapped_column()
+    computed_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class MarketMover(BaseModel):
+    model_config = {
+        "json_schema_extra": {"description": "The change in robust median price and volume of an item over a window"}
+    }
+
+    item: Item = Field(description="The item")
+    window: MarketMoverWindow = Field(description="The window the change is measured over")
+    current_median_buyout_price: int = Field(description="The current robust median buyout price in copper", ge=0)
+    previous_median_buyout_price: int = Field(
+        description="The robust median buyout price at the start of the window in copper", ge=0
+    )
+    price_change_pct: float = Field(description="The change of the robust median buyout price in percent")
+    current_quantity: int = Field(description="The currently listed quantity", ge=0)
+    previous_quantity: int = Field(description="The listed quantity at the start of the window", ge=0)
+    volume_change_pct: float = Field(description="The change of the listed quantity in percent")
+    computed_at: datetime = Field(description="The time the change was computed (UTC)")
+
+
+class MarketMoverFactory:
+    @staticmethod
+    def get(model: MarketMoverModel | AnyRow, item: Item) -> MarketMover:
+        """Get the API model from a database model
+
+        Args:
+            model: The database model to convert to a API model, or a row with its columns
+            item: The item of the market mover
+
+        Returns:
+            The API model
+        """
+        return MarketMover(
+            item=item,
+            window=MarketMoverWindow(model.window),
+            current_median_buyout_price=model.current_median_buyout_price,
+            previous_median_buyout_price=model.previous_median_buyout_price,
+            price_change_pct=model.price_change_pct,
+            current_quantity=model.current_quantity,
+            previous_quantity=model.previous_quantity,
+            volume_change_pct=model.volume_change_pct,
+            computed_at=model.computed_at,
+        )
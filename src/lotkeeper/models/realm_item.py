@@ -0,0 +1,30 @@
+from sqlalchemy import BigInteger, ForeignKeyConstraint, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from lotkeeper.models.base.db_model import DbModel
+
+
+class RealmItemModel(DbModel):
+    """An item that was listed on a realm, with the realm's metadata only where it differs from the catalog."""
+
+    __tablename__ = "realm_items"
+    __table_args__ = (
+        PrimaryKeyConstraint("server_realm_id", "item_id"),
+        ForeignKeyConstraint(["server_realm_id"], ["server_realms.id"]),
+        ForeignKeyConstraint(["item_id"], ["item_catalog.id"]),
+    )
+
+    server_realm_id: Mapped[int] = mapped_column()
+    item_id: Mapped[int] = mapped_column()
+    content_hash: Mapped[int] = mapped_column(BigInteger)  # hash of the metadata as last listed on the realm
+
+    # Overrides, all set if the metadata on the realm differs from the catalog, otherwise all None
+    name: Mapped[str | None] = mapped_column(nullable=True)
+    link: Mapped[str | None] = mapped_column(nullable=True)
+    icon: Mapped[str | None] = mapped_column(nullable=True)
+    level: Mapped[int | None] = mapped_column(nullable=True)
+    quality: Mapped[int | None] = mapped_column(nullable=True)
+    max_stack_size: Mapped[int | None] = mapped_column(nullable=True)
+    vendor_price: Mapped[int | None] = mapped_column(nullable=True)
+    class_index: Mapped[int | None] = mapped_column(nullable=True)
+    class_name: Mapped[str | None] = mapped_column(nullable=True)
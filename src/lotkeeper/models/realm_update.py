@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from lotkeeper.common.snapshot_prep import PreparedSnapshot
+
+
+class RealmUpdate(BaseModel):
+    model_config = {
+        "json_schema_extra": {"description": "A new snapshot of a realm was ingested, its listings and market changed"}
+    }
+
+    server_realm_id: int = Field(description="The ID of the server realm")
+    snapshot_at: datetime = Field(description="The time of the snapshot (UTC), the version of the realm data")
+    total_auctions: int = Field(description="The number of active auctions of the snapshot", ge=0)
+    total_items: int = Field(description="The number of distinct items of the snapshot", ge=0)
+    total_value: int = Field(description="The total buyout value of the active auctions in copper", ge=0)
+
+
+class RealmUpdateFactory:
+    @staticmethod
+    def get(server_realm_id: int, snapshot_at: datetime, snapshot: PreparedSnapshot) -> RealmUpdate:
+        """Get the update of an ingested snapshot
+
+        Args:
+            server_realm_id: The ID of the server realm of the snapshot
+            snapshot_at: The time of the snapshot
+            snapshot: The prepared snapshot
+
+        Returns:
+            The API model, the total value is the same as AuctionService.get_total_value without a query
+        """
+        return RealmUpdate(
+            server_realm_id=server_realm_id,
+            snapshot_at=snapshot_at,
+            total_auctions=snapshot.auction_count,
+            total_items=len(snapshot.items),
+            total_value=snapshot.total_value,
+        )
@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import Any
 
 from pydantic import BaseModel, Field
-from sqlalchemy import Index, UniqueConstraint
+from sqlalchemy import TIMESTAMP, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from lotkeeper.models.base.db_model import DbModel
@@ -17,6 +18,8 @@ class ServerRealmModel(DbModel):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     server: Mapped[str] = mapped_column(index=True)
     realm: Mapped[str] = mapped_column(index=True)
+    # The time of the latest ingested snapshot, older snapshots of the realm are dropped instead of applied
+    last_snapshot_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
 
 
 class Realm(BaseModel):
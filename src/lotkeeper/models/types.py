@@ -1,9 +1,18 @@
 """Generic re-usable models, types and dataclasses"""
 
 from dataclasses import dataclass
-from typing import Any
+from typing import Annotated, Any
 
 from pydantic import BaseModel, Field
+from sqlalchemy import Row
+
+# A result row of any number of columns, e.g. the columns of a model joined with the columns of its item. Row[Any]
+# would only match rows of a single column
+type AnyRow = Row[*tuple[Any, ...]]
+
+# An item ID parameter, item IDs are Postgres integers so larger values would fail in the driver instead of with a 422
+MAX_ITEM_ID = 2**31 - 1
+ItemId = Annotated[int, Field(gt=0, le=MAX_ITEM_ID)]
 
 
 @dataclass
@@ -14,6 +23,14 @@ class PaginationFilter:
     offset: int
 
 
+@dataclass
+class CursorPaginationFilter:
+    """Simple class for querying with limit and an opaque cursor, None for the first page"""
+
+    limit: int
+    cursor: str | None = None
+
+
 class PaginationInfo(BaseModel):
     model_config = {"json_schema_extra": {"description": "Pagination details for paginated resources"}}
 
@@ -49,3 +66,23 @@ class PaginatedResponse[T](BaseModel):
 
     data: list[T] = Field(description="The data of the response")
     pagination: PaginationInfo = Field(description="The pagination information of the response")
+
+
+class CursorPaginationInfo(BaseModel):
+    model_config = {"json_schema_extra": {"description": "Pagination details for cursor paginated resources"}}
+
+    limit: int = Field(description="Number of items per page", ge=1, le=1000)
+    total: int = Field(description="Total number of items available", ge=0)
+    next_cursor: str | None = Field(description="Cursor for the next page, None on the last page", default=None)
+    has_next: bool = Field(description="Whether there's a next page", default=False)
+
+
+class CursorPaginatedResponse[T](BaseModel):
+    model_config = {
+        "json_schema_extra": {
+            "description": "A cursor paginated response containing a list of items and pagination details"
+        }
+    }
+
+    data: list[T] = Field(description="The data of the response")
+    pagination: CursorPaginationInfo = Field(description="The pagination information of the response")
@@ -1,32 +1,64 @@
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
 from loguru import logger
-from sqlalchemy import case, delete, func, select
+from sqlalchemy import BigInteger, case, cast, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
+from lotkeeper.common.snapshot_prep import PreparedSnapshot
 from lotkeeper.infra.db import DB
-from lotkeeper.models.auction import Auction, AuctionData, AuctionFactory, AuctionFilter, AuctionModel
+from lotkeeper.infra.realm_events import RealmEventBroker
+from lotkeeper.models.auction import Auction, AuctionFactory, AuctionFilter, AuctionModel, IngestResult
+from lotkeeper.models.auction_item_snapshot import AuctionItemSnapshotModel
+from lotkeeper.models.base.json_row import json_array, json_paginated, json_text
 from lotkeeper.models.item import Item, ItemFactory, ItemModel
+from lotkeeper.models.item_market_price import ItemMarketPriceModel
+from lotkeeper.models.item_sell_through import ItemSellThroughHourlyModel
+from lotkeeper.models.realm_update import RealmUpdateFactory
+from lotkeeper.models.server_realm import ServerRealmModel
 from lotkeeper.models.types import PaginatedResponse, PaginationFilter, PaginationInfo
 from lotkeeper.services.datapoint_service import DatapointService
+from lotkeeper.services.item_service import ItemService
+from lotkeeper.services.market_service import MarketService
+
+# Listings that disappeared are only counted if the previous snapshot is at most this old, over a longer gap they
+# could have been relisted and sold or expired several times
+SELL_THROUGH_MAX_GAP = timedelta(hours=6)
+
+# The longest auction duration, a listing that was seen for longer expired whatever its price
+AUCTION_MAX_DURATION = timedelta(hours=48)
 
 
 class AuctionService:
-    def __init__(self, db: DB, datapoint_service: DatapointService):
+    def __init__(
+        self,
+        db: DB,
+        datapoint_service: DatapointService,
+        item_service: ItemService,
+        market_service: MarketService,
+        realm_events: RealmEventBroker,
+    ):
         self.db = db
         self.datapoint_service = datapoint_service
+        self.item_service = item_service
+        self.market_service = market_service
+        self.realm_events = realm_events
 
-    def _get_joined_auction_query(self, server_realm_id: int) -> Select[tuple[AuctionModel, ItemModel]]:
+    def _get_joined_auction_query(self, server_realm_id: int) -> Select[Any]:
         """Get the base query that always joins auctions with item metadata.
 
         Args:
             server_realm_id: The ID of the server realm to get the auctions for
 
         Returns:
-            A query that always joins auctions with item metadata
+            A query of plain rows with the columns of the auction and of its item
         """
 
         return (
-            select(AuctionModel, ItemModel)
-            .join(
+            select(*ItemFactory.COLUMNS, *AuctionFactory.COLUMNS)
+            .join_from(
+                AuctionModel,
                 ItemModel,
                 (AuctionModel.item_id == ItemModel.id) & (AuctionModel.server_realm_id == ItemModel.server_realm_id),
             )
@@ -52,6 +84,72 @@ class AuctionService:
             .where(AuctionModel.server_realm_id == server_realm_id)
         )
 
+    def _get_filtered_queries(
+        self, server_realm_id: int, pagination: PaginationFilter, filter: AuctionFilter | None
+    ) -> tuple[Select[Any], Select[tuple[int]]]:
+        """Get the ordered page query and the count query of the filtered auctions of a realm.
+
+        Args:
+            server_realm_id: The ID of the server realm to get the auctions for
+            pagination: The pagination to apply to the auctions
+            filter: The filter to apply to the auctions, optional
+
+        Returns:
+            The page query and the count query
+        """
+        base_query = self._get_joined_auction_query(server_realm_id)
+        count_query = self._get_joined_count_query(server_realm_id)
+
+        if filter:
+            if filter.item_id:
+                base_query = base_query.where(AuctionModel.item_id == filter.item_id)
+                count_query = count_query.where(AuctionModel.item_id == filter.item_id)
+
+            if filter.item_name:
+                base_query = base_query.where(ItemModel.name.ilike(f"%{filter.item_name}%"))
+                count_query = count_query.where(ItemModel.name.ilike(f"%{filter.item_name}%"))
+
+            if filter.item_quality:
+                base_query = base_query.where(ItemModel.quality == filter.item_quality)
+                count_query = count_query.where(ItemModel.quality == filter.item_quality)
+
+            if filter.item_level:
+                base_query = base_query.where(ItemModel.level == filter.item_level)
+                count_query = count_query.where(ItemModel.level == filter.item_level)
+
+            if filter.item_class_index:
+                base_query = base_query.where(ItemModel.class_index == filter.item_class_index)
+                count_query = count_query.where(ItemModel.class_index == filter.item_class_index)
+
+            if filter.item_class_name:
+                base_query = base_query.where(ItemModel.class_name.ilike(f"%{filter.item_class_name}%"))
+                count_query = count_query.where(ItemModel.class_name.ilike(f"%{filter.item_class_name}%"))
+
+        # Apply pagination only to data query
+        if pagination:
+            if pagination.limit:
+                base_query = base_query.limit(pagination.limit)
+
+            if pagination.offset:
+                base_query = base_query.offset(pagination.offset)
+
+        # Add ordering priority for name filter
+        if filter and filter.item_name:
+            base_query = base_query.order_by(
+                case(
+                    (ItemModel.name.ilike(filter.item_name), 0),  # Exact match = highest priority
+                    (ItemModel.name.ilike(f"{filter.item_name}%"), 1),  # Starts with = medium priority
+                    (ItemModel.name.ilike(f"%{filter.item_name}%"), 2),  # Contains = lowest priority
+                    else_=3,  # No match
+                ),
+                ItemModel.name,
+            )
+        else:
+            # else use default ordering by item name
+            base_query = base_query.order_by(ItemModel.name)
+
+        return base_query, count_query
+
     async def get_auctions(self, server_realm_id: int) -> list[Auction]:
         """Get all auctions for a given realm
 
@@ -61,16 +159,30 @@ class AuctionService:
         Returns:
             A list of auctions
         """
-        async with self.db.get_session() as session:
+        async with self.db.get_read_connection(server_realm_id) as conn:
             statement = self._get_joined_auction_query(server_realm_id)
-            result = await session.execute(statement)
-            auctions_with_metadata = list(result.all())
+            result = await conn.execute(statement)
+            rows = result.all()
+
+        # Convert the rows to API models, the auctions of an item share its model
+        items: dict[int, Item] = {}
+        return [AuctionFactory.get(row, ItemFactory.get_once(row, items)) for row in rows]
+
+    async def get_auctions_json(self, server_realm_id: int) -> bytes:
+        """Get all auctions for a given realm as the JSON of a list of auctions, rendered by Postgres
 
-            # Convert database models to API models
-            mapped_auctions = [
-                AuctionFactory.get(auction, ItemFactory.get(item)) for auction, item in auctions_with_metadata
-            ]
-            return mapped_auctions
+        Args:
+            server_realm_id: The ID of the server realm to get the auctions for
+
+        Returns:
+            The JSON array of the auctions
+        """
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            statement = self._get_joined_auction_query(server_realm_id).with_only_columns(
+                json_text(AuctionFactory.get_json_row()), maintain_column_froms=True
+            )
+            result = await conn.execute(statement)
+            return json_array(result.scalars().all())
 
     async def get_auctions_paginated(
         self, server_realm_id: int, pagination: PaginationFilter, filter: AuctionFilter | None = None
@@ -85,74 +197,49 @@ class AuctionService:
         Returns:
             A paginated response of auctions
         """
-        async with self.db.get_session() as session:
-            base_query = self._get_joined_auction_query(server_realm_id)
-            count_query = self._get_joined_count_query(server_realm_id)
-
-            if filter:
-                if filter.item_id:
-                    base_query = base_query.where(AuctionModel.item_id == filter.item_id)
-                    count_query = count_query.where(AuctionModel.item_id == filter.item_id)
-
-                if filter.item_name:
-                    base_query = base_query.where(ItemModel.name.ilike(f"%{filter.item_name}%"))
-                    count_query = count_query.where(ItemModel.name.ilike(f"%{filter.item_name}%"))
-
-                if filter.item_quality:
-                    base_query = base_query.where(ItemModel.quality == filter.item_quality)
-                    count_query = count_query.where(ItemModel.quality == filter.item_quality)
-
-                if filter.item_level:
-                    base_query = base_query.where(ItemModel.level == filter.item_level)
-                    count_query = count_query.where(ItemModel.level == filter.item_level)
-
-                if filter.item_class_index:
-                    base_query = base_query.where(ItemModel.class_index == filter.item_class_index)
-                    count_query = count_query.where(ItemModel.class_index == filter.item_class_index)
-
-                if filter.item_class_name:
-                    base_query = base_query.where(ItemModel.class_name.ilike(f"%{filter.item_class_name}%"))
-                    count_query = count_query.where(ItemModel.class_name.ilike(f"%{filter.item_class_name}%"))
-
-            # Apply pagination only to data query
-            if pagination:
-                if pagination.limit:
-                    base_query = base_query.limit(pagination.limit)
-
-                if pagination.offset:
-                    base_query = base_query.offset(pagination.offset)
-
-            # Add ordering priority for name filter
-            if filter and filter.item_name:
-                base_query = base_query.add_columns(
-                    case(
-                        (ItemModel.name.ilike(filter.item_name), 0),  # Exact match = highest priority
-                        (ItemModel.name.ilike(f"{filter.item_name}%"), 1),  # Starts with = medium priority
-                        (ItemModel.name.ilike(f"%{filter.item_name}%"), 2),  # Contains = lowest priority
-                        else_=3,  # No match
-                    ).label("match_priority")
-                ).order_by("match_priority", ItemModel.name)
-            else:
-                # else use default ordering by item name
-                base_query = base_query.order_by(ItemModel.name)
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            base_query, count_query = self._get_filtered_queries(server_realm_id, pagination, filter)
 
             # execute the data and count queries
-            data_result = await session.execute(base_query)
-            count_result = await session.execute(count_query)
-
-            if filter and filter.item_name:
-                auctions_with_metadata = [row[:2] for row in data_result]  # Skip the match_priority column
-            else:
-                auctions_with_metadata = list(data_result.all())
+            data_result = await conn.execute(base_query)
+            count_result = await conn.execute(count_query)
 
+            rows = data_result.all()
             total_count = count_result.scalar_one()
             pagination_info = PaginationInfo(limit=pagination.limit, offset=pagination.offset, total=total_count)
 
-            # Create the auction models and construct the paginated response
-            mapped_auctions = [
-                AuctionFactory.get(auction, ItemFactory.get(item)) for auction, item in auctions_with_metadata
-            ]
-            return PaginatedResponse(data=mapped_auctions, pagination=pagination_info)
+        # Create the auction models and construct the paginated response
+        items: dict[int, Item] = {}
+        mapped_auctions = [AuctionFactory.get(row, ItemFactory.get_once(row, items)) for row in rows]
+        return PaginatedResponse(data=mapped_auctions, pagination=pagination_info)
+
+    async def get_auctions_paginated_json(
+        self, server_realm_id: int, pagination: PaginationFilter, filter: AuctionFilter | None = None
+    ) -> bytes:
+        """Get all auctions for a given realm with pagination and filtering as the JSON of a paginated response.
+
+        The rows are rendered by Postgres and not validated, they were validated at ingest.
+
+        Args:
+            server_realm_id: The ID of the server realm to get the auctions for
+            pagination: The pagination to apply to the auctions
+            filter: The filter to apply to the auctions, optional
+
+        Returns:
+            The JSON of the paginated response of auctions
+        """
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            base_query, count_query = self._get_filtered_queries(server_realm_id, pagination, filter)
+
+            data_result = await conn.execute(
+                base_query.with_only_columns(json_text(AuctionFactory.get_json_row()), maintain_column_froms=True)
+            )
+            count_result = await conn.execute(count_query)
+
+            pagination_info = PaginationInfo(
+                limit=pagination.limit, offset=pagination.offset, total=count_result.scalar_one()
+            )
+            return json_paginated(data_result.scalars().all(), pagination_info)
 
     async def get_auctions_count(self, server_realm_id: int) -> int:
         """Get the number of active auctions for a given realm
@@ -164,7 +251,7 @@ class AuctionService:
             The number of active auctions
         """
 
-        async with self.db.get_session() as session:
+        async with self.db.get_read_session(server_realm_id) as session:
             statement = select(func.count()).where(AuctionModel.server_realm_id == server_realm_id)
             result = await session.execute(statement)
             return result.scalar_one()
@@ -179,9 +266,9 @@ class AuctionService:
             The total value of all active auctions
         """
 
-        async with self.db.get_session() as session:
+        async with self.db.get_read_session(server_realm_id) as session:
             statement = select(
-                func.sum(AuctionModel.auction_unit_buyout_price * AuctionModel.auction_quantity),
+                func.sum(cast(AuctionModel.auction_unit_buyout_price, BigInteger) * AuctionModel.auction_quantity),
             ).where(
                 AuctionModel.server_realm_id == server_realm_id,
                 AuctionModel.auction_unit_buyout_price > 0,
@@ -190,103 +277,254 @@ class AuctionService:
             result = await session.execute(statement)
             return result.scalar_one_or_none() or 0
 
-    async def get_auctions_below_vendor_price(self, server_realm_id: int) -> list[Auction]:
-        """Get auctions where the buyout price is below the vendor price
-
-        Args:
-            server_realm_id: The ID of the server realm to get the auctions for
-
-        Returns:
-            A list of auctions below vendor price
-        """
-        async with self.db.get_session() as session:
-            base_query = self._get_joined_auction_query(server_realm_id)
-
-            # Add the vendor price filter - buyout must be less than vendor price
-            base_query = base_query.where(
-                AuctionModel.auction_unit_buyout_price < ItemModel.vendor_price,
-                AuctionModel.auction_unit_buyout_price > 0,  # Exclude auctions with 0 buyout
-                ItemModel.vendor_price > 0,  # Exclude items with 0 vendor price
-            )
-
-            # Order by savings (vendor_price - buyout_price) descending, then by item name
-            base_query = base_query.order_by(
-                (ItemModel.vendor_price - AuctionModel.auction_unit_buyout_price).desc(), ItemModel.name
-            )
-
-            # Execute the query
-            data_result = await session.execute(base_query)
-            auctions_with_metadata = list(data_result.all())
-
-            # Create the auction models
-            mapped_auctions = [
-                AuctionFactory.get(auction, ItemFactory.get(item)) for auction, item in auctions_with_metadata
-            ]
-            return mapped_auctions
-
-    async def truncate_and_insert_auctions(self, server_realm_id: int, data: AuctionData) -> None:
+    async def truncate_and_insert_auctions(
+        self, server_realm_id: int, snapshot: PreparedSnapshot, timestamp: datetime | None = None
+    ) -> IngestResult:
         """Delete all auctions for a realm and insert new active auctions
 
+        The ingests of a realm are serialized across workers and hosts, a snapshot older than the latest ingested
+        snapshot of the realm is dropped. Ingests of different realms run in parallel. Everything derived from the
+        listings was computed by the preparation of the snapshot, the listings are copied as they are. The listings
+        are matched with the ones they replace to record the sell-through of the items.
+
         Args:
             server_realm_id: The ID of the server realm to insert the auctions for
-            data: The auctions to insert
+            snapshot: The prepared snapshot (see IngestPool.prepare)
+            timestamp: The time of the snapshot for the historical datapoints and its order, defaults to now
 
         Returns:
-            None
+            Whether the snapshot was applied, or dropped as stale or for a lock timeout
         """
 
         logger.info(f"Truncating and inserting auctions for server realm {server_realm_id}")
+        timestamp = timestamp or datetime.now(UTC)
 
-        # Extract unique items and convert to database models
-        item_list = list({auction.item.id: auction.item for auction in data.auctions}.values())
-        item_models = [ItemFactory.get_db_model(item, server_realm_id) for item in item_list]
-
-        # Convert auctions to database models
-        auctions = [AuctionFactory.get_db_model(auction, server_realm_id) for auction in data.auctions]
-        auction_datapoints = self.datapoint_service.construct_auction_datapoints(auctions)
+        # Add the new items to the shared catalog first, outside of the lock and the long ingest transaction
+        await self.item_service.add_catalog_items(snapshot.items, timestamp)
 
         async with self.db.get_session() as session:
             async with session.begin():
-                # 1. Delete all auctions for the given realm
-                statement = delete(AuctionModel).where(AuctionModel.server_realm_id == server_realm_id)
-                await session.execute(statement)
-
-                # 2. Replace existing item metadata for the given realm (merge will insert new or update existing)
-                for item_model in item_models:
-                    await session.merge(item_model)
-                await session.flush()  # Flush to ensure item metadata exists before inserting auctions
-
-                # 4. Insert the new active auctions
-                session.add_all(auctions)
-
-                # 5. Insert the auction entries for historical auction data
-                session.add_all(auction_datapoints)
-
-        logger.info(f"Truncated and inserted auctions for server realm {server_realm_id}")
-
-    async def get_top_50_items_by_auction_count(self, server_realm_id: int) -> list[Item]:
-        """Get top 50 items with the most auctions (most popular items)
+                # 1. Wait for the ingest of the realm running on another worker or host, if any
+                if not await self.db.ingest_lock.acquire(session, server_realm_id):
+                    return IngestResult.BUSY
+
+                # 2. Drop the snapshot if a newer one was ingested while it waited, else record it as the latest
+                last_snapshot_query = select(ServerRealmModel.last_snapshot_at).where(
+                    ServerRealmModel.id == server_realm_id
+                )
+                last_snapshot_at = (await session.execute(last_snapshot_query)).scalar_one()
+                if last_snapshot_at is not None and timestamp <= last_snapshot_at:
+                    self.db.ingest_lock.metrics.stale += 1
+                    logger.info(
+                        f"Dropped the snapshot of {timestamp.isoformat()} for server realm {server_realm_id}, "
+                        f"the snapshot of {last_snapshot_at.isoformat()} was already ingested"
+                    )
+                    return IngestResult.STALE
+                await session.execute(
+                    update(ServerRealmModel)
+                    .where(ServerRealmModel.id == server_realm_id)
+                    .values(last_snapshot_at=timestamp)
+                )
+
+                # 3. Record new and changed item metadata in the items of the realm
+                changed_items = await self.item_service.sync_realm_items(
+                    session, server_realm_id, snapshot.items, timestamp
+                )
+
+                # 4. Replace the active auctions, matching them with the previous snapshot for the sell-through
+                track_sell_through = (
+                    last_snapshot_at is not None and timestamp - last_snapshot_at <= SELL_THROUGH_MAX_GAP
+                )
+                await self._replace_auctions(
+                    session, server_realm_id, snapshot, timestamp, last_snapshot_at if track_sell_through else None
+                )
+
+                # 5. Insert the packed price history, one row per item of the snapshot with buyout listings
+                await self.db.copy_records(
+                    session,
+                    AuctionItemSnapshotModel.__tablename__,
+                    records=(
+                        (server_realm_id, listings.item_id, timestamp, listings.buyout_prices, listings.quantities)
+                        for listings in snapshot.item_listings
+                        if listings.buyout_prices
+                    ),
+                    columns=["server_realm_id", "item_id", "timestamp", "buyout_prices", "quantities"],
+                )
+
+                # 6. Refresh the current market prices, hourly rollups and deals from the new snapshot (same transaction)
+                await self.market_service.refresh_item_market_prices(
+                    session, server_realm_id, timestamp, snapshot.item_listings
+                )
+                await self.market_service.upsert_item_hourly_rollups(session, server_realm_id, timestamp)
+                await self.market_service.refresh_auction_deals(session, server_realm_id, timestamp, snapshot.deals)
+
+        # Read the realm from the primary until the read replicas replayed the new snapshot
+        lsn = await self.db.fence_realm(server_realm_id)
+
+        # Tell the update streams of every worker that the realm changed
+        realm_update = RealmUpdateFactory.get(server_realm_id, timestamp, snapshot)
+        await self.realm_events.publish(realm_update, lsn)
+
+        logger.info(
+            f"Truncated and inserted auctions for server realm {server_realm_id} "
+            f"({changed_items} of {len(snapshot.items)} items with new metadata)"
+        )
+        return IngestResult.APPLIED
+
+    async def _replace_auctions(
+        self,
+        session: AsyncSession,
+        server_realm_id: int,
+        snapshot: PreparedSnapshot,
+        timestamp: datetime,
+        last_snapshot_at: datetime | None,
+    ) -> None:
+        """Replace the auctions of a realm with the listings of a snapshot and record the listings that disappeared
+
+        Agents send no auction IDs, a listing is identified by its item, prices and quantity. The listings of both
+        snapshots are counted per identity and the counts are matched with a hash join, linear in the listings. The
+        matched listings keep the time of their first snapshot, the newest of identical listings are kept. Buyout
+        listings that disappeared were likely sold if priced at or below the market median of their item before
+        the snapshot, or below every buyout listing of the item left, else they likely expired or were cancelled.
 
         Args:
-            server_realm_id: The ID of the server realm to get the items for
-
-        Returns:
-            A list of top 50 items ordered by auction count descending
+            session: The session of the ingest transaction, the items of the snapshot are synced already
+            server_realm_id: The ID of the server realm
+            snapshot: The prepared snapshot
+            timestamp: The time of the snapshot
+            last_snapshot_at: The time of the previous snapshot, None to not record the sell-through (no previous
+                snapshot or too long ago)
         """
-        async with self.db.get_session() as session:
-            # Count auctions for each item and order by auction count
-            statement = (
-                select(ItemModel, func.count(AuctionModel.id).label("auction_count"))
-                .join(AuctionModel, AuctionModel.item_id == ItemModel.id)
-                .where(AuctionModel.server_realm_id == server_realm_id, ItemModel.server_realm_id == server_realm_id)
-                .group_by(ItemModel.id, ItemModel.server_realm_id)
-                .order_by(func.count(AuctionModel.id).desc())
-                .limit(50)
+        await session.execute(
+            text(
+                "CREATE TEMPORARY TABLE snapshot_listings "
+                "(item_id integer, buyout integer, bid integer, quantity integer) ON COMMIT DROP"
             )
+        )
+        await self.db.copy_records(
+            session,
+            "snapshot_listings",
+            records=snapshot.get_listing_records(),
+            columns=["item_id", "buyout", "bid", "quantity"],
+        )
+        # Without statistics the planner can't tell the listings are many, and sorts instead of hashing them
+        await session.execute(text("ANALYZE snapshot_listings"))
+
+        query = f"""
+        WITH previous AS (
+            DELETE FROM {AuctionModel.__tablename__}
+            WHERE server_realm_id = :server_realm_id
+            RETURNING
+                item_id,
+                auction_unit_buyout_price AS buyout,
+                auction_unit_starting_bid_price AS bid,
+                auction_quantity AS quantity,
+                first_seen_at
+        ),
+        previous_counts AS (
+            SELECT item_id, buyout, bid, quantity, count(*) AS n, array_agg(first_seen_at) AS first_seen
+            FROM previous
+            GROUP BY item_id, buyout, bid, quantity
+        ),
+        current_counts AS (
+            SELECT item_id, buyout, bid, quantity, count(*) AS n
+            FROM snapshot_listings
+            GROUP BY item_id, buyout, bid, quantity
+        ),
+        matched AS (
+            SELECT
+                item_id, buyout, bid, quantity,
+                coalesce(c.n, 0) AS current_n,
+                coalesce(p.n, 0) AS previous_n,
+                -- Newest first, only identical listings have to be ordered
+                CASE WHEN p.n > 1
+                    THEN ARRAY(SELECT t FROM unnest(p.first_seen) AS t ORDER BY t DESC NULLS LAST)
+                    ELSE p.first_seen
+                END AS first_seen
+            FROM current_counts c
+            FULL JOIN previous_counts p USING (item_id, buyout, bid, quantity)
+        ),
+        inserted AS (
+            INSERT INTO {AuctionModel.__tablename__} (
+                server_realm_id, item_id,
+                auction_unit_buyout_price, auction_unit_starting_bid_price, auction_quantity, first_seen_at
+            )
+            SELECT
+                :server_realm_id, item_id, buyout, bid, quantity,
+                CASE WHEN i <= previous_n THEN first_seen[i] ELSE :timestamp END
+            FROM matched, generate_series(1, current_n) AS i
+        ),
+        disappeared AS (
+            SELECT item_id, buyout, quantity, first_seen[i] AS first_seen_at
+            FROM matched, generate_series(current_n + 1, previous_n) AS i
+            WHERE buyout > 0
+            AND CAST(:last_snapshot_at AS timestamptz) IS NOT NULL
+        ),
+        current_prices AS (
+            SELECT item_id, min(buyout) AS min_buyout
+            FROM snapshot_listings
+            WHERE buyout > 0
+            GROUP BY item_id
+        ),
+        events AS (
+            SELECT item_id, current_n - previous_n AS new_listings, NULL AS sold, 0 AS buyout, 0 AS quantity,
+                NULL AS first_seen_at
+            FROM matched
+            WHERE buyout > 0
+            AND current_n > previous_n
+            AND CAST(:last_snapshot_at AS timestamptz) IS NOT NULL
+            UNION ALL
+            SELECT
+                d.item_id, 0,
+                (d.first_seen_at IS NULL OR d.first_seen_at > :expired_before)
+                AND coalesce(d.buyout <= mp.median_buyout_price OR d.buyout < cp.min_buyout, FALSE),
+                d.buyout, d.quantity, d.first_seen_at
+            FROM disappeared d
+            LEFT JOIN {ItemMarketPriceModel.__tablename__} mp
+                ON mp.server_realm_id = :server_realm_id AND mp.item_id = d.item_id
+            LEFT JOIN current_prices cp ON cp.item_id = d.item_id
+        )
+        INSERT INTO {ItemSellThroughHourlyModel.__tablename__} AS t (
+            server_realm_id, item_id, bucket, new_listings,
+            sold, sold_quantity, sold_value, expired, expired_quantity, timed_sales, time_to_sell_seconds
+        )
+        SELECT
+            :server_realm_id, item_id, :bucket, sum(new_listings),
+            count(*) FILTER (WHERE sold),
+            coalesce(sum(quantity) FILTER (WHERE sold), 0),
+            coalesce(sum(CAST(buyout AS bigint) * quantity) FILTER (WHERE sold), 0),
+            count(*) FILTER (WHERE NOT sold),
+            coalesce(sum(quantity) FILTER (WHERE NOT sold), 0),
+            count(*) FILTER (WHERE sold AND first_seen_at IS NOT NULL),
+            coalesce(
+                sum(extract(epoch FROM CAST(:sold_at AS timestamptz) - first_seen_at))
+                    FILTER (WHERE sold AND first_seen_at IS NOT NULL),
+                0
+            )
+        FROM events
+        GROUP BY item_id
+        ON CONFLICT (server_realm_id, item_id, bucket)
+        DO UPDATE SET
+            new_listings         = t.new_listings + EXCLUDED.new_listings,
+            sold                 = t.sold + EXCLUDED.sold,
+            sold_quantity        = t.sold_quantity + EXCLUDED.sold_quantity,
+            sold_value           = t.sold_value + EXCLUDED.sold_value,
+            expired              = t.expired + EXCLUDED.expired,
+            expired_quantity     = t.expired_quantity + EXCLUDED.expired_quantity,
+            timed_sales          = t.timed_sales + EXCLUDED.timed_sales,
+            time_to_sell_seconds = t.time_to_sell_seconds + EXCLUDED.time_to_sell_seconds
+        ;
+        """
 
-            result = await session.execute(statement)
-            items_with_counts = list(result.all())
-
-            # Convert database models to API models
-            mapped_items = [ItemFactory.get(item) for item, _ in items_with_counts]
-            return mapped_items
+        await session.execute(
+            text(query),
+            {
+                "server_realm_id": server_realm_id,
+                "timestamp": timestamp,
+                "last_snapshot_at": last_snapshot_at,
+                "expired_before": timestamp - AUCTION_MAX_DURATION,
+                # A listing disappeared at some time between the snapshots, on average halfway
+                "sold_at": last_snapshot_at + (timestamp - last_snapshot_at) / 2 if last_snapshot_at else timestamp,
+                "bucket": timestamp.astimezone(UTC).replace(minute=0, second=0, microsecond=0),
+            },
+        )
@@ -1,5 +1,6 @@
 import asyncio
 import datetime
+from collections import defaultdict
 from typing import Any
 
 from loguru import logger
@@ -9,10 +10,16 @@ from lotkeeper.infra.db import DB
 from lotkeeper.models.auction import AuctionModel
 from lotkeeper.models.auction_datapoint import (
     AuctionDatapointFactory,
-    AuctionDatapointModel,
     AuctionItemActivityHourlySummary,
+    AuctionItemPriceDailySeries,
+    AuctionItemPriceHistory,
+    AuctionItemPriceHistoryPoint,
+    AuctionItemPriceHistoryResolution,
     AuctionItemPriceHourlySummary,
 )
+from lotkeeper.models.auction_item_daily_rollup import AuctionItemDailyRollupModel
+from lotkeeper.models.auction_item_hourly_rollup import AuctionItemHourlyRollupModel
+from lotkeeper.models.auction_item_snapshot import AuctionItemSnapshotModel
 from lotkeeper.models.auction_realm_activity_datapoint import (
     AuctionRealmActivityDatapoint,
     AuctionRealmActivityDatapointFactory,
@@ -44,28 +51,19 @@ class DatapointService:
     def __init__(self, db: DB):
         self.db = db
 
-    def construct_auction_datapoints(self, auctions: list[AuctionModel]) -> list[AuctionDatapointModel]:
-        """Turn raw auctions into auction datapoints (unit prices etc).
+    async def copy_auction_item_snapshots(self, records: list[tuple[Any, ...]]) -> None:
+        """Bulk load packed auction item snapshots with COPY, much faster than INSERT for many rows.
 
         args:
-            auctions: The list of auctions to construct datapoints from
-
-        returns:
-            A list of AuctionDatapointModel objects
+            records: Tuples of (server_realm_id, item_id, timestamp, buyout_prices, quantities)
         """
-        now = datetime.datetime.now(datetime.UTC)
-        return [
-            AuctionDatapointModel(
-                server_realm_id=a.server_realm_id,
-                item_id=a.item_id,
-                timestamp=now,
-                buyout_price=a.auction_unit_buyout_price,
-                starting_bid_price=a.auction_unit_starting_bid_price,
-                count=1,
-                quantity=a.auction_quantity,
+        async with self.db.engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+                AuctionItemSnapshotModel.__tablename__,
+                records=records,
+                columns=["server_realm_id", "item_id", "timestamp", "buyout_prices", "quantities"],
             )
-            for a in auctions
-        ]
 
     async def upsert_auction_realm_activity_datapoints(self, server_realm_id: int, delay_seconds: int = 0) -> None:
         """
@@ -255,7 +253,7 @@ class DatapointService:
         ORDER BY bucket;
         """
 
-        async with self.db.get_session() as session:
+        async with self.db.get_read_session(server_realm_id) as session:
             result = await session.execute(
                 text(query),
                 {"server_realm_id": server_realm_id, "from_ts": from_ts, "to_ts": to_ts},
@@ -278,6 +276,163 @@ class DatapointService:
             for row in rows
         ]
 
+    async def get_auction_item_price_daily_series(
+        self,
+        item_ids: list[int],
+        server_realm_id: int,
+        from_timestamp: datetime.datetime,
+        to_timestamp: datetime.datetime,
+    ) -> list[AuctionItemPriceDailySeries]:
+        """Get compact daily median/min buyout price series for many items in a single query (e.g. sparklines).
+
+        Read from the daily rollup tier, the median of a day is the median of its outlier-filtered hourly medians.
+
+        args:
+            item_ids: The IDs of the items
+            server_realm_id: The server and realm ID
+            from_timestamp: Start timestamp (UTC, timezone-aware or naive assumed UTC)
+            to_timestamp: End timestamp (UTC, timezone-aware or naive assumed UTC; exclusive)
+
+        returns:
+            A series per requested item in request order, items without datapoints have empty series
+        """
+        from_ts = _ensure_utc(from_timestamp)
+        to_ts = _ensure_utc(to_timestamp)
+
+        rows_by_item: defaultdict[int, list[Any]] = defaultdict(list)
+        for row in await self._get_daily_tier_rows(item_ids, server_realm_id, from_ts, to_ts):
+            if row.median_buyout_price is not None:
+                rows_by_item[row.item_id].append(row)
+
+        series = []
+        for item_id in dict.fromkeys(item_ids):
+            rows = rows_by_item.get(item_id, [])
+            series.append(
+                AuctionItemPriceDailySeries(
+                    item_id=item_id,
+                    timestamps=[row.bucket for row in rows],
+                    median_buyout_prices=[row.median_buyout_price for row in rows],
+                    min_buyout_prices=[row.min_buyout_price for row in rows],
+                )
+            )
+        return series
+
+    async def get_auction_item_price_history(
+        self,
+        item_id: int,
+        server_realm_id: int,
+        from_timestamp: datetime.datetime,
+        to_timestamp: datetime.datetime,
+        resolution: AuctionItemPriceHistoryResolution,
+    ) -> AuctionItemPriceHistory:
+        """Get the long-range price history of an item from the cheapest rollup tier of the resolution.
+
+        Hourly buckets are read from the hourly rollups, which are kept for months. Daily buckets are read from
+        the daily rollups, which are kept forever, the days that are not downsampled yet come from the hourly rollups.
+
+        args:
+            item_id: The ID of the item
+            server_realm_id: The server and realm ID
+            from_timestamp: Start timestamp (UTC, timezone-aware or naive assumed UTC)
+            to_timestamp: End timestamp (UTC, timezone-aware or naive assumed UTC; exclusive)
+            resolution: The size of the buckets
+
+        returns:
+            The price history, buckets without data are omitted
+        """
+        from_ts = _ensure_utc(from_timestamp)
+        to_ts = _ensure_utc(to_timestamp)
+
+        if resolution is AuctionItemPriceHistoryResolution.DAY:
+            rows = await self._get_daily_tier_rows([item_id], server_realm_id, from_ts, to_ts)
+        else:
+            query = f"""
+            SELECT item_id, bucket, min_buyout_price, median_buyout_price, total_quantity, listing_count, outlier_count
+            FROM {AuctionItemHourlyRollupModel.__tablename__}
+            WHERE server_realm_id = :server_realm_id
+            AND item_id = :item_id
+            AND bucket >= :from_ts
+            AND bucket <  :to_ts
+            ORDER BY bucket
+            """
+            async with self.db.get_read_session(server_realm_id) as session:
+                result = await session.execute(
+                    text(query),
+                    {"item_id": item_id, "server_realm_id": server_realm_id, "from_ts": from_ts, "to_ts": to_ts},
+                )
+                rows = list(result.all())
+
+        return AuctionItemPriceHistory(
+            item_id=item_id,
+            resolution=resolution,
+            points=[
+                AuctionItemPriceHistoryPoint(
+                    timestamp=row.bucket,
+                    min_buyout_price=row.min_buyout_price,
+                    median_buyout_price=row.median_buyout_price,
+                    total_quantity=row.total_quantity,
+                    listing_count=row.listing_count,
+                    outlier_count=row.outlier_count,
+                )
+                for row in rows
+            ],
+        )
+
+    async def _get_daily_tier_rows(
+        self,
+        item_ids: list[int],
+        server_realm_id: int,
+        from_ts: datetime.datetime,
+        to_ts: datetime.datetime,
+    ) -> list[Any]:
+        """Get the daily buckets of items, ordered by item and day.
+
+        The days after the last daily rollup of an item (today, or days the downsampling job has not reached yet)
+        are aggregated from the hourly rollups the same way the job does.
+        """
+        query = f"""
+        WITH rolled_up AS (
+            SELECT
+                i.item_id,
+                (
+                    SELECT MAX(d.bucket) + INTERVAL '1 day'
+                    FROM {AuctionItemDailyRollupModel.__tablename__} d
+                    WHERE d.server_realm_id = :server_realm_id AND d.item_id = i.item_id
+                ) AS until
+            FROM unnest(CAST(:item_ids AS integer[])) AS i(item_id)
+        )
+        SELECT d.item_id, d.bucket, d.min_buyout_price, d.median_buyout_price, d.total_quantity, d.listing_count,
+               d.outlier_count
+        FROM {AuctionItemDailyRollupModel.__tablename__} d
+        WHERE d.server_realm_id = :server_realm_id
+        AND d.item_id = ANY(:item_ids)
+        AND d.bucket >= :from_ts
+        AND d.bucket <  :to_ts
+        UNION ALL
+        SELECT
+            h.item_id,
+            time_bucket('1 day', h.bucket)                                              AS bucket,
+            MIN(h.min_buyout_price)                                                     AS min_buyout_price,
+            round(percentile_cont(0.5) WITHIN GROUP (ORDER BY h.median_buyout_price))::int AS median_buyout_price,
+            round(AVG(h.total_quantity))::bigint                                        AS total_quantity,
+            round(AVG(h.listing_count))::int                                            AS listing_count,
+            SUM(h.outlier_count)                                                        AS outlier_count
+        FROM {AuctionItemHourlyRollupModel.__tablename__} h
+        JOIN rolled_up r ON r.item_id = h.item_id
+        WHERE h.server_realm_id = :server_realm_id
+        AND h.bucket >= GREATEST(CAST(:from_ts AS timestamptz), r.until)
+        AND h.bucket <  :to_ts
+        GROUP BY h.item_id, time_bucket('1 day', h.bucket)
+        ORDER BY item_id, bucket
+        """
+
+        async with self.db.get_read_session(server_realm_id) as session:
+            result = await session.execute(
+                text(query),
+                {"item_ids": item_ids, "server_realm_id": server_realm_id, "from_ts": from_ts, "to_ts": to_ts},
+            )
+            return list(result.all())
+
     async def get_auction_item_price_hourly_summary(
         self,
         item_id: int,
@@ -296,19 +451,19 @@ class DatapointService:
         mad_k = 3.0
         iqr_k = 1.5
 
-        async with self.db.get_session() as session:
+        async with self.db.get_read_session(server_realm_id) as session:
             query = f"""
             WITH base AS (
                 SELECT
-                    time_bucket('1 hour', p.timestamp) AS bucket,
+                    time_bucket('1 hour', s.timestamp) AS bucket,
                     p.buyout_price::numeric AS price,
-                    p.quantity::numeric AS qty
-                FROM {AuctionDatapointModel.__tablename__} p
-                WHERE p.item_id = :item_id
-                AND p.server_realm_id = :server_realm_id
-                AND p.timestamp >= :from_ts
-                AND p.timestamp < :to_ts
-                AND p.buyout_price > 0
+                    p.quantity::numeric     AS qty
+                FROM {AuctionItemSnapshotModel.__tablename__} s
+                CROSS JOIN LATERAL unnest(s.buyout_prices, s.quantities) AS p(buyout_price, quantity)
+                WHERE s.item_id = :item_id
+                AND s.server_realm_id = :server_realm_id
+                AND s.timestamp >= :from_ts
+                AND s.timestamp <  :to_ts
             ),
             base_counts AS (
                 SELECT bucket, COUNT(*) AS n
@@ -461,19 +616,19 @@ class DatapointService:
         mad_k = 3.0
         iqr_k = 1.5
 
-        async with self.db.get_session() as session:
+        async with self.db.get_read_session(server_realm_id) as session:
             query = f"""
             WITH base AS (
                 SELECT
-                    time_bucket('1 hour', p.timestamp) AS bucket,
+                    time_bucket('1 hour', s.timestamp) AS bucket,
                     p.buyout_price::numeric AS price,
                     p.quantity::numeric     AS qty
-                FROM {AuctionDatapointModel.__tablename__} p
-                WHERE p.item_id = :item_id
-                AND p.server_realm_id = :server_realm_id
-                AND p.timestamp >= :from_ts
-                AND p.timestamp <  :to_ts
-                AND p.buyout_price > 0
+                FROM {AuctionItemSnapshotModel.__tablename__} s
+                CROSS JOIN LATERAL unnest(s.buyout_prices, s.quantities) AS p(buyout_price, quantity)
+                WHERE s.item_id = :item_id
+                AND s.server_realm_id = :server_realm_id
+                AND s.timestamp >= :from_ts
+                AND s.timestamp <  :to_ts
             ),
             base_counts AS (
                 SELECT bucket, COUNT(*) AS n
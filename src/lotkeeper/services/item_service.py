@@ -1,26 +1,148 @@
+import datetime
+from itertools import batched
+from typing import Any
+
 from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
 from lotkeeper.infra.db import DB
+from lotkeeper.models.base.json_row import json_array, json_paginated, json_text
 from lotkeeper.models.item import Item, ItemFactory, ItemFilter, ItemModel
+from lotkeeper.models.item_catalog import ItemCatalogFactory, ItemCatalogModel
+from lotkeeper.models.realm_item import RealmItemModel
 from lotkeeper.models.types import PaginatedResponse, PaginationFilter, PaginationInfo
 
+# Rows per upsert statement, stays well below the bind parameter limit of asyncpg (32767)
+UPSERT_BATCH_SIZE = 2000
+
 
 class ItemService:
     def __init__(self, db: DB):
         self.db = db
 
-    def _get_base_item_query(self, server_realm_id: int) -> Select[tuple[ItemModel]]:
+    async def add_catalog_items(self, items: list[Item], timestamp: datetime.datetime) -> int:
+        """Add the items of a snapshot that are new to the shared catalog, in a short transaction of its own.
+
+        Runs before the ingest transaction so that realms listing the same new items only wait for each other
+        until this transaction commits, instead of until the end of the other realm's ingest. The first realm
+        that lists an item defines its catalog entry.
+
+        Args:
+            items: The unique items of the snapshot
+            timestamp: The time of the snapshot
+
+        Returns:
+            The number of items that were new to the catalog
+        """
+        async with self.db.get_session() as session:
+            async with session.begin():
+                catalog = await session.execute(
+                    select(ItemCatalogModel.id).where(ItemCatalogModel.id.in_([item.id for item in items]))
+                )
+                catalog_ids = set(catalog.scalars().all())
+                new_items = [item for item in items if item.id not in catalog_ids]
+                await self._insert_catalog_items(session, new_items, timestamp)
+
+        return len(new_items)
+
+    async def sync_realm_items(
+        self, session: AsyncSession, server_realm_id: int, items: list[Item], timestamp: datetime.datetime
+    ) -> int:
+        """Record the items of a snapshot in the items of the realm.
+
+        Items whose metadata hash matches what the realm stored before are skipped, so a snapshot without
+        metadata changes only reads the hashes of the realm. Realms whose metadata differs from the catalog
+        store an override. The new items are expected in the catalog already (see add_catalog_items).
+
+        Args:
+            session: The session of the ingest transaction
+            server_realm_id: The ID of the server realm
+            items: The unique items of the snapshot
+            timestamp: The time of the snapshot
+
+        Returns:
+            The number of items whose metadata was written for the realm
+        """
+        hashes = {item.id: ItemCatalogFactory.get_content_hash(item) for item in items}
+
+        stored = await session.execute(
+            select(RealmItemModel.item_id, RealmItemModel.content_hash).where(
+                RealmItemModel.server_realm_id == server_realm_id,
+                RealmItemModel.item_id.in_(hashes),
+            )
+        )
+        stored_hashes = dict(stored.tuples().all())
+        changed = [item for item in items if stored_hashes.get(item.id) != hashes[item.id]]
+        if not changed:
+            return 0
+
+        catalog_query = select(ItemCatalogModel.id, ItemCatalogModel.content_hash).where(
+            ItemCatalogModel.id.in_([item.id for item in changed])
+        )
+        catalog_hashes = dict((await session.execute(catalog_query)).tuples().all())
+        if missing := [item for item in changed if item.id not in catalog_hashes]:
+            # Only if the catalog step of the ingest was skipped, the inserted rows are held until the ingest commits
+            await self._insert_catalog_items(session, missing, timestamp)
+            catalog_hashes = dict((await session.execute(catalog_query)).tuples().all())
+
+        no_override = dict.fromkeys(ItemCatalogFactory.get_metadata(changed[0]))
+        rows = [
+            {
+                "server_realm_id": server_realm_id,
+                "item_id": item.id,
+                "content_hash": hashes[item.id],
+                **(
+                    no_override if catalog_hashes[item.id] == hashes[item.id] else ItemCatalogFactory.get_metadata(item)
+                ),
+            }
+            for item in changed
+        ]
+
+        table = RealmItemModel.__table__
+        for batch in batched(rows, UPSERT_BATCH_SIZE, strict=False):
+            statement = insert(RealmItemModel).values(list(batch))
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.server_realm_id, table.c.item_id],
+                set_={column: statement.excluded[column] for column in ("content_hash", *no_override)},
+            )
+            await session.execute(statement)
+
+        return len(changed)
+
+    @staticmethod
+    async def _insert_catalog_items(session: AsyncSession, items: list[Item], timestamp: datetime.datetime) -> None:
+        # Concurrent ingests of other realms may add the same items. Inserting in ID order makes them wait for each
+        # other's rows in the same order, which can't deadlock
+        for item_batch in batched(sorted(items, key=lambda item: item.id), UPSERT_BATCH_SIZE, strict=False):
+            await session.execute(
+                insert(ItemCatalogModel)
+                .values(
+                    [
+                        {
+                            "id": item.id,
+                            "content_hash": ItemCatalogFactory.get_content_hash(item),
+                            "updated_at": timestamp,
+                            **ItemCatalogFactory.get_metadata(item),
+                        }
+                        for item in item_batch
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=[ItemCatalogModel.id])
+            )
+
+    def _get_base_item_query(self, server_realm_id: int) -> Select[Any]:
         """Get the base query for items in a server realm.
 
         Args:
             server_realm_id: The ID of the server realm to get the items for
 
         Returns:
-            A query for items in a server realm
+            A query of plain rows with the columns of the items in a server realm
         """
 
-        return select(ItemModel).where(ItemModel.server_realm_id == server_realm_id)
+        return select(*ItemFactory.COLUMNS).where(ItemModel.server_realm_id == server_realm_id)
 
     def _get_count_query(self, server_realm_id: int) -> Select[tuple[int]]:
         """Get a count query for items in a server realm.
@@ -34,6 +156,72 @@ class ItemService:
 
         return select(func.count(ItemModel.id)).where(ItemModel.server_realm_id == server_realm_id)
 
+    def _get_filtered_queries(
+        self, server_realm_id: int, pagination: PaginationFilter, filter: ItemFilter | None
+    ) -> tuple[Select[Any], Select[tuple[int]]]:
+        """Get the ordered page query and the count query of the filtered items of a realm.
+
+        Args:
+            server_realm_id: The ID of the server realm to get the items for
+            pagination: The pagination to apply to the items
+            filter: The filter to apply to the items, optional
+
+        Returns:
+            The page query and the count query
+        """
+        base_query = self._get_base_item_query(server_realm_id)
+        count_query = self._get_count_query(server_realm_id)
+
+        if filter:
+            if filter.id:
+                base_query = base_query.where(ItemModel.id == filter.id)
+                count_query = count_query.where(ItemModel.id == filter.id)
+
+            if filter.name:
+                base_query = base_query.where(ItemModel.name.ilike(f"%{filter.name}%"))
+                count_query = count_query.where(ItemModel.name.ilike(f"%{filter.name}%"))
+
+            if filter.quality:
+                base_query = base_query.where(ItemModel.quality == filter.quality)
+                count_query = count_query.where(ItemModel.quality == filter.quality)
+
+            if filter.level:
+                base_query = base_query.where(ItemModel.level == filter.level)
+                count_query = count_query.where(ItemModel.level == filter.level)
+
+            if filter.class_index:
+                base_query = base_query.where(ItemModel.class_index == filter.class_index)
+                count_query = count_query.where(ItemModel.class_index == filter.class_index)
+
+            if filter.class_name:
+                base_query = base_query.where(ItemModel.class_name.ilike(f"%{filter.class_name}%"))
+                count_query = count_query.where(ItemModel.class_name.ilike(f"%{filter.class_name}%"))
+
+        # Apply pagination only to data query
+        if pagination:
+            if pagination.limit:
+                base_query = base_query.limit(pagination.limit)
+
+            if pagination.offset:
+                base_query = base_query.offset(pagination.offset)
+
+        # Add ordering priority for name filter
+        if filter and filter.name:
+            base_query = base_query.order_by(
+                case(
+                    (ItemModel.name.ilike(filter.name), 0),  # Exact match = highest priority
+                    (ItemModel.name.ilike(f"{filter.name}%"), 1),  # Starts with = medium priority
+                    (ItemModel.name.ilike(f"%{filter.name}%"), 2),  # Contains = lowest priority
+                    else_=3,  # No match
+                ),
+                ItemModel.name,
+            )
+        else:
+            # else use default ordering by item name
+            base_query = base_query.order_by(ItemModel.name)
+
+        return base_query, count_query
+
     async def get_items(self, server_realm_id: int) -> list[Item]:
         """Get all items for a given realm
 
@@ -43,14 +231,29 @@ class ItemService:
         Returns:
             A list of items
         """
-        async with self.db.get_session() as session:
+        async with self.db.get_read_connection(server_realm_id) as conn:
             statement = self._get_base_item_query(server_realm_id)
-            result = await session.execute(statement)
-            items = list(result.scalars().all())
+            result = await conn.execute(statement)
+            rows = result.all()
 
-            # Convert database models to API models
-            mapped_items = [ItemFactory.get(item) for item in items]
-            return mapped_items
+        # Convert the rows to API models
+        return [ItemFactory.get(row) for row in rows]
+
+    async def get_items_json(self, server_realm_id: int) -> bytes:
+        """Get all items for a given realm as the JSON of a list of items, rendered by Postgres
+
+        Args:
+            server_realm_id: The ID of the server realm to get the items for
+
+        Returns:
+            The JSON array of the items
+        """
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            statement = self._get_base_item_query(server_realm_id).with_only_columns(
+                json_text(ItemFactory.get_json_row()), maintain_column_froms=True
+            )
+            result = await conn.execute(statement)
+            return json_array(result.scalars().all())
 
     async def get_items_paginated(
         self, server_realm_id: int, pagination: PaginationFilter, filter: ItemFilter | None = None
@@ -65,72 +268,48 @@ class ItemService:
         Returns:
             A paginated response of items
         """
-        async with self.db.get_session() as session:
-            base_query = self._get_base_item_query(server_realm_id)
-            count_query = self._get_count_query(server_realm_id)
-
-            if filter:
-                if filter.id:
-                    base_query = base_query.where(ItemModel.id == filter.id)
-                    count_query = count_query.where(ItemModel.id == filter.id)
-
-                if filter.name:
-                    base_query = base_query.where(ItemModel.name.ilike(f"%{filter.name}%"))
-                    count_query = count_query.where(ItemModel.name.ilike(f"%{filter.name}%"))
-
-                if filter.quality:
-                    base_query = base_query.where(ItemModel.quality == filter.quality)
-                    count_query = count_query.where(ItemModel.quality == filter.quality)
-
-                if filter.level:
-                    base_query = base_query.where(ItemModel.level == filter.level)
-                    count_query = count_query.where(ItemModel.level == filter.level)
-
-                if filter.class_index:
-                    base_query = base_query.where(ItemModel.class_index == filter.class_index)
-                    count_query = count_query.where(ItemModel.class_index == filter.class_index)
-
-                if filter.class_name:
-                    base_query = base_query.where(ItemModel.class_name.ilike(f"%{filter.class_name}%"))
-                    count_query = count_query.where(ItemModel.class_name.ilike(f"%{filter.class_name}%"))
-
-            # Apply pagination only to data query
-            if pagination:
-                if pagination.limit:
-                    base_query = base_query.limit(pagination.limit)
-
-                if pagination.offset:
-                    base_query = base_query.offset(pagination.offset)
-
-            # Add ordering priority for name filter
-            if filter and filter.name:
-                base_query = base_query.add_columns(
-                    case(
-                        (ItemModel.name.ilike(filter.name), 0),  # Exact match = highest priority
-                        (ItemModel.name.ilike(f"{filter.name}%"), 1),  # Starts with = medium priority
-                        (ItemModel.name.ilike(f"%{filter.name}%"), 2),  # Contains = lowest priority
-                        else_=3,  # No match
-                    ).label("match_priority")
-                ).order_by("match_priority", ItemModel.name)
-            else:
-                # else use default ordering by item name
-                base_query = base_query.order_by(ItemModel.name)
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            base_query, count_query = self._get_filtered_queries(server_realm_id, pagination, filter)
 
             # execute the data and count queries
-            data_result = await session.execute(base_query)
-            count_result = await session.execute(count_query)
-
-            if filter and filter.name:
-                items = [row[0] for row in data_result]  # Get the ItemModel from the first column
-            else:
-                items = list(data_result.scalars().all())
+            data_result = await conn.execute(base_query)
+            count_result = await conn.execute(count_query)
 
+            rows = data_result.all()
             total_count = count_result.scalar_one()
             pagination_info = PaginationInfo(limit=pagination.limit, offset=pagination.offset, total=total_count)
 
-            # Create the item models and construct the paginated response
-            mapped_items = [ItemFactory.get(item) for item in items]
-            return PaginatedResponse(data=mapped_items, pagination=pagination_info)
+        # Create the item models and construct the paginated response
+        mapped_items = [ItemFactory.get(row) for row in rows]
+        return PaginatedResponse(data=mapped_items, pagination=pagination_info)
+
+    async def get_items_paginated_json(
+        self, server_realm_id: int, pagination: PaginationFilter, filter: ItemFilter | None = None
+    ) -> bytes:
+        """Get all items for a given realm with pagination and filtering as the JSON of a paginated response.
+
+        The rows are rendered by Postgres and not validated, they were validated at ingest.
+
+        Args:
+            server_realm_id: The ID of the server realm to get the items for
+            pagination: The pagination to apply to the items
+            filter: The filter to apply to the items, optional
+
+        Returns:
+            The JSON of the paginated response of items
+        """
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            base_query, count_query = self._get_filtered_queries(server_realm_id, pagination, filter)
+
+            data_result = await conn.execute(
+                base_query.with_only_columns(json_text(ItemFactory.get_json_row()), maintain_column_froms=True)
+            )
+            count_result = await conn.execute(count_query)
+
+            pagination_info = PaginationInfo(
+                limit=pagination.limit, offset=pagination.offset, total=count_result.scalar_one()
+            )
+            return json_paginated(data_result.scalars().all(), pagination_info)
 
     async def get_item_count(self, server_realm_id: int) -> int:
         """Get the count of items for a given realm
@@ -141,7 +320,7 @@ class ItemService:
         Returns:
             The count of items
         """
-        async with self.db.get_session() as session:
+        async with self.db.get_read_session(server_realm_id) as session:
             statement = self._get_count_query(server_realm_id)
             result = await session.execute(statement)
             return result.scalar_one()
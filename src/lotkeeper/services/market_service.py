@@ -0,0 +1,677 @@
+import datetime
+from itertools import batched
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import delete, func, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from lotkeeper.common.snapshot_prep import ItemListings
+from lotkeeper.infra.db import DB
+from lotkeeper.models.auction_deal import AuctionDeal, AuctionDealFactory, AuctionDealKind, AuctionDealModel
+from lotkeeper.models.auction_item_hourly_rollup import AuctionItemHourlyRollupModel
+from lotkeeper.models.item import Item, ItemFactory, ItemModel
+from lotkeeper.models.item_market_price import ItemMarketPrice, ItemMarketPriceFactory, ItemMarketPriceModel
+from lotkeeper.models.item_popularity import ItemPopularity, ItemPopularityFactory, ItemPopularityMetric
+from lotkeeper.models.item_sell_through import (
+    ItemSellThrough,
+    ItemSellThroughFactory,
+    ItemSellThroughHour,
+    ItemSellThroughHourlyModel,
+    ItemSellThroughSort,
+)
+from lotkeeper.models.market_mover import (
+    MarketMover,
+    MarketMoverFactory,
+    MarketMoverModel,
+    MarketMoverSort,
+    MarketMoverWindow,
+)
+from lotkeeper.models.types import (
+    CursorPaginatedResponse,
+    CursorPaginationFilter,
+    CursorPaginationInfo,
+    PaginatedResponse,
+    PaginationFilter,
+    PaginationInfo,
+)
+
+# Rows per upsert statement, stays well below the bind parameter limit of asyncpg (32767)
+UPSERT_BATCH_SIZE = 2000
+
+# The rank of a deal is an integer column, a cursor with a larger rank is malformed
+MAX_DEAL_RANK = 2**31 - 1
+
+MARKET_MOVERS_LOCK_ID = 12348  # advisory lock class, the second key is the server realm ID
+
+# Items need at least this many buyout listings at both ends of a window to be ranked, fewer are too noisy
+MARKET_MOVERS_MIN_LISTINGS = 3
+
+# How far before the start of a window a rollup may be to serve as the previous state (snapshots can be sparse)
+MARKET_MOVERS_LOOKBACK = datetime.timedelta(hours=6)
+
+# Items need at least this many disappeared listings in a window to be ranked by sell-through rate, fewer are noise
+SELL_THROUGH_RATE_MIN_LISTINGS = 5
+
+
+class MarketService:
+    """Maintains the current market state of each realm, derived from the latest snapshot during ingest."""
+
+    def __init__(self, db: DB):
+        self.db = db
+
+    async def refresh_item_market_prices(
+        self,
+        session: AsyncSession,
+        server_realm_id: int,
+        timestamp: datetime.datetime,
+        item_listings: list[ItemListings],
+    ) -> None:
+        """Recompute the current market prices of a realm from the listings of a new snapshot.
+
+        Runs inside the ingest transaction, so readers never see market prices that don't match the
+        active auctions. Items that are no longer listed keep their last prices with a listing count of 0.
+
+        Args:
+            session: The session of the ingest transaction
+            server_realm_id: The ID of the server realm
+            timestamp: The time of the snapshot
+            item_listings: The listings and robust buyout price statistics of the snapshot per item
+        """
+        rows = [
+            {
+                "server_realm_id": server_realm_id,
+                "item_id": listings.item_id,
+                "min_buyout_price": listings.stats.min_price,
+                "median_buyout_price": listings.stats.median_price,
+                "total_quantity": listings.total_quantity,
+                "listing_count": listings.listing_count,
+                "outlier_count": listings.stats.outlier_count,
+                "market_value": listings.total_quantity * (listings.stats.median_price or 0),
+                "last_seen_at": timestamp,
+                "updated_at": timestamp,
+            }
+            for listings in item_listings
+        ]
+
+        await session.execute(
+            update(ItemMarketPriceModel)
+            .where(ItemMarketPriceModel.server_realm_id == server_realm_id, ItemMarketPriceModel.listing_count > 0)
+            .values(listing_count=0, total_quantity=0, outlier_count=0, market_value=0, updated_at=timestamp)
+        )
+
+        table = ItemMarketPriceModel.__table__
+        for batch in batched(rows, UPSERT_BATCH_SIZE, strict=False):
+            statement = insert(ItemMarketPriceModel).values(list(batch))
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.server_realm_id, table.c.item_id],
+                set_={
+                    # Keep the last known prices if the item only has bid-only listings now
+                    "min_buyout_price": func.coalesce(statement.excluded.min_buyout_price, table.c.min_buyout_price),
+                    "median_buyout_price": func.coalesce(
+                        statement.excluded.median_buyout_price, table.c.median_buyout_price
+                    ),
+                    "total_quantity": statement.excluded.total_quantity,
+                    "listing_count": statement.excluded.listing_count,
+                    "outlier_count": statement.excluded.outlier_count,
+                    "market_value": statement.excluded.market_value,
+                    "last_seen_at": statement.excluded.last_seen_at,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+            await session.execute(statement)
+
+    async def refresh_auction_deals(
+        self, session: AsyncSession, server_realm_id: int, timestamp: datetime.datetime, deals: list[tuple[Any, ...]]
+    ) -> None:
+        """Replace the stored deals of a realm with the ranked deals of a new snapshot.
+
+        Runs inside the ingest transaction, the deals only change with a new snapshot so reads never
+        have to join and sort the auctions. The deals are ranked with the snapshot (see rank_auction_deals).
+
+        Args:
+            session: The session of the ingest transaction
+            server_realm_id: The ID of the server realm
+            timestamp: The time of the snapshot
+            deals: The ranked deals of the snapshot, the columns of the deals without the realm and the time
+        """
+        await session.execute(delete(AuctionDealModel).where(AuctionDealModel.server_realm_id == server_realm_id))
+        if deals:
+            await self.db.copy_records(
+                session,
+                AuctionDealModel.__tablename__,
+                records=((server_realm_id, *deal, timestamp) for deal in deals),
+                columns=[
+                    "server_realm_id",
+                    "kind",
+                    "rank",
+                    "item_id",
+                    "unit_buyout_price",
+                    "unit_starting_bid_price",
+                    "quantity",
+                    "reference_price",
+                    "unit_savings",
+                    "discount_pct",
+                    "snapshot_at",
+                ],
+            )
+
+    async def get_auction_deals(
+        self,
+        server_realm_id: int,
+        kind: AuctionDealKind,
+        pagination: CursorPaginationFilter,
+        min_discount_pct: float | None = None,
+    ) -> CursorPaginatedResponse[AuctionDeal] | None:
+        """Get a page of the ranked deals of the latest snapshot of a realm
+
+        The cursor is tied to the snapshot it was issued for, so pages never mix deals of different snapshots.
+
+        Args:
+            server_realm_id: The ID of the server realm
+            kind: The kind of deals to get
+            pagination: The page size and the cursor of the previous page, no cursor for the first page
+            min_discount_pct: Only get deals at least this many percent below the reference price, optional
+
+        Returns:
+            The ranked deals with pagination info, None if the cursor is invalid or from an older snapshot
+        """
+        after_rank = 0
+        snapshot_at: datetime.datetime | None = None
+        if pagination.cursor:
+            decoded = _decode_deal_cursor(pagination.cursor)
+            if decoded is None:
+                return None
+            snapshot_at, after_rank = decoded
+
+        conditions = [AuctionDealModel.server_realm_id == server_realm_id, AuctionDealModel.kind == kind.value]
+        if min_discount_pct is not None:
+            conditions.append(AuctionDealModel.discount_pct >= min_discount_pct)
+
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            statement = (
+                select(*AuctionDealModel.__table__.columns, *ItemFactory.COLUMNS)
+                .join_from(
+                    AuctionDealModel,
+                    ItemModel,
+                    (ItemModel.id == AuctionDealModel.item_id)
+                    & (ItemModel.server_realm_id == AuctionDealModel.server_realm_id),
+                )
+                .where(*conditions, AuctionDealModel.rank > after_rank)
+                .order_by(AuctionDealModel.rank)
+                .limit(pagination.limit + 1)  # one extra row tells if there is a next page
+            )
+            rows = (await conn.execute(statement)).all()
+
+            if snapshot_at is not None:
+                if rows:
+                    current_snapshot_at = rows[0].snapshot_at
+                else:
+                    # The deals may have been refreshed with fewer deals than the rank of the cursor
+                    snapshot_at_query = (
+                        select(AuctionDealModel.snapshot_at)
+                        .where(AuctionDealModel.server_realm_id == server_realm_id, AuctionDealModel.kind == kind.value)
+                        .limit(1)
+                    )
+                    current_snapshot_at = (await conn.execute(snapshot_at_query)).scalar_one_or_none()
+                if current_snapshot_at != snapshot_at:
+                    return None
+
+            total = (
+                await conn.execute(select(func.count()).select_from(AuctionDealModel).where(*conditions))
+            ).scalar_one()
+
+        has_next = len(rows) > pagination.limit
+        rows = rows[: pagination.limit]
+        next_cursor = _encode_deal_cursor(rows[-1].snapshot_at, rows[-1].rank) if has_next else None
+
+        items: dict[int, Item] = {}
+        return CursorPaginatedResponse(
+            data=[AuctionDealFactory.get(row, ItemFactory.get_once(row, items)) for row in rows],
+            pagination=CursorPaginationInfo(
+                limit=pagination.limit, total=total, next_cursor=next_cursor, has_next=has_next
+            ),
+        )
+
+    async def upsert_item_hourly_rollups(
+        self, session: AsyncSession, server_realm_id: int, timestamp: datetime.datetime
+    ) -> None:
+        """Record the current market prices of the listed items in the hourly rollup of the snapshot hour.
+
+        Runs inside the ingest transaction after the market prices are refreshed, the latest snapshot
+        within an hour replaces the earlier ones.
+
+        Args:
+            session: The session of the ingest transaction
+            server_realm_id: The ID of the server realm
+            timestamp: The time of the snapshot
+        """
+        table = AuctionItemHourlyRollupModel.__tablename__
+        query = f"""
+        INSERT INTO {table} (
+            server_realm_id, item_id, bucket,
+            min_buyout_price, median_buyout_price, total_quantity, listing_count, outlier_count
+        )
+        SELECT
+            server_realm_id, item_id, :bucket,
+            min_buyout_price, median_buyout_price, total_quantity, listing_count, outlier_count
+        FROM {ItemMarketPriceModel.__tablename__}
+        WHERE server_realm_id = :server_realm_id
+        AND listing_count > 0
+        ON CONFLICT (server_realm_id, item_id, bucket)
+        DO UPDATE SET
+            min_buyout_price    = EXCLUDED.min_buyout_price,
+            median_buyout_price = EXCLUDED.median_buyout_price,
+            total_quantity      = EXCLUDED.total_quantity,
+            listing_count       = EXCLUDED.listing_count,
+            outlier_count       = EXCLUDED.outlier_count
+        ;
+        """
+
+        bucket = timestamp.astimezone(datetime.UTC).replace(minute=0, second=0, microsecond=0)
+        await session.execute(text(query), {"server_realm_id": server_realm_id, "bucket": bucket})
+
+    async def refresh_market_movers(self, server_realm_id: int) -> None:
+        """Rank the price and volume changes of all items over each window from the hourly rollups.
+
+        Compares the latest rollup of each item with its latest rollup at the start of the window and
+        replaces the stored ranking of the realm in a single transaction. Runs after each ingest, the refreshes of
+        a realm are serialized by an advisory lock.
+
+        Args:
+            server_realm_id: The ID of the server realm
+        """
+        logger.info(f"Refreshing market movers for server realm {server_realm_id}")
+        rollups = AuctionItemHourlyRollupModel.__tablename__
+
+        query = f"""
+        WITH latest AS (
+            SELECT max(bucket) AS bucket
+            FROM {rollups}
+            WHERE server_realm_id = :server_realm_id
+        ),
+        cur AS (
+            SELECT r.item_id, r.median_buyout_price AS med, r.total_quantity AS qty
+            FROM {rollups} r, latest
+            WHERE r.server_realm_id = :server_realm_id
+            AND r.bucket = latest.bucket
+            AND r.listing_count - r.outlier_count >= :min_listings
+            AND r.median_buyout_price > 0
+        ),
+        prev AS (
+            SELECT DISTINCT ON (r.item_id) r.item_id, r.median_buyout_price AS med, r.total_quantity AS qty
+            FROM {rollups} r, latest
+            WHERE r.server_realm_id = :server_realm_id
+            AND r.bucket <= latest.bucket - CAST(:window_interval AS interval)
+            AND r.bucket >  latest.bucket - CAST(:window_interval AS interval) - CAST(:lookback AS interval)
+            AND r.listing_count - r.outlier_count >= :min_listings
+            AND r.median_buyout_price > 0
+            ORDER BY r.item_id, r.bucket DESC
+        )
+        INSERT INTO {MarketMoverModel.__tablename__} (
+            server_realm_id, "window", item_id,
+            current_median_buyout_price, previous_median_buyout_price, price_change_pct,
+            current_quantity, previous_quantity, volume_change_pct, computed_at
+        )
+        SELECT
+            :server_realm_id, :window, cur.item_id,
+            cur.med, prev.med, (cur.med - prev.med) * 100.0 / prev.med,
+            cur.qty, prev.qty, (cur.qty - prev.qty) * 100.0 / GREATEST(prev.qty, 1),
+            :computed_at
+        FROM cur
+        JOIN prev USING (item_id)
+        ;
+        """
+
+        computed_at = datetime.datetime.now(datetime.UTC)
+        async with self.db.get_session() as session:
+            async with session.begin():
+                # Refreshes after back-to-back ingests of a realm would insert the same rankings concurrently
+                await session.execute(
+                    text("SELECT pg_advisory_xact_lock(:lock_id, :server_realm_id)"),
+                    {"lock_id": MARKET_MOVERS_LOCK_ID, "server_realm_id": server_realm_id},
+                )
+                await session.execute(
+                    delete(MarketMoverModel).where(MarketMoverModel.server_realm_id == server_realm_id)
+                )
+                for window in MarketMoverWindow:
+                    await session.execute(
+                        text(query),
+                        {
+                            "server_realm_id": server_realm_id,
+                            "window": window.value,
+                            "window_interval": window.to_timedelta(),
+                            "lookback": MARKET_MOVERS_LOOKBACK,
+                            "min_listings": MARKET_MOVERS_MIN_LISTINGS,
+                            "computed_at": computed_at,
+                        },
+                    )
+
+        logger.info(f"Done, refreshed market movers for server realm {server_realm_id}")
+
+    async def get_market_movers(
+        self,
+        server_realm_id: int,
+        window: MarketMoverWindow,
+        pagination: PaginationFilter,
+        sort: MarketMoverSort = MarketMoverSort.PRICE,
+        descending: bool = True,
+    ) -> PaginatedResponse[MarketMover]:
+        """Get a page of the ranked market movers of a realm
+
+        Args:
+            server_realm_id: The ID of the server realm
+            window: The window the changes are measured over
+            pagination: The pagination of the ranking
+            sort: Rank by price change or by volume change
+            descending: Biggest risers first if true, biggest fallers first if false
+
+        Returns:
+            The ranked market movers with pagination info
+        """
+        column = (
+            MarketMoverModel.price_change_pct if sort is MarketMoverSort.PRICE else MarketMoverModel.volume_change_pct
+        )
+        order = column.desc() if descending else column.asc()
+        conditions = (MarketMoverModel.server_realm_id == server_realm_id, MarketMoverModel.window == window.value)
+
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            total = (
+                await conn.execute(select(func.count()).select_from(MarketMoverModel).where(*conditions))
+            ).scalar_one()
+
+            statement = (
+                select(*MarketMoverModel.__table__.columns, *ItemFactory.COLUMNS)
+                .join_from(
+                    MarketMoverModel,
+                    ItemModel,
+                    (ItemModel.id == MarketMoverModel.item_id)
+                    & (ItemModel.server_realm_id == MarketMoverModel.server_realm_id),
+                )
+                .where(*conditions)
+                .order_by(order, MarketMoverModel.item_id)
+                .limit(pagination.limit)
+                .offset(pagination.offset)
+            )
+            rows = (await conn.execute(statement)).all()
+
+        return PaginatedResponse(
+            data=[MarketMoverFactory.get(row, ItemFactory.get(row)) for row in rows],
+            pagination=PaginationInfo(limit=pagination.limit, offset=pagination.offset, total=total),
+        )
+
+    async def get_sell_through(
+        self,
+        server_realm_id: int,
+        window: MarketMoverWindow,
+        pagination: PaginationFilter,
+        sort: ItemSellThroughSort = ItemSellThroughSort.SOLD,
+    ) -> PaginatedResponse[ItemSellThrough]:
+        """Get a page of the items of a realm ranked by their sell-through over a window
+
+        Args:
+            server_realm_id: The ID of the server realm
+            window: The window the listings are counted over, ending now
+            pagination: The pagination of the ranking
+            sort: Rank by likely sold listings, their value or the share of the disappeared listings that sold
+
+        Returns:
+            The ranked items with pagination info, ties are ranked by descending item ID. Only items with a
+            disappeared listing in the window are ranked
+        """
+        hourly = ItemSellThroughHourlyModel
+        min_disappeared = SELL_THROUGH_RATE_MIN_LISTINGS if sort is ItemSellThroughSort.RATE else 1
+        since = datetime.datetime.now(datetime.UTC) - window.to_timedelta()
+        totals = (
+            select(
+                hourly.item_id,
+                func.sum(hourly.new_listings).label("new_listings"),
+                func.sum(hourly.sold).label("sold"),
+                func.sum(hourly.sold_quantity).label("sold_quantity"),
+                func.sum(hourly.sold_value).label("sold_value"),
+                func.sum(hourly.expired).label("expired"),
+                func.sum(hourly.timed_sales).label("timed_sales"),
+                func.sum(hourly.time_to_sell_seconds).label("time_to_sell_seconds"),
+            )
+            .where(hourly.server_realm_id == server_realm_id, hourly.bucket >= since)
+            .group_by(hourly.item_id)
+            .having(func.sum(hourly.sold) + func.sum(hourly.expired) >= min_disappeared)
+            .subquery()
+        )
+        column = {
+            ItemSellThroughSort.SOLD: totals.c.sold,
+            ItemSellThroughSort.VALUE: totals.c.sold_value,
+            ItemSellThroughSort.RATE: totals.c.sold * 1.0 / (totals.c.sold + totals.c.expired),
+        }[sort]
+
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            total = (await conn.execute(select(func.count()).select_from(totals))).scalar_one()
+
+            statement = (
+                select(*totals.columns, *ItemFactory.COLUMNS)
+                .join_from(
+                    totals,
+                    ItemModel,
+                    (ItemModel.id == totals.c.item_id) & (ItemModel.server_realm_id == server_realm_id),
+                )
+                .order_by(column.desc(), totals.c.item_id.desc())
+                .limit(pagination.limit)
+                .offset(pagination.offset)
+            )
+            rows = (await conn.execute(statement)).all()
+
+        return PaginatedResponse(
+            data=[ItemSellThroughFactory.get(row, ItemFactory.get(row), window) for row in rows],
+            pagination=PaginationInfo(limit=pagination.limit, offset=pagination.offset, total=total),
+        )
+
+    async def get_item_sell_through(
+        self, server_realm_id: int, item_id: int, window: MarketMoverWindow
+    ) -> list[ItemSellThroughHour]:
+        """Get the hourly sell-through of an item over a window
+
+        Args:
+            server_realm_id: The ID of the server realm
+            item_id: The ID of the item
+            window: The window to get the hours of, ending now
+
+        Returns:
+            The hours with listings of the item that appeared or disappeared, oldest first
+        """
+        since = datetime.datetime.now(datetime.UTC) - window.to_timedelta()
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            statement = (
+                select(ItemSellThroughHourlyModel)
+                .where(
+                    ItemSellThroughHourlyModel.server_realm_id == server_realm_id,
+                    ItemSellThroughHourlyModel.item_id == item_id,
+                    ItemSellThroughHourlyModel.bucket >= since,
+                )
+                .order_by(ItemSellThroughHourlyModel.bucket)
+            )
+            rows = (await conn.execute(statement)).all()
+
+        return [ItemSellThroughFactory.get_hour(row) for row in rows]
+
+    async def get_popular_items(
+        self, server_realm_id: int, metric: ItemPopularityMetric, pagination: PaginationFilter
+    ) -> PaginatedResponse[ItemPopularity]:
+        """Get a page of the currently listed items of a realm ranked by popularity
+
+        Args:
+            server_realm_id: The ID of the server realm
+            metric: The metric to rank the items by
+            pagination: The pagination of the ranking
+
+        Returns:
+            The ranked items with pagination info, ties are ranked by descending item ID
+        """
+        column = _popularity_column(metric)
+        conditions = (ItemMarketPriceModel.server_realm_id == server_realm_id, ItemMarketPriceModel.listing_count > 0)
+
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            total = (
+                await conn.execute(select(func.count()).select_from(ItemMarketPriceModel).where(*conditions))
+            ).scalar_one()
+
+            statement = (
+                select(*ItemMarketPriceModel.__table__.columns, *ItemFactory.COLUMNS)
+                .join_from(
+                    ItemMarketPriceModel,
+                    ItemModel,
+                    (ItemModel.id == ItemMarketPriceModel.item_id)
+                    & (ItemModel.server_realm_id == ItemMarketPriceModel.server_realm_id),
+                )
+                .where(*conditions)
+                .order_by(column.desc(), ItemMarketPriceModel.item_id.desc())
+                .limit(pagination.limit)
+                .offset(pagination.offset)
+            )
+            rows = (await conn.execute(statement)).all()
+
+        return PaginatedResponse(
+            data=[
+                ItemPopularityFactory.get(row, ItemFactory.get(row), metric, pagination.offset + index)
+                for index, row in enumerate(rows, start=1)
+            ],
+            pagination=PaginationInfo(limit=pagination.limit, offset=pagination.offset, total=total),
+        )
+
+    async def get_item_popularity(
+        self, server_realm_id: int, item_id: int, metric: ItemPopularityMetric
+    ) -> ItemPopularity | None:
+        """Get the popularity rank of an item, counted from the ranking index
+
+        Args:
+            server_realm_id: The ID of the server realm
+            item_id: The ID of the item
+            metric: The metric to rank the item by
+
+        Returns:
+            The popularity of the item, None if the item is not listed on the realm
+        """
+        column = _popularity_column(metric)
+
+        async with self.db.get_read_session(server_realm_id) as session:
+            row = (
+                await session.execute(
+                    select(ItemMarketPriceModel, ItemModel)
+                    .join(
+                        ItemModel,
+                        (ItemModel.id == ItemMarketPriceModel.item_id)
+                        & (ItemModel.server_realm_id == ItemMarketPriceModel.server_realm_id),
+                    )
+                    .where(
+                        ItemMarketPriceModel.server_realm_id == server_realm_id,
+                        ItemMarketPriceModel.item_id == item_id,
+                        ItemMarketPriceModel.listing_count > 0,
+                    )
+                )
+            ).first()
+            if row is None:
+                return None
+            market_price, item = row
+
+            ahead = (
+                await session.execute(
+                    select(func.count())
+                    .select_from(ItemMarketPriceModel)
+                    .where(
+                        ItemMarketPriceModel.server_realm_id == server_realm_id,
+                        ItemMarketPriceModel.listing_count > 0,
+                        tuple_(column, ItemMarketPriceModel.item_id)
+                        > tuple_(getattr(market_price, column.key), market_price.item_id),
+                    )
+                )
+            ).scalar_one()
+
+        return ItemPopularityFactory.get(market_price, ItemFactory.get(item), metric, ahead + 1)
+
+    async def get_item_market_price(self, server_realm_id: int, item_id: int) -> ItemMarketPrice | None:
+        """Get the current market price of an item
+
+        Args:
+            server_realm_id: The ID of the server realm
+            item_id: The ID of the item
+
+        Returns:
+            The current market price, None if the item was never listed on the realm
+        """
+        async with self.db.get_read_session(server_realm_id) as session:
+            model = await session.get(ItemMarketPriceModel, (server_realm_id, item_id))
+            return ItemMarketPriceFactory.get(model) if model else None
+
+    async def get_item_market_prices(self, server_realm_id: int, item_ids: list[int]) -> list[ItemMarketPrice]:
+        """Get the current market prices of multiple items, items that were never listed are omitted
+
+        Args:
+            server_realm_id: The ID of the server realm
+            item_ids: The IDs of the items
+
+        Returns:
+            The current market prices in item ID order
+        """
+        async with self.db.get_read_connection(server_realm_id) as conn:
+            statement = (
+                select(*ItemMarketPriceModel.__table__.columns)
+                .where(
+                    ItemMarketPriceModel.server_realm_id == server_realm_id,
+                    ItemMarketPriceModel.item_id.in_(item_ids),
+                )
+                .order_by(ItemMarketPriceModel.item_id)
+            )
+            rows = (await conn.execute(statement)).all()
+        return [ItemMarketPriceFactory.get(row) for row in rows]
+
+
+def _popularity_column(metric: ItemPopularityMetric) -> InstrumentedAttribute[int]:
+    """Get the market price column an item popularity metric is ranked by
+
+    Args:
+        metric: The popularity metric
+
+    Returns:
+        The column
+    """
+    match metric:
+        case ItemPopularityMetric.LISTINGS:
+            return ItemMarketPriceModel.listing_count
+        case ItemPopularityMetric.QUANTITY:
+            return ItemMarketPriceModel.total_quantity
+        case ItemPopularityMetric.VALUE:
+            return ItemMarketPriceModel.market_value
+
+
+def _encode_deal_cursor(snapshot_at: datetime.datetime, rank: int) -> str:
+    """Encode the position after a deal as an opaque cursor
+
+    Args:
+        snapshot_at: The time of the snapshot of the deal
+        rank: The rank of the deal
+
+    Returns:
+        The cursor
+    """
+    return f"{int(snapshot_at.timestamp() * 1_000_000):x}.{rank:x}"
+
+
+def _decode_deal_cursor(cursor: str) -> tuple[datetime.datetime, int] | None:
+    """Decode a cursor created by _encode_deal_cursor
+
+    Args:
+        cursor: The cursor
+
+    Returns:
+        The time of the snapshot and the rank of the last deal of the previous page, None if the cursor is malformed
+    """
+    snapshot_part, _, rank_part = cursor.partition(".")
+    try:
+        micros, rank = int(snapshot_part, 16), int(rank_part, 16)
+        snapshot_at = datetime.datetime.fromtimestamp(micros // 1_000_000, datetime.UTC)
+    except (ValueError, OverflowError, OSError):
+        return None
+    if not 0 <= rank <= MAX_DEAL_RANK:
+        return None
+    return snapshot_at.replace(microsecond=micros % 1_000_000), rank
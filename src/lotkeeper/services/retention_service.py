@@ -0,0 +1,252 @@
+import datetime
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from lotkeeper.common.stats import robust_price_stats
+from lotkeeper.infra.db import DB
+from lotkeeper.models.auction_item_daily_rollup import AuctionItemDailyRollupModel
+from lotkeeper.models.auction_item_hourly_rollup import AuctionItemHourlyRollupModel
+from lotkeeper.models.auction_item_snapshot import AuctionItemSnapshotModel
+from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
+from lotkeeper.models.server_realm import ServerRealmModel
+
+RETENTION_LOCK_ID = 12346  # advisory lock, only one worker downsamples and purges at a time
+HOURLY_BACKFILL_BATCH_SIZE = 4_000  # 8 columns per rollup, below the 32767 bind parameters of asyncpg
+
+
+@dataclass(frozen=True, slots=True)
+class RetentionRunResult:
+    hourly_rollups_backfilled: int
+    daily_rollups_upserted: int
+    raw_chunks_dropped: int
+    hourly_chunks_dropped: int
+
+
+class RetentionService:
+    """Tiered retention of the item price history.
+
+    Raw snapshots are kept for days, hourly rollups for months and daily rollups forever. Each tier is
+    downsampled into the next one before its chunks are dropped, so a purge never loses the history.
+    """
+
+    def __init__(self, db: DB):
+        self.db = db
+
+    async def run(self) -> RetentionRunResult | None:
+        """Downsample every tier into the next one and drop the chunks past the retention of their tier.
+
+        The steps run in order and a failing step stops the run, so chunks are only dropped after they were
+        downsampled. Safe to run from every worker, only one worker runs at a time.
+
+        Returns:
+            The result of the run, None if another worker is running it
+        """
+        async with self.db.engine.connect() as conn:
+            if not (await conn.execute(text(f"SELECT pg_try_advisory_lock({RETENTION_LOCK_ID})"))).scalar():
+                logger.info("Retention is running on another worker, skipping")
+                return None
+            await conn.commit()
+
+            try:
+                # The cutoffs are taken once, a drop with a later cutoff could reach chunks that were not downsampled
+                raw_cutoff = await self._get_cutoff(conn, AuctionItemSnapshotModel)
+                hourly_cutoff = await self._get_cutoff(conn, AuctionItemHourlyRollupModel)
+                await conn.commit()
+
+                hourly_backfilled = await self._backfill_hourly_rollups(conn, raw_cutoff)
+                daily_upserted = await self._rollup_pending_days(conn)
+                raw_dropped = await self._drop_expired_chunks(conn, AuctionItemSnapshotModel, raw_cutoff)
+                hourly_dropped = await self._drop_expired_chunks(conn, AuctionItemHourlyRollupModel, hourly_cutoff)
+            finally:
+                # A failed step leaves the transaction aborted, the unlock would fail and hide its error
+                await conn.rollback()
+                await conn.execute(text(f"SELECT pg_advisory_unlock({RETENTION_LOCK_ID})"))
+                await conn.commit()
+
+        result = RetentionRunResult(
+            hourly_rollups_backfilled=hourly_backfilled,
+            daily_rollups_upserted=daily_upserted,
+            raw_chunks_dropped=raw_dropped,
+            hourly_chunks_dropped=hourly_dropped,
+        )
+        logger.info(f"Retention done: {result}")
+        return result
+
+    async def rollup_days(
+        self, server_realm_id: int, from_timestamp: datetime.datetime, to_timestamp: datetime.datetime
+    ) -> int:
+        """Downsample the hourly rollups of a realm into daily rollups, replacing existing days
+
+        Args:
+            server_realm_id: The ID of the server realm
+            from_timestamp: The start of the first day, truncated to the UTC day
+            to_timestamp: The end (exclusive), only whole UTC days before it are rolled up
+
+        Returns:
+            The number of upserted daily rollups
+        """
+        async with self.db.engine.begin() as conn:
+            return await self._rollup_days(conn, server_realm_id, _day(from_timestamp), _day(to_timestamp))
+
+    async def _backfill_hourly_rollups(self, conn: AsyncConnection, cutoff: datetime.datetime) -> int:
+        """Derive the missing hourly rollups of raw snapshots before the cutoff of the raw retention.
+
+        Rollups are written at ingest, this only covers hours that predate the rollups or were loaded without them.
+        The latest snapshot of the hour wins, like at ingest. Bid-only listings are not part of the raw tier, so
+        the quantity and listing count of a backfilled hour only cover buyout listings.
+        """
+        snapshots = AuctionItemSnapshotModel.__tablename__
+        rollups = AuctionItemHourlyRollupModel.__tablename__
+        query = f"""
+        SELECT DISTINCT ON (s.server_realm_id, s.item_id, time_bucket('1 hour', s.timestamp))
+            s.server_realm_id,
+            s.item_id,
+            time_bucket('1 hour', s.timestamp) AS bucket,
+            s.buyout_prices,
+            s.quantities
+        FROM {snapshots} s
+        WHERE s.timestamp >= :from_ts
+        AND s.timestamp <  :to_ts
+        AND NOT EXISTS (
+            SELECT 1 FROM {rollups} r
+            WHERE r.server_realm_id = s.server_realm_id
+            AND r.item_id = s.item_id
+            AND r.bucket = time_bucket('1 hour', s.timestamp)
+        )
+        ORDER BY s.server_realm_id, s.item_id, time_bucket('1 hour', s.timestamp), s.timestamp DESC
+        """
+
+        oldest = (await conn.execute(text(f"SELECT MIN(timestamp) FROM {snapshots}"))).scalar()
+        await conn.commit()
+        if oldest is None or oldest >= cutoff:
+            return 0
+
+        # One day at a time, keeps the fetched arrays bounded
+        backfilled = 0
+        day = _day(oldest)
+        while day < cutoff:
+            to_ts = min(day + datetime.timedelta(days=1), cutoff)
+            rows = (await conn.execute(text(query), {"from_ts": day, "to_ts": to_ts})).all()
+            for start in range(0, len(rows), HOURLY_BACKFILL_BATCH_SIZE):
+                values = [_hourly_rollup(row) for row in rows[start : start + HOURLY_BACKFILL_BATCH_SIZE]]
+                await conn.execute(insert(AuctionItemHourlyRollupModel).values(values).on_conflict_do_nothing())
+            await conn.commit()
+            backfilled += len(rows)
+            day = to_ts
+
+        if backfilled:
+            logger.info(f"Backfilled {backfilled} hourly rollups from raw snapshots before {cutoff}")
+        return backfilled
+
+    async def _rollup_pending_days(self, conn: AsyncConnection) -> int:
+        """Downsample the completed days of every realm that were not rolled up yet"""
+        today = _day(datetime.datetime.now(datetime.UTC))
+        query = f"""
+        SELECT
+            r.id AS server_realm_id,
+            COALESCE(
+                (
+                    SELECT MAX(d.bucket) + INTERVAL '1 day'
+                    FROM {AuctionItemDailyRollupModel.__tablename__} d
+                    WHERE d.server_realm_id = r.id
+                ),
+                (SELECT MIN(h.bucket) FROM {AuctionItemHourlyRollupModel.__tablename__} h WHERE h.server_realm_id = r.id)
+            ) AS from_ts
+        FROM {ServerRealmModel.__tablename__} r
+        """
+        pending = (await conn.execute(text(query))).all()
+        await conn.commit()
+
+        upserted = 0
+        for row in pending:
+            if row.from_ts is None or row.from_ts >= today:
+                continue
+            upserted += await self._rollup_days(conn, row.server_realm_id, _day(row.from_ts), today)
+            await conn.commit()
+        return upserted
+
+    async def _rollup_days(
+        self, conn: AsyncConnection, server_realm_id: int, from_day: datetime.datetime, to_day: datetime.datetime
+    ) -> int:
+        query = f"""
+        INSERT INTO {AuctionItemDailyRollupModel.__tablename__} (
+            server_realm_id, item_id, bucket, min_buyout_price, median_buyout_price,
+            total_quantity, listing_count, outlier_count, hour_count
+        )
+        SELECT
+            server_realm_id,
+            item_id,
+            time_bucket('1 day', bucket),
+            MIN(min_buyout_price),
+            round(percentile_cont(0.5) WITHIN GROUP (ORDER BY median_buyout_price))::int,
+            round(AVG(total_quantity))::bigint,
+            round(AVG(listing_count))::int,
+            SUM(outlier_count),
+            COUNT(*)
+        FROM {AuctionItemHourlyRollupModel.__tablename__}
+        WHERE server_realm_id = :server_realm_id
+        AND bucket >= :from_ts
+        AND bucket <  :to_ts
+        GROUP BY server_realm_id, item_id, time_bucket('1 day', bucket)
+        ON CONFLICT (server_realm_id, item_id, bucket) DO UPDATE SET
+            min_buyout_price = EXCLUDED.min_buyout_price,
+            median_buyout_price = EXCLUDED.median_buyout_price,
+            total_quantity = EXCLUDED.total_quantity,
+            listing_count = EXCLUDED.listing_count,
+            outlier_count = EXCLUDED.outlier_count,
+            hour_count = EXCLUDED.hour_count
+        """
+        result = await conn.execute(
+            text(query), {"server_realm_id": server_realm_id, "from_ts": from_day, "to_ts": to_day}
+        )
+        upserted: int = result.rowcount  # type: ignore[attr-defined]
+        if upserted:
+            logger.info(f"Rolled up {upserted} daily rollups of server realm {server_realm_id} since {from_day}")
+        return upserted
+
+    async def _drop_expired_chunks(
+        self, conn: AsyncConnection, model: type[TimescaleDbModel], cutoff: datetime.datetime
+    ) -> int:
+        """Drop the chunks of a tier before its cutoff, the tier must be downsampled up to the cutoff already"""
+        dropped = (
+            await conn.execute(
+                text("SELECT count(*) FROM drop_chunks(CAST(:table_name AS regclass), older_than => :cutoff)"),
+                {"table_name": model.__tablename__, "cutoff": cutoff},
+            )
+        ).scalar_one()
+        await conn.commit()
+
+        if dropped:
+            logger.info(f"Dropped {dropped} chunks of {model.__tablename__} older than {cutoff}")
+        return int(dropped)
+
+    @staticmethod
+    async def _get_cutoff(conn: AsyncConnection, model: type[TimescaleDbModel]) -> datetime.datetime:
+        cutoff: datetime.datetime = (
+            await conn.execute(text(f"SELECT now() - INTERVAL '{model.__retention_after__}'"))
+        ).scalar_one()
+        return cutoff
+
+
+def _day(timestamp: datetime.datetime) -> datetime.datetime:
+    """Truncate to the start of the UTC day"""
+    return timestamp.astimezone(datetime.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _hourly_rollup(row: Any) -> dict[str, Any]:
+    stats = robust_price_stats(row.buyout_prices)
+    return {
+        "server_realm_id": row.server_realm_id,
+        "item_id": row.item_id,
+        "bucket": row.bucket,
+        "min_buyout_price": stats.min_price,
+        "median_buyout_price": stats.median_price,
+        "total_quantity": sum(row.quantities),
+        "listing_count": stats.count,
+        "outlier_count": stats.outlier_count,
+    }
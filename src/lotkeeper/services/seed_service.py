@@ -0,0 +1,253 @@
+import datetime
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import orjson
+from loguru import logger
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from lotkeeper.common.snapshot_prep import prepare_auction_data
+from lotkeeper.common.synthetic import SyntheticListing, SyntheticRealmGenerator
+from lotkeeper.infra.db import DB
+from lotkeeper.models.auction import IngestResult
+from lotkeeper.models.auction_item_hourly_rollup import AuctionItemHourlyRollupModel
+from lotkeeper.models.auction_item_snapshot import AuctionItemSnapshotModel
+from lotkeeper.models.auction_realm_activity_datapoint import AuctionRealmActivityDatapointModel
+from lotkeeper.services.auction_service import AuctionService
+from lotkeeper.services.datapoint_service import DatapointService
+from lotkeeper.services.market_service import MarketService
+from lotkeeper.services.retention_service import RetentionService
+from lotkeeper.services.server_realm_service import ServerRealmService
+
+
+class SeedService:
+    def __init__(
+        self,
+        db: DB,
+        *,
+        auction_service: AuctionService,
+        datapoint_service: DatapointService,
+        market_service: MarketService,
+        retention_service: RetentionService,
+        server_realm_service: ServerRealmService,
+    ):
+        self.db = db
+        self.auction_service = auction_service
+        self.datapoint_service = datapoint_service
+        self.market_service = market_service
+        self.retention_service = retention_service
+        self.server_realm_service = server_realm_service
+
+    async def seed_realm(
+        self,
+        generator: SyntheticRealmGenerator,
+        now: datetime.datetime,
+        listings: int,
+        history_days: int,
+        history_listings: int,
+    ) -> int:
+        """Seed a realm with hourly history and a current snapshot of synthetic auctions.
+
+        The history is bulk loaded with COPY, the current snapshot goes through the regular ingest path.
+        Previously seeded history in the same time range is replaced, so seeding is repeatable.
+
+        Args:
+            generator: The generator of the realm
+            now: The time of the current snapshot, history is generated for the hours before it
+            listings: The number of listings of the current snapshot
+            history_days: The number of days of hourly history
+            history_listings: The number of listings per hourly history snapshot
+
+        Returns:
+            The ID of the server realm
+
+        Raises:
+            RuntimeError: The current snapshot was dropped as stale or for a lock timeout
+        """
+        server_realm_id = await self.server_realm_service.get_server_realm_id(generator.server, generator.realm)
+        if not server_realm_id:
+            server_realm_id = (
+                await self.server_realm_service.create_server_realm(generator.server, generator.realm)
+            ).id
+
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        first_hour = current_hour - datetime.timedelta(days=history_days)
+        await self._delete_history(server_realm_id, first_hour, current_hour)
+
+        logger.info(f"Seeding {history_days} days of history for {generator.server}/{generator.realm}")
+        for day in range(history_days):
+            records: list[tuple[Any, ...]] = []
+            rollups: list[tuple[Any, ...]] = []
+            activity: list[dict[str, Any]] = []
+            for hour in range(24):
+                timestamp = first_hour + datetime.timedelta(days=day, hours=hour)
+                snapshot = generator.listings(timestamp, history_listings)
+                records += _item_snapshots(server_realm_id, timestamp, snapshot)
+                rollups += _item_hourly_rollups(server_realm_id, timestamp, snapshot)
+                activity.append(_realm_activity(server_realm_id, timestamp, snapshot))
+
+            await self.datapoint_service.copy_auction_item_snapshots(records)
+            await self._copy_item_hourly_rollups(rollups)
+            await self._upsert_realm_activity(activity)
+
+        # Downsample the seeded days right away instead of waiting for the retention job
+        await self.retention_service.rollup_days(server_realm_id, first_hour, current_hour)
+
+        logger.info(f"Ingesting current snapshot of {listings} listings for {generator.server}/{generator.realm}")
+        current = generator.listings(now, listings)
+        result = await self.auction_service.truncate_and_insert_auctions(
+            server_realm_id, prepare_auction_data(generator.snapshot(current)), timestamp=now
+        )
+        if result is not IngestResult.APPLIED:
+            # E.g. seeded twice within a minute, or the realm has a newer snapshot
+            raise RuntimeError(
+                f"The current snapshot of {generator.server}/{generator.realm} at {now.isoformat()} was not ingested "
+                f"({result.value})"
+            )
+        await self._upsert_realm_activity([_realm_activity(server_realm_id, current_hour, current)])
+        await self.market_service.refresh_market_movers(server_realm_id)
+
+        return server_realm_id
+
+    @staticmethod
+    def write_snapshots(
+        generator: SyntheticRealmGenerator, now: datetime.datetime, listings: int, count: int, directory: Path
+    ) -> list[Path]:
+        """Write consecutive hourly snapshots of a realm as agent request bodies, for replaying in benchmarks.
+
+        Args:
+            generator: The generator of the realm
+            now: The time of the last snapshot
+            listings: The number of listings per snapshot
+            count: The number of snapshots
+            directory: The directory to write the snapshot files to
+
+        Returns:
+            The paths of the written files, oldest first
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = f"{generator.server}-{generator.realm}".lower().replace(" ", "-")
+
+        paths = []
+        for i in reversed(range(count)):
+            timestamp = now - datetime.timedelta(hours=i)
+            path = directory / f"{slug}-{timestamp.strftime('%Y%m%d%H')}.json"
+            path.write_bytes(orjson.dumps(generator.snapshot(generator.listings(timestamp, listings)).model_dump()))
+            paths.append(path)
+
+        return paths
+
+    async def _delete_history(
+        self, server_realm_id: int, from_timestamp: datetime.datetime, to_timestamp: datetime.datetime
+    ) -> None:
+        async with self.db.get_session() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(AuctionItemSnapshotModel).where(
+                        AuctionItemSnapshotModel.server_realm_id == server_realm_id,
+                        AuctionItemSnapshotModel.timestamp >= from_timestamp,
+                        AuctionItemSnapshotModel.timestamp <= to_timestamp,
+                    )
+                )
+                await session.execute(
+                    delete(AuctionItemHourlyRollupModel).where(
+                        AuctionItemHourlyRollupModel.server_realm_id == server_realm_id,
+                        AuctionItemHourlyRollupModel.bucket >= from_timestamp,
+                        AuctionItemHourlyRollupModel.bucket <= to_timestamp,
+                    )
+                )
+
+    async def _copy_item_hourly_rollups(self, records: list[tuple[Any, ...]]) -> None:
+        async with self.db.engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+                AuctionItemHourlyRollupModel.__tablename__,
+                records=records,
+                columns=[
+                    "server_realm_id",
+                    "item_id",
+                    "bucket",
+                    "min_buyout_price",
+                    "median_buyout_price",
+                    "total_quantity",
+                    "listing_count",
+                    "outlier_count",
+                ],
+            )
+
+    async def _upsert_realm_activity(self, rows: list[dict[str, Any]]) -> None:
+        statement = insert(AuctionRealmActivityDatapointModel).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["server_realm_id", "ts"],
+            set_={column: statement.excluded[column] for column in rows[0] if column not in ("server_realm_id", "ts")},
+        )
+        async with self.db.get_session() as session:
+            async with session.begin():
+                await session.execute(statement)
+
+
+def _item_snapshots(
+    server_realm_id: int, timestamp: datetime.datetime, listings: list[SyntheticListing]
+) -> list[tuple[Any, ...]]:
+    """Pack the buyout listings of a synthetic snapshot into one record per item, sorted by price"""
+    by_item: defaultdict[int, list[tuple[int, int]]] = defaultdict(list)
+    for listing in listings:
+        if listing.unit_buyout_price > 0:
+            by_item[listing.item_id].append((listing.unit_buyout_price, listing.quantity))
+
+    records = []
+    for item_id, item_listings in by_item.items():
+        item_listings.sort()
+        prices = [price for price, _ in item_listings]
+        quantities = [quantity for _, quantity in item_listings]
+        records.append((server_realm_id, item_id, timestamp, prices, quantities))
+    return records
+
+
+def _item_hourly_rollups(
+    server_realm_id: int, timestamp: datetime.datetime, listings: list[SyntheticListing]
+) -> list[tuple[Any, ...]]:
+    """Aggregate the hourly rollups of a synthetic snapshot, the median excludes the injected outliers"""
+    by_item: defaultdict[int, list[SyntheticListing]] = defaultdict(list)
+    for listing in listings:
+        by_item[listing.item_id].append(listing)
+
+    rollups = []
+    for item_id, item_listings in by_item.items():
+        buyouts = [listing for listing in item_listings if listing.unit_buyout_price > 0]
+        inliers = [listing.unit_buyout_price for listing in buyouts if not listing.is_outlier]
+        rollups.append(
+            (
+                server_realm_id,
+                item_id,
+                timestamp.replace(minute=0, second=0, microsecond=0),
+                min((listing.unit_buyout_price for listing in buyouts), default=None),
+                round(statistics.median(inliers)) if inliers else None,
+                sum(listing.quantity for listing in item_listings),
+                len(item_listings),
+                len(buyouts) - len(inliers),
+            )
+        )
+    return rollups
+
+
+def _realm_activity(
+    server_realm_id: int, timestamp: datetime.datetime, listings: list[SyntheticListing]
+) -> dict[str, Any]:
+    """Aggregate the realm activity of a synthetic snapshot, the injected outliers are known so no stats are needed"""
+    buyouts = [listing for listing in listings if listing.unit_buyout_price > 0]
+    return {
+        "server_realm_id": server_realm_id,
+        "ts": timestamp.replace(minute=0, second=0, microsecond=0),
+        "total_auctions": len(buyouts),
+        "total_quantity": sum(listing.quantity for listing in buyouts),
+        "total_market_value": sum(listing.unit_buyout_price * listing.quantity for listing in buyouts),
+        "estimated_market_value": sum(
+            listing.unit_buyout_price * listing.quantity for listing in buyouts if not listing.is_outlier
+        ),
+        "datapoint_count": len(buyouts),
+        "outlier_count": sum(1 for listing in buyouts if listing.is_outlier),
+    }
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+
+from lotkeeper.api.agent_route import VALIDATION_WINDOW, AuctionDataValidationResult, validate_auction_count
+from lotkeeper.infra.db import DB
+from lotkeeper.infra.db_replica import ReplicaRouter
+from lotkeeper.infra.realm_events import RealmEventBroker
+from lotkeeper.models.realm_update import RealmUpdate
+
+UNAVAILABLE_VALKEY_URL = "redis://127.0.0.1:1"
+REALM_ID = 1_000_000_001
+
+
+def _broker(url: str) -> RealmEventBroker:
+    db = SimpleNamespace(replicas=ReplicaRouter([], max_lag=5.0, check_interval=1.0))
+    return RealmEventBroker(cast(DB, db), url, max_connections=10, socket_timeout=0.5)
+
+
+def _update(total_auctions: int, age: timedelta = timedelta(minutes=5)) -> RealmUpdate:
+    return RealmUpdate(
+        server_realm_id=REALM_ID,
+        snapshot_at=datetime.now(UTC) - age,
+        total_auctions=total_auctions,
+        total_items=10,
+        total_value=0,
+    )
+
+
+async def _validate(
+    previous: RealmUpdate | None, new_total_auctions: int, url: str = UNAVAILABLE_VALKEY_URL
+) -> AuctionDataValidationResult:
+    broker = _broker(url)
+    try:
+        if previous:
+            await broker.publish(previous)
+        return await validate_auction_count(broker, REALM_ID, new_total_auctions)
+    finally:
+        await broker.close()
+
+
+def test_first_snapshot_is_valid() -> None:
+    result = asyncio.run(_validate(None, 10))
+
+    assert result.valid
+    assert result.previous_count is None
+
+
+@pytest.mark.parametrize(("new_total", "valid"), [(800, True), (799, False), (1000, True), (5000, True), (0, False)])
+def test_snapshot_needs_80_percent_of_the_last_one(new_total: int, valid: bool) -> None:
+    result = asyncio.run(_validate(_update(1000), new_total))
+
+    assert result.valid is valid
+    assert result.previous_count == 1000
+    assert result.threshold == 800
+    assert result.decrease_percentage == pytest.approx((1000 - new_total) / 10)
+
+
+def test_snapshot_older_than_the_window_is_not_compared() -> None:
+    result = asyncio.run(_validate(_update(1000, age=VALIDATION_WINDOW + timedelta(minutes=1)), 10))
+
+    assert result.valid
+    assert result.previous_count is None
+
+
+def test_empty_last_snapshot() -> None:
+    result = asyncio.run(_validate(_update(0), 0))
+
+    assert result.valid
+    assert result.decrease_percentage == 0
+
+
+def test_back_to_back_submissions_on_other_workers(valkey_url: str) -> None:
+    async def run() -> None:
+        ingesting_worker, validating_worker = _broker(valkey_url), _broker(valkey_url)
+
+        await ingesting_worker.publish(_update(1000))
+        result = await validate_auction_count(validating_worker, REALM_ID, 100)
+
+        assert not result.valid
+        assert result.previous_count == 1000
+
+        # A newer snapshot replaces the last one right away
+        await ingesting_worker.publish(_update(100, age=timedelta(minutes=1)))
+        assert (await validate_auction_count(validating_worker, REALM_ID, 100)).valid
+
+        for broker in (ingesting_worker, validating_worker):
+            await broker.close()
+
+    asyncio.run(run())
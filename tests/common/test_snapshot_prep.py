@@ -0,0 +1,148 @@
+import pickle
+from array import array
+
+import orjson
+import pytest
+
+from lotkeeper.common.snapshot_prep import SnapshotValidationError, prepare_auction_data, prepare_snapshot
+from lotkeeper.models.auction import Auction, AuctionData
+from lotkeeper.models.item import Item
+
+HERB = Item(
+    id=1,
+    name="Peacebloom",
+    link="",
+    icon="",
+    level=5,
+    quality=1,
+    max_stack_size=20,
+    vendor_price=0,
+    class_index=7,
+    class_name="Trade Goods",
+)
+SWORD = Item(
+    id=2,
+    name="Worn Shortsword",
+    link="",
+    icon="",
+    level=1,
+    quality=1,
+    max_stack_size=1,
+    vendor_price=100,
+    class_index=2,
+    class_name="Weapon",
+)
+
+
+def _auction(item: Item, price: int, quantity: int = 1, starting_bid: int = 1) -> Auction:
+    return Auction(item=item, unit_buyout_price=price, unit_starting_bid_price=starting_bid, quantity=quantity)
+
+
+def _snapshot(auctions: list[Auction]) -> AuctionData:
+    return AuctionData(server="Server", realm="Realm", auctions=auctions)
+
+
+AUCTIONS = [
+    *[_auction(HERB, 1000, quantity=5) for _ in range(10)],
+    _auction(HERB, 800, quantity=2),
+    _auction(HERB, 500),
+    _auction(SWORD, 60),
+    _auction(SWORD, 30),
+    _auction(SWORD, 0, starting_bid=20),  # bid-only
+]
+
+
+def test_prepare_groups_listings_by_item() -> None:
+    prepared = prepare_auction_data(_snapshot(AUCTIONS))
+
+    assert prepared.auction_count == len(AUCTIONS)
+    assert [item.id for item in prepared.items] == [HERB.id, SWORD.id]
+    assert prepared.total_value == 10 * 5 * 1000 + 2 * 800 + 500 + 60 + 30
+
+    herb, sword = prepared.item_listings
+    assert herb.buyout_prices == array("q", [500, 800, *[1000] * 10])
+    assert herb.quantities == array("q", [1, 2, *[5] * 10])
+    assert herb.total_quantity == 53
+    assert herb.stats.median_price == 1000
+    assert sword.buyout_prices == array("q", [30, 60])
+    assert sword.listing_count == 3
+    assert sword.stats.count == 2
+
+
+def test_prepared_snapshot_can_be_pickled() -> None:
+    prepared = prepare_auction_data(_snapshot(AUCTIONS))
+
+    assert pickle.loads(pickle.dumps(prepared)) == prepared
+
+
+def test_rank_deals() -> None:
+    prepared = prepare_auction_data(_snapshot(AUCTIONS))
+
+    assert prepared.deals == [
+        ("vendor", 1, SWORD.id, 30, 1, 1, 100, 70, 70.0),
+        ("vendor", 2, SWORD.id, 60, 1, 1, 100, 40, 40.0),
+        # Ranked by discount, the median of the sword is 45
+        ("market", 1, HERB.id, 500, 1, 1, 1000, 500, 50.0),
+        ("market", 2, SWORD.id, 30, 1, 1, 45, 15, pytest.approx(100 / 3)),
+        ("market", 3, HERB.id, 800, 1, 2, 1000, 200, 20.0),
+    ]
+
+
+def test_small_discounts_are_not_market_deals() -> None:
+    prepared = prepare_auction_data(_snapshot([*[_auction(HERB, 1000) for _ in range(10)], _auction(HERB, 950)]))
+
+    assert prepared.deals == []
+
+
+def test_fingerprint_ignores_listing_order() -> None:
+    fingerprint = prepare_auction_data(_snapshot(AUCTIONS)).fingerprint
+
+    assert prepare_auction_data(_snapshot(AUCTIONS[::-1])).fingerprint == fingerprint
+    assert prepare_auction_data(_snapshot(AUCTIONS[1:])).fingerprint != fingerprint
+    assert prepare_auction_data(_snapshot([*AUCTIONS[:-1], _auction(SWORD, 0, starting_bid=21)])).fingerprint != (
+        fingerprint
+    )
+
+
+def test_fingerprint_includes_item_metadata() -> None:
+    renamed = SWORD.model_copy(update={"name": "Rusty Shortsword"})
+    auctions = [_auction(renamed, 60) if auction.item == SWORD else auction for auction in AUCTIONS]
+
+    assert (
+        prepare_auction_data(_snapshot(auctions)).fingerprint != prepare_auction_data(_snapshot(AUCTIONS)).fingerprint
+    )
+
+
+def test_prepare_snapshot_from_json() -> None:
+    data = _snapshot(AUCTIONS)
+
+    prepared = prepare_snapshot(data.model_dump_json().encode())
+
+    assert prepared.server == "Server"
+    assert prepared.realm == "Realm"
+    assert prepared.fingerprint == prepare_auction_data(data).fingerprint
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"not json",
+        orjson.dumps({"server": "Server", "realm": "Realm"}),
+        orjson.dumps({"server": "S", "realm": "Realm", "auctions": []}),
+    ],
+)
+def test_prepare_snapshot_rejects_invalid_bodies(body: bytes) -> None:
+    with pytest.raises(SnapshotValidationError) as exc_info:
+        prepare_snapshot(body)
+
+    assert exc_info.value.errors
+
+
+def test_validation_error_can_be_pickled() -> None:
+    with pytest.raises(SnapshotValidationError) as exc_info:
+        prepare_snapshot(orjson.dumps({"server": "Server", "realm": "Realm", "auctions": [{"quantity": 0}]}))
+
+    error = pickle.loads(pickle.dumps(exc_info.value))
+
+    assert isinstance(error, SnapshotValidationError)
+    assert error.errors == exc_info.value.errors
@@ -0,0 +1,44 @@
+from lotkeeper.common.stats import RobustPriceStats, percentile_cont, robust_price_stats
+
+
+def test_percentile_cont_interpolates() -> None:
+    assert percentile_cont([1, 2, 3, 4], 0.5) == 2.5
+    assert percentile_cont([1, 2, 3, 4], 0.0) == 1
+    assert percentile_cont([1, 2, 3, 4], 1.0) == 4
+    assert percentile_cont([7], 0.25) == 7
+
+
+def test_no_prices() -> None:
+    assert robust_price_stats([]) == RobustPriceStats(count=0, min_price=None, median_price=None, outlier_count=0)
+
+
+def test_single_price() -> None:
+    assert robust_price_stats([100]) == RobustPriceStats(count=1, min_price=100, median_price=100, outlier_count=0)
+
+
+def test_few_prices_use_iqr_fences() -> None:
+    # Fences at 8 and 16, the median of the inliers 11.5 rounds half up like SQL
+    stats = robust_price_stats([13, 1000, 10, 12, 11])
+
+    assert stats == RobustPriceStats(count=5, min_price=10, median_price=12, outlier_count=1)
+
+
+def test_many_prices_use_mad() -> None:
+    # Median 105 and MAD 3, so the inliers are within 105 +- 13.3
+    stats = robust_price_stats([*range(100, 110), 10_000])
+
+    assert stats == RobustPriceStats(count=11, min_price=100, median_price=105, outlier_count=1)
+
+
+def test_no_spread_has_no_outliers() -> None:
+    stats = robust_price_stats([50] * 20)
+
+    assert stats == RobustPriceStats(count=20, min_price=50, median_price=50, outlier_count=0)
+
+
+def test_min_price_includes_outliers() -> None:
+    stats = robust_price_stats([1, 1000, 1000, 1010, 1010])
+
+    assert stats.min_price == 1
+    assert stats.outlier_count == 1
+    assert stats.median_price == 1005
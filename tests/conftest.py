@@ -0,0 +1,78 @@
+"""Fixtures of the tests that need Postgres or Valkey, skipped if the service is not reachable.
+
+The services are configured like the app (LOT_POSTGRES_*, LOT_VALKEY_*). The Postgres tests run in a database of
+their own, migrated to head at the start of the session and dropped at its end. The Valkey tests run in a logical
+database of their own, flushed around every test. Pub/sub is not scoped to a logical database, the tests publish
+for realm IDs no server has.
+"""
+
+import asyncio
+import os
+from collections.abc import Iterator
+
+import pytest
+import redis
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from lotkeeper.config import ENV
+from lotkeeper.infra.db import _upgrade_to_head
+
+TEST_DATABASE = f"lotkeeper_test_{os.getpid()}"
+VALKEY_TEST_DB = 15
+CONNECT_TIMEOUT = 3  # seconds
+
+
+async def _execute_autocommit(url: str, statement: str) -> None:
+    engine = create_async_engine(url, isolation_level="AUTOCOMMIT", connect_args={"timeout": CONNECT_TIMEOUT})
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text(statement))
+    finally:
+        await engine.dispose()
+
+
+async def _migrate(url: str) -> None:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(_upgrade_to_head)
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def database_url() -> Iterator[str]:
+    """The URL of a database at head for the session, the hypertable settings are not applied"""
+    server_url = ENV.get_database_url()
+    try:
+        asyncio.run(_execute_autocommit(server_url, f"CREATE DATABASE {TEST_DATABASE}"))
+    except (OSError, SQLAlchemyError) as e:
+        pytest.skip(f"Postgres is not available: {e}")
+
+    url = make_url(server_url).set(database=TEST_DATABASE).render_as_string(hide_password=False)
+    try:
+        asyncio.run(_migrate(url))
+        yield url
+    finally:
+        asyncio.run(_execute_autocommit(server_url, f"DROP DATABASE IF EXISTS {TEST_DATABASE} WITH (FORCE)"))
+
+
+@pytest.fixture
+def valkey_url() -> Iterator[str]:
+    """The URL of an empty logical Valkey database"""
+    url = f"redis://{ENV.LOT_VALKEY_HOST}:{ENV.LOT_VALKEY_PORT}/{VALKEY_TEST_DB}"
+    client = redis.Redis.from_url(url, socket_connect_timeout=CONNECT_TIMEOUT, socket_timeout=CONNECT_TIMEOUT)
+    try:
+        client.flushdb()
+    except redis.RedisError as e:
+        client.close()
+        pytest.skip(f"Valkey is not available: {e}")
+
+    try:
+        yield url
+    finally:
+        client.flushdb()
+        client.close()
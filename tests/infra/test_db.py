@@ -0,0 +1,50 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from lotkeeper.infra import db
+from lotkeeper.infra.db import MIGRATIONS_DIR, _get_head_revisions
+
+
+@pytest.fixture(autouse=True)
+def clear_head_revisions() -> Iterator[None]:
+    _get_head_revisions.cache_clear()
+    yield
+    _get_head_revisions.cache_clear()
+
+
+def _write_migration(versions: Path, revision: str, down_revision: str) -> None:
+    (versions / f"{revision}_migration.py").write_text(
+        f'"""Migration {revision}"""\n\n'
+        "from collections.abc import Sequence\n\n"
+        f'revision: str = "{revision}"\n'
+        f"down_revision: str | Sequence[str] | None = {down_revision}\n"
+        "branch_labels = None\n\n\n"
+        "def upgrade() -> None:\n"
+        "    revision = 'not a revision'\n"
+    )
+
+
+def test_head_revisions_match_alembic() -> None:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+
+    assert _get_head_revisions() == set(ScriptDirectory.from_config(config).get_heads())
+
+
+def test_head_revisions_of_branches_and_merges(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    versions = tmp_path / "versions"
+    versions.mkdir()
+    monkeypatch.setattr(db, "MIGRATIONS_DIR", tmp_path)
+
+    _write_migration(versions, "a1", "None")
+    _write_migration(versions, "b2", '"a1"')
+    _write_migration(versions, "c3", '"a1"')
+    assert _get_head_revisions() == {"b2", "c3"}
+
+    _get_head_revisions.cache_clear()
+    _write_migration(versions, "d4", '("b2", "c3")')
+    assert _get_head_revisions() == {"d4"}
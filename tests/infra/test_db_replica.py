@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from lotkeeper.infra.db_replica import Replica, ReplicaRouter, parse_lsn
+
+MAX_LAG = 5.0
+CHECK_INTERVAL = 1.0
+
+
+def _replica(name: str, replay_lsn: str | None = "0/0", healthy: bool = True) -> Replica:
+    # The engine connects lazily, the router never uses it to pick
+    engine = create_async_engine(f"postgresql+asyncpg://lotkeeper@{name}/lotkeeper")
+    return Replica(
+        name=name,
+        engine=engine,
+        async_session=async_sessionmaker(engine),
+        healthy=healthy,
+        in_recovery=True,
+        replay_lsn=parse_lsn(replay_lsn) if replay_lsn else None,
+    )
+
+
+def _picked_names(router: ReplicaRouter, server_realm_id: int | None, reads: int) -> set[str | None]:
+    return {replica.name if replica else None for replica in (router.pick(server_realm_id) for _ in range(reads))}
+
+
+def test_parse_lsn() -> None:
+    assert parse_lsn("0/0") == 0
+    assert parse_lsn("16/B374D848") == (0x16 << 32) + 0xB374D848
+    assert parse_lsn("0/FFFFFFFF") < parse_lsn("1/0")
+
+
+@pytest.mark.parametrize("lsn", ["", "16B374D848", "16/XYZ"])
+def test_parse_malformed_lsn(lsn: str) -> None:
+    with pytest.raises(ValueError):
+        parse_lsn(lsn)
+
+
+def test_pick_without_healthy_replicas() -> None:
+    router = ReplicaRouter([_replica("a", healthy=False)], MAX_LAG, CHECK_INTERVAL)
+
+    assert router.pick() is None
+    assert ReplicaRouter([], MAX_LAG, CHECK_INTERVAL).pick() is None
+
+
+def test_pick_round_robin_over_healthy_replicas() -> None:
+    a, b, c = _replica("a"), _replica("b", healthy=False), _replica("c")
+    router = ReplicaRouter([a, b, c], MAX_LAG, CHECK_INTERVAL)
+
+    picked = [router.pick() for _ in range(4)]
+
+    assert picked == [a, c, a, c]
+    assert (a.reads, b.reads, c.reads) == (2, 0, 2)
+
+
+def test_fenced_realm_needs_a_replica_that_replayed_the_ingest() -> None:
+    behind, caught_up, standalone = _replica("behind", "1/0"), _replica("caught-up", "2/10"), _replica("s", None)
+    router = ReplicaRouter([behind, caught_up, standalone], MAX_LAG, CHECK_INTERVAL)
+
+    router.fence(7, "2/10")
+
+    assert _picked_names(router, 7, 3) == {caught_up.name}
+    # Other realms and reads without a realm are not fenced
+    assert _picked_names(router, 8, 3) == {behind.name, caught_up.name, standalone.name}
+    assert _picked_names(router, None, 3) == {behind.name, caught_up.name, standalone.name}
+
+
+def test_fenced_realm_reads_from_primary_until_replayed() -> None:
+    replica = _replica("a", "1/0")
+    router = ReplicaRouter([replica], MAX_LAG, CHECK_INTERVAL)
+    router.fence(7, "1/1")
+
+    assert router.pick(7) is None
+
+    replica.replay_lsn = parse_lsn("1/1")
+    assert router.pick(7) is replica
+
+
+def test_fence_expires_after_the_max_lag() -> None:
+    replica = _replica("a", "1/0")
+    router = ReplicaRouter([replica], MAX_LAG, CHECK_INTERVAL)
+    router.fence(7, "2/0")
+    router.fences[7].fenced_at -= MAX_LAG + CHECK_INTERVAL + 1
+
+    assert router.pick(7) is replica
+    assert 7 not in router.fences
+
+
+def test_refencing_moves_the_fence_forward() -> None:
+    replica = _replica("a", "1/5")
+    router = ReplicaRouter([replica], MAX_LAG, CHECK_INTERVAL)
+
+    router.fence(7, "1/5")
+    assert router.pick(7) is replica
+
+    router.fence(7, "1/6")
+    assert router.pick(7) is None
@@ -0,0 +1,133 @@
+from typing import Any
+
+import pytest
+
+from lotkeeper.infra import rate_limit_storage
+from lotkeeper.infra.rate_limit_storage import BatchedValkeyStorage
+
+
+class FakePipeline:
+    """Records the commands of a pipeline and runs them against a dictionary on execute."""
+
+    def __init__(self, counts: dict[str, int]):
+        self.counts = counts
+        self.commands: list[tuple[str, int]] = []
+
+    def get(self, key: str) -> None:
+        self.commands.append((key, 0))
+
+    def execute(self) -> list[int | None]:
+        results: list[int | None] = []
+        for key, amount in self.commands:
+            if amount:
+                self.counts[key] = self.counts.get(key, 0) + amount
+            results.append(self.counts.get(key))
+        return results
+
+
+class FakeValkey:
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self.counts)
+
+    def incr_script(self, keys: list[str], args: list[Any], client: FakePipeline) -> None:
+        client.commands.append((keys[0], args[0]))
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit_storage.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def valkey() -> FakeValkey:
+    return FakeValkey()
+
+
+def _storage(valkey: FakeValkey, monkeypatch: pytest.MonkeyPatch, max_drift: int = 10) -> BatchedValkeyStorage:
+    # Synchronized by the tests instead of the background thread
+    storage = BatchedValkeyStorage("batched+redis://localhost:6379", max_drift=max_drift)
+    monkeypatch.setattr(storage, "_client", valkey)
+    monkeypatch.setattr(storage, "_incr_script", valkey.incr_script)
+    monkeypatch.setattr(storage, "_ensure_sync_thread", lambda: None)
+    return storage
+
+
+def test_counts_hits_in_process(clock: Clock, valkey: FakeValkey, monkeypatch: pytest.MonkeyPatch) -> None:
+    storage = _storage(valkey, monkeypatch)
+
+    assert storage.get("LIMITER/a") == 0
+    assert storage.incr("LIMITER/a", 60) == 1
+    assert storage.incr("LIMITER/a", 60, amount=2) == 3
+    assert storage.incr("LIMITER/b", 60) == 1
+    assert storage.get("LIMITER/a") == 3
+    assert storage.get_expiry("LIMITER/a") == clock.now + 60
+    assert valkey.counts == {}
+
+
+def test_window_expires(clock: Clock, valkey: FakeValkey, monkeypatch: pytest.MonkeyPatch) -> None:
+    storage = _storage(valkey, monkeypatch)
+    storage.incr("LIMITER/a", 60)
+    storage.incr("LIMITER/a", 60)
+
+    clock.now += 60
+
+    assert storage.get("LIMITER/a") == 0
+    assert storage.incr("LIMITER/a", 60) == 1
+    assert storage.get_expiry("LIMITER/a") == clock.now + 60
+
+
+def test_sync_pushes_pending_hits_and_pulls_global_counts(
+    clock: Clock, valkey: FakeValkey, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    storage = _storage(valkey, monkeypatch)
+    storage.incr("LIMITER/a", 60, amount=3)
+    storage.incr("LIMITER/b", 60)
+    valkey.counts["LIMITER/a"] = 4  # hits of the other workers
+
+    storage.sync()
+
+    assert valkey.counts == {"LIMITER/a": 7, "LIMITER/b": 1}
+    assert storage.get("LIMITER/a") == 7
+
+    # Keys without pending hits only pull the global count
+    valkey.counts["LIMITER/b"] = 5
+    storage.sync()
+
+    assert valkey.counts == {"LIMITER/a": 7, "LIMITER/b": 5}
+    assert storage.get("LIMITER/b") == 5
+    assert storage.incr("LIMITER/b", 60) == 6
+
+
+def test_sync_drops_expired_windows(clock: Clock, valkey: FakeValkey, monkeypatch: pytest.MonkeyPatch) -> None:
+    storage = _storage(valkey, monkeypatch)
+    storage.incr("LIMITER/a", 60)
+
+    clock.now += 60
+    storage.sync()
+
+    assert valkey.counts == {}
+    assert storage.get_expiry("LIMITER/a") == clock.now
+
+
+def test_max_drift_requests_an_early_sync(clock: Clock, valkey: FakeValkey, monkeypatch: pytest.MonkeyPatch) -> None:
+    storage = _storage(valkey, monkeypatch, max_drift=3)
+
+    storage.incr("LIMITER/a", 60)
+    storage.incr("LIMITER/a", 60)
+    assert not storage._sync_requested.is_set()
+
+    storage.incr("LIMITER/a", 60)
+    assert storage._sync_requested.is_set()
@@ -0,0 +1,147 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+
+from lotkeeper.infra.db import DB
+from lotkeeper.infra.db_replica import ReplicaRouter, parse_lsn
+from lotkeeper.infra.realm_events import RealmEventBroker
+from lotkeeper.models.realm_update import RealmUpdate
+
+UNAVAILABLE_VALKEY_URL = "redis://127.0.0.1:1"
+REALM_ID = 1_000_000_001  # no server has it, pub/sub reaches every logical database
+OTHER_REALM_ID = 1_000_000_002
+SNAPSHOT_AT = datetime(2026, 3, 1, 12, tzinfo=UTC)
+DELIVERY_TIMEOUT = 5.0  # seconds
+NO_DELIVERY_TIMEOUT = 0.3  # seconds waited for an update that must not arrive
+
+
+def _update(server_realm_id: int = REALM_ID, snapshot_at: datetime = SNAPSHOT_AT, auctions: int = 100) -> RealmUpdate:
+    return RealmUpdate(
+        server_realm_id=server_realm_id,
+        snapshot_at=snapshot_at,
+        total_auctions=auctions,
+        total_items=10,
+        total_value=auctions * 1000,
+    )
+
+
+def _broker(url: str, max_connections: int = 10) -> RealmEventBroker:
+    """A broker of one worker, with a replica router of its own to fence the realms"""
+    db = SimpleNamespace(replicas=ReplicaRouter([], max_lag=5.0, check_interval=1.0))
+    return RealmEventBroker(cast(DB, db), url, max_connections=max_connections, socket_timeout=0.5)
+
+
+async def _wait_listening(*brokers: RealmEventBroker) -> None:
+    async with asyncio.timeout(DELIVERY_TIMEOUT):
+        while not all(broker.get_status().listening for broker in brokers):
+            await asyncio.sleep(0.01)
+
+
+def test_a_slow_stream_skips_to_the_latest_update() -> None:
+    async def run() -> None:
+        broker = _broker(UNAVAILABLE_VALKEY_URL)
+        subscription = broker.subscribe(REALM_ID)
+        assert subscription is not None
+
+        assert not subscription.put(_update(auctions=1))
+        assert subscription.put(_update(auctions=2))
+
+        assert await subscription.get(timeout=DELIVERY_TIMEOUT) == _update(auctions=2)
+        with pytest.raises(TimeoutError):
+            await subscription.get(timeout=NO_DELIVERY_TIMEOUT)
+        await broker.close()
+
+    asyncio.run(run())
+
+
+def test_streams_are_limited_per_worker() -> None:
+    async def run() -> None:
+        broker = _broker(UNAVAILABLE_VALKEY_URL, max_connections=2)
+        first, second = broker.subscribe(REALM_ID), broker.subscribe(OTHER_REALM_ID)
+        assert first is not None
+        assert second is not None
+
+        assert broker.subscribe(REALM_ID) is None
+
+        first.close()
+        first.close()
+        assert broker.connections == 1
+        assert broker.subscribe(REALM_ID) is not None
+
+        broker.end_streams()
+        assert await second.get(timeout=DELIVERY_TIMEOUT) is None
+        await broker.close()
+
+    asyncio.run(run())
+
+
+def test_the_latest_update_is_kept_in_memory_without_valkey() -> None:
+    async def run() -> None:
+        broker = _broker(UNAVAILABLE_VALKEY_URL)
+
+        await broker.publish(_update(snapshot_at=SNAPSHOT_AT, auctions=1))
+        await broker.publish(_update(snapshot_at=SNAPSHOT_AT - timedelta(hours=1), auctions=2))
+
+        assert await broker.get_latest(REALM_ID) == _update(auctions=1)
+        assert await broker.get_latest(OTHER_REALM_ID) is None
+        await broker.close()
+
+    asyncio.run(run())
+
+
+def test_updates_fan_out_to_the_streams_of_every_worker(valkey_url: str) -> None:
+    async def run() -> None:
+        publisher, worker, other_worker = _broker(valkey_url), _broker(valkey_url), _broker(valkey_url)
+        streams = [worker.subscribe(REALM_ID), worker.subscribe(REALM_ID), other_worker.subscribe(REALM_ID)]
+        other_realm_stream = worker.subscribe(OTHER_REALM_ID)
+        assert other_realm_stream is not None
+        await _wait_listening(worker, other_worker)
+
+        await publisher.publish(_update(), lsn="1/A0")
+
+        for stream in streams:
+            assert stream is not None
+            assert await stream.get(timeout=DELIVERY_TIMEOUT) == _update()
+        with pytest.raises(TimeoutError):
+            await other_realm_stream.get(timeout=NO_DELIVERY_TIMEOUT)
+
+        # The workers keep the reads of the realm on the primary until the replicas replayed the ingest
+        for broker in (worker, other_worker):
+            assert broker.db.replicas.fences[REALM_ID].lsn == parse_lsn("1/A0")
+            assert OTHER_REALM_ID not in broker.db.replicas.fences
+        assert publisher.get_status().published == 1
+        assert worker.get_status().delivered == 2
+
+        for broker in (publisher, worker, other_worker):
+            await broker.close()
+
+    asyncio.run(run())
+
+
+def test_an_older_update_is_not_published(valkey_url: str) -> None:
+    async def run() -> None:
+        publisher, worker = _broker(valkey_url), _broker(valkey_url)
+        stream = worker.subscribe(REALM_ID)
+        assert stream is not None
+        await _wait_listening(worker)
+
+        await publisher.publish(_update(auctions=1))
+        assert await stream.get(timeout=DELIVERY_TIMEOUT) == _update(auctions=1)
+
+        # E.g. an ingest of an older snapshot that committed first but published last
+        await publisher.publish(_update(snapshot_at=SNAPSHOT_AT - timedelta(minutes=1), auctions=2))
+        with pytest.raises(TimeoutError):
+            await stream.get(timeout=NO_DELIVERY_TIMEOUT)
+
+        # A worker that never saw an update reads the latest one from Valkey
+        reader = _broker(valkey_url)
+        assert await reader.get_latest(REALM_ID) == _update(auctions=1)
+        assert publisher.get_status().published == 1
+
+        for broker in (publisher, worker, reader):
+            await broker.close()
+
+    asyncio.run(run())
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from lotkeeper.common.snapshot_prep import PreparedSnapshot, prepare_auction_data
+from lotkeeper.infra.snapshot_dedup import SnapshotDeduplicator
+from lotkeeper.models.auction import Auction, AuctionData
+from lotkeeper.models.item import Item
+
+UNAVAILABLE_VALKEY_URL = "redis://127.0.0.1:1"
+
+HERB = Item(
+    id=1,
+    name="Peacebloom",
+    link="",
+    icon="",
+    level=5,
+    quality=1,
+    max_stack_size=20,
+    vendor_price=0,
+    class_index=7,
+    class_name="Trade Goods",
+)
+AUCTIONS = [
+    Auction(item=HERB, unit_buyout_price=price, unit_starting_bid_price=1, quantity=quantity)
+    for price, quantity in [(1000, 5), (800, 2), (500, 1)]
+]
+
+
+def _snapshot(auctions: list[Auction], server: str = "Server", realm: str = "Realm") -> PreparedSnapshot:
+    return prepare_auction_data(AuctionData(server=server, realm=realm, auctions=auctions))
+
+
+def _deduplicator(url: str) -> SnapshotDeduplicator:
+    return SnapshotDeduplicator(url, window=60, socket_timeout=0.5)
+
+
+def test_duplicate_by_content(valkey_url: str) -> None:
+    async def run() -> None:
+        dedup = _deduplicator(valkey_url)
+
+        claim = await dedup.claim(_snapshot(AUCTIONS))
+        assert claim and claim.held
+        # Claimed while being ingested, and remembered once ingested
+        assert await dedup.claim(_snapshot(AUCTIONS)) is None
+        await dedup.complete(claim, ingest_seconds=0.3)
+        assert await dedup.claim(_snapshot(list(reversed(AUCTIONS)))) is None
+        # Another spelling of the realm is the same realm
+        assert await dedup.claim(_snapshot(AUCTIONS, server="server", realm="realm")) is None
+
+        assert await dedup.claim(_snapshot(AUCTIONS[:2]))
+        assert await dedup.claim(_snapshot(AUCTIONS, realm="Other Realm"))
+
+        status = dedup.get_status()
+        assert (status.received, status.ingested, status.duplicates_by_content) == (6, 1, 3)
+        assert status.skipped_auctions == 9
+        assert status.skipped_ingest_seconds == pytest.approx(0.9)
+        await dedup.close()
+
+    asyncio.run(run())
+
+
+def test_released_snapshot_is_ingested_again(valkey_url: str) -> None:
+    async def run() -> None:
+        dedup = _deduplicator(valkey_url)
+
+        claim = await dedup.claim(_snapshot(AUCTIONS))
+        assert claim
+        await dedup.release(claim)
+        assert await dedup.claim(_snapshot(AUCTIONS))
+        await dedup.close()
+
+    asyncio.run(run())
+
+
+def test_duplicate_by_idempotency_key(valkey_url: str) -> None:
+    async def run() -> None:
+        dedup = _deduplicator(valkey_url)
+
+        claim = await dedup.claim(_snapshot(AUCTIONS), idempotency_key="scan-1")
+        assert claim
+        await dedup.complete(claim, ingest_seconds=0.1)
+
+        # A retry is a duplicate even if the auction house changed in between
+        assert await dedup.claim(_snapshot(AUCTIONS[:1]), idempotency_key="scan-1") is None
+        assert await dedup.claim(_snapshot(AUCTIONS[:1]), idempotency_key="scan-2")
+        assert dedup.get_status().duplicates_by_key == 1
+        await dedup.close()
+
+    asyncio.run(run())
+
+
+def test_unavailable_valkey_never_skips_a_snapshot() -> None:
+    async def run() -> None:
+        dedup = _deduplicator(UNAVAILABLE_VALKEY_URL)
+
+        for _ in range(2):
+            claim = await dedup.claim(_snapshot(AUCTIONS), idempotency_key="scan-1")
+            assert claim
+            assert not claim.held
+            await dedup.complete(claim, ingest_seconds=0.1)
+
+        status = dedup.get_status()
+        assert (status.received, status.ingested, status.unavailable) == (2, 2, 2)
+        await dedup.close()
+
+    asyncio.run(run())
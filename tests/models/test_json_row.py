@@ -0,0 +1,109 @@
+import asyncio
+from datetime import UTC, datetime
+
+import orjson
+from pydantic import BaseModel
+
+from lotkeeper.common.snapshot_prep import prepare_auction_data
+from lotkeeper.infra.db import DB
+from lotkeeper.infra.realm_events import RealmEventBroker
+from lotkeeper.models.auction import Auction, AuctionData, AuctionFilter
+from lotkeeper.models.item import Item, ItemFilter
+from lotkeeper.models.types import PaginationFilter
+from lotkeeper.services.auction_service import AuctionService
+from lotkeeper.services.datapoint_service import DatapointService
+from lotkeeper.services.item_service import ItemService
+from lotkeeper.services.market_service import MarketService
+from lotkeeper.services.server_realm_service import ServerRealmService
+
+UNAVAILABLE_VALKEY_URL = "redis://127.0.0.1:1"  # the ingest only logs that the update was not published
+
+# Metadata JSON escapes differently in some encoders, the rows must still be the bytes of the pydantic models
+NAMES = [
+    "Linen Cloth",
+    'Thunderfury, "Blessed" Blade of the Windseeker',
+    "Back\\slash </script> & slash/",
+    "Épée du crépuscule 🗡",
+    "Tab\tand\ncontrol \x01 characters",
+]
+
+
+def _item(item_id: int, name: str, vendor_price: int = 0) -> Item:
+    return Item(
+        id=item_id,
+        name=name,
+        link=f"|cffffffff|Hitem:{item_id}::::::::|h[{name}]|h|r",
+        icon="inv_misc_questionmark",
+        level=item_id % 80,
+        quality=item_id % 6,
+        max_stack_size=200,
+        vendor_price=vendor_price,
+        class_index=7,
+        class_name="Trade Goods",
+    )
+
+
+def _dumps(model: BaseModel | list[Item] | list[Auction]) -> bytes:
+    """Serialize like the ORJSONResponse of the validated read paths"""
+    if isinstance(model, list):
+        return orjson.dumps([entry.model_dump(mode="json") for entry in model])
+    return orjson.dumps(model.model_dump(mode="json"))
+
+
+async def _check_rendering(database_url: str) -> None:
+    db = DB(database_url, replica_urls=[])
+    item_service = ItemService(db)
+    auction_service = AuctionService(
+        db,
+        DatapointService(db),
+        item_service,
+        MarketService(db),
+        RealmEventBroker(db, UNAVAILABLE_VALKEY_URL, max_connections=1, socket_timeout=0.5),
+    )
+    server_realm_service = ServerRealmService(db)
+    try:
+        # The second realm lists the first item with other metadata, its rows come from the override of the realm
+        realm_ids = []
+        for realm, renamed in (("Json Rows", "Linen Cloth"), ("Json Rows Override", "Linen Cloth (Old)")):
+            realm_ids.append((await server_realm_service.create_server_realm("Test", realm)).id)
+            items = [_item(1, renamed), *(_item(i + 1, name, 2**31 - i) for i, name in enumerate(NAMES[1:], start=1))]
+            data = AuctionData(
+                server="Test",
+                realm=realm,
+                auctions=[
+                    Auction(item=item, unit_buyout_price=100 * item.id, unit_starting_bid_price=item.id, quantity=i + 1)
+                    for i, item in enumerate(items)
+                ],
+            )
+            await auction_service.truncate_and_insert_auctions(
+                realm_ids[-1], prepare_auction_data(data), datetime.now(UTC)
+            )
+
+        assert len(await auction_service.get_auctions(realm_ids[0])) == len(NAMES)
+
+        page = PaginationFilter(limit=3, offset=1)
+        for server_realm_id in realm_ids:
+            assert await auction_service.get_auctions_json(server_realm_id) == _dumps(
+                await auction_service.get_auctions(server_realm_id)
+            )
+            assert await item_service.get_items_json(server_realm_id) == _dumps(
+                await item_service.get_items(server_realm_id)
+            )
+            for auction_filter in (None, AuctionFilter(item_name="e")):
+                assert await auction_service.get_auctions_paginated_json(
+                    server_realm_id, page, auction_filter
+                ) == _dumps(await auction_service.get_auctions_paginated(server_realm_id, page, auction_filter))
+            for item_filter in (None, ItemFilter(name="e")):
+                assert await item_service.get_items_paginated_json(server_realm_id, page, item_filter) == _dumps(
+                    await item_service.get_items_paginated(server_realm_id, page, item_filter)
+                )
+
+        override = orjson.loads(await item_service.get_items_json(realm_ids[1]))
+        assert [item["name"] for item in override if item["id"] == 1] == ["Linen Cloth (Old)"]
+    finally:
+        await auction_service.realm_events.close()
+        await db.disconnect()
+
+
+def test_postgres_renders_the_bytes_of_the_models(database_url: str) -> None:
+    asyncio.run(_check_rendering(database_url))
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+
+from lotkeeper.common.snapshot_prep import PreparedSnapshot, prepare_auction_data
+from lotkeeper.infra.db import DB
+from lotkeeper.infra.ingest_lock import RealmIngestLock
+from lotkeeper.infra.realm_events import RealmEventBroker
+from lotkeeper.models.auction import Auction, AuctionData
+from lotkeeper.models.item import Item
+from lotkeeper.models.server_realm import ServerRealmModel
+from lotkeeper.services.auction_service import AuctionService, IngestResult
+from lotkeeper.services.datapoint_service import DatapointService
+from lotkeeper.services.item_service import ItemService
+from lotkeeper.services.market_service import MarketService
+from lotkeeper.services.server_realm_service import ServerRealmService
+
+UNAVAILABLE_VALKEY_URL = "redis://127.0.0.1:1"  # the ingest only logs that the update was not published
+
+HERB = Item(
+    id=1,
+    name="Peacebloom",
+    link="",
+    icon="",
+    level=5,
+    quality=1,
+    max_stack_size=20,
+    vendor_price=0,
+    class_index=7,
+    class_name="Trade Goods",
+)
+
+
+def _snapshot(realm: str, prices: list[int]) -> PreparedSnapshot:
+    auctions = [Auction(item=HERB, unit_buyout_price=price, unit_starting_bid_price=1, quantity=1) for price in prices]
+    return prepare_auction_data(AuctionData(server="Test", realm=realm, auctions=auctions))
+
+
+def _auction_service(db: DB) -> AuctionService:
+    return AuctionService(
+        db,
+        DatapointService(db),
+        ItemService(db),
+        MarketService(db),
+        RealmEventBroker(db, UNAVAILABLE_VALKEY_URL, max_connections=1, socket_timeout=0.5),
+    )
+
+
+async def _get_last_snapshot_at(db: DB, server_realm_id: int) -> datetime | None:
+    async with db.get_session() as session:
+        query = select(ServerRealmModel.last_snapshot_at).where(ServerRealmModel.id == server_realm_id)
+        last_snapshot_at: datetime | None = (await session.execute(query)).scalar_one()
+        return last_snapshot_at
+
+
+async def _check_stale(database_url: str) -> None:
+    db = DB(database_url, replica_urls=[])
+    auction_service = _auction_service(db)
+    try:
+        server_realm_id = (await ServerRealmService(db).create_server_realm("Test", "Stale Ingest")).id
+        newer = datetime.now(UTC)
+
+        result = await auction_service.truncate_and_insert_auctions(
+            server_realm_id, _snapshot("Stale Ingest", [100, 200]), newer
+        )
+        assert result is IngestResult.APPLIED
+
+        # A snapshot that waited behind a newer one is dropped, the newer one stays
+        for timestamp in (newer - timedelta(minutes=1), newer):
+            result = await auction_service.truncate_and_insert_auctions(
+                server_realm_id, _snapshot("Stale Ingest", [300]), timestamp
+            )
+            assert result is IngestResult.STALE
+
+        auctions = await auction_service.get_auctions(server_realm_id)
+        assert sorted(auction.unit_buyout_price for auction in auctions) == [100, 200]
+        assert await _get_last_snapshot_at(db, server_realm_id) == newer
+        assert db.ingest_lock.metrics.stale == 2
+    finally:
+        await auction_service.realm_events.close()
+        await db.disconnect()
+
+
+async def _check_busy(database_url: str) -> None:
+    db = DB(database_url, replica_urls=[])
+    db.ingest_lock = RealmIngestLock(timeout=0.5, slow_wait_threshold=1.0)
+    auction_service = _auction_service(db)
+    try:
+        server_realm_service = ServerRealmService(db)
+        busy_realm_id = (await server_realm_service.create_server_realm("Test", "Busy Ingest")).id
+        other_realm_id = (await server_realm_service.create_server_realm("Test", "Other Ingest")).id
+
+        # An ingest of the realm on another worker holds the lock past the timeout
+        async with db.get_session() as session, session.begin():
+            assert await db.ingest_lock.acquire(session, busy_realm_id)
+
+            result = await auction_service.truncate_and_insert_auctions(
+                busy_realm_id, _snapshot("Busy Ingest", [100]), datetime.now(UTC)
+            )
+            assert result is IngestResult.BUSY
+            result = await auction_service.truncate_and_insert_auctions(
+                other_realm_id, _snapshot("Other Ingest", [100]), datetime.now(UTC)
+            )
+            assert result is IngestResult.APPLIED
+
+        assert await auction_service.get_auctions(busy_realm_id) == []
+        assert await _get_last_snapshot_at(db, busy_realm_id) is None
+        assert db.ingest_lock.metrics.timeouts == 1
+
+        # The lock ends with the transaction that held it
+        result = await auction_service.truncate_and_insert_auctions(
+            busy_realm_id, _snapshot("Busy Ingest", [100]), datetime.now(UTC)
+        )
+        assert result is IngestResult.APPLIED
+    finally:
+        await auction_service.realm_events.close()
+        await db.disconnect()
+
+
+def test_older_snapshot_is_stale(database_url: str) -> None:
+    asyncio.run(_check_stale(database_url))
+
+
+def test_locked_realm_is_busy(database_url: str) -> None:
+    asyncio.run(_check_busy(database_url))
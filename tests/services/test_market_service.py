@@ -0,0 +1,47 @@
+import datetime
+
+import pytest
+
+from lotkeeper.services.market_service import MAX_DEAL_RANK, _decode_deal_cursor, _encode_deal_cursor
+
+
+@pytest.mark.parametrize(
+    "snapshot_at",
+    [
+        datetime.datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=datetime.UTC),
+        datetime.datetime(2026, 3, 1, 12, 30, tzinfo=datetime.UTC),
+        datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC),
+    ],
+)
+@pytest.mark.parametrize("rank", [0, 1, 4711, MAX_DEAL_RANK])
+def test_deal_cursor_round_trip(snapshot_at: datetime.datetime, rank: int) -> None:
+    assert _decode_deal_cursor(_encode_deal_cursor(snapshot_at, rank)) == (snapshot_at, rank)
+
+
+def test_deal_cursor_keeps_the_instant() -> None:
+    snapshot_at = datetime.datetime(2026, 3, 1, 14, 0, 0, 500, tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+
+    decoded = _decode_deal_cursor(_encode_deal_cursor(snapshot_at, 3))
+
+    assert decoded == (snapshot_at, 3)
+    assert decoded[0].tzinfo == datetime.UTC
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        ".",
+        "abc",
+        "abc.",
+        ".1",
+        "xyz.1",
+        "1.xyz",
+        "1.-1",
+        f"1.{MAX_DEAL_RANK + 1:x}",
+        f"{'f' * 40}.1",  # beyond the supported dates
+        f"-{'f' * 20}.1",
+    ],
+)
+def test_malformed_deal_cursor(cursor: str) -> None:
+    assert _decode_deal_cursor(cursor) is None
@@ -0,0 +1,145 @@
+import asyncio
+import datetime
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from lotkeeper.infra.db import DB
+from lotkeeper.models.auction_item_hourly_rollup import AuctionItemHourlyRollupModel
+from lotkeeper.models.auction_item_snapshot import AuctionItemSnapshotModel
+from lotkeeper.models.base.timescale_db_model import TimescaleDbModel
+from lotkeeper.services.retention_service import RetentionRunResult, RetentionService, _hourly_rollup
+
+NOW = datetime.datetime(2026, 3, 1, 12, tzinfo=datetime.UTC)
+CUTOFFS: dict[type[TimescaleDbModel], datetime.datetime] = {
+    AuctionItemSnapshotModel: NOW - datetime.timedelta(days=90),
+    AuctionItemHourlyRollupModel: NOW - datetime.timedelta(days=180),
+}
+
+
+class FakeConnection:
+    """Answers the advisory lock queries of the retention run, the steps are replaced by the tests."""
+
+    def __init__(self, lock_available: bool):
+        self.lock_available = lock_available
+        self.statements: list[str] = []
+
+    async def execute(self, statement: Any, *args: Any) -> SimpleNamespace:
+        self.statements.append(str(statement))
+        return SimpleNamespace(scalar=lambda: self.lock_available)
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        self.statements.append("ROLLBACK")
+
+
+class Steps:
+    """Records the steps of a retention run in order, optionally failing one of them."""
+
+    def __init__(self, service: RetentionService, monkeypatch: pytest.MonkeyPatch, fail: str | None = None):
+        self.calls: list[tuple[Any, ...]] = []
+        self.fail = fail
+        # Later cutoffs on every call, a step that fetched its own cutoff would see a different one
+        self.cutoff_calls = 0
+
+        async def get_cutoff(conn: AsyncConnection, model: type[TimescaleDbModel]) -> datetime.datetime:
+            self.cutoff_calls += 1
+            return CUTOFFS[model] + datetime.timedelta(seconds=self.cutoff_calls)
+
+        async def backfill(conn: AsyncConnection, cutoff: datetime.datetime) -> int:
+            return self.record("backfill", cutoff)
+
+        async def rollup_pending_days(conn: AsyncConnection) -> int:
+            return self.record("rollup")
+
+        async def drop(conn: AsyncConnection, model: type[TimescaleDbModel], cutoff: datetime.datetime) -> int:
+            return self.record("drop", model, cutoff)
+
+        monkeypatch.setattr(service, "_get_cutoff", get_cutoff)
+        monkeypatch.setattr(service, "_backfill_hourly_rollups", backfill)
+        monkeypatch.setattr(service, "_rollup_pending_days", rollup_pending_days)
+        monkeypatch.setattr(service, "_drop_expired_chunks", drop)
+
+    def record(self, step: str, *args: Any) -> int:
+        self.calls.append((step, *args))
+        if step == self.fail:
+            raise RuntimeError(f"{step} failed")
+        return 1
+
+
+def _service(conn: FakeConnection) -> RetentionService:
+    @asynccontextmanager
+    async def connect() -> AsyncIterator[FakeConnection]:
+        yield conn
+
+    return RetentionService(cast(DB, SimpleNamespace(engine=SimpleNamespace(connect=connect))))
+
+
+def test_run_downsamples_before_dropping_with_the_same_cutoffs(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = FakeConnection(lock_available=True)
+    service = _service(conn)
+    steps = Steps(service, monkeypatch)
+
+    result = asyncio.run(service.run())
+
+    assert result == RetentionRunResult(
+        hourly_rollups_backfilled=1, daily_rollups_upserted=1, raw_chunks_dropped=1, hourly_chunks_dropped=1
+    )
+    raw_cutoff = CUTOFFS[AuctionItemSnapshotModel] + datetime.timedelta(seconds=1)
+    hourly_cutoff = CUTOFFS[AuctionItemHourlyRollupModel] + datetime.timedelta(seconds=2)
+    assert steps.calls == [
+        ("backfill", raw_cutoff),
+        ("rollup",),
+        ("drop", AuctionItemSnapshotModel, raw_cutoff),
+        ("drop", AuctionItemHourlyRollupModel, hourly_cutoff),
+    ]
+    assert "pg_advisory_unlock" in conn.statements[-1]
+
+
+@pytest.mark.parametrize("failing_step", ["backfill", "rollup"])
+def test_failed_downsampling_drops_nothing(monkeypatch: pytest.MonkeyPatch, failing_step: str) -> None:
+    conn = FakeConnection(lock_available=True)
+    service = _service(conn)
+    steps = Steps(service, monkeypatch, fail=failing_step)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.run())
+
+    assert "drop" not in [call[0] for call in steps.calls]
+    # Rolled back before the unlock, which would fail in an aborted transaction
+    assert conn.statements[-2] == "ROLLBACK"
+    assert "pg_advisory_unlock" in conn.statements[-1]
+
+
+def test_run_is_skipped_while_another_worker_runs_it(monkeypatch: pytest.MonkeyPatch) -> None:
+    conn = FakeConnection(lock_available=False)
+    service = _service(conn)
+    steps = Steps(service, monkeypatch)
+
+    assert asyncio.run(service.run()) is None
+    assert steps.calls == []
+    assert not any("pg_advisory_unlock" in statement for statement in conn.statements)
+
+
+def test_hourly_rollup_of_a_raw_snapshot() -> None:
+    bucket = NOW - datetime.timedelta(days=100)
+    row = SimpleNamespace(
+        server_realm_id=3, item_id=42, bucket=bucket, buyout_prices=[10, 11, 12, 13, 1000], quantities=[1, 2, 3, 4, 5]
+    )
+
+    assert _hourly_rollup(row) == {
+        "server_realm_id": 3,
+        "item_id": 42,
+        "bucket": bucket,
+        "min_buyout_price": 10,
+        "median_buyout_price": 12,
+        "total_quantity": 15,
+        "listing_count": 5,
+        "outlier_count": 1,
+    }